@@ -0,0 +1,67 @@
+# app/api/admin.py
+"""
+Endpoints HTTP de administración (fuera del esquema GraphQL).
+
+Se protegen con un token estático: la cabecera `Authorization: Bearer <token>` debe
+coincidir con `ADMIN_API_TOKEN`. Si la variable no está definida, los endpoints
+responden 404.
+"""
+import os
+import secrets
+from typing import Optional
+
+from bson import ObjectId
+from bson.errors import InvalidId
+from fastapi import APIRouter, Depends, Header, HTTPException, Query
+from fastapi.responses import StreamingResponse
+
+from app.services.export import DEFAULT_BATCH_SIZE, FORMATS, ExportUnavailable, arrow_schema, export_users
+
+router = APIRouter(prefix="/admin", tags=["admin"])
+
+MEDIA_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "arrow": "application/vnd.apache.arrow.stream",
+}
+
+
+async def require_admin(authorization: Optional[str] = Header(default=None)) -> None:
+    admin_token = os.getenv("ADMIN_API_TOKEN")
+    if not admin_token:
+        raise HTTPException(status_code=404, detail="Not Found")
+    scheme, _, token = (authorization or "").partition(" ")
+    if scheme.lower() != "bearer" or not secrets.compare_digest(token.encode(), admin_token.encode()):
+        raise HTTPException(status_code=401, detail="Invalid admin token")
+
+
+@router.get("/export/users", dependencies=[Depends(require_admin)])
+async def export_users_endpoint(
+    format: str = Query("ndjson", pattern=f"^({'|'.join(FORMATS)})$"),
+    after: Optional[str] = Query(None, description="Reanuda tras este _id"),
+    batch_size: int = Query(DEFAULT_BATCH_SIZE, ge=1, le=10_000),
+    limit: Optional[int] = Query(None, ge=1),
+) -> StreamingResponse:
+    """
+    Exporta los usuarios y sus cartas natales en streaming (NDJSON o Arrow IPC),
+    en orden de `_id`. Para reanudar, se pasa como `after` el último `id` recibido.
+    """
+    try:
+        after_id = ObjectId(after) if after else None
+    except InvalidId:
+        raise HTTPException(status_code=400, detail="after must be a valid ObjectId")
+    if format == "arrow":
+        try:
+            arrow_schema()
+        except ExportUnavailable as e:
+            raise HTTPException(status_code=501, detail=str(e))
+
+    async def body():
+        async for chunk in export_users(format, after_id, batch_size, limit):
+            yield chunk.data
+
+    extension = "ndjson" if format == "ndjson" else "arrows"
+    return StreamingResponse(
+        body(),
+        media_type=MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="users.{extension}"'},
+    )
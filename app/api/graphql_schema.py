@@ -6,6 +6,7 @@ Importa los tipos Query y Mutation y los une en el esquema de Strawberry.
 import strawberry
 from .queries import Query
 from .mutations import Mutation
+from .subscriptions import Subscription
 
 # Se crea y exporta el esquema final, limpio y sin lógica de negocio.
-schema = strawberry.Schema(query=Query, mutation=Mutation)
\ No newline at end of file
+schema = strawberry.Schema(query=Query, mutation=Mutation, subscription=Subscription)
\ No newline at end of file
@@ -0,0 +1,144 @@
+# app/api/graphql_view.py
+"""
+Vista ASGI de GraphQL con serialización rápida y respuestas comprimidas.
+
+- `GraphQLView` sustituye el `json.dumps` de Strawberry por `orjson`, que escribe
+  directamente bytes y entiende `date`, `time` y `datetime` (y `ObjectId` con
+  `_default`). En una página del feed con cartas natales es varias veces más rápido
+  (ver `python -m benchmarks.graphql_json`).
+- `CompressionMiddleware` comprime las respuestas completas de más de
+  `GRAPHQL_COMPRESSION_MIN_BYTES` con Brotli o gzip según `Accept-Encoding`. Brotli es
+  una dependencia opcional (`brotli`); sin ella sólo se ofrece gzip.
+"""
+import asyncio
+import gzip
+import os
+from typing import Any, Dict, List, Optional, Tuple
+
+import orjson
+from bson import ObjectId
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from strawberry.asgi import GraphQL
+
+try:
+    import brotli
+except ImportError:  # Dependencia opcional, sólo para `Content-Encoding: br`
+    brotli = None
+
+GRAPHQL_COMPRESSION = os.getenv("GRAPHQL_COMPRESSION", "true").lower() == "true"
+GRAPHQL_COMPRESSION_MIN_BYTES = int(os.getenv("GRAPHQL_COMPRESSION_MIN_BYTES", "1024"))
+# Niveles bajos: en una página del feed (~300 KB) reducen casi tanto como los
+# habituales (~46 KB frente a ~44 KB) en unos 4 ms en lugar de 6-7
+GZIP_LEVEL = 4
+BROTLI_QUALITY = 4
+# A partir de aquí se comprime en un hilo (zlib y brotli sueltan el GIL) para no
+# bloquear el bucle de eventos
+OFFLOAD_MIN_BYTES = 64 * 1024
+
+COMPRESSIBLE_TYPES = ("application/json", "application/graphql-response+json")
+
+
+def _default(value: Any) -> Any:
+    if isinstance(value, ObjectId):
+        return str(value)
+    raise TypeError(f"Type is not JSON serializable: {type(value).__name__}")
+
+
+def dumps(data: Any) -> bytes:
+    return orjson.dumps(data, default=_default)
+
+
+class GraphQLView(GraphQL):
+    def encode_json(self, response_data) -> bytes:  # Strawberry la anota como str
+        return dumps(response_data)
+
+
+def supported_encodings() -> List[str]:
+    return ["br", "gzip"] if brotli is not None else ["gzip"]
+
+
+def negotiate_encoding(accept_encoding: str) -> Optional[str]:
+    """La codificación soportada con mayor `q` en `Accept-Encoding` (a igualdad, br)."""
+    weights: Dict[str, float] = {}
+    for part in accept_encoding.split(","):
+        name, _, params = part.strip().partition(";")
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                continue
+        if name:
+            weights[name.strip().lower()] = q
+    best: Optional[Tuple[float, str]] = None
+    for encoding in supported_encodings():
+        q = weights.get(encoding, weights.get("*", 0.0))
+        if q > 0 and (best is None or q > best[0]):
+            best = (q, encoding)
+    return best[1] if best else None
+
+
+def compress(body: bytes, encoding: str) -> bytes:
+    if encoding == "br":
+        return brotli.compress(body, quality=BROTLI_QUALITY)
+    return gzip.compress(body, compresslevel=GZIP_LEVEL)
+
+
+class CompressionMiddleware:
+    """
+    Comprime las respuestas JSON enviadas en un solo mensaje (las de GraphQL). Las
+    respuestas en streaming y los websockets pasan sin tocar.
+    """
+
+    def __init__(self, app: ASGIApp, minimum_size: int = GRAPHQL_COMPRESSION_MIN_BYTES):
+        self.app = app
+        self.minimum_size = minimum_size
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        encoding = negotiate_encoding(Headers(scope=scope).get("accept-encoding", ""))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start: Optional[Message] = None
+        passthrough = False
+
+        async def send_compressed(message: Message) -> None:
+            nonlocal start, passthrough
+            if passthrough:
+                await send(message)
+                return
+            if message["type"] == "http.response.start":
+                start = message
+                return
+
+            headers = MutableHeaders(raw=start["headers"])
+            body = message.get("body", b"")
+            content_type = headers.get("content-type", "").split(";")[0].strip()
+            passthrough = True
+            if (
+                message.get("more_body", False)
+                or "content-encoding" in headers
+                or content_type not in COMPRESSIBLE_TYPES
+                or len(body) < self.minimum_size
+            ):
+                await send(start)
+                await send(message)
+                return
+
+            if len(body) >= OFFLOAD_MIN_BYTES:
+                body = await asyncio.to_thread(compress, body, encoding)
+            else:
+                body = compress(body, encoding)
+            headers["content-encoding"] = encoding
+            headers["content-length"] = str(len(body))
+            headers.add_vary_header("Accept-Encoding")
+            await send(start)
+            await send({"type": "http.response.body", "body": body})
+
+        await self.app(scope, receive, send_compressed)
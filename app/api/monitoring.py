@@ -0,0 +1,62 @@
+# app/api/monitoring.py
+"""
+Endpoints HTTP de observabilidad (fuera del esquema GraphQL).
+"""
+import asyncio
+import os
+
+from fastapi import APIRouter
+from fastapi.responses import JSONResponse
+from starlette.requests import Request
+
+from app.db.client import ping_mongo, ping_redis, pool_stats
+from app.monitoring import get_loop_monitor
+from app.services import candidate_index
+
+router = APIRouter(tags=["monitoring"])
+
+
+@router.get("/metrics/loop-lag")
+async def loop_lag() -> JSONResponse:
+    """Percentiles de latencia del event loop y bloqueos detectados recientemente."""
+    monitor = get_loop_monitor()
+    if monitor is None:
+        return JSONResponse(status_code=404, content={"detail": "Loop monitor disabled"})
+    return JSONResponse(content=monitor.stats())
+
+
+@router.get("/health/live")
+async def liveness() -> JSONResponse:
+    """El proceso está vivo y su event loop atiende peticiones."""
+    return JSONResponse(content={"status": "ok"})
+
+
+@router.get("/health/ready")
+async def readiness(request: Request) -> JSONResponse:
+    """Comprueba MongoDB y Redis; responde 503 si alguno no está disponible o si el proceso drena."""
+    drain = getattr(request.app.state, "drain", None)
+    if drain is not None and drain.draining:  # Apagándose: que el balanceador deje de enviar tráfico
+        return JSONResponse(status_code=503, content={"status": "draining", **drain.stats()})
+    timeout = float(os.getenv("HEALTH_CHECK_TIMEOUT_S", "2"))
+    results = await asyncio.gather(ping_mongo(timeout), ping_redis(timeout), return_exceptions=True)
+    checks = {
+        name: "ok" if result is None else f"error: {type(result).__name__}: {result}"
+        for name, result in zip(("mongo", "redis"), results)
+    }
+    ready = all(status == "ok" for status in checks.values())
+    return JSONResponse(
+        status_code=200 if ready else 503,
+        content={"status": "ready" if ready else "unavailable", "checks": checks},
+    )
+
+
+@router.get("/metrics/pools")
+async def pools() -> JSONResponse:
+    """Utilización de los pools de conexiones de MongoDB y Redis."""
+    return JSONResponse(content=pool_stats())
+
+
+@router.get("/metrics/candidate-index")
+async def candidate_index_stats() -> JSONResponse:
+    """Tamaño y estado del índice de candidatos del feed en este proceso."""
+    return JSONResponse(content=candidate_index.index.stats())
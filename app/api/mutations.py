@@ -13,7 +13,7 @@ from .types import (
     AddPhotosInput,
     User,
 )
-from .resolvers.user_resolvers import UserMutations, update_profile_resolver
+from .resolvers.user_resolvers import UserMutations, update_location_resolver, update_profile_resolver
 from .resolvers.match_resolvers import MatchMutations
 from app.services.profile import add_photos_to_user
 
@@ -78,6 +78,11 @@ class ProfileMutations:
             spirituality=spirituality,
         )
 
+    @strawberry.mutation
+    async def update_location(self, info: Info, latitude: float, longitude: float) -> User:
+        """Actualiza la ubicación actual del usuario (usada por el feed por cercanía)."""
+        return await update_location_resolver(info=info, latitude=latitude, longitude=longitude)
+
 
 @strawberry.type
 class Mutation(UserMutations, MatchMutations, PhotoMutations, ProfileMutations):
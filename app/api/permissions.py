@@ -0,0 +1,71 @@
+# app/api/permissions.py
+"""
+Permisos de Strawberry que aplican límites de frecuencia a las mutaciones caras.
+
+Cada permiso consume un token del cubo de la IP cliente y otro del cubo del email
+objetivo (ver `app.services.rate_limit`). Los límites se configuran con variables de
+entorno en formato `"<capacidad>/<segundos>"`.
+"""
+import math
+import os
+from typing import Any, Optional
+
+from strawberry.permission import BasePermission
+from strawberry.types import Info
+
+from app.models.user import normalize_email
+from app.services.rate_limit import RateLimit, hit_all
+
+RATE_LIMIT_ENABLED = os.getenv("RATE_LIMIT_ENABLED", "true").lower() in {"1", "true", "yes", "on"}
+# Solo detrás de un proxy de confianza tiene sentido leer X-Forwarded-For
+RATE_LIMIT_TRUST_PROXY = os.getenv("RATE_LIMIT_TRUST_PROXY", "false").lower() in {"1", "true", "yes", "on"}
+
+LOGIN_PER_IP = RateLimit.parse(os.getenv("RATE_LIMIT_LOGIN_PER_IP", "20/60"))
+LOGIN_PER_EMAIL = RateLimit.parse(os.getenv("RATE_LIMIT_LOGIN_PER_EMAIL", "5/300"))
+SIGNUP_PER_IP = RateLimit.parse(os.getenv("RATE_LIMIT_SIGNUP_PER_IP", "10/3600"))
+SIGNUP_PER_EMAIL = RateLimit.parse(os.getenv("RATE_LIMIT_SIGNUP_PER_EMAIL", "3/3600"))
+
+
+def client_ip(info: Info) -> str:
+    """IP del cliente que originó la petición."""
+    request = info.context["request"]
+    if RATE_LIMIT_TRUST_PROXY:
+        if forwarded := request.headers.get("X-Forwarded-For"):
+            return forwarded.split(",")[0].strip()
+    return request.client.host if request.client else "unknown"
+
+
+class _MutationRateLimit(BasePermission):
+    """Base: limita por IP y por el email del argumento `input_argument`."""
+    scope: str
+    input_argument: str
+    per_ip: RateLimit
+    per_email: RateLimit
+    message: Optional[str] = "Too many requests"
+
+    async def has_permission(self, source: Any, info: Info, **kwargs: Any) -> bool:
+        if not RATE_LIMIT_ENABLED:
+            return True
+        email = normalize_email(getattr(kwargs.get(self.input_argument), "email", ""))
+        result = await hit_all((
+            (f"{self.scope}:ip:{client_ip(info)}", self.per_ip),
+            (f"{self.scope}:email:{email}", self.per_email),
+        ))
+        if not result.allowed:
+            # Mensaje propio de cada rechazo: `message` es un atributo de la clase
+            raise PermissionError(f"{self.message}, retry in {math.ceil(result.retry_after)} seconds")
+        return True
+
+
+class LoginRateLimit(_MutationRateLimit):
+    scope = "login"
+    input_argument = "login_input"
+    per_ip = LOGIN_PER_IP
+    per_email = LOGIN_PER_EMAIL
+
+
+class SignUpRateLimit(_MutationRateLimit):
+    scope = "signup"
+    input_argument = "signup_input"
+    per_ip = SIGNUP_PER_IP
+    per_email = SIGNUP_PER_EMAIL
@@ -0,0 +1,62 @@
+# app/api/photos.py
+"""
+Subida de fotos por HTTP (fuera del esquema GraphQL, que no transporta ficheros).
+
+    curl -H "Authorization: Bearer <jwt>" -F file=@foto.jpg -F sign=Leo http://localhost:8000/photos
+"""
+from fastapi import APIRouter
+from fastapi.responses import JSONResponse
+from starlette.requests import Request
+
+from app.api.exceptions import AuthenticationError
+from app.api.types import ZodiacSign
+from app.auth.jwt import get_current_user_from_request
+from app.services.image_processing import InvalidImage
+from app.services.photos import UploadError, add_uploaded_photo, receive_upload
+
+router = APIRouter(tags=["photos"])
+
+
+def _public_photo(photo: dict) -> dict:
+    return {
+        "id": photo["id"],
+        "url": photo["url"],
+        "sign": photo.get("sign"),
+        "width": photo["width"],
+        "height": photo["height"],
+        "variants": [
+            {key: variant[key] for key in ("name", "width", "height", "url")}
+            for variant in photo["variants"]
+        ],
+    }
+
+
+@router.post("/photos", status_code=201)
+async def upload_photo(request: Request) -> JSONResponse:
+    """
+    Recibe una imagen (`multipart/form-data`, campo `file`; `sign` opcional) y la
+    añade a las fotos del usuario autenticado con sus variantes redimensionadas.
+    """
+    try:
+        user = await get_current_user_from_request(request)
+    except AuthenticationError as e:
+        return JSONResponse(status_code=401, content={"detail": e.message})
+
+    try:
+        upload = await receive_upload(request)
+    except UploadError as e:
+        return JSONResponse(status_code=e.status_code, content={"detail": str(e)})
+
+    try:
+        sign = upload.fields.get("sign") or None
+        if sign is not None and sign not in ZodiacSign.__members__:
+            return JSONResponse(status_code=400, content={"detail": f"Invalid sign {sign!r}"})
+        photo = await add_uploaded_photo(user, upload, sign)
+    except InvalidImage:
+        return JSONResponse(status_code=415, content={"detail": "Unsupported or corrupt image"})
+    except UploadError as e:
+        return JSONResponse(status_code=e.status_code, content={"detail": str(e)})
+    finally:
+        upload.cleanup()
+
+    return JSONResponse(status_code=201, content=_public_photo(photo))
@@ -1,89 +1,129 @@
 # app/api/queries.py
 
-from datetime import datetime, time
-from typing import List
+from typing import List, Optional
 import strawberry
+from strawberry.types import Info
 
-from app.db.client import get_mongo_db
+from app.auth.jwt import get_current_user_from_token
+from app.services import candidate_index, inbox, like_filter
+from app.services.feed import build_feed_filters, find_feed_candidates, find_indexed_candidates, geo_point
 from .types import (
-    User, Photo, ZodiacSign, NatalChartType, AstrologicalPositionType,
-    CompatibilityBreakdown, UserInfo, Gender, SexualOrientation,
-    Children, CommunicationStyle, Pets, Drinking, Smoking,
-    Fitness, Dietary, Sleeping, Politics, Spirituality, LookingFor,
+    User, ZodiacSign, CompatibilityBreakdown, Gender, SexualOrientation, LookingFor, GeoPointInput,
+    Element, MatchConnection, MatchEdge, PageInfo,
 )
+from .resolvers.user_resolvers import build_user_object
+from .views import MatchView
 
 
-def build_natal_chart(natal_chart_data) -> NatalChartType | None:
-    if not natal_chart_data:
+def feed_exclusion(user_id=None, liked=None, signs=None, elements=None):
+    """
+    Predicado para descartar candidatos en memoria: el propio usuario, los que ya
+    tienen su like y, sin índice de candidatos, los de otro signo o elemento.
+    """
+    if user_id is None and liked is None and not signs and not elements:
         return None
-    return NatalChartType(
-        positions=[AstrologicalPositionType(**pos) for pos in natal_chart_data.get("positions", [])],
-        houses=[AstrologicalPositionType(**house) for house in natal_chart_data.get("houses", [])],
-    )
 
+    def exclude(doc: dict) -> bool:
+        if doc["_id"] == user_id or (liked is not None and str(doc["_id"]) in liked):
+            return True
+        if signs or elements:
+            facets = dict(candidate_index.facets_of(doc))
+            if signs and facets.get("sign") not in signs:
+                return True
+            if elements and facets.get("element") not in elements:
+                return True
+        return False
 
-def build_user_info(user_info_data: dict) -> UserInfo:
-    return UserInfo(
-        height=user_info_data.get("height"),
-        weight=user_info_data.get("weight"),
-        school=user_info_data.get("school"),
-        languages=user_info_data.get("languages"),
-        interests=user_info_data.get("interests"),
-        education=user_info_data.get("education"),
-        children=Children(user_info_data.get("children")) if user_info_data.get("children") is not None else None,
-        communication_style=CommunicationStyle(user_info_data.get("communication_style")) if user_info_data.get("communication_style") is not None else None,
-        pets=Pets(user_info_data.get("pets")) if user_info_data.get("pets") is not None else None,
-        drinking=Drinking(user_info_data.get("drinking")) if user_info_data.get("drinking") is not None else None,
-        smoking=Smoking(user_info_data.get("smoking")) if user_info_data.get("smoking") is not None else None,
-        fitness=Fitness(user_info_data.get("fitness")) if user_info_data.get("fitness") is not None else None,
-        dietary=Dietary(user_info_data.get("dietary")) if user_info_data.get("dietary") is not None else None,
-        sleeping=Sleeping(user_info_data.get("sleeping")) if user_info_data.get("sleeping") is not None else None,
-        politics=Politics(user_info_data.get("politics")) if user_info_data.get("politics") is not None else None,
-        spirituality=Spirituality(user_info_data.get("spirituality")) if user_info_data.get("spirituality") is not None else None,
-    )
+    return exclude
 
 
-def build_user(doc) -> User:
-    natal_chart = build_natal_chart(doc.get("natal_chart"))
-    user_info = build_user_info(doc.get("user_info", {}) or {})
+@strawberry.type
+class Query:
+    @strawberry.field(name="feed")
+    async def get_feed(
+        self,
+        info: Info,
+        near: Optional[GeoPointInput] = None,
+        max_distance_km: Optional[float] = None,
+        gender: Optional[Gender] = None,
+        looking_for: Optional[LookingFor] = None,
+        sexual_orientation: Optional[List[SexualOrientation]] = None,
+        sun_signs: Optional[List[ZodiacSign]] = None,
+        elements: Optional[List[Element]] = None,
+        first: Optional[int] = None,
+    ) -> List[User]:
+        """
+        Candidatos del feed. Con `near`, ordenados por distancia y limitados a
+        `max_distance_km`; los filtros de género y tipo de relación se combinan con
+        la búsqueda geoespacial en el mismo índice.
 
-    birth_dt = doc.get("birth_date")
-    birth_t_str = doc.get("birth_time")
-    birth_date_obj = birth_dt.date() if isinstance(birth_dt, datetime) else birth_dt
-    birth_time_obj = time.fromisoformat(birth_t_str) if isinstance(birth_t_str, str) else birth_t_str
+        Sin `near`, los filtros se resuelven con los bitmaps del índice de
+        candidatos (`app.services.candidate_index`) cuando está cargado.
 
-    return User(
-        id=str(doc["_id"]),
-        email=doc.get("email"),
-        birth_date=birth_date_obj,
-        birth_time=birth_time_obj,
-        birth_place=doc.get("birth_place"),
-        latitude=doc.get("latitude"),
-        longitude=doc.get("longitude"),
-        timezone=doc.get("timezone"),
-        natal_chart=natal_chart,
-        photos=[
-            Photo(
-                url=p.get("url"),
-                sign=ZodiacSign[p.get("sign")] if p.get("sign") else None,
-            )
-            for p in doc.get("photos", [])
-        ],
-        gender=Gender(doc["gender"]),
-        looking_for=LookingFor(doc["looking_for"]),
-        sexual_orientation=[SexualOrientation(so) for so in doc.get("sexual_orientation", [])],
-        user_info=user_info,
-    )
+        Con sesión iniciada se omiten el propio usuario y aquellos a los que ya ha
+        dado like (según su filtro de Bloom, sin consultar `likes`).
+        """
+        orientations = [o.value for o in sexual_orientation or []]
+        signs = {s.value for s in sun_signs or []}
+        element_values = {e.value for e in elements or []}
 
+        current_user, liked = None, None
+        if info.context["request"].headers.get("Authorization"):
+            current_user = await get_current_user_from_token(info)
+            liked = await like_filter.load_filter(str(current_user["_id"]))
 
-@strawberry.type
-class Query:
-    @strawberry.field(name="feed")
-    async def get_feed(self) -> List[User]:
-        db = get_mongo_db()
-        users_collection = db.get_collection("users")
-        cursor = users_collection.find({})
-        return [build_user(doc) async for doc in cursor]
+        index = candidate_index.index
+        if near is None and index.ready:
+            own_ordinal = current_user.get("ordinal") if current_user else None
+            bitmap = index.candidates(
+                gender=gender.value if gender else None,
+                looking_for=looking_for.value if looking_for else None,
+                orientations=orientations,
+                signs=signs,
+                elements=element_values,
+                exclude=1 << own_ordinal if own_ordinal is not None else 0,
+            )
+            docs = find_indexed_candidates(
+                index.ordinals(bitmap),
+                index.ids,
+                limit=first,
+                exclude=feed_exclusion(liked=liked),
+            )
+        else:
+            filters = build_feed_filters(
+                gender=gender.value if gender else None,
+                looking_for=looking_for.value if looking_for else None,
+                sexual_orientation=orientations,
+            )
+            docs = find_feed_candidates(
+                filters,
+                near=geo_point(near.latitude, near.longitude) if near else None,
+                max_distance_km=max_distance_km,
+                limit=first,
+                exclude=feed_exclusion(
+                    current_user["_id"] if current_user else None, liked, signs, element_values
+                ),
+            )
+        return [build_user_object(doc) async for doc in docs]
+
+    @strawberry.field
+    async def my_matches(
+        self, info: Info, first: int = 20, after: Optional[str] = None
+    ) -> MatchConnection:
+        """
+        Matches del usuario autenticado, del más al menos reciente. Cada página es
+        una sola consulta indexada sobre su bandeja (`inbox_entries`).
+        """
+        current_user = await get_current_user_from_token(info)
+        entries, has_next_page = await inbox.list_inbox(str(current_user["_id"]), first, after)
+        edges = [MatchEdge(cursor=inbox.encode_cursor(e), node=MatchView(e)) for e in entries]
+        return MatchConnection(
+            edges=edges,
+            page_info=PageInfo(
+                has_next_page=has_next_page,
+                end_cursor=edges[-1].cursor if edges else None,
+            ),
+        )
 
     @strawberry.field
     def get_compatibility(self, user_id: strawberry.ID) -> CompatibilityBreakdown:
@@ -1,13 +1,18 @@
 # app/api/resolvers/match_resolvers.py
 
+import logging
 from datetime import datetime, timezone
 import strawberry
+from bson import ObjectId
 from strawberry.types import Info
 
 from app.db.client import get_mongo_db
+from app.services import couple_charts, feed_stream, inbox, like_filter
 from ..types import LikeResponse, LikeInput
 from .user_resolvers import get_current_user # <-- Esta importación es segura gracias a la nueva estructura
 
+logger = logging.getLogger(__name__)
+
 @strawberry.type
 class MatchMutations:
     """
@@ -16,6 +21,8 @@ class MatchMutations:
     @strawberry.mutation
     async def like_user(self, info: Info, input_data: LikeInput) -> LikeResponse:
         """Registra un 'like' y comprueba si hay un 'match'."""
+        if not ObjectId.is_valid(str(input_data.target_user_id)):
+            raise ValueError("Invalid target user id")
         db = get_mongo_db()
         likes_collection = db.get_collection("likes")
         
@@ -30,16 +37,44 @@ class MatchMutations:
             "created_at": datetime.now(timezone.utc)
         })
 
-        # Comprobamos si el like es recíproco para crear un 'match'
-        reciprocal = await likes_collection.find_one({
-            "user_id": str(input_data.target_user_id),
-            "target_user_id": str(user_id),
-        })
-        if reciprocal:
-            await db.get_collection("matches").insert_one({
+        # Comprobamos si el like es recíproco para crear un 'match'. El filtro de
+        # Bloom descarta sin tocar MongoDB la mayoría de likes no correspondidos
+        maybe_reciprocal = await like_filter.record_like(str(user_id), str(input_data.target_user_id))
+        reciprocal = None
+        if maybe_reciprocal is not False:
+            reciprocal = await likes_collection.find_one({
+                "user_id": str(input_data.target_user_id),
+                "target_user_id": str(user_id),
+            })
+        matched = bool(reciprocal)
+        if matched:
+            matched_at = datetime.now(timezone.utc)
+            match = await db.get_collection("matches").insert_one({
                 "users": [str(user_id), str(input_data.target_user_id)],
-                "created_at": datetime.now(timezone.utc),
+                "created_at": matched_at,
             })
-            return LikeResponse(matched=True)
+            # Bandeja desnormalizada de ambos: `myMatches` no vuelve a leer `users`
+            users = await db.get_collection("users").find(
+                {"_id": {"$in": [ObjectId(user_id), ObjectId(input_data.target_user_id)]}},
+                inbox.SUMMARY_PROJECTION,
+            ).to_list(length=2)
+            if len(users) == 2:
+                await inbox.record_match(users[0], users[1], match.inserted_id, matched_at)
+            # Las cartas de pareja se calculan en el worker para servir `coupleCharts` ya
+            # hechas; si no se puede encolar, `coupleCharts` las calcula al pedirlas
+            try:
+                await couple_charts.enqueue_couple_charts(match.inserted_id)
+            except Exception as e:
+                logger.warning("Could not enqueue couple charts for match %s: %s", match.inserted_id, e)
 
-        return LikeResponse(matched=False)
\ No newline at end of file
+        # Avanza el mazo de `feedStream` si el usuario tiene uno abierto (lo último: si
+        # Redis falla, el like y el match ya están guardados)
+        await feed_stream.publish_swipe(user_id, input_data.target_user_id, liked=True)
+        return LikeResponse(matched=matched)
+
+    @strawberry.mutation
+    async def pass_user(self, info: Info, target_user_id: strawberry.ID) -> bool:
+        """Descarta un candidato del feed: `feedStream` envía el siguiente."""
+        current_user = await get_current_user(info)
+        await feed_stream.publish_swipe(current_user.id, target_user_id, liked=False)
+        return True
\ No newline at end of file
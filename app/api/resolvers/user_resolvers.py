@@ -1,162 +1,151 @@
+import asyncio
+import hashlib
+import logging
 from datetime import datetime, time, timezone
 import strawberry
 from strawberry.types import Info
-from bson import ObjectId
+from pydantic import ValidationError
+from pymongo import ReturnDocument
 
 from app.db.client import get_mongo_db
-from app.models.user import UserModel
-from app.auth.jwt import create_access_token, get_current_user_from_token
-from app.services.astrology_service import calculate_natal_chart
+from app.models.user import Credentials, UserModel, email_adapter, normalize_email
+from app.auth.jwt import create_access_token, get_current_user_from_token, get_token_subject
+from app.services import candidate_index
+from app.services.chart_jobs import CHART_PENDING, enqueue_chart_calculation
+from app.services.feed import geo_point
+from app.services.singleflight import SingleFlight
+from ..permissions import LoginRateLimit, SignUpRateLimit
 from ..types import (
-    User,
     AuthPayload,
     SignUpInput,
     LoginInput,
-    Photo,
-    ZodiacSign,
-    NatalChartType,
-    AstrologicalPositionType,
-    UserInfo,
-    Gender,
-    SexualOrientation,
-    Children,
-    CommunicationStyle,
-    Pets,
-    Drinking,
-    Smoking,
-    Fitness,
-    Dietary,
-    Sleeping,
-    Politics,
-    Spirituality,
-    LookingFor,
 )
+from ..views import UserView
 from ..exceptions import (
+    AuthenticationError,
     UserAlreadyExistsError,
     InvalidCredentialsError,
-    AstrologicalCalculationError,
 )
 
+logger = logging.getLogger(__name__)
+
+# Coalescen envíos concurrentes idénticos (p. ej. doble clic en "registrarse")
+signup_flight = SingleFlight()
+login_flight = SingleFlight()
+
+
+# Campos que necesita `build_user_object`: nunca se devuelve el hash de la contraseña
+USER_PROJECTION = {"password_hash": 0}
+
+
+def _request_key(*parts) -> str:
+    """Clave de coalescencia; se hashea para no retener contraseñas en claro."""
+    return hashlib.sha256("\x1f".join(map(str, parts)).encode()).hexdigest()
+
 
 @strawberry.type
 class UserMutations:
-    @strawberry.mutation
+    @strawberry.mutation(permission_classes=[SignUpRateLimit])
     async def sign_up(self, signup_input: SignUpInput) -> AuthPayload:
-        db = get_mongo_db()
-        users_collection = db.get_collection("users")
-        if await users_collection.find_one({"email": signup_input.email}):
-            raise UserAlreadyExistsError("User with this email already exists")
-
-        birth_datetime = datetime.combine(signup_input.birth_date, signup_input.birth_time)
-        try:
-            natal_chart, latitude, longitude, timezone_name = await calculate_natal_chart(
-                birth_datetime, signup_input.birth_place
-            )
-        except ValueError as e:
-            raise AstrologicalCalculationError(f"Could not process astrological data: {e}") from e
-
-        user_data_to_insert = {
-            "email": signup_input.email,
-            "password_hash": UserModel.hash_password(signup_input.password),
-            "birth_date": datetime.combine(signup_input.birth_date, time.min),
-            "birth_time": signup_input.birth_time.isoformat(),
-            "birth_place": signup_input.birth_place,
-            "latitude": latitude,
-            "longitude": longitude,
-            "timezone": timezone_name,
-            "natal_chart": natal_chart.dict(),
-            "plan": "free",
-            "photos": [],
-            "gender": signup_input.gender.value,
-            "looking_for": signup_input.looking_for.value,
-            "sexual_orientation": [],
-            "user_info": None,
-            "created_at": datetime.now(timezone.utc),
-            "updated_at": datetime.now(timezone.utc),
-        }
-
-        result = await users_collection.insert_one(user_data_to_insert)
-
-        user = build_user_object(user_data_to_insert | {"_id": result.inserted_id})
-        token = create_access_token(signup_input.email)
-        return AuthPayload(token=token, user=user)
-
-    @strawberry.mutation
+        key = _request_key(
+            normalize_email(signup_input.email),
+            signup_input.password,
+            signup_input.birth_date,
+            signup_input.birth_time,
+            signup_input.birth_place,
+            signup_input.gender,
+            signup_input.looking_for,
+        )
+        return await signup_flight.do(key, register_user, signup_input)
+
+    @strawberry.mutation(permission_classes=[LoginRateLimit])
     async def login(self, login_input: LoginInput) -> AuthPayload:
-        user_data = await fetch_user_data(login_input.email)
-        if not user_data:
-            raise InvalidCredentialsError("Invalid credentials")
+        key = _request_key(normalize_email(login_input.email), login_input.password)
+        return await login_flight.do(key, authenticate_user, login_input)
+
+
+async def register_user(signup_input: SignUpInput) -> AuthPayload:
+    db = get_mongo_db()
+    users_collection = db.get_collection("users")
+    email = normalize_email(signup_input.email)
+    # También la forma original: cuentas anteriores a la normalización
+    if await users_collection.find_one({"email": {"$in": [email, signup_input.email]}}):
+        raise UserAlreadyExistsError("User with this email already exists")
+
+    # bcrypt bloquearía el bucle de eventos durante cientos de ms
+    password_hash = await asyncio.to_thread(UserModel.hash_password, signup_input.password)
+    # La geocodificación y la carta natal se calculan en el worker (ver chart_jobs)
+    user_data_to_insert = {
+        "email": email,
+        "password_hash": password_hash,
+        "birth_date": datetime.combine(signup_input.birth_date, time.min),
+        "birth_time": signup_input.birth_time.isoformat(),
+        "birth_place": signup_input.birth_place,
+        "latitude": None,
+        "longitude": None,
+        "timezone": None,
+        "natal_chart": None,
+        "chart_status": CHART_PENDING,
+        "plan": "free",
+        "photos": [],
+        "gender": signup_input.gender.value,
+        "looking_for": signup_input.looking_for.value,
+        "sexual_orientation": [],
+        "user_info": {},
+        "ordinal": (await candidate_index.allocate_ordinals(1)).start,
+        "created_at": datetime.now(timezone.utc),
+        "updated_at": datetime.now(timezone.utc),
+    }
+
+    result = await users_collection.insert_one(user_data_to_insert)
+    try:
+        await enqueue_chart_calculation(result.inserted_id)
+    except Exception as e:
+        # El usuario ya existe: su carta queda `pending` y el barrido del worker la
+        # vuelve a encolar (ver `chart_jobs.requeue_pending_charts`)
+        logger.warning("Could not enqueue natal chart of %s: %s", result.inserted_id, e)
+
+    user = build_user_object(user_data_to_insert | {"_id": result.inserted_id})
+    token = create_access_token(email)
+    return AuthPayload(token=token, user=user)
+
+
+async def authenticate_user(login_input: LoginInput) -> AuthPayload:
+    try:
+        email_adapter.validate_python(login_input.email)
+    except ValidationError:
+        raise InvalidCredentialsError("Invalid credentials")
 
-        user_model = UserModel(**user_data)
-        if not user_model.verify_password(login_input.password):
-            raise InvalidCredentialsError("Invalid credentials")
+    user_data = await fetch_user_data(login_input.email)
+    if not user_data:
+        raise InvalidCredentialsError("Invalid credentials")
 
-        user = build_user_object(user_data)
-        token = create_access_token(user_model.email)
-        return AuthPayload(token=token, user=user)
+    # Sólo se comprueba la contraseña: el resto del documento no se valida
+    credentials = Credentials.from_document(user_data)
+    if not await credentials.verify_password_async(login_input.password):
+        raise InvalidCredentialsError("Invalid credentials")
+
+    user = build_user_object(user_data)
+    token = create_access_token(credentials.email)
+    return AuthPayload(token=token, user=user)
 
 
 async def fetch_user_data(email: str) -> dict:
     db = get_mongo_db()
     users_collection = db.get_collection("users")
-    return await users_collection.find_one({"email": email})
-
-
-def build_user_object(user_data: dict) -> User:
-    natal_chart_obj = build_natal_chart(user_data.get("natal_chart"))
-    user_info_obj = build_user_info(user_data.get("user_info"))
-
-    return User(
-        id=str(user_data["_id"]),
-        email=user_data["email"],
-        birth_date=user_data["birth_date"].date() if isinstance(user_data["birth_date"], datetime) else user_data["birth_date"],
-        birth_time=time.fromisoformat(user_data["birth_time"]) if isinstance(user_data["birth_time"], str) else user_data["birth_time"],
-        birth_place=user_data["birth_place"],
-        latitude=user_data.get("latitude"),
-        longitude=user_data.get("longitude"),
-        timezone=user_data.get("timezone"),
-        photos=[Photo(url=p["url"], sign=ZodiacSign[p["sign"]]) for p in user_data.get("photos", []) if p.get("sign")],
-        natal_chart=natal_chart_obj,
-        gender=Gender(user_data["gender"]),
-        looking_for=LookingFor(user_data["looking_for"]),
-        sexual_orientation=[SexualOrientation(so) for so in user_data.get("sexual_orientation", [])],
-        user_info=user_info_obj,
-    )
-
-
-def build_natal_chart(chart: dict) -> NatalChartType | None:
-    if not chart:
-        return None
-    return NatalChartType(
-        positions=[AstrologicalPositionType(**p) for p in chart.get("positions", [])],
-        houses=[AstrologicalPositionType(**h) for h in chart.get("houses", [])],
-    )
+    user_data = await users_collection.find_one({"email": normalize_email(email)})
+    if user_data is None and email != normalize_email(email):
+        # Cuentas anteriores a la normalización, guardadas tal cual se escribieron
+        user_data = await users_collection.find_one({"email": email})
+    return user_data
 
 
-def build_user_info(info: dict) -> UserInfo | None:
-    if not info:
-        return None
-    return UserInfo(
-        height=info.get("height"),
-        weight=info.get("weight"),
-        school=info.get("school"),
-        languages=info.get("languages"),
-        interests=info.get("interests"),
-        education=info.get("education"),
-        children=Children(info["children"]) if info.get("children") is not None else None,
-        communication_style=CommunicationStyle(info["communication_style"]) if info.get("communication_style") is not None else None,
-        pets=Pets(info["pets"]) if info.get("pets") is not None else None,
-        drinking=Drinking(info["drinking"]) if info.get("drinking") is not None else None,
-        smoking=Smoking(info["smoking"]) if info.get("smoking") is not None else None,
-        fitness=Fitness(info["fitness"]) if info.get("fitness") is not None else None,
-        dietary=Dietary(info["dietary"]) if info.get("dietary") is not None else None,
-        sleeping=Sleeping(info["sleeping"]) if info.get("sleeping") is not None else None,
-        politics=Politics(info["politics"]) if info.get("politics") is not None else None,
-        spirituality=Spirituality(info["spirituality"]) if info.get("spirituality") is not None else None,
-    )
+def build_user_object(user_data: dict) -> UserView:
+    """`User` perezoso sobre el documento (ver `app.api.views`)."""
+    return UserView(user_data)
 
 
-async def get_current_user(info: Info) -> User:
+async def get_current_user(info: Info) -> UserView:
     user_data = await get_current_user_from_token(info)
     return build_user_object(user_data)
 
@@ -182,10 +171,8 @@ async def update_profile_resolver(
     sleeping: str = None,
     politics: str = None,
     spirituality: str = None,
-) -> User:
-    db = get_mongo_db()
-    user_data = await get_current_user_from_token(info)
-    users_collection = db.get_collection("users")
+) -> UserView:
+    email = get_token_subject(info)
 
     update_fields = {}
     if gender:
@@ -217,14 +204,58 @@ async def update_profile_resolver(
         }.items()
         if v is not None
     }:
-        update_fields["user_info"] = user_info_update
+        # Rutas con punto: dos ediciones concurrentes de campos distintos no se pisan
+        update_fields.update({f"user_info.{k}": v for k, v in user_info_update.items()})
 
     update_fields["updated_at"] = datetime.now(timezone.utc)
 
-    await users_collection.update_one(
-        {"_id": ObjectId(user_data["_id"])},
-        {"$set": update_fields}
+    updated_user = await update_user_by_email(email, update_fields)
+    return build_user_object(updated_user)
+
+
+async def update_user_by_email(email: str, update_fields: dict) -> dict:
+    """
+    Aplica `$set` con `update_fields` y devuelve el documento resultante en un solo
+    viaje a la base de datos.
+    """
+    users_collection = get_mongo_db().get_collection("users")
+    query = {"email": email}
+    touches_user_info = any(field.startswith("user_info.") for field in update_fields)
+    if touches_user_info:
+        # Las rutas `user_info.*` sólo pueden crearse si `user_info` es un documento
+        query["user_info"] = {"$type": "object"}
+
+    updated_user = await users_collection.find_one_and_update(
+        query,
+        {"$set": update_fields},
+        projection=USER_PROJECTION,
+        return_document=ReturnDocument.AFTER,
     )
+    if updated_user is None and touches_user_info:
+        # Usuarios antiguos con `user_info: null` (o sin el campo): se inicializa
+        # una vez como documento vacío y se repite la actualización
+        await users_collection.update_one(
+            {"email": email, "user_info": {"$not": {"$type": "object"}}},
+            {"$set": {"user_info": {}}},
+        )
+        updated_user = await users_collection.find_one_and_update(
+            {"email": email},
+            {"$set": update_fields},
+            projection=USER_PROJECTION,
+            return_document=ReturnDocument.AFTER,
+        )
+    if updated_user is None:
+        raise AuthenticationError(message="User not found")
+    return updated_user
+
 
-    updated_user = await users_collection.find_one({"_id": ObjectId(user_data["_id"])})
+async def update_location_resolver(info: Info, latitude: float, longitude: float) -> UserView:
+    if not (-90 <= latitude <= 90 and -180 <= longitude <= 180):
+        raise ValueError("Invalid coordinates")
+
+    email = get_token_subject(info)
+    now = datetime.now(timezone.utc)
+    updated_user = await update_user_by_email(
+        email, {"location": geo_point(latitude, longitude), "location_updated_at": now, "updated_at": now}
+    )
     return build_user_object(updated_user)
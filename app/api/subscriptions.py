@@ -0,0 +1,120 @@
+# app/api/subscriptions.py
+
+from typing import AsyncGenerator, List, Optional
+
+import strawberry
+from strawberry.types import Info
+
+from app.auth.jwt import get_current_user_from_token
+from app.db.client import get_mongo_db
+from app.services import candidate_index, events, like_filter
+from app.services.chart_jobs import chart_status_channel
+from app.services.feed import build_feed_filters, geo_point, stream_feed_candidates, stream_indexed_candidates
+from app.services.feed_stream import FEED_STREAM_MAX_DECK, FeedSession, feed_swipes_channel
+from .queries import feed_exclusion
+from .resolvers.user_resolvers import build_user_object
+from .types import (
+    ChartStatus, ChartStatusEvent, Element, Gender, GeoPointInput, LookingFor, SexualOrientation, User, ZodiacSign,
+)
+from .views import build_chart_status
+
+
+@strawberry.type
+class Subscription:
+    @strawberry.subscription
+    async def chart_status(self, info: Info) -> AsyncGenerator[ChartStatusEvent, None]:
+        """
+        Emite el estado de la carta natal del usuario autenticado hasta que el
+        cálculo diferido termina (`ready` o `failed`).
+        """
+        user_data = await get_current_user_from_token(info)
+        user_id = str(user_data["_id"])
+
+        async with events.subscribe(chart_status_channel(user_id)) as queue:
+            # Se relee el documento tras suscribirse para no perder un evento intermedio
+            current = await get_mongo_db().get_collection("users").find_one(
+                {"_id": user_data["_id"]}, {"chart_status": 1, "chart_error": 1, "natal_chart": 1}
+            )
+            status = build_chart_status(current or user_data)
+            yield ChartStatusEvent(user_id=user_id, chart_status=status, error=(current or {}).get("chart_error"))
+
+            while status == ChartStatus.Pending:
+                event = await queue.get()
+                status = ChartStatus(event["chart_status"])
+                yield ChartStatusEvent(user_id=user_id, chart_status=status, error=event.get("error"))
+
+    @strawberry.subscription
+    async def feed_stream(
+        self,
+        info: Info,
+        near: Optional[GeoPointInput] = None,
+        max_distance_km: Optional[float] = None,
+        gender: Optional[Gender] = None,
+        looking_for: Optional[LookingFor] = None,
+        sexual_orientation: Optional[List[SexualOrientation]] = None,
+        sun_signs: Optional[List[ZodiacSign]] = None,
+        elements: Optional[List[Element]] = None,
+        deck_size: int = 10,
+    ) -> AsyncGenerator[List[User], None]:
+        """
+        Feed en streaming para el usuario autenticado, con los mismos filtros que
+        `feed`. Emite primero `deck_size` candidatos y, por cada swipe (`likeUser` o
+        `passUser`) sobre uno de ellos, los siguientes para mantener el mazo lleno.
+        Los candidatos salen de un búfer por sesión que se rellena en segundo plano
+        (`app.services.feed_stream`). Termina cuando no quedan candidatos.
+        """
+        current_user = await get_current_user_from_token(info)
+        user_id = str(current_user["_id"])
+        deck_size = max(1, min(deck_size, FEED_STREAM_MAX_DECK))
+        orientations = [o.value for o in sexual_orientation or []]
+        signs = {s.value for s in sun_signs or []}
+        element_values = {e.value for e in elements or []}
+        liked = await like_filter.load_filter(user_id)
+
+        index = candidate_index.index
+        if near is None and index.ready:
+            own_ordinal = current_user.get("ordinal")
+            bitmap = index.candidates(
+                gender=gender.value if gender else None,
+                looking_for=looking_for.value if looking_for else None,
+                orientations=orientations,
+                signs=signs,
+                elements=element_values,
+                exclude=1 << own_ordinal if own_ordinal is not None else 0,
+            )
+            source = stream_indexed_candidates(
+                index.ordinals(bitmap), index.ids, batch_size=deck_size, exclude=feed_exclusion(liked=liked)
+            )
+        else:
+            filters = build_feed_filters(
+                gender=gender.value if gender else None,
+                looking_for=looking_for.value if looking_for else None,
+                sexual_orientation=orientations,
+            )
+            source = stream_feed_candidates(
+                filters,
+                near=geo_point(near.latitude, near.longitude) if near else None,
+                max_distance_km=max_distance_km,
+                batch_size=deck_size,
+                exclude=feed_exclusion(current_user["_id"], liked, signs, element_values),
+            )
+
+        session = FeedSession(source)
+        # Suscritos antes de enviar nada para no perder ningún swipe
+        async with events.subscribe(feed_swipes_channel(user_id)) as swipes:
+            try:
+                docs = await session.take(deck_size)
+                dealt = {str(doc["_id"]) for doc in docs}
+                if docs:
+                    yield [build_user_object(doc) for doc in docs]
+                while dealt:
+                    swipe = await swipes.get()
+                    if swipe["target_user_id"] not in dealt:
+                        continue  # Swipe de otro dispositivo o de fuera del mazo
+                    dealt.discard(swipe["target_user_id"])
+                    docs = await session.take(deck_size - len(dealt))
+                    if docs:
+                        dealt.update(str(doc["_id"]) for doc in docs)
+                        yield [build_user_object(doc) for doc in docs]
+            finally:
+                await session.close()
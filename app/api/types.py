@@ -1,7 +1,7 @@
 # app/api/types.py
 from __future__ import annotations
 import enum
-from datetime import date, time
+from datetime import date, datetime, time
 from typing import List, Optional
 import strawberry
 from pydantic import BaseModel
@@ -19,8 +19,16 @@ class ZodiacSign(enum.Enum):
     Scorpio = "Scorpio"
     Sagittarius = "Sagittarius"
     Capricorn = "Capricorn"
+    Aquarius = "Aquarius"
     Pisces = "Pisces"
 
+@strawberry.enum
+class Element(enum.Enum):
+    Fire = "Fuego"
+    Earth = "Tierra"
+    Air = "Aire"
+    Water = "Agua"
+
 @strawberry.enum
 class Children(enum.Enum):
     Wanted = "I want children"
@@ -151,11 +159,67 @@ class LookingFor(enum.Enum):
     Casual = "Casual relationship"
     Friendship = "Friendship"
 
+@strawberry.enum
+class ChartStatus(enum.Enum):
+    Pending = "pending"
+    Ready = "ready"
+    Failed = "failed"
+
+@strawberry.enum
+class HouseSystem(enum.Enum):
+    Placidus = "placidus"
+    Koch = "koch"
+    Porphyry = "porphyry"
+    Regiomontanus = "regiomontanus"
+    Campanus = "campanus"
+    WholeSign = "whole_sign"
+    Equal = "equal"
+
+@strawberry.enum
+class Ayanamsa(enum.Enum):
+    Lahiri = "lahiri"
+    FaganBradley = "fagan_bradley"
+    Raman = "raman"
+    Krishnamurti = "krishnamurti"
+
 # --- Data Types (Output) ---
+@strawberry.type
+class PhotoVariant:
+    name: str
+    width: int
+    height: int
+    url: str
+
 @strawberry.type
 class Photo:
     url: str
     sign: Optional[ZodiacSign]
+    id: Optional[strawberry.ID] = None
+    width: Optional[int] = None
+    height: Optional[int] = None
+    variants: List[PhotoVariant] = strawberry.field(default_factory=list)
+
+    @strawberry.field
+    def src(self, min_width: int) -> str:
+        """URL de la variante más pequeña con al menos `min_width` px de ancho (o de la mayor)."""
+        for variant in self.variants:  # Ordenadas de menor a mayor
+            if variant.width >= min_width:
+                return variant.url
+        return self.variants[-1].url if self.variants else self.url
+
+    @classmethod
+    def from_document(cls, photo: dict) -> "Photo":
+        return cls(
+            url=photo["url"],
+            sign=ZodiacSign[photo["sign"]] if photo.get("sign") else None,
+            id=photo.get("id"),
+            width=photo.get("width"),
+            height=photo.get("height"),
+            variants=[
+                PhotoVariant(name=v["name"], width=v["width"], height=v["height"], url=v["url"])
+                for v in photo.get("variants", [])
+            ],
+        )
 
 @strawberry.type
 class AstrologicalPositionType:
@@ -205,11 +269,24 @@ class User:
     latitude: Optional[float] = None
     longitude: Optional[float] = None
     timezone: Optional[str] = None
-    natal_chart: Optional[NatalChartType] = None
+    chart_status: ChartStatus = ChartStatus.Ready
     user_info: Optional[UserInfo]
     gender: Gender
     looking_for: LookingFor
     sexual_orientation: Optional[List[SexualOrientation]]
+    distance_km: Optional[float] = None  # Solo en el feed por cercanía
+
+    @strawberry.field
+    def natal_chart(
+        self, house_system: HouseSystem = HouseSystem.Placidus, ayanamsa: Optional[Ayanamsa] = None
+    ) -> Optional[NatalChartType]:
+        """
+        Carta natal en el sistema de casas pedido, tropical o (con `ayanamsa`) sideral.
+        `null` si aún no está calculada o si el sistema no existe en esa latitud
+        (Placidus y Koch cerca de los polos).
+        """
+        # `self` es la vista del documento (app.api.views.UserView)
+        return self.chart(house_system.value, ayanamsa.value if ayanamsa else None)
 
 @strawberry.type
 class AuthPayload:
@@ -220,12 +297,62 @@ class AuthPayload:
 class LikeResponse:
     matched: bool
 
+@strawberry.type
+class ChartStatusEvent:
+    user_id: strawberry.ID
+    chart_status: ChartStatus
+    error: Optional[str] = None
+
 @strawberry.type
 class CompatibilityBreakdown:
     category: str
     score: float
     description: str
 
+@strawberry.type
+class MatchPartner:
+    id: strawberry.ID
+    sun_sign: str
+    birth_place: Optional[str] = None
+    gender: Optional[Gender] = None
+    photo_url: Optional[str] = None
+
+@strawberry.type
+class CoupleCharts:
+    composite: Optional[NatalChartType] = None
+    davison: Optional[NatalChartType] = None
+
+@strawberry.type
+class Match:
+    partner: MatchPartner
+    compatibility: float
+    matched_at: datetime
+    last_activity_at: datetime
+
+    @strawberry.field
+    async def couple_charts(self) -> Optional[CoupleCharts]:
+        """
+        Cartas compuesta y Davison de la pareja. Se calculan una vez por match y se
+        guardan con él; None en matches anteriores a guardar su id en la bandeja.
+        """
+        # `self` es la vista de la entrada de la bandeja (app.api.views.MatchView)
+        return await self.load_couple_charts()
+
+@strawberry.type
+class PageInfo:
+    has_next_page: bool
+    end_cursor: Optional[str] = None
+
+@strawberry.type
+class MatchEdge:
+    cursor: str
+    node: Match
+
+@strawberry.type
+class MatchConnection:
+    edges: List[MatchEdge]
+    page_info: PageInfo
+
 # --- Input Types ---
 @strawberry.input
 class SignUpInput:
@@ -242,6 +369,11 @@ class LoginInput:
     email: str
     password: str
 
+@strawberry.input
+class GeoPointInput:
+    latitude: float
+    longitude: float
+
 @strawberry.input
 class LikeInput:
     user_id: strawberry.ID
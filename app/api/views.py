@@ -0,0 +1,292 @@
+# app/api/views.py
+"""
+Vistas perezosas de los documentos de MongoDB para los tipos de salida de GraphQL.
+
+Los tipos de `types.py` describen el esquema; lo que devuelven los resolvers son estas
+vistas, objetos con `__slots__` que envuelven el documento tal cual llega de Mongo y
+exponen cada campo como propiedad. Strawberry lee los campos con `getattr`, así que
+sólo se convierte lo que la consulta selecciona: un feed que no pide `natalChart` no
+crea los 25 objetos de posiciones de cada usuario, y uno que no pide `userInfo` no
+convierte sus enums (ver `python -m benchmarks.graphql_views`). Las variantes de la
+carta (otros sistemas de casas, zodiaco sideral) se derivan de `chart_variants` sólo
+cuando se piden.
+"""
+from datetime import date, datetime, time, timezone
+from typing import List, Optional
+
+from app.services import couple_charts
+from app.services.astrology_service import DEFAULT_HOUSE_SYSTEM, ChartVariants
+
+from .types import (
+    ChartStatus,
+    Children,
+    CommunicationStyle,
+    Dietary,
+    Drinking,
+    Fitness,
+    CoupleCharts,
+    Gender,
+    LookingFor,
+    MatchPartner,
+    Pets,
+    Photo,
+    Politics,
+    SexualOrientation,
+    Sleeping,
+    Smoking,
+    Spirituality,
+)
+
+
+def build_chart_status(user_data: dict) -> ChartStatus:
+    # Los usuarios anteriores a la cola de trabajos no tienen el campo
+    if status := user_data.get("chart_status"):
+        return ChartStatus(status)
+    return ChartStatus.Ready if user_data.get("natal_chart") else ChartStatus.Pending
+
+
+class PositionView:
+    """`AstrologicalPositionType` sobre un elemento de `natal_chart.positions`/`houses`."""
+    __slots__ = ("_doc",)
+
+    def __init__(self, doc: dict):
+        self._doc = doc
+
+    @property
+    def name(self) -> str:
+        return self._doc["name"]
+
+    @property
+    def sign(self) -> str:
+        return self._doc["sign"]
+
+    @property
+    def sign_icon(self) -> str:
+        return self._doc["sign_icon"]
+
+    @property
+    def degrees(self) -> float:
+        return self._doc["degrees"]
+
+    @property
+    def house(self) -> int:
+        return self._doc["house"]
+
+
+class NatalChartView:
+    """`NatalChartType` sobre `users.natal_chart`."""
+    __slots__ = ("_doc",)
+
+    def __init__(self, doc: dict):
+        self._doc = doc
+
+    @property
+    def positions(self) -> List[PositionView]:
+        return [PositionView(p) for p in self._doc.get("positions", [])]
+
+    @property
+    def houses(self) -> List[PositionView]:
+        return [PositionView(h) for h in self._doc.get("houses", [])]
+
+
+def _enum(enum_cls, value):
+    return enum_cls(value) if value is not None else None
+
+
+class UserInfoView:
+    """`UserInfo` sobre `users.user_info`."""
+    __slots__ = ("_doc",)
+
+    def __init__(self, doc: dict):
+        self._doc = doc
+
+    @property
+    def height(self) -> Optional[int]:
+        return self._doc.get("height")
+
+    @property
+    def weight(self) -> Optional[int]:
+        return self._doc.get("weight")
+
+    @property
+    def school(self) -> Optional[str]:
+        return self._doc.get("school")
+
+    @property
+    def languages(self) -> Optional[List[str]]:
+        return self._doc.get("languages")
+
+    @property
+    def interests(self) -> Optional[List[str]]:
+        return self._doc.get("interests")
+
+    @property
+    def education(self) -> Optional[str]:
+        return self._doc.get("education")
+
+    @property
+    def children(self) -> Optional[Children]:
+        return _enum(Children, self._doc.get("children"))
+
+    @property
+    def communication_style(self) -> Optional[CommunicationStyle]:
+        return _enum(CommunicationStyle, self._doc.get("communication_style"))
+
+    @property
+    def pets(self) -> Optional[Pets]:
+        return _enum(Pets, self._doc.get("pets"))
+
+    @property
+    def drinking(self) -> Optional[Drinking]:
+        return _enum(Drinking, self._doc.get("drinking"))
+
+    @property
+    def smoking(self) -> Optional[Smoking]:
+        return _enum(Smoking, self._doc.get("smoking"))
+
+    @property
+    def fitness(self) -> Optional[Fitness]:
+        return _enum(Fitness, self._doc.get("fitness"))
+
+    @property
+    def dietary(self) -> Optional[Dietary]:
+        return _enum(Dietary, self._doc.get("dietary"))
+
+    @property
+    def sleeping(self) -> Optional[Sleeping]:
+        return _enum(Sleeping, self._doc.get("sleeping"))
+
+    @property
+    def politics(self) -> Optional[Politics]:
+        return _enum(Politics, self._doc.get("politics"))
+
+    @property
+    def spirituality(self) -> Optional[Spirituality]:
+        return _enum(Spirituality, self._doc.get("spirituality"))
+
+
+class UserView:
+    """`User` sobre un documento de `users` (sin `password_hash`, ver `USER_PROJECTION`)."""
+    __slots__ = ("_doc",)
+
+    def __init__(self, doc: dict):
+        self._doc = doc
+
+    @property
+    def id(self) -> str:
+        return str(self._doc["_id"])
+
+    @property
+    def email(self) -> str:
+        return self._doc.get("email")
+
+    @property
+    def birth_date(self) -> date:
+        value = self._doc.get("birth_date")
+        return value.date() if isinstance(value, datetime) else value
+
+    @property
+    def birth_time(self) -> time:
+        value = self._doc.get("birth_time")
+        return time.fromisoformat(value) if isinstance(value, str) else value
+
+    @property
+    def birth_place(self) -> str:
+        return self._doc.get("birth_place")
+
+    @property
+    def latitude(self) -> Optional[float]:
+        return self._doc.get("latitude")
+
+    @property
+    def longitude(self) -> Optional[float]:
+        return self._doc.get("longitude")
+
+    @property
+    def timezone(self) -> Optional[str]:
+        return self._doc.get("timezone")
+
+    @property
+    def photos(self) -> List[Photo]:
+        return [Photo.from_document(p) for p in self._doc.get("photos", [])]
+
+    def chart(self, house_system: str = DEFAULT_HOUSE_SYSTEM, ayanamsa: Optional[str] = None):
+        """Carta para `User.natalChart`: la guardada o una variante de `chart_variants`."""
+        if house_system == DEFAULT_HOUSE_SYSTEM and ayanamsa is None:
+            chart = self._doc.get("natal_chart")
+            return NatalChartView(chart) if chart else None
+        variants = self._doc.get("chart_variants")
+        return ChartVariants.from_document(variants).chart(house_system, ayanamsa) if variants else None
+
+    @property
+    def chart_status(self) -> ChartStatus:
+        return build_chart_status(self._doc)
+
+    @property
+    def user_info(self) -> Optional[UserInfoView]:
+        info = self._doc.get("user_info")
+        return UserInfoView(info) if info else None
+
+    @property
+    def gender(self) -> Gender:
+        return Gender(self._doc["gender"])
+
+    @property
+    def looking_for(self) -> LookingFor:
+        return LookingFor(self._doc["looking_for"])
+
+    @property
+    def sexual_orientation(self) -> List[SexualOrientation]:
+        return [SexualOrientation(so) for so in self._doc.get("sexual_orientation", [])]
+
+    @property
+    def distance_km(self) -> Optional[float]:
+        # Solo en el feed por cercanía
+        distance_m = self._doc.get("distance_m")
+        return distance_m / 1000 if distance_m is not None else None
+
+
+def _utc(value: datetime) -> datetime:
+    # Motor devuelve las fechas en UTC sin zona horaria
+    return value.replace(tzinfo=timezone.utc) if value.tzinfo is None else value
+
+
+class MatchView:
+    """`Match` sobre una entrada de `inbox_entries` (ver `app.services.inbox`)."""
+    __slots__ = ("_doc",)
+
+    def __init__(self, doc: dict):
+        self._doc = doc
+
+    @property
+    def partner(self) -> MatchPartner:
+        partner = self._doc["partner"]
+        return MatchPartner(
+            id=partner["id"],
+            sun_sign=partner["sun_sign"],
+            birth_place=partner.get("birth_place"),
+            gender=Gender(partner["gender"]) if partner.get("gender") else None,
+            photo_url=partner.get("photo_url"),
+        )
+
+    @property
+    def compatibility(self) -> float:
+        return self._doc["compatibility"]
+
+    @property
+    def matched_at(self) -> datetime:
+        return _utc(self._doc["matched_at"])
+
+    @property
+    def last_activity_at(self) -> datetime:
+        return _utc(self._doc["last_activity_at"])
+
+    async def load_couple_charts(self) -> Optional[CoupleCharts]:
+        match_id = self._doc.get("match_id")
+        charts = await couple_charts.get_couple_charts(match_id) if match_id else None
+        if charts is None:
+            return None
+        return CoupleCharts(
+            composite=NatalChartView(charts["composite"]) if charts.get("composite") else None,
+            davison=NatalChartView(charts["davison"]) if charts.get("davison") else None,
+        )
@@ -6,6 +6,12 @@ Esto permite que los cálculos se prueben y reutilicen independientemente de la
 from datetime import date
 from typing import Dict, List, Tuple
 
+# Nombres de los signos (valores de `ZodiacSign`) en el orden de los índices de abajo
+SIGN_NAMES = [
+    "Aries", "Taurus", "Gemini", "Cancer", "Leo", "Virgo",
+    "Libra", "Scorpio", "Sagittarius", "Capricorn", "Aquarius", "Pisces",
+]
+
 def get_zodiac_sign_details(birth_date_obj: date) -> Tuple[int, str]:
     """Calcula el índice (0-11) y el elemento de un signo zodiacal."""
     month = birth_date_obj.month
@@ -24,6 +30,10 @@ def get_zodiac_sign_details(birth_date_obj: date) -> Tuple[int, str]:
     if (month == 1 and day >= 20) or (month == 2 and day <= 18): return (10, "Aire")    # Acuario
     return (11, "Agua") # Piscis
 
+def get_sun_sign(birth_date_obj: date) -> str:
+    """Nombre del signo solar (valor de `ZodiacSign`)."""
+    return SIGN_NAMES[get_zodiac_sign_details(birth_date_obj)[0]]
+
 def calculate_compatibility_scores(
     date1: date, date2: date, is_premium: bool
 ) -> List[Dict[str, any]]:
@@ -34,9 +34,33 @@ async def get_current_user_from_token(info: Info) -> dict:
     Decodifica el token JWT de la cabecera de la petición, valida al usuario
     y devuelve su documento de la base de datos.
     """
+    return await get_user_from_authorization(_authorization_header(info))
+
+
+def get_token_subject(info: Info) -> str:
+    """
+    Valida el token de la petición y devuelve su sujeto (el email) sin consultar la
+    base de datos; para escrituras que filtran directamente por email.
+    """
+    return decode_authorization(_authorization_header(info))
+
+
+def _authorization_header(info: Info) -> Optional[str]:
     request = info.context["request"]
     auth_header = request.headers.get("Authorization")
+    # En las suscripciones por websocket el token llega en el payload de connection_init
+    if not auth_header and (connection_params := info.context.get("connection_params")):
+        auth_header = connection_params.get("Authorization") or connection_params.get("authorization")
+    return auth_header
 
+
+async def get_current_user_from_request(request) -> dict:
+    """Igual que `get_current_user_from_token` para endpoints HTTP fuera de GraphQL."""
+    return await get_user_from_authorization(request.headers.get("Authorization"))
+
+
+def decode_authorization(auth_header: Optional[str]) -> str:
+    """Valida una cabecera `Authorization: Bearer <jwt>` y devuelve el email del token."""
     if not auth_header or not auth_header.startswith("Bearer "):
         raise AuthenticationError(message="Not authenticated: Authorization header is missing or invalid")
 
@@ -49,6 +73,12 @@ async def get_current_user_from_token(info: Info) -> dict:
             raise AuthenticationError(message="Invalid token: subject missing")
     except JWTError as e:
         raise AuthenticationError(message=f"Invalid token: {e}") from e
+    return email
+
+
+async def get_user_from_authorization(auth_header: Optional[str]) -> dict:
+    """Valida una cabecera `Authorization: Bearer <jwt>` y devuelve el documento del usuario."""
+    email = decode_authorization(auth_header)
 
     db = get_mongo_db()
     users_collection = db.get_collection("users")
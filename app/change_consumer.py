@@ -0,0 +1,44 @@
+"""
+Punto de entrada del consumidor de change streams de MongoDB.
+
+    python -m app.change_consumer [--name default]
+
+Conecta con MongoDB y Redis, importa los manejadores registrados y mantiene los
+datos derivados (índice de candidatos, filtros de likes, resúmenes de la bandeja)
+hasta recibir SIGINT/SIGTERM, momento en el que termina el lote en curso. Basta un
+proceso por nombre: el nombre identifica el resume token guardado.
+"""
+
+import argparse
+import asyncio
+import logging
+import signal
+
+from dotenv import load_dotenv
+
+from app.db.client import close_db_clients, init_db_clients
+from app.services import candidate_index, couple_charts, inbox, like_filter  # noqa: F401  (registran los manejadores)
+from app.services.change_stream import ChangeStreamConsumer
+
+
+async def main(name: str) -> None:
+    await init_db_clients()
+    consumer = ChangeStreamConsumer(name=name)
+
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, consumer.stop)
+
+    try:
+        await consumer.run()
+    finally:
+        await close_db_clients()
+
+
+if __name__ == "__main__":
+    load_dotenv()
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+    parser = argparse.ArgumentParser(description="Synastr change stream consumer")
+    parser.add_argument("--name", default="default")
+    args = parser.parse_args()
+    asyncio.run(main(args.name))
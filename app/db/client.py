@@ -3,35 +3,128 @@ Inicialización de clientes de base de datos para MongoDB y Redis.
 
 Se exponen variables globales `mongo_client` y `redis_client` que pueden
 importarse desde otros módulos. Llama a `init_db_clients()` en el startup de
-FastAPI para inicializar las conexiones.
+FastAPI para inicializar las conexiones y a `close_db_clients()` en el shutdown
+para drenarlas.
+
+El tamaño de los pools se configura con variables de entorno, de modo que pueda
+ajustarse al número de workers del despliegue:
+
+- `MONGO_MAX_POOL_SIZE` (por defecto `100`), `MONGO_MIN_POOL_SIZE` (`0`)
+- `MONGO_MAX_IDLE_TIME_MS` (`300000`), `MONGO_SERVER_SELECTION_TIMEOUT_MS` (`5000`)
+- `MONGO_WAIT_QUEUE_TIMEOUT_MS` (`10000`)
+- `REDIS_MAX_CONNECTIONS` (`50`), `REDIS_POOL_TIMEOUT_S` (`10`)
+- `REDIS_SOCKET_TIMEOUT_S` (`5`), `REDIS_HEALTH_CHECK_INTERVAL_S` (`30`)
 """
 
+import asyncio
 import os
-from typing import Optional
+import time
+from typing import Dict, Optional
 
 from motor.motor_asyncio import AsyncIOMotorClient
 import redis.asyncio as aioredis
 
+from app.monitoring.pools import mongo_pool_metrics, redis_pool_snapshot
+
 mongo_client: Optional[AsyncIOMotorClient] = None
 redis_client: Optional[aioredis.Redis] = None
 
+# Base de datos por defecto de `get_mongo_db()` (los benchmarks usan otra)
+DEFAULT_DB_NAME = os.getenv("MONGODB_DB", "synastr")
+
+
+def _mongo_pool_options() -> Dict:
+    return {
+        "maxPoolSize": int(os.getenv("MONGO_MAX_POOL_SIZE", "100")),
+        "minPoolSize": int(os.getenv("MONGO_MIN_POOL_SIZE", "0")),
+        "maxIdleTimeMS": int(os.getenv("MONGO_MAX_IDLE_TIME_MS", "300000")),
+        "serverSelectionTimeoutMS": int(os.getenv("MONGO_SERVER_SELECTION_TIMEOUT_MS", "5000")),
+        "waitQueueTimeoutMS": int(os.getenv("MONGO_WAIT_QUEUE_TIMEOUT_MS", "10000")),
+    }
+
+
+def _redis_pool_options() -> Dict:
+    return {
+        "max_connections": int(os.getenv("REDIS_MAX_CONNECTIONS", "50")),
+        "timeout": float(os.getenv("REDIS_POOL_TIMEOUT_S", "10")),
+        "socket_timeout": float(os.getenv("REDIS_SOCKET_TIMEOUT_S", "5")),
+        "socket_connect_timeout": float(os.getenv("REDIS_SOCKET_TIMEOUT_S", "5")),
+        "health_check_interval": int(os.getenv("REDIS_HEALTH_CHECK_INTERVAL_S", "30")),
+    }
+
 
 async def init_db_clients() -> None:
     """Inicializa las conexiones a MongoDB y Redis basadas en variables de entorno."""
     global mongo_client, redis_client
     if mongo_client is None:
         mongo_uri = os.getenv("MONGODB_URI", "mongodb://localhost:27017/synastr")
-        mongo_client = AsyncIOMotorClient(mongo_uri)
+        mongo_client = AsyncIOMotorClient(
+            mongo_uri, event_listeners=[mongo_pool_metrics], **_mongo_pool_options()
+        )
     if redis_client is None:
         redis_url = os.getenv("REDIS_URL", "redis://localhost:6379/0")
-        redis_client = aioredis.from_url(redis_url)
+        # El pool bloqueante hace esperar a las peticiones cuando se agota en lugar de
+        # fallar inmediatamente, así el límite puede ajustarse por worker.
+        pool = aioredis.BlockingConnectionPool.from_url(redis_url, **_redis_pool_options())
+        redis_client = aioredis.Redis(connection_pool=pool)
+
+
+async def close_db_clients(drain_timeout: Optional[float] = None) -> None:
+    """
+    Drena y cierra los clientes. Espera hasta `drain_timeout` segundos (por defecto
+    `DB_DRAIN_TIMEOUT_S`, 10) a que se devuelvan las conexiones en uso antes de
+    cerrar los pools.
+    """
+    global mongo_client, redis_client
+    if drain_timeout is None:
+        drain_timeout = float(os.getenv("DB_DRAIN_TIMEOUT_S", "10"))
+
+    deadline = time.monotonic() + drain_timeout
+    while time.monotonic() < deadline and _connections_in_use() > 0:
+        await asyncio.sleep(0.05)
+
+    if redis_client is not None:
+        await redis_client.aclose(close_connection_pool=True)
+        redis_client = None
+    if mongo_client is not None:
+        mongo_client.close()
+        mongo_client = None
+
+
+def _connections_in_use() -> int:
+    in_use = mongo_pool_metrics.in_use if mongo_client is not None else 0
+    if redis_client is not None:
+        in_use += len(redis_client.connection_pool._in_use_connections)
+    return in_use
+
+
+async def ping_mongo(timeout: float = 2.0) -> None:
+    """Lanza una excepción si MongoDB no responde a `ping` en `timeout` segundos."""
+    if not mongo_client:
+        raise RuntimeError("Mongo client is not initialized. Call init_db_clients() first.")
+    await asyncio.wait_for(mongo_client.admin.command("ping"), timeout)
+
+
+async def ping_redis(timeout: float = 2.0) -> None:
+    """Lanza una excepción si Redis no responde a `PING` en `timeout` segundos."""
+    await asyncio.wait_for(get_redis().ping(), timeout)
+
+
+def pool_stats() -> Dict:
+    """Utilización actual de los pools de conexiones."""
+    return {
+        "mongo": mongo_pool_metrics.snapshot(mongo_client.options.pool_options.max_pool_size)
+        if mongo_client is not None
+        else None,
+        "redis": redis_pool_snapshot(redis_client.connection_pool) if redis_client is not None else None,
+    }
 
 
-def get_mongo_db(name: str = "synastr"):
+def get_mongo_db(name: Optional[str] = None):
     """Devuelve una referencia a la base de datos MongoDB."""
     if not mongo_client:
         raise RuntimeError("Mongo client is not initialized. Call init_db_clients() first.")
-    return mongo_client.get_database(name)
+    return mongo_client.get_database(name or DEFAULT_DB_NAME)
 
 
 def get_redis() -> aioredis.Redis:
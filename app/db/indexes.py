@@ -0,0 +1,66 @@
+"""
+Índices de MongoDB requeridos por las consultas de la aplicación.
+
+`ensure_indexes()` se llama en el arranque; `create_index` es idempotente, así que
+repetirlo en cada worker no tiene coste apreciable. Cada índice se crea por separado:
+si uno falla (p. ej. `email_unique` con emails duplicados de usuarios anteriores) se
+registra el error y se siguen creando los demás, de modo que el feed por cercanía no
+se queda sin su índice. Sólo se aborta si MongoDB no está disponible.
+"""
+import logging
+from typing import Any, Dict, List, Tuple
+
+from pymongo import ASCENDING, DESCENDING, GEOSPHERE
+from pymongo.errors import ConnectionFailure
+
+from .client import get_mongo_db
+
+logger = logging.getLogger(__name__)
+
+# (colección, claves, opciones de `create_index`; `name` es obligatorio)
+INDEXES: List[Tuple[str, List[Tuple[str, Any]], Dict[str, Any]]] = [
+    # Un email por cuenta (normalizado, ver `normalize_email`): también permite a las
+    # importaciones masivas insertar con ordered=False y descartar los duplicados
+    ("users", [("email", ASCENDING)], {"name": "email_unique", "unique": True}),
+    # Ordinales del índice de candidatos (app.services.candidate_index); los usuarios
+    # anteriores no lo tienen hasta el backfill
+    ("users", [("ordinal", ASCENDING)], {
+        "name": "ordinal_unique",
+        "unique": True,
+        "partialFilterExpression": {"ordinal": {"$exists": True}},
+    }),
+    # Feed por cercanía: $geoNear sobre la ubicación actual, filtrando por género y
+    # tipo de relación dentro del mismo índice
+    ("users", [("location", GEOSPHERE), ("gender", ASCENDING), ("looking_for", ASCENDING)], {
+        "name": "location_2dsphere_gender_looking_for",
+    }),
+    # Matches de un usuario (invalidación de `matches.couple_charts`)
+    ("matches", [("users", ASCENDING)], {"name": "users"}),
+    # Una entrada por pareja y dueño: `record_match` hace upsert sobre ella
+    ("inbox_entries", [("owner_id", ASCENDING), ("partner_id", ASCENDING)], {
+        "name": "owner_partner_unique",
+        "unique": True,
+    }),
+    # `myMatches`: página de la bandeja ordenada por última actividad
+    ("inbox_entries", [("owner_id", ASCENDING), ("last_activity_at", DESCENDING), ("_id", DESCENDING)], {
+        "name": "owner_last_activity",
+    }),
+    # Refresco de los resúmenes de un usuario en las bandejas de los demás
+    # (consumidor de change streams)
+    ("inbox_entries", [("partner_id", ASCENDING)], {"name": "partner_id"}),
+]
+
+
+async def ensure_indexes() -> List[str]:
+    """Crea los índices de `INDEXES` y devuelve los nombres de los que no se pudieron crear."""
+    db = get_mongo_db()
+    failed = []
+    for collection, keys, options in INDEXES:
+        try:
+            await db.get_collection(collection).create_index(keys, **options)
+        except ConnectionFailure:
+            raise  # Sin MongoDB no tiene sentido esperar al timeout de cada índice
+        except Exception as e:
+            failed.append(options["name"])
+            logger.error("Could not create index %s on %s: %s", options["name"], collection, e)
+    return failed
@@ -0,0 +1,3 @@
+"""
+Trabajos por lotes ejecutables desde la línea de comandos (`python -m app.jobs.<nombre>`).
+"""
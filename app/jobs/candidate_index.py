@@ -0,0 +1,54 @@
+"""
+Mantenimiento del índice de candidatos del feed (`app.services.candidate_index`).
+
+    # Numera los usuarios creados antes de los ordinales y recarga el índice de los workers
+    python -m app.jobs.candidate_index backfill [--batch-size 10000]
+
+    # Carga el índice en este proceso y muestra su tamaño
+    python -m app.jobs.candidate_index stats
+"""
+
+import argparse
+import asyncio
+import json
+import time
+
+from dotenv import load_dotenv
+
+from app.db.client import close_db_clients, init_db_clients
+from app.services import candidate_index
+
+
+async def backfill(args) -> None:
+    await init_db_clients()
+    try:
+        started = time.perf_counter()
+        total = await candidate_index.backfill_ordinals(batch_size=args.batch_size)
+        await candidate_index.request_reload()
+    finally:
+        await close_db_clients()
+    print(f"{total} usuarios numerados en {time.perf_counter() - started:.1f}s")
+
+
+async def stats(args) -> None:
+    await init_db_clients()
+    try:
+        started = time.perf_counter()
+        await candidate_index.load_index()
+    finally:
+        await close_db_clients()
+    print(json.dumps(candidate_index.index.stats(), indent=2))
+    print(f"cargado en {time.perf_counter() - started:.1f}s")
+
+
+if __name__ == "__main__":
+    load_dotenv()
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    backfill_parser = subparsers.add_parser("backfill", help="asigna ordinales a los usuarios que no tienen")
+    backfill_parser.add_argument("--batch-size", type=int, default=10_000)
+    subparsers.add_parser("stats", help="carga el índice y muestra su tamaño")
+
+    args = parser.parse_args()
+    asyncio.run(backfill(args) if args.command == "backfill" else stats(args))
@@ -0,0 +1,37 @@
+"""
+Variantes de la carta natal (sistemas de casas y zodiaco sideral) de los usuarios
+registrados antes de `chart_variants`.
+
+    python -m app.jobs.chart_variants backfill [--batch-size 1000]
+"""
+
+import argparse
+import asyncio
+import time
+
+from dotenv import load_dotenv
+
+from app.db.client import close_db_clients, init_db_clients
+from app.services.chart_jobs import backfill_chart_variants
+
+
+async def backfill(args) -> None:
+    await init_db_clients()
+    try:
+        started = time.perf_counter()
+        updated, failed = await backfill_chart_variants(batch_size=args.batch_size)
+    finally:
+        await close_db_clients()
+    print(f"{updated} usuarios actualizados, {failed} fallidos en {time.perf_counter() - started:.1f}s")
+
+
+if __name__ == "__main__":
+    load_dotenv()
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    backfill_parser = subparsers.add_parser("backfill", help="calcula chart_variants de los usuarios que no lo tienen")
+    backfill_parser.add_argument("--batch-size", type=int, default=1_000)
+
+    args = parser.parse_args()
+    asyncio.run(backfill(args))
@@ -0,0 +1,102 @@
+"""
+Tabla diaria de efemérides y cálculo masivo de tránsitos.
+
+    # Precalcula la tabla una vez (o al ampliar el rango)
+    python -m app.jobs.ephemeris build --start 1900-01-01 --end 2100-12-31
+
+    # Aspectos de los tránsitos de hoy sobre todas las cartas natales
+    python -m app.jobs.ephemeris transits [--date 2025-01-01] [--orb 1.0]
+
+La ruta de la tabla se toma de `EPHEMERIS_TABLE_PATH` (por defecto
+`data/ephemeris_daily.npy`).
+"""
+
+import argparse
+import asyncio
+import os
+import time
+from collections import Counter
+from datetime import date, datetime, timezone
+
+import numpy as np
+from dotenv import load_dotenv
+
+from app.db.client import close_db_clients, get_mongo_db, init_db_clients
+from app.services.ephemeris_table import (
+    ASPECTS,
+    BODY_NAMES,
+    EphemerisTable,
+    build_table,
+    find_transit_aspects,
+    natal_longitudes,
+)
+
+EPHEMERIS_TABLE_PATH = os.getenv("EPHEMERIS_TABLE_PATH", "data/ephemeris_daily.npy")
+
+
+def build(args) -> None:
+    os.makedirs(os.path.dirname(args.out) or ".", exist_ok=True)
+    started = time.perf_counter()
+    build_table(args.start, args.end, args.out)
+    days = (args.end - args.start).days + 1
+    print(f"{days} días x {len(BODY_NAMES)} cuerpos escritos en {args.out} ({time.perf_counter() - started:.1f}s)")
+
+
+async def _load_natal_matrix(batch_size: int) -> tuple[list, np.ndarray]:
+    """Lee las cartas natales en lotes y las convierte en una matriz (usuarios, cuerpos)."""
+    users = get_mongo_db().get_collection("users")
+    cursor = users.find(
+        {"natal_chart": {"$ne": None}},
+        {"natal_chart.positions": 1},
+        batch_size=batch_size,
+    )
+    ids, rows = [], []
+    async for doc in cursor:
+        ids.append(doc["_id"])
+        rows.append(natal_longitudes(doc.get("natal_chart")))
+    return ids, np.vstack(rows) if rows else np.empty((0, len(BODY_NAMES)))
+
+
+async def transits(args) -> None:
+    table = EphemerisTable(args.table)
+    transit = table.positions(args.date)
+
+    await init_db_clients()
+    try:
+        started = time.perf_counter()
+        user_ids, natal = await _load_natal_matrix(args.batch_size)
+        loaded = time.perf_counter()
+        aspects = find_transit_aspects(natal, transit, orb=args.orb)
+        computed = time.perf_counter()
+    finally:
+        await close_db_clients()
+
+    aspect_names = list(ASPECTS)
+    counts = Counter(aspect_names[i] for i in aspects.aspect)
+    print(f"{len(user_ids)} cartas cargadas en {loaded - started:.2f}s")
+    print(f"{len(aspects)} aspectos ({len(set(aspects.user.tolist()))} usuarios) en {computed - loaded:.2f}s")
+    for name in aspect_names:
+        print(f"  {name:<12} {counts.get(name, 0)}")
+
+
+if __name__ == "__main__":
+    load_dotenv()
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    build_parser = subparsers.add_parser("build", help="precalcula la tabla diaria")
+    build_parser.add_argument("--start", type=date.fromisoformat, required=True)
+    build_parser.add_argument("--end", type=date.fromisoformat, required=True)
+    build_parser.add_argument("--out", default=EPHEMERIS_TABLE_PATH)
+
+    transits_parser = subparsers.add_parser("transits", help="aspectos de tránsito de un día")
+    transits_parser.add_argument("--date", type=date.fromisoformat, default=datetime.now(timezone.utc).date())
+    transits_parser.add_argument("--orb", type=float, default=1.0)
+    transits_parser.add_argument("--table", default=EPHEMERIS_TABLE_PATH)
+    transits_parser.add_argument("--batch-size", type=int, default=10_000)
+
+    args = parser.parse_args()
+    if args.command == "build":
+        build(args)
+    else:
+        asyncio.run(transits(args))
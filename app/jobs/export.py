@@ -0,0 +1,107 @@
+"""
+Exportación masiva de usuarios y cartas natales (ver `app.services.export`).
+
+    python -m app.jobs.export --out data/users.ndjson
+    python -m app.jobs.export --format arrow --out data/users.arrows
+
+Tras cada lote escrito se guarda un punto de control en `<out>.checkpoint` (último
+`_id`, filas y tamaño del fichero). Con `--resume` la exportación continúa desde
+ahí: NDJSON se trunca al último lote completo y sigue en el mismo fichero; Arrow,
+como cada stream empieza con su esquema, continúa en `<out>.part<n>`.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import time
+
+from bson import ObjectId
+from dotenv import load_dotenv
+
+from app.db.client import close_db_clients, init_db_clients
+from app.services.export import DEFAULT_BATCH_SIZE, FORMATS, export_users
+
+
+def _checkpoint_path(out: str) -> str:
+    return f"{out}.checkpoint"
+
+
+def _load_checkpoint(out: str) -> dict:
+    try:
+        with open(_checkpoint_path(out)) as fh:
+            return json.load(fh)
+    except FileNotFoundError:
+        return {}
+
+
+def _save_checkpoint(out: str, checkpoint: dict) -> None:
+    tmp_path = _checkpoint_path(out) + ".tmp"
+    with open(tmp_path, "w") as fh:
+        json.dump(checkpoint, fh)
+    os.replace(tmp_path, _checkpoint_path(out))
+
+
+def _part_path(out: str, part: int) -> str:
+    return out if part == 0 else f"{out}.part{part}"
+
+
+async def export(args) -> None:
+    checkpoint = _load_checkpoint(args.out) if args.resume else {}
+    if checkpoint.get("format", args.format) != args.format:
+        raise SystemExit(f"El punto de control es de una exportación {checkpoint['format']}")
+
+    after = ObjectId(checkpoint["last_id"]) if checkpoint.get("last_id") else None
+    rows = checkpoint.get("rows", 0)
+    part = checkpoint.get("part", 0)
+    if checkpoint and args.format == "arrow":
+        part += 1  # Un stream Arrow nuevo no puede añadirse a uno ya empezado
+
+    path = _part_path(args.out, part)
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    if checkpoint and args.format == "ndjson":
+        fh = open(path, "r+b")
+        fh.truncate(checkpoint["bytes"])  # Descarta un lote a medio escribir
+        fh.seek(checkpoint["bytes"])
+    else:
+        if checkpoint and os.path.exists(_part_path(args.out, part - 1)):
+            with open(_part_path(args.out, part - 1), "r+b") as previous:
+                previous.truncate(checkpoint["bytes"])
+        fh = open(path, "wb")
+
+    await init_db_clients()
+    started = time.perf_counter()
+    exported = 0
+    try:
+        async for chunk in export_users(args.format, after, args.batch_size, args.limit):
+            fh.write(chunk.data)
+            if chunk.last_id is None:
+                continue
+            fh.flush()
+            os.fsync(fh.fileno())
+            exported += chunk.rows
+            _save_checkpoint(args.out, {
+                "format": args.format,
+                "last_id": str(chunk.last_id),
+                "rows": rows + exported,
+                "part": part,
+                "bytes": fh.tell(),
+            })
+    finally:
+        fh.close()
+        await close_db_clients()
+
+    elapsed = time.perf_counter() - started
+    rate = exported / elapsed if elapsed else 0
+    print(f"{exported} usuarios exportados a {path} en {elapsed:.1f}s ({rate:.0f} filas/s); total {rows + exported}")
+
+
+if __name__ == "__main__":
+    load_dotenv()
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--format", choices=FORMATS, default="ndjson")
+    parser.add_argument("--out", required=True)
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE)
+    parser.add_argument("--limit", type=int, default=None)
+    parser.add_argument("--resume", action="store_true", help="continúa desde <out>.checkpoint")
+    asyncio.run(export(parser.parse_args()))
@@ -0,0 +1,95 @@
+"""
+Importación masiva de usuarios y poblaciones sintéticas (ver `app.services.bulk_import`).
+
+    # CSV con cabecera o NDJSON con: email, password | password_hash, birth_date,
+    # birth_time, birth_place, gender, looking_for [, latitude, longitude, timezone]
+    python -m app.jobs.import_users file users.csv --gazetteer data/cities15000.txt
+
+    # N usuarios sintéticos (en la base de datos de benchmarks por defecto)
+    python -m app.jobs.import_users synthetic --count 100000 --db synastr_bench
+
+Al terminar se imprimen las filas por segundo de cada etapa. Las filas rechazadas
+se escriben en `--rejects` (NDJSON) si se indica.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import time
+
+from dotenv import load_dotenv
+
+from app.db import client as db_client
+from app.db.indexes import ensure_indexes
+from app.models.user import UserModel
+from app.services.bulk_import import BulkImporter, create_compute_pool, read_rows, synthetic_rows
+from app.services.gazetteer import Gazetteer
+
+
+def _load_gazetteer(path: str | None) -> Gazetteer:
+    if not path:
+        return Gazetteer.builtin()
+    started = time.perf_counter()
+    gazetteer = Gazetteer.from_geonames(path)
+    print(f"Gazetteer: {len(gazetteer)} nombres cargados en {time.perf_counter() - started:.1f}s")
+    return gazetteer
+
+
+async def run(args) -> None:
+    if args.command == "file":
+        rows = read_rows(args.path)
+    else:
+        password_hash = UserModel.hash_password(args.password)  # Un solo hash compartido
+        rows = synthetic_rows(args.count, seed=args.seed, password_hash=password_hash)
+
+    gazetteer = _load_gazetteer(args.gazetteer)
+    if args.db:
+        db_client.DEFAULT_DB_NAME = args.db
+
+    await db_client.init_db_clients()
+    try:
+        # Índice único de email: los duplicados se descartan; sin él se insertarían
+        if "email_unique" in await ensure_indexes():
+            raise SystemExit("No se pudo crear el índice único de email; revisa los emails duplicados")
+        with create_compute_pool(args.workers) as pool:
+            importer = BulkImporter(
+                pool,
+                gazetteer,
+                workers=args.workers,
+                chunk_size=args.chunk_size,
+                insert_batch_size=args.insert_batch_size,
+            )
+            report = await importer.run(rows)
+    finally:
+        await db_client.close_db_clients()
+
+    print(report.summary())
+    if args.rejects and report.rejects:
+        with open(args.rejects, "w", encoding="utf-8") as fh:
+            for reject in report.rejects:
+                fh.write(json.dumps(reject, default=str) + "\n")
+        print(f"{len(report.rejects)} filas rechazadas escritas en {args.rejects}")
+
+
+if __name__ == "__main__":
+    load_dotenv()
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="procesos para cartas y hashes")
+    parser.add_argument("--chunk-size", type=int, default=500)
+    parser.add_argument("--insert-batch-size", type=int, default=5000)
+    parser.add_argument("--gazetteer", default=os.getenv("GAZETTEER_PATH"), help="volcado de GeoNames")
+    parser.add_argument("--rejects", help="fichero NDJSON para las filas rechazadas")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    file_parser = subparsers.add_parser("file", help="importa un CSV o NDJSON")
+    file_parser.add_argument("path")
+    file_parser.add_argument("--db", default=None, help="base de datos destino (por defecto MONGODB_DB)")
+
+    synthetic_parser = subparsers.add_parser("synthetic", help="genera N usuarios sintéticos")
+    synthetic_parser.add_argument("--count", type=int, required=True)
+    synthetic_parser.add_argument("--seed", type=int, default=42)
+    synthetic_parser.add_argument("--password", default="synastr-bench")
+    synthetic_parser.add_argument("--db", default="synastr_bench")
+
+    asyncio.run(run(parser.parse_args()))
@@ -0,0 +1,40 @@
+"""
+Reconstrucción de los filtros de Bloom de likes (`app.services.like_filter`).
+
+    python -m app.jobs.like_filters rebuild [--batch-size 5000]
+
+Hay que ejecutarlo una vez al desplegar los filtros, tras cambiar `LIKES_BLOOM_BITS`
+o `LIKES_BLOOM_HASHES` y si se pierden los datos de Redis. Hasta que termina, los
+likes recíprocos se comprueban en MongoDB.
+"""
+
+import argparse
+import asyncio
+import time
+
+from dotenv import load_dotenv
+
+from app.db.client import close_db_clients, init_db_clients
+from app.services import like_filter
+
+
+async def rebuild(args) -> None:
+    await init_db_clients()
+    try:
+        started = time.perf_counter()
+        total = await like_filter.rebuild(batch_size=args.batch_size)
+    finally:
+        await close_db_clients()
+    print(f"{total} likes cargados en los filtros en {time.perf_counter() - started:.1f}s")
+
+
+if __name__ == "__main__":
+    load_dotenv()
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    rebuild_parser = subparsers.add_parser("rebuild", help="reconstruye los filtros desde la colección likes")
+    rebuild_parser.add_argument("--batch-size", type=int, default=5_000)
+
+    args = parser.parse_args()
+    asyncio.run(rebuild(args))
@@ -5,6 +5,7 @@ Carga la configuración desde variables de entorno, inicializa la conexión a la
 y monta el servidor GraphQL a través de Strawberry.
 """
 
+import logging
 import os
 from typing import List
 
@@ -15,14 +16,27 @@ from dotenv import load_dotenv
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
+from fastapi.staticfiles import StaticFiles
 from starlette.requests import Request
-from strawberry.asgi import GraphQL
 
+from app.api.admin import router as admin_router
 from app.api.graphql_schema import schema
-from app.db.client import init_db_clients
+from app.api.graphql_view import GRAPHQL_COMPRESSION, CompressionMiddleware, GraphQLView
+from app.api.monitoring import router as monitoring_router
+from app.api.photos import router as photos_router
+from app.db.client import close_db_clients, init_db_clients
+from app.db.indexes import ensure_indexes
+from app.monitoring import start_loop_monitor, stop_loop_monitor
+from app.monitoring.drain import Drain, DrainMiddleware
+from app.services.candidate_index import start_candidate_index, stop_candidate_index
+from app.services.events import stop_event_bus
+from app.services.photos import shutdown_photo_pool
+from app.services.storage import LocalStorage, get_storage
 
 load_dotenv()
 
+logger = logging.getLogger(__name__)
+
 # ✅ 2. Crear el manejador de ciclo de vida "lifespan"
 @asynccontextmanager
 async def lifespan(app: FastAPI):
@@ -30,12 +44,31 @@ async def lifespan(app: FastAPI):
     print("Iniciando aplicación...")
     await init_db_clients()
     print("Clientes de base de datos inicializados.")
+    try:
+        failed = await ensure_indexes()  # Cada fallo ya queda registrado por ensure_indexes
+        if failed:
+            logger.error("MongoDB indexes missing: %s", ", ".join(failed))
+    except Exception as e:  # Mongo aún no disponible: la app arranca igualmente
+        logger.error("Could not create MongoDB indexes: %s", e)
+    await start_loop_monitor()
+    await start_candidate_index()
     
     yield  # La aplicación se ejecuta aquí
     
     # Lo que se ejecuta DESPUÉS de que la aplicación se apaga
     print("Apagando aplicación...")
-    # Aquí iría el código para cerrar conexiones si fuera necesario
+    # Readiness pasa a 503 y se rechazan peticiones nuevas; las que están en curso
+    # terminan antes de cerrar nada
+    drain = app.state.drain
+    drain.begin()
+    if not await drain.wait():
+        logger.warning("Shutting down with %d requests still in flight", drain.in_flight)
+    await stop_loop_monitor()
+    await stop_candidate_index()
+    await stop_event_bus()
+    shutdown_photo_pool()
+    await close_db_clients()
+    print("Conexiones de base de datos cerradas.")
 
 
 def create_app() -> FastAPI:
@@ -58,11 +91,23 @@ def create_app() -> FastAPI:
         allow_methods=["*"],
         allow_headers=["*"],
     )
+    # Último en añadirse: envuelve a todos los demás (ver `app.monitoring.drain`)
+    app.state.drain = Drain()
+    app.add_middleware(DrainMiddleware, drain=app.state.drain)
 
-    graphql_app = GraphQL(schema, graphiql=True)
+    graphql_app = GraphQLView(schema, graphiql=True)
     # Monta GraphQL en la ruta /graphql
-    app.add_route("/graphql", graphql_app)
+    app.add_route("/graphql", CompressionMiddleware(graphql_app) if GRAPHQL_COMPRESSION else graphql_app)
     app.add_websocket_route("/graphql", graphql_app)
+    app.include_router(monitoring_router)
+    app.include_router(admin_router)
+    app.include_router(photos_router)
+
+    # Con almacenamiento local, la propia app sirve las fotos subidas
+    storage = get_storage()
+    if isinstance(storage, LocalStorage):
+        os.makedirs(storage.root, exist_ok=True)
+        app.mount("/media", StaticFiles(directory=storage.root), name="media")
 
     # ✅ 4. El antiguo bloque @app.on_event("startup") se elimina
     
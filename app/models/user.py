@@ -4,18 +4,34 @@ Definición del modelo de usuario usando Pydantic.
 Este modelo representa la estructura de datos que se almacenará en MongoDB y que
 se enviará/recibirá a través del API GraphQL. Incluye utilidades para
 hashing de contraseñas.
+
+El login no valida el documento completo: sólo `Credentials` (email y hash), y el
+email de entrada se comprueba con un `TypeAdapter` compilado una sola vez.
+
+Los emails se guardan normalizados (`normalize_email`) en el registro, el login y la
+importación masiva, para que el índice único `email_unique` detecte también los
+duplicados que sólo difieren en mayúsculas.
 """
 
+import asyncio
 from datetime import date, time, datetime
 from typing import List, Optional
 
 from bson import ObjectId
-from pydantic import BaseModel, Field, EmailStr, ConfigDict
+from pydantic import BaseModel, Field, EmailStr, ConfigDict, TypeAdapter
 from passlib.context import CryptContext
 
 
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
+# Validador del email del login, reutilizado entre peticiones
+email_adapter = TypeAdapter(EmailStr)
+
+
+def normalize_email(email: str) -> str:
+    """Forma canónica con la que se guarda y se busca un email."""
+    return email.strip().lower()
+
 
 class UserInfo(BaseModel):
     height: Optional[int] = None
@@ -67,6 +83,7 @@ class UserModel(BaseModel):
     longitude: Optional[float] = None
     timezone: Optional[str] = None
     natal_chart: Optional[NatalChart] = None
+    chart_status: Optional[str] = None  # pending | ready | failed
     created_at: Optional[datetime] = None
     updated_at: Optional[datetime] = None
     plan: str = "free"
@@ -92,3 +109,22 @@ class UserModel(BaseModel):
 
     def verify_password(self, password: str) -> bool:
         return pwd_context.verify(password, self.password_hash)
+
+
+class Credentials(BaseModel):
+    """Lo único que necesita el login para comprobar la contraseña."""
+    email: str
+    password_hash: str
+
+    @classmethod
+    def from_document(cls, user_data: dict) -> "Credentials":
+        # Con dos `str`, validar es más barato que `model_construct` (ver
+        # benchmarks/login_validation.py); lo caro era validar el documento entero
+        return cls.model_validate({"email": user_data["email"], "password_hash": user_data["password_hash"]})
+
+    def verify_password(self, password: str) -> bool:
+        return pwd_context.verify(password, self.password_hash)
+
+    async def verify_password_async(self, password: str) -> bool:
+        # bcrypt tarda cientos de ms y suelta el GIL: se ejecuta en un hilo
+        return await asyncio.to_thread(self.verify_password, password)
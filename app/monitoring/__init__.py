@@ -0,0 +1,7 @@
+"""
+Utilidades de observabilidad del proceso (latencia del event loop, métricas).
+"""
+
+from .loop_lag import get_loop_monitor, start_loop_monitor, stop_loop_monitor
+
+__all__ = ["get_loop_monitor", "start_loop_monitor", "stop_loop_monitor"]
@@ -0,0 +1,85 @@
+"""
+Drenado ordenado del worker al apagarse.
+
+`DrainMiddleware` cuenta las peticiones HTTP en curso en el `Drain` de la aplicación
+(`app.state.drain`, ver `app.main.create_app`). Al empezar el apagado, el `lifespan`
+llama a `Drain.begin()`: desde ese momento `/health/ready` responde 503 para que el
+balanceador deje de enviar tráfico, las peticiones nuevas reciben un 503 con
+`Connection: close` y `Drain.wait()` espera a que terminen las que ya estaban en
+curso antes de cerrar los clientes de base de datos. Las sondas de salud siguen
+respondiendo durante el drenado.
+
+- `DRAIN_TIMEOUT_S`: espera máxima a las peticiones en curso (por defecto `20`)
+"""
+
+import asyncio
+import os
+import time
+from typing import Dict, Iterable
+
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+DRAIN_TIMEOUT_S = float(os.getenv("DRAIN_TIMEOUT_S", "20"))
+
+# Rutas que se siguen atendiendo mientras el proceso drena (y que no se cuentan)
+HEALTH_PATHS = ("/health/live", "/health/ready")
+
+
+class Drain:
+    """Estado de drenado del proceso y número de peticiones HTTP en curso."""
+
+    def __init__(self):
+        self.draining = False
+        self.in_flight = 0
+
+    def begin(self) -> None:
+        self.draining = True
+
+    async def wait(self, timeout: float = DRAIN_TIMEOUT_S) -> bool:
+        """Espera a que no quede ninguna petición en curso; `False` si vence `timeout`."""
+        deadline = time.monotonic() + timeout
+        while self.in_flight > 0:
+            if time.monotonic() >= deadline:
+                return False
+            await asyncio.sleep(0.05)
+        return True
+
+    def stats(self) -> Dict:
+        return {"draining": self.draining, "in_flight": self.in_flight}
+
+
+class DrainMiddleware:
+    """Rechaza las peticiones nuevas mientras el proceso drena y cuenta las demás."""
+
+    def __init__(self, app: ASGIApp, drain: Drain, exempt_paths: Iterable[str] = HEALTH_PATHS):
+        self.app = app
+        self.drain = drain
+        self.exempt_paths = frozenset(exempt_paths)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] not in ("http", "websocket") or scope["path"] in self.exempt_paths:
+            await self.app(scope, receive, send)
+            return
+
+        if self.drain.draining:
+            if scope["type"] == "websocket":
+                await send({"type": "websocket.close", "code": 1001})  # Going away
+            else:
+                response = JSONResponse(
+                    status_code=503,
+                    content={"detail": "Server is shutting down"},
+                    headers={"Connection": "close", "Retry-After": "1"},
+                )
+                await response(scope, receive, send)
+            return
+
+        if scope["type"] == "websocket":
+            # Las suscripciones pueden durar horas: no retienen el apagado
+            await self.app(scope, receive, send)
+            return
+        self.drain.in_flight += 1
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self.drain.in_flight -= 1
@@ -0,0 +1,241 @@
+"""
+Monitor de latencia del event loop y detector de llamadas bloqueantes.
+
+El muestreador duerme `interval` segundos en bucle y mide cuánto tarda el loop en
+despertarlo; el exceso sobre el intervalo es la latencia ("lag") que sufre cualquier
+petición en ese instante. Con el modo debug activado, un hilo vigía hace ping al loop
+y, si no responde en `block_threshold` segundos, captura la pila del hilo del loop
+para identificar qué código (y qué resolver) lo está reteniendo.
+
+Se configura con variables de entorno y se arranca desde el `lifespan` de `app.main`:
+
+- `LOOP_MONITOR_ENABLED` (por defecto `true`)
+- `LOOP_MONITOR_INTERVAL_MS` (por defecto `100`)
+- `LOOP_MONITOR_WINDOW` número de muestras retenidas (por defecto `600`)
+- `LOOP_MONITOR_DEBUG` activa la captura de pilas (por defecto `false`)
+- `LOOP_MONITOR_BLOCK_THRESHOLD_MS` (por defecto `100`)
+"""
+
+import asyncio
+import logging
+import os
+import sys
+import sysconfig
+import threading
+import time
+import traceback
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Deque, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Directorios cuyas tramas no se consideran "culpables" (stdlib y dependencias)
+_LIBRARY_PATHS = tuple(
+    os.path.realpath(p)
+    for p in {sysconfig.get_paths()["stdlib"], sysconfig.get_paths()["purelib"], sysconfig.get_paths()["platlib"]}
+)
+_RESOLVER_MODULE_PREFIX = "app.api"
+
+
+def _env_flag(name: str, default: bool) -> bool:
+    return os.getenv(name, str(default)).strip().lower() in {"1", "true", "yes", "on"}
+
+
+@dataclass
+class BlockingCall:
+    """Una retención del event loop detectada por el hilo vigía."""
+    started_at: float
+    duration: float
+    location: Optional[str]
+    resolver: Optional[str]
+    stack: List[str] = field(default_factory=list)
+
+    def to_dict(self) -> Dict:
+        return {
+            "started_at": self.started_at,
+            "duration_ms": round(self.duration * 1000, 2),
+            "location": self.location,
+            "resolver": self.resolver,
+            "stack": self.stack,
+        }
+
+
+def _describe(frame) -> str:
+    module = frame.f_globals.get("__name__", "?")
+    return f"{module}.{frame.f_code.co_qualname}:{frame.f_lineno}"
+
+
+def _is_library_frame(frame) -> bool:
+    filename = os.path.realpath(frame.f_code.co_filename)
+    return filename == os.path.realpath(__file__) or filename.startswith(_LIBRARY_PATHS)
+
+
+def _find_culprits(frame) -> tuple[Optional[str], Optional[str]]:
+    """
+    Devuelve `(location, resolver)`: la trama más interna que pertenece al código de
+    la aplicación y la trama más interna dentro de `app.api` (resolvers GraphQL).
+    """
+    location = resolver = None
+    while frame is not None:
+        if location is None and not _is_library_frame(frame):
+            location = _describe(frame)
+        if resolver is None and frame.f_globals.get("__name__", "").startswith(_RESOLVER_MODULE_PREFIX):
+            resolver = _describe(frame)
+        if location and resolver:
+            break
+        frame = frame.f_back
+    return location, resolver
+
+
+class LoopLagMonitor:
+    """Muestrea la latencia del event loop y, opcionalmente, detecta bloqueos."""
+
+    def __init__(
+        self,
+        interval: float = 0.1,
+        window: int = 600,
+        debug: bool = False,
+        block_threshold: float = 0.1,
+        max_reports: int = 50,
+    ):
+        self.interval = interval
+        self.debug = debug
+        self.block_threshold = block_threshold
+        self._samples: Deque[float] = deque(maxlen=window)
+        self._blocking_calls: Deque[BlockingCall] = deque(maxlen=max_reports)
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._loop_thread_id: Optional[int] = None
+        self._task: Optional[asyncio.Task] = None
+        self._watchdog: Optional[threading.Thread] = None
+        self._stopping = threading.Event()
+
+    async def start(self) -> None:
+        """Arranca el muestreador (y el vigía en modo debug) en el loop actual."""
+        if self._task is not None:
+            return
+        self._loop = asyncio.get_running_loop()
+        self._loop_thread_id = threading.get_ident()
+        self._stopping.clear()
+        self._task = asyncio.create_task(self._sample_forever(), name="loop-lag-monitor")
+        if self.debug:
+            self._watchdog = threading.Thread(target=self._watch, name="loop-lag-watchdog", daemon=True)
+            self._watchdog.start()
+
+    async def stop(self) -> None:
+        """Detiene el muestreador y el hilo vigía."""
+        self._stopping.set()
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self._watchdog is not None:
+            await asyncio.to_thread(self._watchdog.join, self.block_threshold * 2)
+            self._watchdog = None
+
+    async def _sample_forever(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            expected = loop.time() + self.interval
+            await asyncio.sleep(self.interval)
+            self._samples.append(max(0.0, loop.time() - expected))
+
+    def _watch(self) -> None:
+        """
+        Hilo vigía: programa un callback en el loop y espera a que se ejecute. Si el
+        loop no lo atiende a tiempo, captura la pila del hilo del loop y sigue
+        esperando para medir la duración total del bloqueo.
+        """
+        poll = max(self.block_threshold / 4, 0.005)
+        while not self._stopping.is_set():
+            answered = threading.Event()
+            sent_at = time.monotonic()
+            try:
+                self._loop.call_soon_threadsafe(answered.set)
+            except RuntimeError:
+                return  # El loop se ha cerrado
+            if answered.wait(self.block_threshold):
+                self._stopping.wait(poll)
+                continue
+
+            report = self._capture(sent_at)
+            while not answered.wait(poll):
+                if self._stopping.is_set():
+                    return
+            report.duration = time.monotonic() - sent_at
+            self._blocking_calls.append(report)
+            logger.warning(
+                "Event loop bloqueado %.0f ms por %s (resolver: %s)\n%s",
+                report.duration * 1000,
+                report.location,
+                report.resolver,
+                "".join(report.stack),
+            )
+
+    def _capture(self, sent_at: float) -> BlockingCall:
+        frame = sys._current_frames().get(self._loop_thread_id)
+        location, resolver = _find_culprits(frame)
+        stack = traceback.format_stack(frame) if frame is not None else []
+        return BlockingCall(
+            started_at=time.time() - (time.monotonic() - sent_at),
+            duration=time.monotonic() - sent_at,
+            location=location,
+            resolver=resolver,
+            stack=stack,
+        )
+
+    @property
+    def blocking_calls(self) -> List[BlockingCall]:
+        return list(self._blocking_calls)
+
+    def percentiles(self, *quantiles: float) -> Dict[str, float]:
+        """Percentiles de latencia en milisegundos sobre la ventana actual."""
+        samples = sorted(self._samples)
+        if not samples:
+            return {f"p{q:g}_ms": 0.0 for q in quantiles}
+        last = len(samples) - 1
+        return {f"p{q:g}_ms": round(samples[min(last, int(q / 100 * len(samples)))] * 1000, 3) for q in quantiles}
+
+    def stats(self) -> Dict:
+        """Resumen listo para exponer en un endpoint de métricas."""
+        return {
+            "samples": len(self._samples),
+            "interval_ms": self.interval * 1000,
+            **self.percentiles(50, 90, 99),
+            "max_ms": round(max(self._samples, default=0.0) * 1000, 3),
+            "debug": self.debug,
+            "blocking_calls": [call.to_dict() for call in self._blocking_calls],
+        }
+
+
+loop_monitor: Optional[LoopLagMonitor] = None
+
+
+async def start_loop_monitor() -> Optional[LoopLagMonitor]:
+    """Crea y arranca el monitor global según las variables de entorno."""
+    global loop_monitor
+    if loop_monitor is None and _env_flag("LOOP_MONITOR_ENABLED", True):
+        loop_monitor = LoopLagMonitor(
+            interval=int(os.getenv("LOOP_MONITOR_INTERVAL_MS", "100")) / 1000,
+            window=int(os.getenv("LOOP_MONITOR_WINDOW", "600")),
+            debug=_env_flag("LOOP_MONITOR_DEBUG", False),
+            block_threshold=int(os.getenv("LOOP_MONITOR_BLOCK_THRESHOLD_MS", "100")) / 1000,
+        )
+        await loop_monitor.start()
+    return loop_monitor
+
+
+async def stop_loop_monitor() -> None:
+    """Detiene el monitor global, si está activo."""
+    global loop_monitor
+    if loop_monitor is not None:
+        await loop_monitor.stop()
+        loop_monitor = None
+
+
+def get_loop_monitor() -> Optional[LoopLagMonitor]:
+    """Devuelve el monitor global (o `None` si está desactivado)."""
+    return loop_monitor
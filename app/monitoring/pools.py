@@ -0,0 +1,113 @@
+"""
+Métricas de utilización de los pools de conexiones de MongoDB y Redis.
+
+Para MongoDB se registra un `ConnectionPoolListener` de PyMongo al crear el cliente
+(ver `app.db.client`); para Redis se leen los contadores del propio pool.
+"""
+
+import threading
+from collections import defaultdict
+from typing import Dict, Optional
+
+from pymongo import monitoring
+
+
+class MongoPoolMetrics(monitoring.ConnectionPoolListener):
+    """
+    Cuenta conexiones abiertas, en uso y esperas por servidor. PyMongo invoca los
+    eventos desde sus propios hilos, así que los contadores se protegen con un lock.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._open: Dict[str, int] = defaultdict(int)
+        self._checked_out: Dict[str, int] = defaultdict(int)
+        self._waiting: Dict[str, int] = defaultdict(int)
+        self._checkout_failures: Dict[str, int] = defaultdict(int)
+
+    @staticmethod
+    def _key(event) -> str:
+        host, port = event.address
+        return f"{host}:{port}"
+
+    def _add(self, counter: Dict[str, int], event, delta: int) -> None:
+        with self._lock:
+            counter[self._key(event)] += delta
+
+    def pool_created(self, event):
+        pass
+
+    def pool_ready(self, event):
+        pass
+
+    def pool_cleared(self, event):
+        pass
+
+    def pool_closed(self, event):
+        with self._lock:
+            key = self._key(event)
+            for counter in (self._open, self._checked_out, self._waiting):
+                counter.pop(key, None)
+
+    def connection_created(self, event):
+        self._add(self._open, event, 1)
+
+    def connection_ready(self, event):
+        pass
+
+    def connection_closed(self, event):
+        self._add(self._open, event, -1)
+
+    def connection_check_out_started(self, event):
+        self._add(self._waiting, event, 1)
+
+    def connection_check_out_failed(self, event):
+        with self._lock:
+            key = self._key(event)
+            self._waiting[key] -= 1
+            self._checkout_failures[key] += 1
+
+    def connection_checked_out(self, event):
+        with self._lock:
+            key = self._key(event)
+            self._waiting[key] -= 1
+            self._checked_out[key] += 1
+
+    def connection_checked_in(self, event):
+        self._add(self._checked_out, event, -1)
+
+    @property
+    def in_use(self) -> int:
+        with self._lock:
+            return sum(self._checked_out.values())
+
+    def snapshot(self, max_pool_size: Optional[int] = None) -> Dict:
+        with self._lock:
+            servers = {
+                key: {
+                    "open": self._open.get(key, 0),
+                    "in_use": self._checked_out.get(key, 0),
+                    "waiting": self._waiting.get(key, 0),
+                    "checkout_failures": self._checkout_failures.get(key, 0),
+                }
+                for key in set(self._open) | set(self._checked_out) | set(self._checkout_failures)
+            }
+        for stats in servers.values():
+            if max_pool_size:
+                stats["utilization"] = round(stats["in_use"] / max_pool_size, 3)
+        return {"max_pool_size": max_pool_size, "servers": servers}
+
+
+def redis_pool_snapshot(pool) -> Dict:
+    """Conexiones en uso/disponibles de un `redis.asyncio.ConnectionPool`."""
+    in_use = len(pool._in_use_connections)
+    available = len(pool._available_connections)
+    return {
+        "max_connections": pool.max_connections,
+        "in_use": in_use,
+        "available": available,
+        "utilization": round(in_use / pool.max_connections, 3),
+    }
+
+
+mongo_pool_metrics = MongoPoolMetrics()
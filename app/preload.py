@@ -0,0 +1,55 @@
+"""
+Precarga de datos inmutables antes del fork de los workers.
+
+`gunicorn.conf.py` llama a `warm()` en el proceso maestro para que los workers
+hereden (copy-on-write) las tablas ya cargadas: el `TimezoneFinder` en memoria,
+las zonas horarias y los ficheros de efemérides en la caché de páginas del sistema.
+Tras el fork, `after_fork()` descarta el estado que no debe compartirse entre
+procesos (descriptores de fichero de Swiss Ephemeris y clientes de base de datos);
+cada worker abre sus propias conexiones en el `lifespan` de `app.main`.
+"""
+
+import os
+from datetime import datetime
+from zoneinfo import ZoneInfo, available_timezones
+
+import swisseph as swe
+
+from app.db import client as db_client
+from app.services.astrology_service import EPHE_PATH, PLANET_MAPPING, get_timezone_finder
+
+
+def _read_ephemeris_files() -> None:
+    """Lee los ficheros de efemérides para dejarlos en la caché de páginas del SO."""
+    for name in os.listdir(EPHE_PATH):
+        if name.endswith(".se1"):
+            with open(os.path.join(EPHE_PATH, name), "rb") as fh:
+                while fh.read(1 << 20):
+                    pass
+
+
+def warm() -> None:
+    """Carga en el proceso actual todas las tablas inmutables usadas por las peticiones."""
+    get_timezone_finder()
+    for key in available_timezones():
+        ZoneInfo(key)
+    _read_ephemeris_files()
+
+    # Un cálculo completo inicializa las tablas internas de Swiss Ephemeris
+    swe.set_ephe_path(EPHE_PATH)
+    jd = swe.julday(2000, 1, 1, 12.0)
+    for planet_id in PLANET_MAPPING.values():
+        swe.calc_ut(jd, planet_id, swe.FLG_SPEED)
+    swe.houses(jd, 0.0, 0.0, b'P')
+    print(f"Datos precargados en el proceso maestro ({datetime.now().isoformat(timespec='seconds')}).")
+
+
+def after_fork() -> None:
+    """Reinicia en el worker recién creado el estado ligado al proceso padre."""
+    # Swiss Ephemeris guarda descriptores de fichero abiertos; compartir su offset
+    # entre procesos provocaría lecturas cruzadas, así que cada worker los reabre.
+    swe.close()
+    swe.set_ephe_path(EPHE_PATH)
+    # Los clientes Mongo/Redis nunca deben cruzar un fork: se crean en el lifespan.
+    db_client.mongo_client = None
+    db_client.redis_client = None
@@ -1,11 +1,28 @@
 # app/services/astrology_service.py
+import asyncio
+import math
+import os
+import threading
+import numpy as np
 import swisseph as swe
-from datetime import datetime
+from bson import Binary
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from functools import lru_cache
+from typing import Callable, Dict, List, Optional, Sequence, Tuple, TypeVar, Union
 from geopy.geocoders import Nominatim
 from timezonefinder import TimezoneFinder
-from zoneinfo import ZoneInfo
 
 from ..models.user import NatalChart, AstrologicalPosition
+from . import places
+from .cache import cached
+from .gazetteer import normalize_place
+from .timezone_table import transition_table
+
+# Directory holding the Swiss Ephemeris data files (*.se1)
+EPHE_PATH = os.getenv("EPHE_PATH", "./ephe")
 
 # Mapping of Swiss Ephemeris planet indexes
 PLANET_MAPPING = {
@@ -24,6 +41,50 @@ PLANET_MAPPING = {
     "Lilith": swe.OSCU_APOG,  # Lilith (osculating lunar apogee)
 }
 
+# House systems offered to users and their Swiss Ephemeris codes. Whole Sign and
+# Equal houses are derived from the Ascendant (see ChartVariants.house_cusps).
+HOUSE_SYSTEMS = {
+    "placidus": b'P',
+    "koch": b'K',
+    "porphyry": b'O',
+    "regiomontanus": b'R',
+    "campanus": b'C',
+    "whole_sign": None,
+    "equal": None,
+}
+DEFAULT_HOUSE_SYSTEM = "placidus"
+# Stored chart when the default system is undefined (Placidus and Koch near the poles)
+FALLBACK_HOUSE_SYSTEM = "porphyry"
+
+# Sidereal modes (ayanamsas) offered to users
+AYANAMSAS = {
+    "lahiri": swe.SIDM_LAHIRI,
+    "fagan_bradley": swe.SIDM_FAGAN_BRADLEY,
+    "raman": swe.SIDM_RAMAN,
+    "krishnamurti": swe.SIDM_KRISHNAMURTI,
+}
+
+HOUSE_NAMES = ["Ascendant", "House 2", "House 3", "Imum Coeli", "House 5", "House 6",
+               "Descendant", "House 8", "House 9", "Midheaven", "House 11", "House 12"]
+
+# Bodies eligible for interpolation in EphemerisCache (they barely move within a day)
+SLOW_BODIES = {"Jupiter", "Saturn", "Uranus", "Neptune", "Pluto", "Chiron", "North Node"}
+
+# Worst-case error (arcseconds) of cubic Hermite interpolation between 0h UT nodes,
+# measured against direct calls over 1900-2100 with a 1.5x safety margin. The true
+# node wobbles with the Sun-Moon geometry and interpolates poorly.
+HERMITE_MAX_ERROR_ARCSEC = {
+    "Jupiter": 2.0,
+    "Saturn": 4.0,
+    "Uranus": 5.0,
+    "Neptune": 5.0,
+    "Pluto": 1.0,
+    "Chiron": 1.0,
+    "North Node": 110.0,
+}
+
+T = TypeVar("T")
+
 # Zodiac signs and their icons
 ZODIAC_SIGNS = [
     ("Aries", "♈️"), ("Taurus", "♉️"), ("Gemini", "♊️"), ("Cancer", "♋️"),
@@ -31,6 +92,20 @@ ZODIAC_SIGNS = [
     ("Sagittarius", "♐️"), ("Capricorn", "♑️"), ("Aquarius", "♒️"), ("Pisces", "♓️")
 ]
 
+_timezone_finder: Optional[TimezoneFinder] = None
+
+
+def get_timezone_finder() -> TimezoneFinder:
+    """
+    Returns a process-wide TimezoneFinder. Building one loads its polygon data, so it
+    is created once (and, under the multi-worker server, before forking so the
+    workers share its memory copy-on-write).
+    """
+    global _timezone_finder
+    if _timezone_finder is None:
+        _timezone_finder = TimezoneFinder(in_memory=True)
+    return _timezone_finder
+
 def get_zodiac_sign(longitude):
     """Returns the sign name and icon from a celestial longitude."""
     index = int(longitude / 30)
@@ -47,13 +122,124 @@ def get_zodiac_sign_index(sign_name):
         -1,
     )
 
-async def calculate_natal_chart(birth_datetime: datetime, birth_place: str):
+class EphemerisCache:
     """
-    Calculates the complete natal chart using Swiss Ephemeris.
-    Also determines the timezone based on coordinates.
-    Returns a tuple: (NatalChart, latitude, longitude, timezone_name)
+    Memoizes Swiss Ephemeris body positions.
+
+    Positions are keyed by planet and Julian day quantized to `quantum_seconds`
+    (birth times have minute resolution, so charts for the same minute share every
+    body) and kept in a bounded LRU. With `interpolate` on, bodies in `SLOW_BODIES`
+    whose worst-case error is within `tolerance_arcsec` are instead interpolated
+    (cubic Hermite, using positions and speeds) between 0h UT nodes, so every chart
+    for the same day shares two cached nodes per slow body.
     """
-    # 1. Geocode the birth place to get latitude and longitude
+
+    def __init__(
+        self,
+        maxsize: int = 65536,
+        quantum_seconds: float = 60.0,
+        interpolate: bool = False,
+        tolerance_arcsec: float = 5.0,
+    ):
+        self.maxsize = maxsize
+        self.quantum_days = quantum_seconds / 86400
+        self.interpolate = interpolate
+        self.tolerance_arcsec = tolerance_arcsec
+        self.interpolated_bodies = {
+            planet_id
+            for name, planet_id in PLANET_MAPPING.items()
+            if name in SLOW_BODIES and HERMITE_MAX_ERROR_ARCSEC[name] <= tolerance_arcsec
+        }
+        self._entries: "OrderedDict[Tuple[int, int], Tuple[float, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.interpolations = 0
+
+    def _cached(self, key: Tuple[int, int], julian_day: float) -> Tuple[float, float]:
+        with self._lock:
+            if (entry := self._entries.get(key)) is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry
+            self.misses += 1
+        position_data = swe.calc_ut(julian_day, key[0], swe.FLG_SPEED)[0]
+        entry = (position_data[0], position_data[3])
+        with self._lock:
+            self._entries[key] = entry
+            if len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+        return entry
+
+    def _node(self, planet_id: int, julian_day: float) -> Tuple[float, float]:
+        # Interpolation nodes are whole days; key them apart from quantized instants
+        return self._cached((planet_id, -int(julian_day + 0.5)), julian_day)
+
+    def position(self, julian_day: float, planet_id: int) -> Tuple[float, float]:
+        """Returns `(longitude, speed)` in degrees and degrees/day."""
+        if self.interpolate and planet_id in self.interpolated_bodies:
+            return self._interpolate(julian_day, planet_id)
+        quantum = round(julian_day / self.quantum_days)
+        return self._cached((planet_id, quantum), quantum * self.quantum_days)
+
+    def _interpolate(self, julian_day: float, planet_id: int) -> Tuple[float, float]:
+        self.interpolations += 1
+        start = math.floor(julian_day - 0.5) + 0.5  # Preceding 0h UT
+        lon0, speed0 = self._node(planet_id, start)
+        lon1, speed1 = self._node(planet_id, start + 1)
+        lon1 = lon0 + (lon1 - lon0 + 180) % 360 - 180  # Unwrap across 0°/360°
+        t = julian_day - start
+        t2, t3 = t * t, t * t * t
+        longitude = (
+            (2 * t3 - 3 * t2 + 1) * lon0 + (t3 - 2 * t2 + t) * speed0
+            + (-2 * t3 + 3 * t2) * lon1 + (t3 - t2) * speed1
+        )
+        speed = (
+            (6 * t2 - 6 * t) * lon0 + (3 * t2 - 4 * t + 1) * speed0
+            + (-6 * t2 + 6 * t) * lon1 + (3 * t2 - 2 * t) * speed1
+        )
+        return longitude % 360, speed
+
+    @property
+    def hit_ratio(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def info(self) -> dict:
+        return {
+            "size": len(self._entries),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hit_ratio, 4),
+            "interpolations": self.interpolations,
+        }
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.misses = self.interpolations = 0
+
+
+ephemeris_cache = EphemerisCache(
+    maxsize=int(os.getenv("EPHE_CACHE_SIZE", "65536")),
+    quantum_seconds=float(os.getenv("EPHE_CACHE_QUANTUM_SECONDS", "60")),
+    interpolate=os.getenv("EPHE_INTERPOLATE_SLOW_BODIES", "false").lower() in {"1", "true", "yes", "on"},
+    tolerance_arcsec=float(os.getenv("EPHE_INTERPOLATION_TOLERANCE_ARCSEC", "5")),
+)
+
+# Swiss Ephemeris keeps global state and is not thread-safe: every call goes through
+# this single thread, which also keeps the CPU-bound work off the event loop.
+_ephemeris_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="ephemeris")
+
+
+async def run_ephemeris(fn: Callable[..., T], *args) -> T:
+    """Runs `fn(*args)` on the ephemeris thread."""
+    return await asyncio.get_running_loop().run_in_executor(_ephemeris_executor, fn, *args)
+
+
+def resolve_birth_place(birth_place: str) -> Tuple[float, float, str]:
+    """Geocodes `birth_place` and returns `(latitude, longitude, timezone_name)`."""
     geolocator = Nominatim(user_agent="synastr_app")
     try:
         location = geolocator.geocode(birth_place)
@@ -66,71 +252,301 @@ async def calculate_natal_chart(birth_datetime: datetime, birth_place: str):
 
     latitude, longitude = location.latitude, location.longitude
 
-    # 2. Determine timezone using timezonefinder
-    tf = TimezoneFinder()
-    timezone_name = tf.timezone_at(lng=longitude, lat=latitude)
+    timezone_name = get_timezone_finder().timezone_at(lng=longitude, lat=latitude)
     if not timezone_name:
         raise ValueError("Could not determine timezone for the given location.")
+    return latitude, longitude, timezone_name
 
-    # 3. Convert birth datetime to local timezone and then to UTC
-    local_tz = ZoneInfo(timezone_name)
-    birth_local = birth_datetime.replace(tzinfo=local_tz)
-    birth_dt_utc = birth_local.astimezone(ZoneInfo("UTC"))
 
-    # 4. Set path for Swiss Ephemeris
-    swe.set_ephe_path('./ephe')
+_UNIX_EPOCH = datetime(1970, 1, 1)
+_UNIX_EPOCH_JD = 2440587.5
+
+
+def julian_day_utc(birth_datetime: datetime, timezone_name: str, fold: str = "earlier", gap: str = "shift") -> float:
+    """
+    Interprets `birth_datetime` as local time in `timezone_name` and returns its UT
+    Julian day. Local times that occur twice or never (DST changes) are resolved by
+    the `fold`/`gap` policies of `app.services.timezone_table`; the defaults match
+    `ZoneInfo` with `fold=0`.
+    """
+    local_seconds = (birth_datetime.replace(tzinfo=None) - _UNIX_EPOCH) // timedelta(seconds=1)
+    utc_seconds = int(transition_table(timezone_name).to_utc([local_seconds], fold=fold, gap=gap)[0])
+    birth_dt_utc = datetime.fromtimestamp(utc_seconds, timezone.utc)
 
-    # 5. Calculate Julian day in UTC
-    julian_day_utc = swe.utc_to_jd(
+    return swe.utc_to_jd(
         birth_dt_utc.year, birth_dt_utc.month, birth_dt_utc.day,
         birth_dt_utc.hour, birth_dt_utc.minute, birth_dt_utc.second,
         1  # Gregorian calendar
     )[1]
 
-    chart = NatalChart()
 
-    # 6. Calculate astrological houses (Placidus)
-    houses_cusps, ascmc = swe.houses(julian_day_utc, latitude, longitude, b'P')
+@lru_cache(maxsize=65536)
+def _ut1_correction(unix_day: int) -> float:
+    """UT1 minus UTC, in days, at 0h UTC of a day (what `swe.utc_to_jd` adds)."""
+    day = _UNIX_EPOCH + timedelta(days=unix_day)
+    return swe.utc_to_jd(day.year, day.month, day.day, 0, 0, 0, 1)[1] - (unix_day + _UNIX_EPOCH_JD)
 
-    # 7. Calculate planetary positions
-    for name, planet_id in PLANET_MAPPING.items():
-        position_data = swe.calc_ut(julian_day_utc, planet_id, swe.FLG_SPEED)
-        planet_longitude = position_data[0][0]
-        sign, icon = get_zodiac_sign(planet_longitude)
 
-        # Determine which house the planet falls into
-        planet_house_number = 0
-        for i in range(12):
-            cusp_start = houses_cusps[i]
-            cusp_end = houses_cusps[(i + 1) % 12]
+def julian_days_utc(
+    local: np.ndarray, timezone_name: str, fold: str = "earlier", gap: str = "shift"
+) -> np.ndarray:
+    """
+    Vectorized `julian_day_utc` for an array of naive local `datetime64` values in
+    one zone. UT1 - UTC changes only with leap seconds and by milliseconds per day,
+    so it is looked up once per distinct day.
+    """
+    local_seconds = np.asarray(local, dtype="datetime64[s]").astype(np.int64)
+    utc_seconds = transition_table(timezone_name).to_utc(local_seconds, fold=fold, gap=gap)
+    days, inverse = np.unique(utc_seconds // 86400, return_inverse=True)
+    correction = np.array([_ut1_correction(int(day)) for day in days])
+    return utc_seconds / 86400 + _UNIX_EPOCH_JD + correction[inverse]
 
-            if (cusp_start > cusp_end and (planet_longitude >= cusp_start or planet_longitude < cusp_end)) or \
-               (cusp_start <= cusp_end and cusp_start <= planet_longitude < cusp_end):
-                planet_house_number = i + 1
-                break
 
-        chart.positions.append(AstrologicalPosition(
-            name=name,
-            sign=sign,
-            sign_icon=icon,
-            degrees=planet_longitude % 30,
-            house=planet_house_number
-        ))
+def julian_days_by_zone(births: Sequence[Tuple[datetime, str]]) -> List[Union[float, Exception]]:
+    """
+    `julian_day_utc` for many `(local datetime, timezone name)` pairs, vectorized per
+    zone. Rows of a zone that cannot be loaded get the exception instead.
+    """
+    results: List[Union[float, Exception]] = [None] * len(births)
+    by_zone: Dict[str, List[int]] = {}
+    for i, (_, timezone_name) in enumerate(births):
+        by_zone.setdefault(timezone_name, []).append(i)
+    for timezone_name, rows in by_zone.items():
+        local = np.array([births[i][0].replace(tzinfo=None) for i in rows], dtype="datetime64[s]")
+        try:
+            julian_days = julian_days_utc(local, timezone_name)
+        except Exception as e:
+            julian_days = [e] * len(rows)
+        for i, julian_day in zip(rows, julian_days):
+            results[i] = julian_day if isinstance(julian_day, Exception) else float(julian_day)
+    return results
 
-    # 8. Store house cusps
-    house_names = ["Ascendant", "House 2", "House 3", "Imum Coeli", "House 5", "House 6",
-                   "Descendant", "House 8", "House 9", "Midheaven", "House 11", "House 12"]
 
+def _house_of(longitude: float, cusps: Sequence[float]) -> int:
+    """House number (1-12) of `longitude` between consecutive `cusps` (0 if none)."""
     for i in range(12):
-        house_longitude = houses_cusps[i]
-        sign, icon = get_zodiac_sign(house_longitude)
-        chart.houses.append(AstrologicalPosition(
-            name=house_names[i],
-            sign=sign,
-            sign_icon=icon,
-            degrees=house_longitude % 30,
-            house=i + 1
-        ))
-
-    # Return chart with location and timezone info
-    return chart, latitude, longitude, timezone_name
+        cusp_start = cusps[i]
+        cusp_end = cusps[(i + 1) % 12]
+
+        if (cusp_start > cusp_end and (longitude >= cusp_start or longitude < cusp_end)) or \
+           (cusp_start <= cusp_end and cusp_start <= longitude < cusp_end):
+            return i + 1
+    return 0
+
+
+def _position(name: str, longitude: float, house: int) -> AstrologicalPosition:
+    sign, icon = get_zodiac_sign(longitude)
+    return AstrologicalPosition(name=name, sign=sign, sign_icon=icon, degrees=longitude % 30, house=house)
+
+
+@dataclass(frozen=True)
+class ChartVariants:
+    """
+    Everything needed to derive a chart in any supported house system and zodiac
+    from a single ephemeris pass: tropical planet longitudes, the Ascendant, the
+    cusps of each quadrant house system and the ayanamsa of each sidereal mode.
+
+    Whole Sign and Equal houses follow from the Ascendant, and a sidereal chart is
+    the tropical one shifted by the ayanamsa (identical to `FLG_SIDEREAL`), so no
+    variant needs another ephemeris call.
+    """
+    planets: np.ndarray  # Tropical longitudes, in PLANET_MAPPING order
+    ascendant: float
+    cusps: Dict[str, np.ndarray]  # Quadrant house system -> 12 tropical cusps
+    ayanamsas: Dict[str, float]
+
+    def house_cusps(self, house_system: str, ayanamsa: float = 0.0) -> Optional[np.ndarray]:
+        """Cusps in the zodiac shifted by `ayanamsa`, or None if unavailable (polar latitudes)."""
+        if self.ascendant is None:
+            return None
+        ascendant = (self.ascendant - ayanamsa) % 360
+        if house_system == "whole_sign":
+            return (ascendant // 30 * 30 + 30 * np.arange(12)) % 360
+        if house_system == "equal":
+            return (ascendant + 30 * np.arange(12)) % 360
+        if house_system not in HOUSE_SYSTEMS:
+            raise ValueError(f"Unknown house system: {house_system}")
+        cusps = self.cusps.get(house_system)
+        return (cusps - ayanamsa) % 360 if cusps is not None else None
+
+    def chart(self, house_system: str = DEFAULT_HOUSE_SYSTEM, ayanamsa: Optional[str] = None) -> Optional[NatalChart]:
+        """The chart in `house_system`, tropical or sidereal with the `ayanamsa` mode."""
+        shift = self.ayanamsas[ayanamsa] if ayanamsa else 0.0
+        cusps = self.house_cusps(house_system, shift)
+        if cusps is None:
+            return None
+        planets = (self.planets - shift) % 360
+        return NatalChart(
+            positions=[
+                _position(name, float(longitude), _house_of(longitude, cusps))
+                for name, longitude in zip(PLANET_MAPPING, planets)
+            ],
+            houses=[_position(HOUSE_NAMES[i], float(cusps[i]), i + 1) for i in range(12)],
+        )
+
+    def natal_chart(self) -> Optional[NatalChart]:
+        """The chart stored as `natal_chart`: Placidus, or Porphyry where Placidus is undefined."""
+        return self.chart() or self.chart(FALLBACK_HOUSE_SYSTEM)
+
+    def to_document(self) -> dict:
+        """Compact BSON form: float32 arrays (~0.1 arcsecond resolution)."""
+        return {
+            "planets": Binary(self.planets.astype("<f4").tobytes()),
+            "ascendant": self.ascendant,
+            "cusps": {name: Binary(cusps.astype("<f4").tobytes()) for name, cusps in self.cusps.items()},
+            "ayanamsas": dict(self.ayanamsas),
+        }
+
+    @classmethod
+    def from_document(cls, doc: dict) -> "ChartVariants":
+        return cls(
+            planets=np.frombuffer(doc["planets"], dtype="<f4").astype(np.float64),
+            ascendant=doc["ascendant"],
+            cusps={name: np.frombuffer(raw, dtype="<f4").astype(np.float64) for name, raw in doc["cusps"].items()},
+            ayanamsas=doc["ayanamsas"],
+        )
+
+
+def compute_chart_variants(julian_day: float, latitude: float, longitude: float) -> ChartVariants:
+    """Computes every chart variant for a UT Julian day and location (synchronous, CPU-bound)."""
+    swe.set_ephe_path(EPHE_PATH)
+    planets = np.array([ephemeris_cache.position(julian_day, planet_id)[0] for planet_id in PLANET_MAPPING.values()])
+
+    ascendant, cusps = None, {}
+    for name, code in HOUSE_SYSTEMS.items():
+        if code is None:
+            continue
+        try:
+            house_cusps, ascmc = swe.houses(julian_day, latitude, longitude, code)
+        except swe.Error:
+            continue  # Placidus and Koch are undefined near the poles
+        cusps[name] = np.array(house_cusps[:12])
+        ascendant = ascmc[0]
+
+    ayanamsas = {}
+    for name, mode in AYANAMSAS.items():
+        swe.set_sid_mode(mode)
+        ayanamsas[name] = swe.get_ayanamsa_ex_ut(julian_day, swe.FLG_SWIEPH)[1]
+    return ChartVariants(planets=planets, ascendant=ascendant, cusps=cusps, ayanamsas=ayanamsas)
+
+
+def compute_natal_chart(julian_day: float, latitude: float, longitude: float) -> Optional[NatalChart]:
+    """
+    Builds the stored natal chart (synchronous, CPU-bound): tropical Placidus, or
+    Porphyry where Placidus is undefined. None only without an Ascendant.
+    """
+    return compute_chart_variants(julian_day, latitude, longitude).natal_chart()
+
+
+def _dump_variants_result(result) -> list:
+    variants, latitude, longitude, timezone_name = result
+    return [variants.to_document(), latitude, longitude, timezone_name]
+
+
+def _load_variants_result(value: list):
+    document, latitude, longitude, timezone_name = value
+    return ChartVariants.from_document(document), latitude, longitude, timezone_name
+
+
+# A birth moment and place always give the same chart: entries only expire so that
+# unused ones leave Redis. Keyed on the normalized place, like `places`.
+@cached(
+    "chart_variants",
+    ttl=7 * 86400,
+    stale_ttl=30 * 86400,
+    key=lambda birth_datetime, birth_place: (birth_datetime.isoformat(), normalize_place(birth_place)),
+    dump=_dump_variants_result,
+    load=_load_variants_result,
+)
+async def calculate_chart_variants(birth_datetime: datetime, birth_place: str):
+    """
+    Calculates every chart variant using Swiss Ephemeris.
+    Also determines the timezone based on coordinates.
+    Returns a tuple: (ChartVariants, latitude, longitude, timezone_name). Results are
+    cached in Redis per birth moment and place (see `app.services.cache`), so the
+    variants always come from their stored float32 form.
+    """
+    # 1. Look the birth place up in `places`, geocoding it (off the event loop) only
+    #    the first time it is seen
+    place = await places.resolve_place(birth_place, resolve_birth_place, source="nominatim")
+    latitude, longitude, timezone_name = place.latitude, place.longitude, place.timezone
+
+    # 2. Convert the local birth time to a UT Julian day, also on the ephemeris thread:
+    #    the first time a process sees a zone it builds its transition table
+    julian_day = await run_ephemeris(julian_day_utc, birth_datetime, timezone_name)
+
+    # 3. Compute positions, houses and ayanamsas on the ephemeris thread
+    variants = await run_ephemeris(compute_chart_variants, julian_day, latitude, longitude)
+
+    # Return variants with location and timezone info
+    return variants, latitude, longitude, timezone_name
+
+
+async def calculate_natal_chart(birth_datetime: datetime, birth_place: str):
+    """
+    Calculates the complete tropical natal chart using Swiss Ephemeris (Placidus,
+    or Porphyry where Placidus is undefined; None only without an Ascendant).
+    Returns a tuple: (NatalChart, latitude, longitude, timezone_name)
+    """
+    variants, latitude, longitude, timezone_name = await calculate_chart_variants(birth_datetime, birth_place)
+    return variants.natal_chart(), latitude, longitude, timezone_name
+
+
+def midpoint_longitude(a, b):
+    """Midpoint of two longitudes along the shorter arc (works on scalars and arrays)."""
+    return (a + ((b - a + 180) % 360 - 180) / 2) % 360
+
+
+def stored_chart_longitudes(natal_chart: dict) -> Tuple[np.ndarray, np.ndarray]:
+    """Absolute planet longitudes (PLANET_MAPPING order) and the 12 cusps of a stored chart."""
+    positions = {p["name"]: p for p in natal_chart["positions"]}
+    planets = np.array([
+        get_zodiac_sign_index(positions[name]["sign"]) * 30 + positions[name]["degrees"]
+        for name in PLANET_MAPPING
+    ])
+    cusps = np.array([get_zodiac_sign_index(h["sign"]) * 30 + h["degrees"] for h in natal_chart["houses"]])
+    return planets, cusps
+
+
+def compute_composite_chart(chart_a: dict, chart_b: dict) -> NatalChart:
+    """
+    Composite chart of two stored natal charts: the midpoint of each pair of planets
+    and of each pair of house cusps. Pure arithmetic, no ephemeris call.
+    """
+    planets_a, cusps_a = stored_chart_longitudes(chart_a)
+    planets_b, cusps_b = stored_chart_longitudes(chart_b)
+    planets = midpoint_longitude(planets_a, planets_b)
+    cusps = midpoint_longitude(cusps_a, cusps_b)
+    return NatalChart(
+        positions=[
+            _position(name, float(longitude), _house_of(longitude, cusps))
+            for name, longitude in zip(PLANET_MAPPING, planets)
+        ],
+        houses=[_position(HOUSE_NAMES[i], float(cusps[i]), i + 1) for i in range(12)],
+    )
+
+
+def davison_moment(
+    julian_day_a: float, latitude_a: float, longitude_a: float,
+    julian_day_b: float, latitude_b: float, longitude_b: float,
+) -> Tuple[float, float, float]:
+    """
+    Midpoint in time and space of two births: the mean UT Julian day, the mean
+    latitude and the midpoint of the longitudes along the shorter arc.
+    """
+    longitude = midpoint_longitude(longitude_a % 360, longitude_b % 360)
+    return (julian_day_a + julian_day_b) / 2, (latitude_a + latitude_b) / 2, (longitude + 180) % 360 - 180
+
+
+def compute_davison_chart(
+    julian_day_a: float, latitude_a: float, longitude_a: float,
+    julian_day_b: float, latitude_b: float, longitude_b: float,
+) -> Optional[NatalChart]:
+    """
+    Davison chart: a regular natal chart cast for `davison_moment` (synchronous,
+    CPU-bound), with the same Porphyry fallback near the poles. None only if there
+    is no Ascendant at the midpoint.
+    """
+    return compute_natal_chart(*davison_moment(
+        julian_day_a, latitude_a, longitude_a, julian_day_b, latitude_b, longitude_b
+    ))
@@ -0,0 +1,391 @@
+# app/services/bulk_import.py
+"""
+Importación masiva de usuarios con la carta natal ya calculada.
+
+A diferencia de `sign_up`, que deja la carta pendiente para el worker, aquí cada
+fila se procesa en etapas y llega a MongoDB completa (`chart_status: ready`):
+
+1. `parse`: se valida la fila (CSV o NDJSON, ver `parse_row`).
+2. `geocode`: el lugar de nacimiento se busca en `places` (una consulta por bloque con
+   los lugares distintos, ver `app.services.places`) y, si no está, contra un
+   `Gazetteer` local, cuyos resultados se guardan en `places`. Se omite si la fila
+   trae `latitude`/`longitude`.
+3. `compute`: carta natal y hash de la contraseña en un pool de procesos, por
+   bloques. Si la fila trae `password_hash` (bcrypt) se usa tal cual.
+4. `insert`: `insert_many(ordered=False)` por lotes; los duplicados (índice único
+   de `email`) se cuentan y no detienen el lote.
+
+`ImportReport` acumula el tiempo ocupado de cada etapa para informar de filas por
+segundo en cada una y localizar el cuello de botella.
+"""
+import asyncio
+import csv
+import json
+import multiprocessing
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from datetime import date, datetime, timedelta, timezone
+from datetime import time as dt_time
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+import swisseph as swe
+from pymongo.errors import BulkWriteError
+
+from app.db.client import get_mongo_db
+from app.models.user import UserModel, normalize_email
+from app.services import candidate_index, places
+from app.services.astrology_service import EPHE_PATH, compute_chart_variants, get_timezone_finder, julian_days_by_zone
+from app.services.chart_jobs import CHART_READY
+from app.services.gazetteer import BUILTIN_PLACES, Gazetteer, Place, normalize_place
+
+GENDERS = ["Male", "Female", "Non-binary", "Other"]
+LOOKING_FOR = ["Serious relationship", "Casual relationship", "Friendship"]
+
+DUPLICATE_KEY_ERROR = 11000
+
+STAGES = ("parse", "geocode", "compute", "insert")
+
+
+@dataclass
+class ImportRow:
+    email: str
+    birth_date: date
+    birth_time: dt_time
+    birth_place: str
+    gender: str
+    looking_for: str
+    password: Optional[str] = None
+    password_hash: Optional[str] = None
+    latitude: Optional[float] = None
+    longitude: Optional[float] = None
+    timezone: Optional[str] = None
+
+
+def _optional_float(value: Any) -> Optional[float]:
+    return float(value) if value not in (None, "") else None
+
+
+def parse_row(raw: Dict[str, Any]) -> ImportRow:
+    """Valida una fila de entrada; lanza `ValueError` con el motivo si no es válida."""
+    missing = [name for name in ("email", "birth_date", "birth_time", "birth_place", "gender", "looking_for")
+               if not raw.get(name)]
+    if missing:
+        raise ValueError(f"missing fields: {', '.join(missing)}")
+    if not raw.get("password") and not raw.get("password_hash"):
+        raise ValueError("missing password or password_hash")
+    if raw.get("password_hash") and not str(raw["password_hash"]).startswith("$2"):
+        raise ValueError("password_hash must be a bcrypt hash")
+    if raw["gender"] not in GENDERS:
+        raise ValueError(f"invalid gender {raw['gender']!r}")
+    if raw["looking_for"] not in LOOKING_FOR:
+        raise ValueError(f"invalid looking_for {raw['looking_for']!r}")
+
+    return ImportRow(
+        email=normalize_email(str(raw["email"])),
+        birth_date=date.fromisoformat(str(raw["birth_date"])[:10]),
+        birth_time=dt_time.fromisoformat(str(raw["birth_time"])),
+        birth_place=str(raw["birth_place"]),
+        gender=raw["gender"],
+        looking_for=raw["looking_for"],
+        password=raw.get("password") or None,
+        password_hash=raw.get("password_hash") or None,
+        latitude=_optional_float(raw.get("latitude")),
+        longitude=_optional_float(raw.get("longitude")),
+        timezone=raw.get("timezone") or None,
+    )
+
+
+def read_rows(path: str) -> Iterator[Dict[str, Any]]:
+    """Filas de un CSV con cabecera o de un NDJSON (según la extensión)."""
+    with open(path, encoding="utf-8", newline="") as fh:
+        if path.endswith((".ndjson", ".jsonl")):
+            for line in fh:
+                if line.strip():
+                    yield json.loads(line)
+        else:
+            yield from csv.DictReader(fh)
+
+
+def synthetic_rows(count: int, seed: int = 42, password_hash: str = "", domain: str = "synastr.test") -> Iterator[Dict[str, Any]]:
+    """
+    Población sintética reproducible para benchmarks: fechas entre 1960 y 2005, hora
+    y ciudad (de `BUILTIN_PLACES`) al azar. Todas comparten `password_hash` para no
+    pagar bcrypt por fila.
+    """
+    rng = random.Random(seed)
+    first_day = date(1960, 1, 1)
+    span_days = (date(2005, 12, 31) - first_day).days
+    for i in range(count):
+        yield {
+            "email": f"synthetic-{seed}-{i}@{domain}",
+            "password_hash": password_hash,
+            "birth_date": (first_day + timedelta(days=rng.randrange(span_days))).isoformat(),
+            "birth_time": f"{rng.randrange(24):02d}:{rng.randrange(60):02d}",
+            "birth_place": rng.choice(BUILTIN_PLACES)[0],
+            "gender": rng.choice(GENDERS),
+            "looking_for": rng.choice(LOOKING_FOR),
+        }
+
+
+# --- Pool de procesos ---
+
+def _init_compute_worker() -> None:
+    swe.set_ephe_path(EPHE_PATH)
+
+
+ComputeInput = Tuple[str, str, float, float, Optional[str], Optional[str]]
+
+
+def compute_chunk(items: List[ComputeInput]) -> Tuple[List[Any], float]:
+    """
+    Ejecutado en el pool: calcula la carta natal (y el hash si hace falta) de cada
+    fila. Devuelve `(resultados, segundos)`; cada resultado es
+    `(natal_chart, chart_variants, timezone, password_hash)` o el mensaje de error de la fila.
+    """
+    started = time.perf_counter()
+    results: List[Any] = [None] * len(items)
+    births: List[Tuple[datetime, str]] = []
+    rows: List[int] = []
+    for i, (birth_datetime, _, latitude, longitude, timezone_name, _) in enumerate(items):
+        try:
+            timezone_name = timezone_name or get_timezone_finder().timezone_at(lng=longitude, lat=latitude)
+            if not timezone_name:
+                raise ValueError("could not determine timezone")
+            births.append((datetime.fromisoformat(birth_datetime), timezone_name))
+            rows.append(i)
+        except Exception as e:
+            results[i] = f"{type(e).__name__}: {e}"
+
+    # Hora local -> UT de todo el bloque de una vez, por zona horaria
+    for i, (_, timezone_name), julian_day in zip(rows, births, julian_days_by_zone(births)):
+        _, password, latitude, longitude, _, password_hash = items[i]
+        try:
+            if isinstance(julian_day, Exception):
+                raise julian_day
+            variants = compute_chart_variants(julian_day, latitude, longitude)
+            natal_chart = variants.natal_chart()
+            results[i] = (
+                natal_chart.dict() if natal_chart else None,
+                variants.to_document(),
+                timezone_name,
+                password_hash or UserModel.hash_password(password),
+            )
+        except Exception as e:
+            results[i] = f"{type(e).__name__}: {e}"
+    return results, time.perf_counter() - started
+
+
+def create_compute_pool(workers: int) -> ProcessPoolExecutor:
+    # spawn: los procesos no heredan los clientes de MongoDB/Redis del padre
+    return ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=_init_compute_worker,
+    )
+
+
+# --- Pipeline ---
+
+@dataclass
+class ImportReport:
+    read: int = 0
+    inserted: int = 0
+    duplicates: int = 0
+    rejected: int = 0
+    busy: Dict[str, float] = field(default_factory=lambda: dict.fromkeys(STAGES, 0.0))
+    rows: Dict[str, int] = field(default_factory=lambda: dict.fromkeys(STAGES, 0))
+    wall_seconds: float = 0.0
+    rejects: List[Dict[str, Any]] = field(default_factory=list)
+
+    def record(self, stage: str, rows: int, seconds: float) -> None:
+        self.rows[stage] += rows
+        self.busy[stage] += seconds
+
+    def reject(self, raw: Dict[str, Any], reason: str) -> None:
+        self.rejected += 1
+        self.rejects.append({"row": raw, "error": reason})
+
+    def rate(self, stage: str) -> float:
+        return self.rows[stage] / self.busy[stage] if self.busy[stage] else 0.0
+
+    def summary(self) -> str:
+        lines = [
+            f"{self.read} filas leídas, {self.inserted} insertadas, {self.duplicates} duplicadas, "
+            f"{self.rejected} rechazadas en {self.wall_seconds:.1f}s "
+            f"({self.inserted / self.wall_seconds if self.wall_seconds else 0:.0f} filas/s)",
+            f"{'etapa':<10} {'filas':>10} {'ocupado s':>10} {'filas/s':>10}",
+        ]
+        for stage in STAGES:
+            lines.append(f"{stage:<10} {self.rows[stage]:>10} {self.busy[stage]:>10.2f} {self.rate(stage):>10.0f}")
+        lines.append("(compute: tiempo sumado de todos los procesos del pool)")
+        return "\n".join(lines)
+
+
+def _new_user_document(
+    row: ImportRow, chart: dict, chart_variants: dict, timezone_name: str, password_hash: str
+) -> Dict[str, Any]:
+    now = datetime.now(timezone.utc)
+    return {
+        "email": row.email,
+        "password_hash": password_hash,
+        "birth_date": datetime.combine(row.birth_date, dt_time.min),
+        "birth_time": row.birth_time.isoformat(),
+        "birth_place": row.birth_place,
+        "latitude": row.latitude,
+        "longitude": row.longitude,
+        "timezone": timezone_name,
+        "natal_chart": chart,
+        "chart_variants": chart_variants,
+        "chart_status": CHART_READY,
+        "plan": "free",
+        "photos": [],
+        "gender": row.gender,
+        "looking_for": row.looking_for,
+        "sexual_orientation": [],
+        "user_info": {},
+        "created_at": now,
+        "updated_at": now,
+    }
+
+
+class BulkImporter:
+    """
+    Ejecuta el pipeline sobre un iterable de filas crudas. Mantiene hasta
+    `2 * workers` bloques en el pool para que ningún proceso quede ocioso mientras
+    se insertan los resultados anteriores.
+    """
+
+    def __init__(
+        self,
+        pool: ProcessPoolExecutor,
+        gazetteer: Gazetteer,
+        workers: int,
+        chunk_size: int = 500,
+        insert_batch_size: int = 5000,
+        collection=None,
+    ):
+        self.pool = pool
+        self.gazetteer = gazetteer
+        self.max_in_flight = 2 * workers
+        self.chunk_size = chunk_size
+        self.insert_batch_size = insert_batch_size
+        self.collection = collection if collection is not None else get_mongo_db().get_collection("users")
+        self.report = ImportReport()
+        self._pending_docs: List[Dict[str, Any]] = []
+
+    async def _prepare(self, raws: List[Dict[str, Any]]) -> Tuple[List[ImportRow], List[ComputeInput]]:
+        started = time.perf_counter()
+        rows: List[ImportRow] = []
+        parsed: List[Tuple[Dict[str, Any], ImportRow]] = []
+        for raw in raws:
+            try:
+                parsed.append((raw, parse_row(raw)))
+            except (ValueError, TypeError) as e:
+                self.report.reject(raw, str(e))
+        parse_done = time.perf_counter()
+        self.report.record("parse", len(raws), parse_done - started)
+
+        db = self.collection.database
+        known = await places.lookup_places(
+            (row.birth_place for _, row in parsed if row.latitude is None or row.longitude is None), db
+        )
+        resolved: Dict[str, Place] = {}
+        inputs: List[ComputeInput] = []
+        for raw, row in parsed:
+            if row.latitude is None or row.longitude is None:
+                key = normalize_place(row.birth_place)
+                place = known.get(key)
+                if place is None:
+                    matched = self.gazetteer.match(row.birth_place)
+                    if matched is None:
+                        self.report.reject(raw, f"birth place not found: {row.birth_place!r}")
+                        continue
+                    # En `places` sólo bajo la clave que coincidió: una coincidencia
+                    # parcial ("cambridge" para "Cambridge, Massachusetts") guardada con
+                    # la clave completa fijaría esa suposición para todos los registros
+                    matched_key, place = matched
+                    known[key] = resolved[matched_key] = place
+                row.latitude, row.longitude = place.latitude, place.longitude
+                row.timezone = row.timezone or place.timezone
+            rows.append(row)
+            inputs.append((
+                datetime.combine(row.birth_date, row.birth_time).isoformat(),
+                row.password,
+                row.latitude,
+                row.longitude,
+                row.timezone,
+                row.password_hash,
+            ))
+        if resolved:
+            await places.save_places(resolved, source="gazetteer", db=db)
+        self.report.record("geocode", len(parsed), time.perf_counter() - parse_done)
+        return rows, inputs
+
+    async def _collect(self, rows: List[ImportRow], future: "asyncio.Future") -> None:
+        results, seconds = await future
+        self.report.record("compute", len(rows), seconds)
+        for row, result in zip(rows, results):
+            if isinstance(result, str):
+                self.report.reject({"email": row.email, "birth_place": row.birth_place}, result)
+            else:
+                self._pending_docs.append(_new_user_document(row, *result))
+        if len(self._pending_docs) >= self.insert_batch_size:
+            await self._flush()
+
+    async def _flush(self) -> None:
+        docs, self._pending_docs = self._pending_docs, []
+        if not docs:
+            return
+        started = time.perf_counter()
+        # Los ordinales de los duplicados quedan sin usar: el índice admite huecos
+        ordinals = await candidate_index.allocate_ordinals(len(docs), self.collection.database)
+        for doc, ordinal in zip(docs, ordinals):
+            doc["ordinal"] = ordinal
+        try:
+            result = await self.collection.insert_many(docs, ordered=False)
+            inserted = len(result.inserted_ids)
+        except BulkWriteError as e:
+            inserted = e.details.get("nInserted", 0)
+            for error in e.details.get("writeErrors", []):
+                if error.get("code") == DUPLICATE_KEY_ERROR:
+                    self.report.duplicates += 1
+                else:
+                    self.report.reject({"email": docs[error["index"]]["email"]}, error.get("errmsg", "write error"))
+        self.report.inserted += inserted
+        self.report.record("insert", len(docs), time.perf_counter() - started)
+
+    async def run(self, raws: Iterable[Dict[str, Any]]) -> ImportReport:
+        loop = asyncio.get_running_loop()
+        started = time.perf_counter()
+        in_flight: Dict["asyncio.Future", List[ImportRow]] = {}
+
+        async def drain(return_when: str) -> None:
+            done, _ = await asyncio.wait(in_flight, return_when=return_when)
+            for future in done:
+                await self._collect(in_flight.pop(future), future)
+
+        chunk: List[Dict[str, Any]] = []
+        for raw in raws:
+            self.report.read += 1
+            chunk.append(raw)
+            if len(chunk) < self.chunk_size:
+                continue
+            rows, inputs = await self._prepare(chunk)
+            chunk = []
+            if inputs:
+                in_flight[loop.run_in_executor(self.pool, compute_chunk, inputs)] = rows
+            if len(in_flight) >= self.max_in_flight:
+                await drain(asyncio.FIRST_COMPLETED)
+
+        if chunk:
+            rows, inputs = await self._prepare(chunk)
+            if inputs:
+                in_flight[loop.run_in_executor(self.pool, compute_chunk, inputs)] = rows
+        if in_flight:
+            await drain(asyncio.ALL_COMPLETED)
+        await self._flush()
+
+        self.report.wall_seconds = time.perf_counter() - started
+        return self.report
@@ -0,0 +1,361 @@
+# app/services/cache.py
+"""
+Caché distribuida (Redis) de resultados calculados, con protección contra estampidas.
+
+`@cached("namespace", ttl=...)` sobre una función asíncrona (un servicio como
+`calculate_chart_variants` o un resolver de Strawberry) guarda su resultado por
+argumentos en `cache:<namespace>:<hash>`. Para que una clave fría o caducada de un
+usuario popular no dispare decenas de recálculos a la vez en todos los workers:
+
+- **L1 por proceso**: una LRU pequeña con un TTL corto (`CACHE_L1_TTL_S`) delante de
+  Redis. No se invalida entre procesos, así que sólo conviene para datos que toleran
+  unos segundos de retraso; `l1_ttl=0` la desactiva.
+- **Single-flight**: dentro de un proceso, las llamadas simultáneas con la misma clave
+  esperan al mismo cálculo; entre procesos, sólo quien consigue el candado
+  `<clave>:lock` (`SET NX PX`) calcula y el resto sondea la clave hasta que aparece
+  (o hasta `CACHE_LOCK_TIMEOUT_S`, y entonces calcula por su cuenta).
+- **Stale-while-revalidate**: cada entrada es fresca durante `ttl` y sigue en Redis
+  `stale_ttl` segundos más; en ese intervalo se devuelve tal cual y se recalcula en
+  segundo plano.
+- **Caducidad anticipada probabilística** (XFetch): con la entrada aún fresca, cada
+  lectura decide recalcular antes de tiempo con una probabilidad que crece al
+  acercarse la caducidad y con lo que tardó el cálculo (`beta` la escala), así que
+  las entradas populares se renuevan antes de caducar y de una en una.
+
+Las entradas se guardan en BSON (el formato binario que ya usa MongoDB; valores
+anidados de dicts, listas, números, cadenas, fechas, `ObjectId`, bytes...) comprimido
+con zlib a partir de `CACHE_COMPRESS_MIN_BYTES`. Lo que no sea BSON (modelos de
+Pydantic, tuplas) se adapta con `dump`/`load`. Si Redis no responde, la función se
+ejecuta sin caché (fail-open).
+"""
+import asyncio
+import dataclasses
+import enum
+import functools
+import hashlib
+import inspect
+import logging
+import math
+import os
+import random
+import time
+import uuid
+import zlib
+from collections import OrderedDict
+from datetime import date, time as time_of_day
+from typing import Any, Awaitable, Callable, Dict, Optional, Set, Tuple
+
+import bson
+from bson.codec_options import CodecOptions, TypeRegistry
+from pydantic import BaseModel
+
+from app.db.client import get_redis
+
+logger = logging.getLogger(__name__)
+
+CACHE_L1_SIZE = int(os.getenv("CACHE_L1_SIZE", "1000"))
+CACHE_L1_TTL_S = float(os.getenv("CACHE_L1_TTL_S", "5"))
+CACHE_LOCK_TIMEOUT_S = float(os.getenv("CACHE_LOCK_TIMEOUT_S", "10"))
+CACHE_COMPRESS_MIN_BYTES = int(os.getenv("CACHE_COMPRESS_MIN_BYTES", "1024"))
+
+_PREFIX = "cache:"
+_RAW = b"\x00"
+_ZLIB = b"\x01"
+# Espera entre sondeos de quien no consiguió el candado (crece hasta el máximo)
+_POLL_INITIAL_S = 0.01
+_POLL_MAX_S = 0.2
+
+# Borra el candado sólo si sigue siendo nuestro (no el de quien lo tomó al vencer)
+_RELEASE_LOCK_LUA = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+  return redis.call('DEL', KEYS[1])
+end
+return 0
+"""
+
+# Parámetros que no forman parte de la clave: el objeto padre y el contexto de Strawberry
+DEFAULT_SKIP = ("self", "root", "info")
+
+
+def _key_fallback(value: Any) -> Any:
+    # Tipos habituales en los argumentos que BSON no conoce
+    if isinstance(value, enum.Enum):
+        return value.value
+    if isinstance(value, (date, time_of_day)):
+        return value.isoformat()
+    if isinstance(value, (set, frozenset)):
+        return sorted(value)
+    if isinstance(value, BaseModel):
+        return value.dict()
+    if dataclasses.is_dataclass(value) and not isinstance(value, type):
+        return dataclasses.asdict(value)
+    raise TypeError(f"Cannot build a cache key from {type(value).__name__}")
+
+
+_KEY_OPTIONS = CodecOptions(type_registry=TypeRegistry(fallback_encoder=_key_fallback))
+
+
+def encode(entry: Dict[str, Any]) -> bytes:
+    """Documento BSON de `entry`, comprimido si pasa de `CACHE_COMPRESS_MIN_BYTES`."""
+    raw = bson.encode(entry)
+    if len(raw) >= CACHE_COMPRESS_MIN_BYTES:
+        return _ZLIB + zlib.compress(raw, 1)
+    return _RAW + raw
+
+
+def decode(blob: bytes) -> Dict[str, Any]:
+    raw = zlib.decompress(blob[1:]) if blob[:1] == _ZLIB else blob[1:]
+    return bson.decode(raw)
+
+
+class LocalCache:
+    """LRU acotada de clave -> `(caduca (monotonic), valor)`."""
+
+    def __init__(self, maxsize: int = CACHE_L1_SIZE):
+        self.maxsize = maxsize
+        self._entries: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+
+    def get(self, key: str) -> Tuple[bool, Any]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return False, None
+        if entry[0] <= time.monotonic():
+            del self._entries[key]
+            return False, None
+        self._entries.move_to_end(key)
+        return True, entry[1]
+
+    def put(self, key: str, value: Any, ttl: float) -> None:
+        if ttl <= 0:
+            return
+        self._entries[key] = (time.monotonic() + ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def pop(self, key: str) -> None:
+        self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+
+@dataclasses.dataclass
+class CacheStats:
+    l1_hits: int = 0
+    hits: int = 0
+    stale_hits: int = 0
+    early_refreshes: int = 0
+    misses: int = 0
+    computes: int = 0
+    lock_waits: int = 0
+    errors: int = 0
+
+
+# Recálculos en segundo plano en curso (referencias para que no los recoja el GC)
+_background: Set[asyncio.Task] = set()
+
+
+class Cache:
+    """Una caché con nombre (`namespace`) sobre Redis; ver `cached`."""
+
+    def __init__(
+        self,
+        namespace: str,
+        ttl: float,
+        stale_ttl: Optional[float] = None,
+        l1_ttl: float = CACHE_L1_TTL_S,
+        l1_size: int = CACHE_L1_SIZE,
+        beta: float = 1.0,
+        lock_timeout: float = CACHE_LOCK_TIMEOUT_S,
+    ):
+        self.namespace = namespace
+        self.ttl = ttl
+        self.stale_ttl = ttl if stale_ttl is None else stale_ttl
+        self.l1_ttl = min(l1_ttl, ttl)
+        self.beta = beta
+        self.lock_timeout = lock_timeout
+        self.local = LocalCache(l1_size)
+        self.stats = CacheStats()
+        self._in_flight: Dict[str, "asyncio.Future[Any]"] = {}
+
+    def key(self, *parts: Any) -> str:
+        digest = hashlib.blake2b(bson.encode({"k": list(parts)}, codec_options=_KEY_OPTIONS), digest_size=16)
+        return f"{_PREFIX}{self.namespace}:{digest.hexdigest()}"
+
+    async def get_or_compute(self, key: str, compute: Callable[[], Awaitable[Any]]) -> Any:
+        """El valor de `key`, calculándolo con `compute` (una sola vez) si no está."""
+        found, value = self.local.get(key)
+        if found:
+            self.stats.l1_hits += 1
+            return value
+        if (pending := self._in_flight.get(key)) is not None:
+            return await asyncio.shield(pending)
+
+        task = asyncio.ensure_future(self._get_or_compute(key, compute))
+        self._in_flight[key] = task
+        try:
+            return await asyncio.shield(task)
+        finally:
+            if task.done():
+                self._in_flight.pop(key, None)
+            else:
+                task.add_done_callback(lambda _: self._in_flight.pop(key, None))
+
+    async def _get_or_compute(self, key: str, compute: Callable[[], Awaitable[Any]]) -> Any:
+        try:
+            blob = await get_redis().get(key)
+        except Exception as e:
+            return await self._compute_without_cache(compute, e)
+
+        if blob is not None:
+            entry = decode(blob)
+            now = time.time()
+            if now >= entry["fresh_until"]:
+                self.stats.stale_hits += 1
+                self._refresh_in_background(key, compute)
+            elif now - entry["delta"] * self.beta * math.log(1.0 - random.random()) >= entry["fresh_until"]:
+                self.stats.early_refreshes += 1
+                self._refresh_in_background(key, compute)
+            else:
+                self.stats.hits += 1
+            self.local.put(key, entry["value"], min(self.l1_ttl, max(0.0, entry["fresh_until"] - now)))
+            return entry["value"]
+
+        self.stats.misses += 1
+        return await self._compute_once(key, compute)
+
+    async def _compute_without_cache(self, compute: Callable[[], Awaitable[Any]], error: Exception) -> Any:
+        # Redis caído: se calcula sin caché (ni candado)
+        self.stats.errors += 1
+        logger.warning("Cache %s unavailable, computing without it: %s", self.namespace, error)
+        return await compute()
+
+    async def _compute_once(self, key: str, compute: Callable[[], Awaitable[Any]]) -> Any:
+        """Calcula bajo el candado distribuido o espera a que otro proceso lo guarde."""
+        token = uuid.uuid4().hex
+        deadline = time.monotonic() + self.lock_timeout
+        delay = _POLL_INITIAL_S
+        while True:
+            try:
+                redis = get_redis()
+                if await redis.set(f"{key}:lock", token, nx=True, px=int(self.lock_timeout * 1000)):
+                    break
+                self.stats.lock_waits += 1
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, _POLL_MAX_S)
+                blob = await redis.get(key)
+            except Exception as e:
+                return await self._compute_without_cache(compute, e)
+            if blob is not None:
+                value = decode(blob)["value"]
+                self.local.put(key, value, self.l1_ttl)
+                return value
+            if time.monotonic() >= deadline:
+                # Quien tenía el candado no terminó a tiempo
+                return await self._compute_and_store(key, compute)
+        try:
+            return await self._compute_and_store(key, compute)
+        finally:
+            await self._release(key, token)
+
+    async def _release(self, key: str, token: str) -> None:
+        try:
+            await get_redis().eval(_RELEASE_LOCK_LUA, 1, f"{key}:lock", token)
+        except Exception as e:  # Vencerá solo
+            logger.warning("Could not release cache lock %s: %s", key, e)
+
+    async def _compute_and_store(self, key: str, compute: Callable[[], Awaitable[Any]]) -> Any:
+        started = time.monotonic()
+        value = await compute()
+        self.stats.computes += 1
+        try:
+            await self.set(key, value, delta=time.monotonic() - started)
+        except Exception as e:
+            self.stats.errors += 1
+            logger.warning("Could not store cache entry %s: %s", key, e)
+        return value
+
+    async def set(self, key: str, value: Any, delta: float = 0.0) -> None:
+        """Guarda `value` en `key` (fresco `ttl` s) sin pasar por el candado."""
+        now = time.time()
+        blob = encode({"value": value, "computed_at": now, "delta": delta, "fresh_until": now + self.ttl})
+        await get_redis().set(key, blob, px=int((self.ttl + self.stale_ttl) * 1000))
+        self.local.put(key, value, self.l1_ttl)
+
+    def _refresh_in_background(self, key: str, compute: Callable[[], Awaitable[Any]]) -> None:
+        task = asyncio.create_task(self._refresh(key, compute), name=f"cache-refresh:{self.namespace}")
+        _background.add(task)
+        task.add_done_callback(_background.discard)
+
+    async def _refresh(self, key: str, compute: Callable[[], Awaitable[Any]]) -> None:
+        token = uuid.uuid4().hex
+        try:
+            redis = get_redis()
+            # Si otro proceso ya está recalculando, no hace falta esperar: hay valor
+            if not await redis.set(f"{key}:lock", token, nx=True, px=int(self.lock_timeout * 1000)):
+                return
+            try:
+                await self._compute_and_store(key, compute)
+            finally:
+                await self._release(key, token)
+        except Exception:
+            self.stats.errors += 1
+            logger.exception("Background refresh of cache %s failed", self.namespace)
+
+    async def invalidate(self, key: str) -> None:
+        """Borra `key` de Redis y de la L1 de este proceso (las de otros caducan solas)."""
+        self.local.pop(key)
+        await get_redis().delete(key)
+
+
+def cached(
+    namespace: str,
+    ttl: float,
+    stale_ttl: Optional[float] = None,
+    l1_ttl: float = CACHE_L1_TTL_S,
+    beta: float = 1.0,
+    key: Optional[Callable[..., Any]] = None,
+    dump: Optional[Callable[[Any], Any]] = None,
+    load: Optional[Callable[[Any], Any]] = None,
+    skip: Tuple[str, ...] = DEFAULT_SKIP,
+):
+    """
+    Cachea en Redis los resultados de una función asíncrona.
+
+    La clave sale de los argumentos (con los valores por defecto aplicados y sin los
+    de `skip`) o de `key(*args, **kwargs)`. `dump` convierte el resultado en algo
+    que BSON sepa guardar y `load` lo reconstruye al leerlo. La función decorada
+    conserva su firma (vale como resolver) y expone `.cache` y `.invalidate(...)`,
+    que recibe los mismos argumentos que ella.
+    """
+    def decorator(fn):
+        if not inspect.iscoroutinefunction(fn):
+            raise TypeError(f"@cached needs an async function, got {fn.__qualname__}")
+        cache = Cache(namespace, ttl, stale_ttl=stale_ttl, l1_ttl=l1_ttl, beta=beta)
+        signature = inspect.signature(fn)
+
+        def key_of(*args, **kwargs) -> str:
+            if key is not None:
+                return cache.key(key(*args, **kwargs))
+            bound = signature.bind(*args, **kwargs)
+            bound.apply_defaults()
+            return cache.key(*(value for name, value in bound.arguments.items() if name not in skip))
+
+        @functools.wraps(fn)
+        async def wrapper(*args, **kwargs):
+            async def compute():
+                result = await fn(*args, **kwargs)
+                return dump(result) if dump is not None else result
+
+            value = await cache.get_or_compute(key_of(*args, **kwargs), compute)
+            return load(value) if load is not None else value
+
+        async def invalidate(*args, **kwargs) -> None:
+            await cache.invalidate(key_of(*args, **kwargs))
+
+        wrapper.cache = cache
+        wrapper.invalidate = invalidate
+        return wrapper
+
+    return decorator
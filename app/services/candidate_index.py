@@ -0,0 +1,338 @@
+# app/services/candidate_index.py
+"""
+Índice en memoria de candidatos del feed.
+
+Cada usuario tiene un ordinal entero denso (`users.ordinal`, asignado con un contador
+en la colección `counters`) y el índice guarda un bitmap por valor de cada faceta
+(género, tipo de relación, orientación, signo solar y elemento), con el bit `n`
+activo si el usuario de ordinal `n` tiene ese valor. Un filtro del feed se resuelve
+con AND/OR/ANDNOT entre enteros de Python, y sólo los ordinales resultantes se leen de
+MongoDB por `_id`.
+
+Cada proceso web tiene su copia: `start_candidate_index()` la carga al arrancar y
+aplica los cambios que llegan por el bus de eventos (`app.services.events`). Los
+publica el consumidor de change streams (`app.services.change_stream`) cuando cambia
+una faceta de un usuario, sea cual sea la escritura que lo provocó.
+
+El índice sólo se usa (`index.ready`) cuando todos los usuarios tienen ordinal; los
+anteriores se numeran con `python -m app.jobs.candidate_index backfill`.
+"""
+import asyncio
+import logging
+import os
+from collections import defaultdict
+from datetime import date, datetime
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+from bson import ObjectId
+from pymongo import ReturnDocument, UpdateOne
+
+from app.api.zodiac_logic import get_sun_sign, get_zodiac_sign_details
+from app.db import client as db_client
+from app.db.client import get_mongo_db
+from app.services import events
+from app.services.change_stream import ChangeEvent, change_handler, reset_handler
+
+logger = logging.getLogger(__name__)
+
+CANDIDATE_INDEX_ENABLED = os.getenv("CANDIDATE_INDEX_ENABLED", "true").lower() == "true"
+# Espera máxima entre reintentos de la sincronización (bus de eventos o MongoDB caídos)
+CANDIDATE_INDEX_RETRY_MAX_S = float(os.getenv("CANDIDATE_INDEX_RETRY_MAX_S", "60"))
+# Cada cuánto se comprueba, sin mensajes, que la escucha del bus sigue viva
+_READER_CHECK_S = 5.0
+CHANNEL = "candidate-index"
+ORDINAL_COUNTER = "user_ordinal"
+
+# Campos de `users` de los que salen las facetas
+INDEX_PROJECTION = {"ordinal": 1, "gender": 1, "looking_for": 1, "sexual_orientation": 1, "birth_date": 1}
+FACET_FIELDS = tuple(INDEX_PROJECTION)
+
+Facet = Tuple[str, str]
+
+
+def facets_of(user: Dict) -> Tuple[Facet, ...]:
+    """Pares `(faceta, valor)` de un usuario; los valores son los de los enums de la API."""
+    pairs: List[Facet] = [("gender", user.get("gender")), ("looking_for", user.get("looking_for"))]
+    pairs += [("orientation", value) for value in user.get("sexual_orientation") or []]
+    if birth_date := user.get("birth_date"):
+        if isinstance(birth_date, datetime):
+            birth_date = birth_date.date()
+        elif isinstance(birth_date, str):
+            birth_date = date.fromisoformat(birth_date[:10])
+        pairs.append(("sign", get_sun_sign(birth_date)))
+        pairs.append(("element", get_zodiac_sign_details(birth_date)[1]))
+    return tuple(pair for pair in pairs if pair[1] is not None)
+
+
+async def allocate_ordinals(count: int, db=None) -> range:
+    """Reserva `count` ordinales consecutivos (un solo `$inc` atómico)."""
+    db = db if db is not None else get_mongo_db()
+    counter = await db.get_collection("counters").find_one_and_update(
+        {"_id": ORDINAL_COUNTER},
+        {"$inc": {"seq": count}},
+        upsert=True,
+        return_document=ReturnDocument.AFTER,
+    )
+    return range(counter["seq"] - count, counter["seq"])
+
+
+def _bitmap_from_ordinals(ordinals: Sequence[int]) -> int:
+    if not len(ordinals):
+        return 0
+    bits = np.zeros(max(ordinals) + 1, dtype=np.uint8)
+    bits[np.asarray(ordinals)] = 1
+    return int.from_bytes(np.packbits(bits, bitorder="little").tobytes(), "little")
+
+
+class CandidateIndex:
+    def __init__(self):
+        self._ids: Dict[int, ObjectId] = {}
+        self._facets: Dict[int, Tuple[Facet, ...]] = {}
+        self._bitmaps: Dict[Facet, int] = defaultdict(int)
+        self._all = 0
+        self.loaded = False
+        self.missing_ordinals = 0
+
+    @property
+    def ready(self) -> bool:
+        return self.loaded and self.missing_ordinals == 0
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def upsert(self, ordinal: int, user_id: ObjectId, facets: Tuple[Facet, ...]) -> None:
+        if self._facets.get(ordinal) == facets:
+            return
+        self.remove(ordinal)
+        bit = 1 << ordinal
+        for facet in facets:
+            self._bitmaps[facet] |= bit
+        self._all |= bit
+        self._ids[ordinal] = user_id
+        self._facets[ordinal] = facets
+
+    def remove(self, ordinal: int) -> None:
+        facets = self._facets.pop(ordinal, None)
+        if facets is None:
+            return
+        mask = ~(1 << ordinal)
+        for facet in facets:
+            self._bitmaps[facet] &= mask
+        self._all &= mask
+        del self._ids[ordinal]
+
+    def apply(self, records: Iterable[Dict]) -> None:
+        """Aplica registros de `_record()` (los que viajan por el bus de eventos)."""
+        for record in records:
+            self.upsert(record["ordinal"], ObjectId(record["id"]), tuple(map(tuple, record["facets"])))
+
+    def candidates(
+        self,
+        gender: Optional[str] = None,
+        looking_for: Optional[str] = None,
+        orientations: Optional[Iterable[str]] = None,
+        signs: Optional[Iterable[str]] = None,
+        elements: Optional[Iterable[str]] = None,
+        exclude: int = 0,
+    ) -> int:
+        """
+        Bitmap de los usuarios que cumplen todos los filtros dados (dentro de una
+        faceta con varios valores basta con uno) y no están en `exclude`.
+        """
+        result = self._all & ~exclude
+        for facet, values in (
+            ("gender", [gender] if gender else None),
+            ("looking_for", [looking_for] if looking_for else None),
+            ("orientation", orientations),
+            ("sign", signs),
+            ("element", elements),
+        ):
+            if values:
+                union = 0
+                for value in values:
+                    union |= self._bitmaps.get((facet, value), 0)
+                result &= union
+        return result
+
+    @staticmethod
+    def ordinals(bitmap: int) -> np.ndarray:
+        """Ordinales activos de `bitmap`, de menor a mayor."""
+        if not bitmap:
+            return np.empty(0, dtype=np.int64)
+        raw = np.frombuffer(bitmap.to_bytes((bitmap.bit_length() + 7) // 8, "little"), dtype=np.uint8)
+        return np.flatnonzero(np.unpackbits(raw, bitorder="little"))
+
+    def ids(self, ordinals: Iterable[int]) -> List[ObjectId]:
+        return [self._ids[int(ordinal)] for ordinal in ordinals]
+
+    def load(self, users: Iterable[Dict]) -> None:
+        """Reconstruye el índice desde documentos con `INDEX_PROJECTION`."""
+        builder = _IndexBuilder()
+        for user in users:
+            builder.add(user)
+        self._install(builder)
+
+    def _install(self, builder: "_IndexBuilder") -> None:
+        # Cada bitmap se construye de una vez (con numpy) en lugar de bit a bit
+        self._ids = builder.ids
+        self._facets = builder.facets
+        self._bitmaps = defaultdict(int, {facet: _bitmap_from_ordinals(o) for facet, o in builder.members.items()})
+        self._all = _bitmap_from_ordinals(list(builder.ids))
+        self.missing_ordinals = builder.missing
+        self.loaded = True
+
+    def stats(self) -> Dict:
+        return {
+            "ready": self.ready,
+            "users": len(self),
+            "missing_ordinals": self.missing_ordinals,
+            "bitmaps": len(self._bitmaps),
+            "bytes": sum((b.bit_length() + 7) // 8 for b in self._bitmaps.values()) + (self._all.bit_length() + 7) // 8,
+        }
+
+
+class _IndexBuilder:
+    def __init__(self):
+        self.ids: Dict[int, ObjectId] = {}
+        self.facets: Dict[int, Tuple[Facet, ...]] = {}
+        self.members: Dict[Facet, List[int]] = defaultdict(list)
+        self.missing = 0
+
+    def add(self, user: Dict) -> None:
+        ordinal = user.get("ordinal")
+        if ordinal is None:
+            self.missing += 1
+            return
+        facets = facets_of(user)
+        self.ids[ordinal] = user["_id"]
+        self.facets[ordinal] = facets
+        for facet in facets:
+            self.members[facet].append(ordinal)
+
+
+index = CandidateIndex()
+_sync_task: Optional[asyncio.Task] = None
+
+
+async def load_index(batch_size: int = 10_000) -> None:
+    builder = _IndexBuilder()
+    async for user in get_mongo_db().get_collection("users").find({}, INDEX_PROJECTION, batch_size=batch_size):
+        builder.add(user)
+    index._install(builder)
+    if index.missing_ordinals:
+        logger.warning(
+            "%d users have no ordinal; candidate index disabled until backfill", index.missing_ordinals
+        )
+
+
+def _record(user: Dict) -> Dict:
+    return {"ordinal": user["ordinal"], "id": str(user["_id"]), "facets": facets_of(user)}
+
+
+async def publish_users(users: Iterable[Dict], db_name: Optional[str] = None) -> None:
+    """
+    Refleja en el índice de todos los procesos las facetas de `users` (documentos con
+    `_id`, `ordinal` y los campos de `INDEX_PROJECTION`) de la base de datos `db_name`
+    (por defecto la de la aplicación).
+    """
+    records = [_record(user) for user in users if user.get("ordinal") is not None]
+    if not records:
+        return
+    db_name = db_name or db_client.DEFAULT_DB_NAME
+    if db_name == db_client.DEFAULT_DB_NAME:
+        index.apply(records)
+    try:
+        await events.publish(CHANNEL, {"db": db_name, "users": records})
+    except Exception as e:  # El resto de procesos se pondrá al día al recargar
+        logger.warning("Could not publish candidate index update: %s", e)
+
+
+@change_handler("users", operations=("insert", "update", "replace"), fields=FACET_FIELDS)
+async def _on_users_changed(changes: List[ChangeEvent]) -> None:
+    # Los borrados no se propagan: el feed omite los ordinales cuyo documento ya no existe
+    await publish_users(change.document for change in changes if change.document)
+
+
+@reset_handler
+async def _on_change_stream_reset() -> None:
+    await request_reload()
+
+
+async def _sync() -> None:
+    # Se suscribe antes de cargar para no perder cambios hechos durante la carga
+    async with events.subscribe(CHANNEL) as queue:
+        await load_index()
+        while True:
+            try:
+                payload = await asyncio.wait_for(queue.get(), _READER_CHECK_S)
+            except asyncio.TimeoutError:
+                if not events.reader_running():
+                    raise ConnectionError("event bus reader stopped")
+                continue
+            if payload.get("db", db_client.DEFAULT_DB_NAME) != db_client.DEFAULT_DB_NAME:
+                continue  # P. ej. una importación a la base de datos de benchmarks
+            if payload.get("reload"):
+                await load_index()
+            else:
+                index.apply(payload["users"])
+
+
+async def _sync_forever() -> None:
+    """
+    Mantiene el índice al día hasta que se cancela. Si se cae el bus o falla MongoDB,
+    el índice se desactiva (el feed vuelve a consultar MongoDB) y se vuelve a
+    suscribir y recargar con espera creciente.
+    """
+    failures = 0
+    while True:
+        try:
+            await _sync()
+        except Exception as e:
+            # Si llegó a cargarse, la conexión estuvo sana: se reintenta pronto
+            failures = 1 if index.loaded else failures + 1
+            index.loaded = False
+            delay = min(2 ** (failures - 1), CANDIDATE_INDEX_RETRY_MAX_S)
+            logger.warning("Candidate index sync interrupted, retrying in %.0fs: %r", delay, e)
+            await asyncio.sleep(delay)
+
+
+async def start_candidate_index() -> None:
+    """Carga el índice en segundo plano y lo mantiene sincronizado (startup)."""
+    global _sync_task
+    if CANDIDATE_INDEX_ENABLED and _sync_task is None:
+        _sync_task = asyncio.create_task(_sync_forever(), name="candidate-index-sync")
+
+
+async def stop_candidate_index() -> None:
+    global _sync_task
+    if _sync_task is not None:
+        _sync_task.cancel()
+        try:
+            await _sync_task
+        except (asyncio.CancelledError, Exception):
+            pass
+        _sync_task = None
+
+
+async def request_reload() -> None:
+    """Pide a todos los procesos que recarguen el índice (p. ej. tras `backfill_ordinals`)."""
+    await events.publish(CHANNEL, {"reload": True})
+
+
+async def backfill_ordinals(batch_size: int = 10_000) -> int:
+    """Numera los usuarios sin `ordinal` (por orden de `_id`). Devuelve cuántos."""
+    users = get_mongo_db().get_collection("users")
+    total = 0
+    while True:
+        cursor = users.find({"ordinal": {"$exists": False}}, {"_id": 1}).sort("_id", 1).limit(batch_size)
+        batch = await cursor.to_list(length=batch_size)
+        if not batch:
+            return total
+        ordinals = await allocate_ordinals(len(batch))
+        # El filtro evita pisar un ordinal asignado entretanto por otro proceso
+        await users.bulk_write([
+            UpdateOne({"_id": user["_id"], "ordinal": {"$exists": False}}, {"$set": {"ordinal": ordinal}})
+            for user, ordinal in zip(batch, ordinals)
+        ], ordered=False)
+        total += len(batch)
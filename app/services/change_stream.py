@@ -0,0 +1,232 @@
+# app/services/change_stream.py
+"""
+Consumidor de change streams de MongoDB para mantener los datos derivados.
+
+Las estructuras que se derivan de las colecciones (índice de candidatos, filtros de
+likes, resúmenes de la bandeja...) no se actualizan desde cada escritura, sino desde
+aquí: los módulos registran manejadores con `@change_handler("coleccion", ...)` y
+`ChangeStreamConsumer` (ver `python -m app.change_consumer`) les entrega los cambios
+como `ChangeEvent` en lotes de hasta `CHANGE_STREAM_BATCH_SIZE` eventos o
+`CHANGE_STREAM_MAX_WAIT_MS` milisegundos.
+
+Tras procesar cada lote se guarda el *resume token* en `change_stream_tokens`, así que
+al reiniciar se continúa donde se quedó. La entrega es *al menos una vez*: si un
+manejador falla, el lote se repite, por lo que los manejadores deben ser idempotentes.
+Si el token ya no está en el oplog se descarta y se ejecutan los `@reset_handler`,
+que reconstruyen sus datos desde cero.
+
+Los change streams necesitan que MongoDB funcione como *replica set* (basta uno de
+un solo nodo, ver `docker-compose.yml`).
+"""
+import asyncio
+import logging
+import os
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Any, Awaitable, Callable, Dict, List, Mapping, Optional, Sequence, Tuple
+
+from pymongo.errors import OperationFailure
+
+from app.db.client import get_mongo_db
+
+logger = logging.getLogger(__name__)
+
+CHANGE_STREAM_BATCH_SIZE = int(os.getenv("CHANGE_STREAM_BATCH_SIZE", "500"))
+CHANGE_STREAM_MAX_WAIT_MS = int(os.getenv("CHANGE_STREAM_MAX_WAIT_MS", "200"))
+CHANGE_STREAM_RETRY_DELAY_S = float(os.getenv("CHANGE_STREAM_RETRY_DELAY_S", "5"))
+TOKENS_COLLECTION = "change_stream_tokens"
+
+ALL_OPERATIONS = ("insert", "update", "replace", "delete")
+# Códigos de MongoDB cuando el resume token ya no está en el oplog
+_HISTORY_LOST_CODES = {136, 280, 286}
+
+
+@dataclass(frozen=True)
+class ChangeEvent:
+    """Un cambio de un documento, con el documento completo tras el cambio si existe."""
+    collection: str
+    operation: str
+    document_id: Any
+    document: Optional[Dict[str, Any]] = None
+    updated_fields: Dict[str, Any] = field(default_factory=dict)
+    removed_fields: Tuple[str, ...] = ()
+
+    @classmethod
+    def from_change(cls, change: Mapping[str, Any]) -> "ChangeEvent":
+        description = change.get("updateDescription") or {}
+        return cls(
+            collection=change["ns"]["coll"],
+            operation=change["operationType"],
+            document_id=change["documentKey"]["_id"],
+            document=change.get("fullDocument"),
+            updated_fields=dict(description.get("updatedFields") or {}),
+            removed_fields=tuple(description.get("removedFields") or ()),
+        )
+
+    def touches(self, fields: Sequence[str]) -> bool:
+        """Si el cambio puede afectar a alguno de `fields` (rutas con punto incluidas)."""
+        if self.operation != "update":
+            return True
+        for changed in (*self.updated_fields, *self.removed_fields):
+            for name in fields:
+                if changed == name or changed.startswith(name + ".") or name.startswith(changed + "."):
+                    return True
+        return False
+
+
+ChangeHandler = Callable[[List[ChangeEvent]], Awaitable[None]]
+ResetHandler = Callable[[], Awaitable[None]]
+
+
+@dataclass
+class _Registration:
+    collection: str
+    operations: Tuple[str, ...]
+    fields: Optional[Tuple[str, ...]]
+    fn: ChangeHandler
+
+    def accepts(self, event: ChangeEvent) -> bool:
+        return (
+            event.collection == self.collection
+            and event.operation in self.operations
+            and (self.fields is None or event.touches(self.fields))
+        )
+
+
+_handlers: List[_Registration] = []
+_reset_handlers: List[ResetHandler] = []
+
+
+def change_handler(
+    collection: str,
+    operations: Sequence[str] = ALL_OPERATIONS,
+    fields: Optional[Sequence[str]] = None,
+):
+    """
+    Registra una corrutina que recibe, en lotes, los cambios de `collection` de los
+    tipos `operations`. Con `fields`, las actualizaciones que no tocan ninguno de esos
+    campos se omiten (las inserciones y reemplazos siempre llegan).
+    """
+    def decorator(fn: ChangeHandler) -> ChangeHandler:
+        _handlers.append(_Registration(collection, tuple(operations), tuple(fields) if fields else None, fn))
+        return fn
+    return decorator
+
+
+def reset_handler(fn: ResetHandler) -> ResetHandler:
+    """Registra una corrutina que reconstruye datos derivados si se pierde el histórico."""
+    _reset_handlers.append(fn)
+    return fn
+
+
+def watched_collections() -> List[str]:
+    return sorted({registration.collection for registration in _handlers})
+
+
+async def dispatch(events: List[ChangeEvent]) -> None:
+    """Entrega a cada manejador los eventos de `events` que le interesan, en orden."""
+    for registration in _handlers:
+        selected = [event for event in events if registration.accepts(event)]
+        if selected:
+            await registration.fn(selected)
+
+
+class ChangeStreamConsumer:
+    """
+    Sigue los cambios de las colecciones con manejadores registrados hasta `stop()`.
+    `name` identifica el resume token guardado: dos consumidores con el mismo nombre
+    procesarían los mismos cambios.
+    """
+
+    def __init__(
+        self,
+        name: str = "default",
+        batch_size: int = CHANGE_STREAM_BATCH_SIZE,
+        max_wait_ms: int = CHANGE_STREAM_MAX_WAIT_MS,
+    ):
+        self.name = name
+        self.batch_size = batch_size
+        self.max_wait_ms = max_wait_ms
+        self.processed = 0
+        self._stopping = False
+        # La reconstrucción tras perder la posición se repite hasta completarse
+        self._reset_pending = False
+
+    def stop(self) -> None:
+        self._stopping = True
+
+    async def run(self) -> None:
+        while not self._stopping:
+            try:
+                if self._reset_pending:
+                    await self._reset()
+                    self._reset_pending = False
+                await self._consume()
+            except OperationFailure as e:
+                if e.code in _HISTORY_LOST_CODES:
+                    logger.warning("Change stream %r lost its position (%s); rebuilding derived data", self.name, e)
+                    self._reset_pending = True
+                    continue
+                logger.warning("Change stream %r failed, retrying: %s", self.name, e)
+                await asyncio.sleep(CHANGE_STREAM_RETRY_DELAY_S)
+            except Exception:
+                # Error de red o de un manejador: se repite desde el último token guardado
+                logger.exception("Change stream %r interrupted, retrying", self.name)
+                await asyncio.sleep(CHANGE_STREAM_RETRY_DELAY_S)
+
+    async def _consume(self) -> None:
+        tokens = get_mongo_db().get_collection(TOKENS_COLLECTION)
+        saved = await tokens.find_one({"_id": self.name}) or {}
+        pipeline = [{"$match": {
+            "ns.coll": {"$in": watched_collections()},
+            "operationType": {"$in": list(ALL_OPERATIONS)},
+        }}]
+        async with get_mongo_db().watch(
+            pipeline,
+            full_document="updateLookup",
+            resume_after=saved.get("token"),
+            start_at_operation_time=saved.get("start_at") if not saved.get("token") else None,
+            batch_size=self.batch_size,
+            max_await_time_ms=self.max_wait_ms,
+        ) as stream:
+            last_token = saved.get("token")
+            while not self._stopping:
+                events = await self.next_batch(stream)
+                if events:
+                    await dispatch(events)
+                    self.processed += len(events)
+                # Sin cambios también avanza: el token no envejece fuera del oplog
+                token = stream.resume_token
+                if token is not None and token != last_token:
+                    await tokens.update_one(
+                        {"_id": self.name},
+                        {"$set": {"token": token, "updated_at": datetime.now(timezone.utc)}, "$unset": {"start_at": ""}},
+                        upsert=True,
+                    )
+                    last_token = token
+
+    async def next_batch(self, stream) -> List[ChangeEvent]:
+        """Lee cambios hasta llenar el lote, agotar la espera o quedarse sin cambios."""
+        events: List[ChangeEvent] = []
+        deadline = time.monotonic() + self.max_wait_ms / 1000
+        while len(events) < self.batch_size:
+            change = await stream.try_next()
+            if change is not None:
+                events.append(ChangeEvent.from_change(change))
+            elif events or time.monotonic() >= deadline:
+                break
+        return events
+
+    async def _reset(self) -> None:
+        # Se fija antes de reconstruir desde dónde seguir, para no perder los cambios
+        # que ocurran durante la reconstrucción (se verán dos veces, no ninguna)
+        db = get_mongo_db()
+        start_at = (await db.command("hello"))["operationTime"]
+        await db.get_collection(TOKENS_COLLECTION).replace_one(
+            {"_id": self.name},
+            {"start_at": start_at, "updated_at": datetime.now(timezone.utc)},
+            upsert=True,
+        )
+        for fn in _reset_handlers:
+            await fn()
@@ -0,0 +1,186 @@
+# app/services/chart_jobs.py
+"""
+Cálculo diferido de la carta natal tras el registro.
+
+`sign_up` inserta al usuario con `chart_status: pending` y encola un trabajo; el
+worker (`python -m app.worker`) geocodifica, calcula la carta, actualiza el
+documento y publica el nuevo estado en el canal `chart_status:<user_id>`.
+
+Junto a `natal_chart` (Placidus, tropical) se guarda `chart_variants`, el resultado de
+la misma pasada de efemérides del que se derivan los demás sistemas de casas y el
+zodiaco sideral (ver `ChartVariants`). `backfill_chart_variants` lo añade a los
+usuarios anteriores (`python -m app.jobs.chart_variants backfill`).
+
+Si el trabajo no llega a encolarse (Redis caído justo tras el registro), el usuario
+queda `pending`: el worker barre periódicamente con `requeue_pending_charts` los que
+llevan más de `CHART_PENDING_REQUEUE_S` segundos así y los vuelve a encolar.
+"""
+import logging
+import os
+from datetime import datetime, time, timedelta, timezone
+from typing import Any, Dict, Optional, Tuple
+
+from bson import ObjectId
+from pymongo import UpdateOne
+
+from app.db.client import get_mongo_db
+from app.services import events
+from app.services.astrology_service import (
+    calculate_chart_variants,
+    compute_chart_variants,
+    julian_days_by_zone,
+    run_ephemeris,
+)
+from app.services.job_queue import enqueue, job_failure_handler, job_handler
+
+logger = logging.getLogger(__name__)
+
+COMPUTE_NATAL_CHART = "compute_natal_chart"
+CHART_PENDING_REQUEUE_S = float(os.getenv("CHART_PENDING_REQUEUE_S", "600"))
+
+CHART_PENDING = "pending"
+CHART_READY = "ready"
+CHART_FAILED = "failed"
+
+
+def chart_status_channel(user_id: str) -> str:
+    return f"chart_status:{user_id}"
+
+
+async def enqueue_chart_calculation(user_id: str) -> None:
+    await enqueue(COMPUTE_NATAL_CHART, {"user_id": str(user_id)})
+
+
+async def requeue_pending_charts(older_than_s: float = CHART_PENDING_REQUEUE_S, limit: int = 1_000) -> int:
+    """
+    Vuelve a encolar las cartas que siguen `pending` tras `older_than_s` segundos y
+    devuelve cuántas. Cada usuario se reclama moviendo su `updated_at` antes de
+    encolar, así que varios workers pueden barrer a la vez sin duplicar trabajos (y
+    si el encolado vuelve a fallar, se reintenta en otro barrido).
+    """
+    users_collection = get_mongo_db().get_collection("users")
+    cutoff = datetime.now(timezone.utc) - timedelta(seconds=older_than_s)
+    stale = users_collection.find(
+        {"chart_status": CHART_PENDING, "updated_at": {"$lt": cutoff}}, {"updated_at": 1}
+    ).limit(limit)
+    requeued = 0
+    async for user in stale:
+        claimed = await users_collection.update_one(
+            {"_id": user["_id"], "chart_status": CHART_PENDING, "updated_at": user["updated_at"]},
+            {"$set": {"updated_at": datetime.now(timezone.utc)}},
+        )
+        if claimed.modified_count:
+            await enqueue_chart_calculation(user["_id"])
+            requeued += 1
+    if requeued:
+        logger.info("Requeued %d pending natal charts", requeued)
+    return requeued
+
+
+async def publish_chart_status(user_id: str, status: str, error: Optional[str] = None) -> None:
+    await events.publish(
+        chart_status_channel(user_id),
+        {"user_id": str(user_id), "chart_status": status, "error": error},
+    )
+
+
+@job_handler(COMPUTE_NATAL_CHART)
+async def compute_natal_chart_job(payload: Dict[str, Any]) -> None:
+    users_collection = get_mongo_db().get_collection("users")
+    user_id = ObjectId(payload["user_id"])
+    user = await users_collection.find_one(
+        {"_id": user_id}, {"birth_date": 1, "birth_time": 1, "birth_place": 1}
+    )
+    if user is None:
+        return  # El usuario se borró antes de procesar el trabajo
+
+    birth_datetime = datetime.combine(user["birth_date"].date(), time.fromisoformat(user["birth_time"]))
+    variants, latitude, longitude, timezone_name = await calculate_chart_variants(
+        birth_datetime, user["birth_place"]
+    )
+    # En latitudes polares la carta por defecto usa Porphyry; las variantes que sí
+    # existen se guardan siempre
+    natal_chart = variants.natal_chart()
+    await users_collection.update_one(
+        {"_id": user_id},
+        {"$set": {
+            "latitude": latitude,
+            "longitude": longitude,
+            "timezone": timezone_name,
+            "natal_chart": natal_chart.dict() if natal_chart else None,
+            "chart_variants": variants.to_document(),
+            "chart_status": CHART_READY,
+            "chart_error": None,
+            "updated_at": datetime.now(timezone.utc),
+        }},
+    )
+    await publish_chart_status(payload["user_id"], CHART_READY)
+
+
+@job_failure_handler(COMPUTE_NATAL_CHART)
+async def mark_chart_failed(payload: Dict[str, Any], error: BaseException) -> None:
+    await get_mongo_db().get_collection("users").update_one(
+        {"_id": ObjectId(payload["user_id"])},
+        {"$set": {
+            "chart_status": CHART_FAILED,
+            "chart_error": str(error),
+            "updated_at": datetime.now(timezone.utc),
+        }},
+    )
+    await publish_chart_status(payload["user_id"], CHART_FAILED, str(error))
+
+
+async def backfill_chart_variants(batch_size: int = 1_000) -> Tuple[int, int]:
+    """
+    Calcula `chart_variants` de los usuarios con carta que no lo tienen, a partir de
+    las coordenadas y la zona horaria ya guardadas (sin geocodificar). Devuelve
+    `(actualizados, fallidos)`.
+    """
+    users = get_mongo_db().get_collection("users")
+    query = {
+        "natal_chart": {"$ne": None},
+        "chart_variants": {"$exists": False},
+        "latitude": {"$ne": None},
+        "longitude": {"$ne": None},
+        "timezone": {"$ne": None},
+    }
+    projection = {"birth_date": 1, "birth_time": 1, "latitude": 1, "longitude": 1, "timezone": 1}
+    updated = failed = 0
+    last_id = None
+    while True:
+        # Se pagina por `_id` para no volver a leer los que fallan
+        page = {**query, "_id": {"$gt": last_id}} if last_id is not None else query
+        batch = await users.find(page, projection).sort("_id", 1).limit(batch_size).to_list(length=batch_size)
+        if not batch:
+            return updated, failed
+        last_id = batch[-1]["_id"]
+        births, valid = [], []
+        for user in batch:
+            try:
+                births.append((
+                    datetime.combine(user["birth_date"].date(), time.fromisoformat(user["birth_time"])),
+                    user["timezone"],
+                ))
+                valid.append(user)
+            except (KeyError, TypeError, ValueError, AttributeError):
+                failed += 1
+        operations = []
+        # Hora local -> UT de todo el lote de una vez, por zona horaria (en el hilo de
+        # efemérides, que además construye las tablas de zonas nuevas)
+        for user, julian_day in zip(valid, await run_ephemeris(julian_days_by_zone, births)):
+            try:
+                if isinstance(julian_day, Exception):
+                    raise julian_day
+                variants = await run_ephemeris(
+                    compute_chart_variants, julian_day, user["latitude"], user["longitude"]
+                )
+            except Exception:
+                failed += 1
+                continue
+            operations.append(UpdateOne(
+                {"_id": user["_id"], "chart_variants": {"$exists": False}},
+                {"$set": {"chart_variants": variants.to_document()}},
+            ))
+        if operations:
+            await users.bulk_write(operations, ordered=False)
+            updated += len(operations)
@@ -0,0 +1,114 @@
+# app/services/couple_charts.py
+"""
+Cartas de pareja de cada match: compuesta y Davison.
+
+- La compuesta sale de las cartas natales ya guardadas (punto medio de cada planeta y
+  de cada cúspide), sin llamar a las efemérides.
+- La Davison es una carta normal para el punto medio en el tiempo y en el espacio de
+  los dos nacimientos, así que se calcula en el hilo de efemérides (`run_ephemeris`).
+
+El resultado se guarda en el documento del match (`matches.couple_charts`): al crearse
+el match se encola su cálculo y `Match.coupleCharts` sólo calcula si aún no está. Cuando
+uno de los dos recalcula su carta natal, el consumidor de change streams
+(`app.services.change_stream`) borra las cartas de sus matches para que se vuelvan a
+calcular en la siguiente lectura.
+"""
+from datetime import datetime, time, timezone
+from typing import Any, Dict, List, Optional
+
+from bson import ObjectId
+from bson.errors import InvalidId
+
+from app.db.client import get_mongo_db
+from app.services.astrology_service import (
+    compute_composite_chart,
+    compute_davison_chart,
+    julian_day_utc,
+    run_ephemeris,
+)
+from app.services.change_stream import ChangeEvent, change_handler, reset_handler
+from app.services.job_queue import enqueue, job_handler
+
+COMPUTE_COUPLE_CHARTS = "compute_couple_charts"
+
+# Campos de `users` necesarios para las dos cartas
+COUPLE_PROJECTION = {
+    "natal_chart": 1, "birth_date": 1, "birth_time": 1, "latitude": 1, "longitude": 1, "timezone": 1,
+}
+
+
+async def enqueue_couple_charts(match_id) -> None:
+    await enqueue(COMPUTE_COUPLE_CHARTS, {"match_id": str(match_id)})
+
+
+def _birth_moment(user: Dict) -> Optional[tuple]:
+    """`(día juliano UT, latitud, longitud)` del nacimiento, o None si falta algún dato."""
+    if user.get("latitude") is None or user.get("longitude") is None or not user.get("timezone"):
+        return None
+    birth_datetime = datetime.combine(user["birth_date"].date(), time.fromisoformat(user["birth_time"]))
+    return julian_day_utc(birth_datetime, user["timezone"]), user["latitude"], user["longitude"]
+
+
+async def compute_couple_charts(user_a: Dict, user_b: Dict) -> Dict[str, Any]:
+    """Las dos cartas de una pareja de documentos de `users` (con `COUPLE_PROJECTION`)."""
+    composite = davison = None
+    if user_a.get("natal_chart") and user_b.get("natal_chart"):
+        composite = compute_composite_chart(user_a["natal_chart"], user_b["natal_chart"]).dict()
+    # En el hilo de efemérides: la primera vez que el proceso ve una zona horaria
+    # construye su tabla de transiciones
+    moment_a = await run_ephemeris(_birth_moment, user_a)
+    moment_b = await run_ephemeris(_birth_moment, user_b)
+    if moment_a and moment_b:
+        chart = await run_ephemeris(compute_davison_chart, *moment_a, *moment_b)
+        davison = chart.dict() if chart else None
+    return {"composite": composite, "davison": davison, "computed_at": datetime.now(timezone.utc)}
+
+
+async def get_couple_charts(match_id) -> Optional[Dict[str, Any]]:
+    """
+    Las cartas del match `match_id`: las guardadas o, si no las hay, las calcula y las
+    guarda. None si el match (o alguno de sus usuarios) no existe.
+    """
+    try:
+        match_oid = ObjectId(match_id)
+    except (InvalidId, TypeError):
+        return None
+    db = get_mongo_db()
+    matches = db.get_collection("matches")
+    match = await matches.find_one({"_id": match_oid}, {"users": 1, "couple_charts": 1})
+    if match is None:
+        return None
+    if match.get("couple_charts"):
+        return match["couple_charts"]
+
+    user_ids = [ObjectId(user_id) for user_id in match["users"]]
+    users = await db.get_collection("users").find({"_id": {"$in": user_ids}}, COUPLE_PROJECTION).to_list(length=2)
+    if len(users) != 2:
+        return None
+    charts = await compute_couple_charts(users[0], users[1])
+    # Si entretanto se invalidó (o lo guardó otro proceso), no se pisa
+    await matches.update_one(
+        {"_id": match_oid, "couple_charts": {"$exists": False}}, {"$set": {"couple_charts": charts}}
+    )
+    return charts
+
+
+@job_handler(COMPUTE_COUPLE_CHARTS)
+async def compute_couple_charts_job(payload: Dict[str, Any]) -> None:
+    await get_couple_charts(payload["match_id"])
+
+
+@change_handler("users", operations=("update", "replace"), fields=("natal_chart",))
+async def _invalidate_couple_charts(changes: List[ChangeEvent]) -> None:
+    user_ids = list({str(change.document_id) for change in changes})
+    await get_mongo_db().get_collection("matches").update_many(
+        {"users": {"$in": user_ids}, "couple_charts": {"$exists": True}}, {"$unset": {"couple_charts": ""}}
+    )
+
+
+@reset_handler
+async def _on_change_stream_reset() -> None:
+    # Se han podido perder invalidaciones: se recalculan todas al leerlas
+    await get_mongo_db().get_collection("matches").update_many(
+        {"couple_charts": {"$exists": True}}, {"$unset": {"couple_charts": ""}}
+    )
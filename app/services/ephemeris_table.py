@@ -0,0 +1,189 @@
+# app/services/ephemeris_table.py
+"""
+Daily ephemeris table and vectorized transit-to-natal aspects.
+
+The table holds the tropical longitude of every body in `PLANET_MAPPING` at 0h UT
+for each day of a date range. It is computed once (see `app.jobs.ephemeris`) and
+stored as a `.npy` file that is memory-mapped on load, so every worker shares the
+same pages and a daily run needs no Swiss Ephemeris calls at all. A JSON sidecar
+(`<path>.json`) records the start date and body order.
+"""
+import json
+from dataclasses import dataclass
+from datetime import date, timedelta
+from typing import Dict, Iterable, Iterator, List, Optional
+
+import numpy as np
+import swisseph as swe
+
+from .astrology_service import EPHE_PATH, PLANET_MAPPING, get_zodiac_sign_index
+
+BODY_NAMES: List[str] = list(PLANET_MAPPING)
+
+# Major aspects and their exact angle in degrees
+ASPECTS: Dict[str, float] = {
+    "conjunction": 0.0,
+    "sextile": 60.0,
+    "square": 90.0,
+    "trine": 120.0,
+    "opposition": 180.0,
+}
+DEFAULT_ORB = 1.0
+
+
+def _metadata_path(path: str) -> str:
+    return f"{path}.json"
+
+
+def build_table(start: date, end: date, path: str) -> None:
+    """Computes daily longitudes for `[start, end]` and writes them to `path`."""
+    days = (end - start).days + 1
+    if days <= 0:
+        raise ValueError("end must not be before start")
+
+    swe.set_ephe_path(EPHE_PATH)
+    table = np.lib.format.open_memmap(path, mode="w+", dtype=np.float64, shape=(days, len(BODY_NAMES)))
+    start_jd = swe.julday(start.year, start.month, start.day, 0.0)
+    for row in range(days):
+        jd = start_jd + row
+        for col, planet_id in enumerate(PLANET_MAPPING.values()):
+            table[row, col] = swe.calc_ut(jd, planet_id)[0][0]
+    table.flush()
+    del table
+
+    with open(_metadata_path(path), "w") as fh:
+        json.dump({"start": start.isoformat(), "days": days, "bodies": BODY_NAMES}, fh)
+
+
+class EphemerisTable:
+    """Read-only, memory-mapped view of a table produced by `build_table`."""
+
+    def __init__(self, path: str):
+        with open(_metadata_path(path)) as fh:
+            metadata = json.load(fh)
+        if metadata["bodies"] != BODY_NAMES:
+            raise ValueError(f"Ephemeris table {path} was built for a different body list")
+        self.start = date.fromisoformat(metadata["start"])
+        self.longitudes = np.load(path, mmap_mode="r")
+
+    @property
+    def end(self) -> date:
+        return self.start + timedelta(days=len(self.longitudes) - 1)
+
+    def positions(self, day: date) -> np.ndarray:
+        """Longitudes of every body on `day` at 0h UT, in `BODY_NAMES` order."""
+        row = (day - self.start).days
+        if not 0 <= row < len(self.longitudes):
+            raise KeyError(f"{day} is outside the table range {self.start}..{self.end}")
+        return np.asarray(self.longitudes[row])
+
+
+def natal_longitudes(natal_chart: Optional[dict]) -> np.ndarray:
+    """
+    Absolute longitudes (0-360) of a stored natal chart in `BODY_NAMES` order; bodies
+    missing from the chart are NaN and never form aspects.
+    """
+    row = np.full(len(BODY_NAMES), np.nan)
+    for position in (natal_chart or {}).get("positions", []):
+        if position["name"] in PLANET_MAPPING:
+            sign_index = get_zodiac_sign_index(position["sign"])
+            row[BODY_NAMES.index(position["name"])] = sign_index * 30 + position["degrees"]
+    return row
+
+
+def natal_matrix(natal_charts: Iterable[Optional[dict]]) -> np.ndarray:
+    """Stacks `natal_longitudes` for many users into an (N, bodies) array."""
+    rows = [natal_longitudes(chart) for chart in natal_charts]
+    return np.vstack(rows) if rows else np.empty((0, len(BODY_NAMES)))
+
+
+@dataclass
+class TransitAspects:
+    """Parallel arrays, one entry per aspect found (indexes into the inputs)."""
+    user: np.ndarray
+    transit_body: np.ndarray
+    natal_body: np.ndarray
+    aspect: np.ndarray
+    deviation: np.ndarray
+
+    def __len__(self) -> int:
+        return len(self.user)
+
+
+# Resolution (bins per degree) of the separation -> candidate aspect lookup table
+_LOOKUP_RESOLUTION = 100
+
+
+def _aspect_lookup(aspect_angles: np.ndarray, orb: float) -> tuple[np.ndarray, float]:
+    """
+    Maps each 1/_LOOKUP_RESOLUTION degree bin of separation (0-180) to the aspect
+    whose orb window touches it, or -1. Bins are conservative: candidates are
+    re-checked exactly. Also returns a separation value that maps to no aspect,
+    used for NaN (missing) bodies.
+    """
+    if len(aspect_angles) > 1 and np.min(np.diff(np.sort(aspect_angles))) <= 2 * orb:
+        raise ValueError("orb is too wide: aspect windows overlap")
+    lower = np.arange(180 * _LOOKUP_RESOLUTION + 1) / _LOOKUP_RESOLUTION
+    upper = lower + 1 / _LOOKUP_RESOLUTION
+    lookup = np.full(len(lower), -1, dtype=np.int8)
+    for aspect_index, angle in enumerate(aspect_angles):
+        lookup[(upper >= angle - orb) & (lower <= angle + orb)] = aspect_index
+    no_aspect = np.flatnonzero(lookup < 0)
+    sentinel = float(lower[no_aspect[0]]) if len(no_aspect) else -1.0
+    return lookup, sentinel
+
+
+def _iter_transit_aspects(
+    natal: np.ndarray, transit: np.ndarray, orb: float, aspect_angles: np.ndarray, chunk_size: int
+) -> Iterator[TransitAspects]:
+    lookup, sentinel = _aspect_lookup(aspect_angles, orb)
+    if sentinel < 0:  # Every separation is within some orb
+        sentinel = 0.0
+    transit = transit.astype(np.float32)[None, :, None]
+    for offset in range(0, len(natal), chunk_size):
+        chunk = natal[offset:offset + chunk_size].astype(np.float32)[:, None, :]
+        # Angular separation in [0, 180] for every (user, transit body, natal body).
+        # (min(d, 360 - d) instead of a modulo: float modulo is several times slower.)
+        difference = np.abs(transit - chunk)
+        separation = np.minimum(difference, 360.0 - difference)
+        np.nan_to_num(separation, copy=False, nan=sentinel)
+
+        candidate = lookup[(separation * _LOOKUP_RESOLUTION).astype(np.int32)]
+        user, transit_body, natal_body = np.nonzero(candidate >= 0)
+        aspect = candidate[user, transit_body, natal_body]
+        deviation = np.abs(separation[user, transit_body, natal_body] - aspect_angles[aspect])
+        exact = deviation <= orb
+        if np.any(exact):
+            yield TransitAspects(
+                user=user[exact] + offset,
+                transit_body=transit_body[exact],
+                natal_body=natal_body[exact],
+                aspect=aspect[exact].astype(np.int64),
+                deviation=deviation[exact],
+            )
+
+
+def find_transit_aspects(
+    natal: np.ndarray,
+    transit: np.ndarray,
+    orb: float = DEFAULT_ORB,
+    aspects: Dict[str, float] = ASPECTS,
+    chunk_size: int = 10_000,
+) -> TransitAspects:
+    """
+    Evaluates every user's natal chart against one set of transit positions.
+
+    `natal` is an (N, bodies) array from `natal_matrix` and `transit` a row from
+    `EphemerisTable.positions`. Users are processed in chunks of `chunk_size` so the
+    (chunk, bodies, bodies) working set stays small. `aspect` values index into
+    `list(aspects)`.
+    """
+    parts = list(_iter_transit_aspects(
+        natal, transit, orb, np.array(list(aspects.values()), dtype=np.float32), chunk_size
+    ))
+    if not parts:
+        empty = np.empty(0, dtype=np.int64)
+        return TransitAspects(empty, empty, empty, empty, np.empty(0, dtype=np.float32))
+    return TransitAspects(*(np.concatenate(arrays) for arrays in zip(*(
+        (p.user, p.transit_body, p.natal_body, p.aspect, p.deviation) for p in parts
+    ))))
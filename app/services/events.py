@@ -0,0 +1,90 @@
+# app/services/events.py
+"""
+Bus de eventos entre procesos sobre Redis Pub/Sub.
+
+Cada proceso mantiene una única conexión suscrita al patrón `events:*` y reparte
+los mensajes a las colas locales de quien esté escuchando ese canal (p. ej. una
+suscripción GraphQL). Así, un evento publicado por el worker de trabajos o por otro
+worker web llega a todos los clientes conectados sin abrir una conexión de Redis
+por suscriptor.
+"""
+import asyncio
+import json
+import logging
+from collections import defaultdict
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Dict, Optional, Set
+
+from app.db.client import get_redis
+
+logger = logging.getLogger(__name__)
+
+_PREFIX = "events:"
+
+_listeners: Dict[str, Set[asyncio.Queue]] = defaultdict(set)
+_reader: Optional[asyncio.Task] = None
+
+
+async def publish(channel: str, payload: Dict[str, Any]) -> None:
+    """Publica `payload` (serializable a JSON) en `channel` para todos los procesos."""
+    await get_redis().publish(_PREFIX + channel, json.dumps(payload, default=str))
+
+
+async def _read_forever() -> None:
+    pubsub = get_redis().pubsub()
+    await pubsub.psubscribe(_PREFIX + "*")
+    try:
+        while True:
+            message = await pubsub.get_message(ignore_subscribe_messages=True, timeout=1.0)
+            if message is None or message["type"] != "pmessage":
+                continue
+            channel = message["channel"].decode()[len(_PREFIX):]
+            if queues := _listeners.get(channel):
+                payload = json.loads(message["data"])
+                for queue in queues:
+                    queue.put_nowait(payload)
+    finally:
+        await pubsub.punsubscribe()
+        await pubsub.aclose()
+
+
+def _ensure_reader() -> None:
+    global _reader
+    if _reader is None or _reader.done():
+        if _reader is not None and not _reader.cancelled() and _reader.exception():
+            logger.warning("Event bus reader stopped, restarting: %r", _reader.exception())
+        _reader = asyncio.create_task(_read_forever(), name="event-bus-reader")
+
+
+def reader_running() -> bool:
+    """Si la conexión de escucha sigue viva (sin ella las colas no reciben nada)."""
+    return _reader is not None and not _reader.done()
+
+
+@asynccontextmanager
+async def subscribe(channel: str) -> AsyncIterator[asyncio.Queue]:
+    """
+    Escucha `channel` en este proceso. Devuelve una cola con los payloads recibidos
+    mientras el contexto esté abierto.
+    """
+    _ensure_reader()
+    queue: asyncio.Queue = asyncio.Queue()
+    _listeners[channel].add(queue)
+    try:
+        yield queue
+    finally:
+        _listeners[channel].discard(queue)
+        if not _listeners[channel]:
+            del _listeners[channel]
+
+
+async def stop_event_bus() -> None:
+    """Cierra la conexión de escucha del proceso (shutdown)."""
+    global _reader
+    if _reader is not None:
+        _reader.cancel()
+        try:
+            await _reader
+        except (asyncio.CancelledError, Exception):
+            pass
+        _reader = None
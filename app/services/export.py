@@ -0,0 +1,212 @@
+# app/services/export.py
+"""
+Exportación masiva de usuarios y cartas natales en streaming.
+
+Los usuarios se leen en orden de `_id` con un cursor por lotes y una proyección
+(nunca se exporta `password_hash`), y cada lote se serializa y se entrega antes de
+pedir el siguiente: la memoria es constante y, si el consumidor (la respuesta HTTP
+o el fichero) va lento, la lectura de MongoDB espera.
+
+La carta natal se aplana en columnas: `<cuerpo>_lon` con la longitud absoluta
+(0-360) de cada cuerpo y `house_<n>` con la de cada cúspide.
+
+Formatos:
+
+- `ndjson`: un objeto JSON por línea.
+- `arrow`: stream IPC de Apache Arrow, un record batch por lote. Requiere
+  `pyarrow` (dependencia opcional: `pip install pyarrow`).
+
+Para reanudar una exportación interrumpida se pasa el último `_id` recibido como
+`after`: el orden por `_id` garantiza que no se repiten ni se saltan filas.
+"""
+import io
+import json
+from datetime import datetime
+from typing import Any, AsyncIterator, Dict, Iterable, List, NamedTuple, Optional
+
+from bson import ObjectId
+
+from app.db.client import get_mongo_db
+from app.services.astrology_service import PLANET_MAPPING, get_zodiac_sign_index
+
+try:
+    import pyarrow as pa
+except ImportError:  # Dependencia opcional, sólo para el formato Arrow
+    pa = None
+
+FORMATS = ("ndjson", "arrow")
+DEFAULT_BATCH_SIZE = 1000
+
+EXPORT_PROJECTION = {
+    "email": 1,
+    "gender": 1,
+    "looking_for": 1,
+    "plan": 1,
+    "birth_date": 1,
+    "birth_time": 1,
+    "birth_place": 1,
+    "latitude": 1,
+    "longitude": 1,
+    "timezone": 1,
+    "chart_status": 1,
+    "created_at": 1,
+    "updated_at": 1,
+    "natal_chart.positions.name": 1,
+    "natal_chart.positions.sign": 1,
+    "natal_chart.positions.degrees": 1,
+    "natal_chart.houses.sign": 1,
+    "natal_chart.houses.degrees": 1,
+}
+
+BODY_COLUMNS = [f"{name.lower().replace(' ', '_')}_lon" for name in PLANET_MAPPING]
+HOUSE_COLUMNS = [f"house_{n}" for n in range(1, 13)]
+_BODY_COLUMN = dict(zip(PLANET_MAPPING, BODY_COLUMNS))
+
+
+class ExportChunk(NamedTuple):
+    data: bytes
+    last_id: Optional[ObjectId]  # Punto de control válido una vez escrito `data`
+    rows: int
+
+
+class ExportUnavailable(RuntimeError):
+    """El formato pedido necesita una dependencia que no está instalada."""
+
+
+def _absolute_longitude(position: Dict[str, Any]) -> float:
+    return get_zodiac_sign_index(position["sign"]) * 30 + position["degrees"]
+
+
+def flatten_user(doc: Dict[str, Any]) -> Dict[str, Any]:
+    """Convierte un documento de `users` en una fila plana (columnas fijas)."""
+    birth_date = doc.get("birth_date")
+    row: Dict[str, Any] = {
+        "id": str(doc["_id"]),
+        "email": doc.get("email"),
+        "gender": doc.get("gender"),
+        "looking_for": doc.get("looking_for"),
+        "plan": doc.get("plan"),
+        "birth_date": birth_date.date().isoformat() if isinstance(birth_date, datetime) else birth_date,
+        "birth_time": doc.get("birth_time"),
+        "birth_place": doc.get("birth_place"),
+        "latitude": doc.get("latitude"),
+        "longitude": doc.get("longitude"),
+        "timezone": doc.get("timezone"),
+        "chart_status": doc.get("chart_status"),
+        "created_at": doc.get("created_at"),
+        "updated_at": doc.get("updated_at"),
+    }
+    row.update(dict.fromkeys(BODY_COLUMNS))
+    row.update(dict.fromkeys(HOUSE_COLUMNS))
+
+    natal_chart = doc.get("natal_chart") or {}
+    for position in natal_chart.get("positions") or []:
+        if column := _BODY_COLUMN.get(position.get("name")):
+            row[column] = _absolute_longitude(position)
+    for column, house in zip(HOUSE_COLUMNS, natal_chart.get("houses") or []):
+        row[column] = _absolute_longitude(house)
+    return row
+
+
+async def iter_user_batches(
+    after: Optional[ObjectId] = None,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    limit: Optional[int] = None,
+) -> AsyncIterator[List[Dict[str, Any]]]:
+    """Lotes de documentos de `users` con `_id > after`, en orden de `_id`."""
+    query = {"_id": {"$gt": after}} if after is not None else {}
+    cursor = (
+        get_mongo_db()
+        .get_collection("users")
+        .find(query, EXPORT_PROJECTION, batch_size=batch_size)
+        .sort("_id", 1)
+    )
+    if limit:
+        cursor = cursor.limit(limit)
+
+    batch: List[Dict[str, Any]] = []
+    async for doc in cursor:
+        batch.append(doc)
+        if len(batch) >= batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def _json_default(value: Any) -> Any:
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return str(value)
+
+
+def encode_ndjson(rows: Iterable[Dict[str, Any]]) -> bytes:
+    return b"".join(
+        json.dumps(row, default=_json_default, separators=(",", ":")).encode() + b"\n"
+        for row in rows
+    )
+
+
+def arrow_schema():
+    if pa is None:
+        raise ExportUnavailable("Arrow export requires pyarrow (pip install pyarrow)")
+    string_columns = [
+        "id", "email", "gender", "looking_for", "plan", "birth_date", "birth_time",
+        "birth_place", "timezone", "chart_status",
+    ]
+    fields = [pa.field(name, pa.string()) for name in string_columns]
+    fields += [pa.field(name, pa.float64()) for name in ("latitude", "longitude")]
+    fields += [pa.field(name, pa.timestamp("ms", tz="UTC")) for name in ("created_at", "updated_at")]
+    fields += [pa.field(name, pa.float64()) for name in BODY_COLUMNS + HOUSE_COLUMNS]
+    return pa.schema(fields)
+
+
+class ArrowStreamEncoder:
+    """
+    Escribe un stream IPC de Arrow por partes: `encode(rows)` devuelve los bytes de
+    un record batch (precedidos del esquema la primera vez) y `close()` el marcador
+    de fin de stream.
+    """
+
+    def __init__(self):
+        self.schema = arrow_schema()
+        self._buffer = io.BytesIO()
+        self._writer = pa.ipc.new_stream(self._buffer, self.schema)
+
+    def _drain(self) -> bytes:
+        data = self._buffer.getvalue()
+        self._buffer.seek(0)
+        self._buffer.truncate()
+        return data
+
+    def encode(self, rows: List[Dict[str, Any]]) -> bytes:
+        self._writer.write_batch(pa.RecordBatch.from_pylist(rows, schema=self.schema))
+        return self._drain()
+
+    def close(self) -> bytes:
+        self._writer.close()
+        return self._drain()
+
+
+async def export_users(
+    fmt: str = "ndjson",
+    after: Optional[ObjectId] = None,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    limit: Optional[int] = None,
+) -> AsyncIterator[ExportChunk]:
+    """
+    Genera un `ExportChunk` por lote. Una vez escritos sus bytes, `last_id` es un
+    punto de control válido para reanudar con `after`. El último fragmento de Arrow
+    (fin de stream) no tiene filas y lleva `last_id=None`.
+    """
+    if fmt not in FORMATS:
+        raise ValueError(f"Unknown export format {fmt!r}; expected one of {FORMATS}")
+    encoder = ArrowStreamEncoder() if fmt == "arrow" else None
+
+    async for batch in iter_user_batches(after, batch_size, limit):
+        rows = [flatten_user(doc) for doc in batch]
+        data = encoder.encode(rows) if encoder else encode_ndjson(rows)
+        yield ExportChunk(data, batch[-1]["_id"], len(rows))
+
+    if encoder:
+        yield ExportChunk(encoder.close(), None, 0)
@@ -0,0 +1,170 @@
+# app/services/feed.py
+"""
+Consultas de candidatos para el feed.
+
+Sin ubicación se devuelve la colección filtrada; con `near` se usa `$geoNear` sobre
+el índice 2dsphere de `location` (ver `app.db.indexes`), de modo que la latencia
+depende de los candidatos cercanos y no del tamaño total de la colección.
+
+Sin ubicación y con el índice de candidatos cargado (`app.services.candidate_index`),
+los filtros se resuelven en memoria y `find_indexed_candidates` sólo lee por `_id`
+los usuarios que entran en la página.
+
+`stream_feed_candidates` y `stream_indexed_candidates` recorren los mismos candidatos
+sin límite de página, para el feed en streaming (`app.services.feed_stream`).
+"""
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional, Sequence
+
+from bson import ObjectId
+
+from app.db.client import get_mongo_db
+
+FEED_DEFAULT_LIMIT = 50
+FEED_MAX_LIMIT = 200
+# Documentos leídos como máximo cuando se descartan candidatos en memoria
+FEED_MAX_SCAN = 2_000
+
+
+def geo_point(latitude: float, longitude: float) -> Dict[str, Any]:
+    """Punto GeoJSON (MongoDB espera el orden [longitud, latitud])."""
+    return {"type": "Point", "coordinates": [longitude, latitude]}
+
+
+def build_feed_filters(
+    gender: Optional[str] = None,
+    looking_for: Optional[str] = None,
+    sexual_orientation: Optional[List[str]] = None,
+) -> Dict[str, Any]:
+    filters: Dict[str, Any] = {}
+    if gender:
+        filters["gender"] = gender
+    if looking_for:
+        filters["looking_for"] = looking_for
+    if sexual_orientation:
+        filters["sexual_orientation"] = {"$in": sexual_orientation}
+    return filters
+
+
+def _geo_near_stage(
+    filters: Dict[str, Any], near: Dict[str, Any], max_distance_km: Optional[float]
+) -> Dict[str, Any]:
+    geo_near: Dict[str, Any] = {
+        "near": near,
+        "key": "location",
+        "distanceField": "distance_m",
+        "spherical": True,
+        "query": filters,
+    }
+    if max_distance_km is not None:
+        geo_near["maxDistance"] = max_distance_km * 1000
+    return {"$geoNear": geo_near}
+
+
+async def find_feed_candidates(
+    filters: Dict[str, Any],
+    near: Optional[Dict[str, Any]] = None,
+    max_distance_km: Optional[float] = None,
+    limit: Optional[int] = None,
+    exclude: Optional[Callable[[Dict[str, Any]], bool]] = None,
+) -> AsyncIterator[Dict[str, Any]]:
+    """
+    Itera los documentos candidatos. Con `near`, vienen ordenados por distancia y
+    con el campo `distance_m` añadido por `$geoNear`.
+
+    Devuelve como mucho `limit` candidatos (`FEED_DEFAULT_LIMIT` si no se indica,
+    nunca más de `FEED_MAX_LIMIT`). `exclude` descarta candidatos en memoria (p. ej.
+    los que ya tienen like, ver `app.services.like_filter`): se siguen leyendo hasta
+    completar `limit`, con un máximo de `FEED_MAX_SCAN` documentos leídos.
+    """
+    users_collection = get_mongo_db().get_collection("users")
+    limit = min(limit or FEED_DEFAULT_LIMIT, FEED_MAX_LIMIT)
+    if near is None:
+        cursor = users_collection.find(filters).limit(FEED_MAX_SCAN if exclude is not None else limit)
+    else:
+        pipeline = [
+            _geo_near_stage(filters, near, max_distance_km),
+            {"$limit": FEED_MAX_SCAN if exclude is not None else limit},
+        ]
+        cursor = users_collection.aggregate(pipeline)
+
+    if exclude is not None:
+        # Lotes del tamaño de la página: no se piden más documentos de los que hacen falta
+        cursor = cursor.batch_size(limit)
+
+    remaining = limit
+    async for doc in cursor:
+        if exclude is not None and exclude(doc):
+            continue
+        yield doc
+        remaining -= 1
+        if remaining == 0:
+            break
+    await cursor.close()
+
+
+async def find_indexed_candidates(
+    ordinals: Sequence[int],
+    ids_for: Callable[[Sequence[int]], List[ObjectId]],
+    limit: Optional[int] = None,
+    exclude: Optional[Callable[[Dict[str, Any]], bool]] = None,
+) -> AsyncIterator[Dict[str, Any]]:
+    """
+    Lee de MongoDB, por `_id` y en el orden dado, los candidatos ya filtrados por
+    `app.services.candidate_index`. Se piden en lotes del tamaño de la página hasta
+    completarla (tras aplicar `exclude`) o agotar `FEED_MAX_SCAN` ordinales.
+    """
+    users_collection = get_mongo_db().get_collection("users")
+    remaining = min(limit or FEED_DEFAULT_LIMIT, FEED_MAX_LIMIT)
+    for start in range(0, min(len(ordinals), FEED_MAX_SCAN), remaining):
+        ids = ids_for(ordinals[start:start + remaining])
+        docs = {doc["_id"]: doc async for doc in users_collection.find({"_id": {"$in": ids}})}
+        for user_id in ids:
+            doc = docs.get(user_id)
+            if doc is None or (exclude is not None and exclude(doc)):
+                continue
+            yield doc
+            remaining -= 1
+            if remaining == 0:
+                return
+
+
+async def stream_feed_candidates(
+    filters: Dict[str, Any],
+    near: Optional[Dict[str, Any]] = None,
+    max_distance_km: Optional[float] = None,
+    batch_size: int = FEED_DEFAULT_LIMIT,
+    exclude: Optional[Callable[[Dict[str, Any]], bool]] = None,
+) -> AsyncIterator[Dict[str, Any]]:
+    """
+    Como `find_feed_candidates` pero sin límite: mantiene abierto el cursor de MongoDB
+    y pide lotes de `batch_size` a medida que se consumen.
+    """
+    users_collection = get_mongo_db().get_collection("users")
+    if near is None:
+        cursor = users_collection.find(filters)
+    else:
+        cursor = users_collection.aggregate([_geo_near_stage(filters, near, max_distance_km)])
+    cursor = cursor.batch_size(batch_size)
+    try:
+        async for doc in cursor:
+            if exclude is None or not exclude(doc):
+                yield doc
+    finally:
+        await cursor.close()
+
+
+async def stream_indexed_candidates(
+    ordinals: Sequence[int],
+    ids_for: Callable[[Sequence[int]], List[ObjectId]],
+    batch_size: int = FEED_DEFAULT_LIMIT,
+    exclude: Optional[Callable[[Dict[str, Any]], bool]] = None,
+) -> AsyncIterator[Dict[str, Any]]:
+    """Como `find_indexed_candidates` pero recorre todos los `ordinals`, `batch_size` a la vez."""
+    users_collection = get_mongo_db().get_collection("users")
+    for start in range(0, len(ordinals), batch_size):
+        ids = ids_for(ordinals[start:start + batch_size])
+        docs = {doc["_id"]: doc async for doc in users_collection.find({"_id": {"$in": ids}})}
+        for user_id in ids:
+            doc = docs.get(user_id)
+            if doc is not None and (exclude is None or not exclude(doc)):
+                yield doc
@@ -0,0 +1,99 @@
+# app/services/feed_stream.py
+"""
+Feed en streaming para la suscripción `feedStream`.
+
+En lugar de pedir una página del feed tras cada tanda de swipes, el cliente abre una
+suscripción y el servidor mantiene por sesión el cursor de candidatos
+(`app.services.feed.stream_*`) y un búfer de `FEED_STREAM_PREFETCH` documentos ya
+leídos. Cada swipe (`likeUser`/`passUser`) se publica en el bus de eventos
+(`feed_swipes:<user_id>`), llega a la suscripción aunque esté en otro worker y ésta
+envía el siguiente candidato desde el búfer; cuando el búfer baja de la mitad se
+rellena en segundo plano.
+"""
+import asyncio
+import logging
+import os
+from collections import deque
+from typing import Any, AsyncIterator, Deque, Dict, List, Optional
+
+from app.services import events
+
+logger = logging.getLogger(__name__)
+
+FEED_STREAM_PREFETCH = int(os.getenv("FEED_STREAM_PREFETCH", "30"))
+FEED_STREAM_MAX_DECK = 50
+
+
+def feed_swipes_channel(user_id: str) -> str:
+    return f"feed_swipes:{user_id}"
+
+
+async def publish_swipe(user_id: str, target_user_id: str, liked: bool) -> None:
+    """Avisa a la suscripción del usuario; si Redis falla el swipe sigue contando."""
+    try:
+        await events.publish(
+            feed_swipes_channel(str(user_id)),
+            {"target_user_id": str(target_user_id), "liked": liked},
+        )
+    except Exception as e:
+        logger.warning("Could not publish swipe of %s: %s", user_id, e)
+
+
+class FeedSession:
+    """
+    Búfer de candidatos sobre un iterador de documentos. Sólo una tarea lee del
+    iterador a la vez (la de relleno), así que el cursor de MongoDB nunca se comparte.
+    """
+
+    def __init__(self, source: AsyncIterator[Dict[str, Any]], prefetch: int = FEED_STREAM_PREFETCH):
+        self._source = source
+        self._prefetch = prefetch
+        self._buffer: Deque[Dict[str, Any]] = deque()
+        self._refill_task: Optional[asyncio.Task] = None
+        self.exhausted = False
+
+    @property
+    def buffered(self) -> int:
+        return len(self._buffer)
+
+    async def _refill(self, target: int) -> None:
+        while len(self._buffer) < target:
+            try:
+                doc = await self._source.__anext__()
+            except StopAsyncIteration:
+                self.exhausted = True
+                return
+            self._buffer.append(doc)
+
+    def _start_refill(self, target: int) -> asyncio.Task:
+        task = self._refill_task
+        if task is not None and task.done() and not task.cancelled() and task.exception():
+            raise task.exception()  # El relleno en segundo plano falló
+        if task is None or task.done():
+            self._refill_task = asyncio.create_task(self._refill(target), name="feed-stream-refill")
+        return self._refill_task
+
+    async def take(self, count: int) -> List[Dict[str, Any]]:
+        """
+        Hasta `count` candidatos. Sólo espera a MongoDB si el búfer no tiene bastantes
+        (la primera vez o si el cliente va más rápido que el relleno); devuelve menos
+        cuando se acaban los candidatos.
+        """
+        while len(self._buffer) < count and not self.exhausted:
+            await self._start_refill(count)
+        taken = [self._buffer.popleft() for _ in range(min(count, len(self._buffer)))]
+        if not self.exhausted and len(self._buffer) <= self._prefetch // 2:
+            self._start_refill(self._prefetch)
+        return taken
+
+    async def close(self) -> None:
+        if self._refill_task is not None:
+            self._refill_task.cancel()
+            try:
+                await self._refill_task
+            except (asyncio.CancelledError, Exception):
+                pass
+        # Cierra el cursor de MongoDB del generador
+        aclose = getattr(self._source, "aclose", None)
+        if aclose is not None:
+            await aclose()
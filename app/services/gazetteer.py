@@ -0,0 +1,134 @@
+# app/services/gazetteer.py
+"""
+Índice local de lugares para geocodificar sin llamar a Nominatim.
+
+Las importaciones masivas no pueden esperar a un servicio externo limitado a una
+petición por segundo, así que resuelven los lugares de nacimiento contra un índice
+en memoria. Se carga desde un volcado de GeoNames (`cities15000.txt` o similar,
+https://download.geonames.org/export/dump/) con `Gazetteer.from_geonames()`; sin
+fichero, `Gazetteer.builtin()` cubre sólo un puñado de capitales (suficiente para
+poblaciones sintéticas).
+
+Los nombres se normalizan (minúsculas, sin tildes ni signos) y se prueba primero el
+texto completo y luego su primer componente (`"Bogotá, Colombia"` -> `"bogota"`).
+Ante nombres repetidos gana el lugar más poblado.
+"""
+import csv
+import re
+import sys
+import unicodedata
+from dataclasses import dataclass
+from typing import Dict, Iterable, Optional, Tuple
+
+
+@dataclass(frozen=True)
+class Place:
+    name: str
+    latitude: float
+    longitude: float
+    timezone: Optional[str] = None
+    population: int = 0
+
+
+# (nombre, latitud, longitud, zona horaria, población aproximada)
+BUILTIN_PLACES = [
+    ("Bogotá", 4.711, -74.0721, "America/Bogota", 7_400_000),
+    ("Medellín", 6.2518, -75.5636, "America/Bogota", 2_500_000),
+    ("Cali", 3.4372, -76.5225, "America/Bogota", 2_200_000),
+    ("Barranquilla", 10.9685, -74.7813, "America/Bogota", 1_200_000),
+    ("Ciudad de México", 19.4326, -99.1332, "America/Mexico_City", 9_200_000),
+    ("Guadalajara", 20.6597, -103.3496, "America/Mexico_City", 1_500_000),
+    ("Lima", -12.0464, -77.0428, "America/Lima", 9_700_000),
+    ("Quito", -0.1807, -78.4678, "America/Guayaquil", 2_000_000),
+    ("Caracas", 10.4806, -66.9036, "America/Caracas", 2_000_000),
+    ("Santiago", -33.4489, -70.6693, "America/Santiago", 6_300_000),
+    ("Buenos Aires", -34.6037, -58.3816, "America/Argentina/Buenos_Aires", 3_100_000),
+    ("Montevideo", -34.9011, -56.1645, "America/Montevideo", 1_300_000),
+    ("São Paulo", -23.5505, -46.6333, "America/Sao_Paulo", 12_300_000),
+    ("Rio de Janeiro", -22.9068, -43.1729, "America/Sao_Paulo", 6_700_000),
+    ("Havana", 23.1136, -82.3666, "America/Havana", 2_100_000),
+    ("New York", 40.7128, -74.006, "America/New_York", 8_300_000),
+    ("Los Angeles", 34.0522, -118.2437, "America/Los_Angeles", 3_900_000),
+    ("Chicago", 41.8781, -87.6298, "America/Chicago", 2_700_000),
+    ("Miami", 25.7617, -80.1918, "America/New_York", 450_000),
+    ("Toronto", 43.6532, -79.3832, "America/Toronto", 2_800_000),
+    ("Madrid", 40.4168, -3.7038, "Europe/Madrid", 3_300_000),
+    ("Barcelona", 41.3874, 2.1686, "Europe/Madrid", 1_600_000),
+    ("Lisboa", 38.7223, -9.1393, "Europe/Lisbon", 550_000),
+    ("London", 51.5074, -0.1278, "Europe/London", 8_900_000),
+    ("Paris", 48.8566, 2.3522, "Europe/Paris", 2_100_000),
+    ("Berlin", 52.52, 13.405, "Europe/Berlin", 3_600_000),
+    ("Roma", 41.9028, 12.4964, "Europe/Rome", 2_800_000),
+    ("Tokyo", 35.6762, 139.6503, "Asia/Tokyo", 14_000_000),
+    ("Sydney", -33.8688, 151.2093, "Australia/Sydney", 5_300_000),
+    ("Johannesburg", -26.2041, 28.0473, "Africa/Johannesburg", 5_600_000),
+]
+
+_PUNCTUATION = re.compile(r"[^\w\s,]")
+_SPACES = re.compile(r"\s+")
+
+
+def normalize_place(text: str) -> str:
+    """Clave de búsqueda: minúsculas, sin tildes, sin signos y con espacios simples."""
+    decomposed = unicodedata.normalize("NFKD", text)
+    stripped = "".join(c for c in decomposed if not unicodedata.combining(c))
+    cleaned = _PUNCTUATION.sub(" ", stripped.lower())
+    return _SPACES.sub(" ", cleaned).replace(" ,", ",").strip(" ,")
+
+
+class Gazetteer:
+    def __init__(self, places: Iterable[Place] = ()):
+        self._index: Dict[str, Place] = {}
+        for place in places:
+            self.add(place)
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+    def add(self, place: Place, *aliases: str) -> None:
+        for name in (place.name, *aliases):
+            key = normalize_place(name)
+            current = self._index.get(key)
+            if key and (current is None or place.population > current.population):
+                self._index[key] = place
+
+    def match(self, text: str) -> Optional[Tuple[str, Place]]:
+        """
+        Lugar de `text` y la clave con la que se encontró: la clave completa o, si no
+        está, sólo la primera parte antes de la coma (`"cambridge, massachusetts"` se
+        resuelve como `"cambridge"`, el más poblado de ese nombre).
+        """
+        key = normalize_place(text)
+        if (place := self._index.get(key)) is not None:
+            return key, place
+        first, _, rest = key.partition(",")
+        first = first.strip()
+        if rest and (place := self._index.get(first)) is not None:
+            return first, place
+        return None
+
+    def lookup(self, text: str) -> Optional[Place]:
+        matched = self.match(text)
+        return matched[1] if matched else None
+
+    @classmethod
+    def builtin(cls) -> "Gazetteer":
+        return cls(Place(*entry) for entry in BUILTIN_PLACES)
+
+    @classmethod
+    def from_geonames(cls, path: str, min_population: int = 0) -> "Gazetteer":
+        """
+        Carga un volcado de GeoNames (TSV sin cabecera). Se indexan el nombre, el
+        nombre ASCII y los nombres alternativos; la zona horaria viene en el fichero.
+        """
+        csv.field_size_limit(sys.maxsize)  # La columna de nombres alternativos es larga
+        gazetteer = cls()
+        with open(path, encoding="utf-8", newline="") as fh:
+            for row in csv.reader(fh, delimiter="\t", quoting=csv.QUOTE_NONE):
+                population = int(row[14] or 0)
+                if population < min_population:
+                    continue
+                place = Place(row[1], float(row[4]), float(row[5]), row[17] or None, population)
+                alternate_names = row[3].split(",") if row[3] else []
+                gazetteer.add(place, row[2], *alternate_names)
+        return gazetteer
@@ -0,0 +1,97 @@
+# app/services/image_processing.py
+"""
+Procesado de imágenes subidas: variantes redimensionadas y hash perceptual.
+
+Se ejecuta en un pool de procesos (ver `app.services.photos`), por eso este módulo
+sólo depende de Pillow y trabaja con rutas de fichero: el proceso principal nunca
+tiene la imagen decodificada en memoria.
+"""
+import os
+from typing import Dict, List
+
+from PIL import ExifTags, Image, ImageOps
+
+# Ancho máximo de cada variante, de menor a mayor
+VARIANT_WIDTHS: Dict[str, int] = {
+    "thumb": 160,
+    "small": 480,
+    "medium": 1080,
+    "large": 2048,
+}
+VARIANT_FORMAT = "WEBP"
+VARIANT_CONTENT_TYPE = "image/webp"
+VARIANT_QUALITY = 80
+
+# Orientaciones EXIF que `exif_transpose` gira 90°: intercambian ancho y alto
+_TRANSPOSED_ORIENTATIONS = {5, 6, 7, 8}
+
+# Límite de píxeles de la imagen de entrada (protección frente a "bombas" de descompresión)
+Image.MAX_IMAGE_PIXELS = int(os.getenv("PHOTO_MAX_PIXELS", str(50_000_000)))
+
+
+class InvalidImage(ValueError):
+    """El fichero no es una imagen que se pueda procesar."""
+
+
+def dhash(image: Image.Image, size: int = 8) -> str:
+    """
+    Hash de diferencias (64 bits en hexadecimal): compara cada píxel con su vecino
+    en una miniatura en grises. Imágenes visualmente iguales (recomprimidas o
+    redimensionadas) dan hashes a distancia de Hamming pequeña.
+    """
+    pixels = image.convert("L").resize((size + 1, size), Image.Resampling.BILINEAR).tobytes()
+    value = 0
+    for row in range(size):
+        for col in range(size):
+            left = pixels[row * (size + 1) + col]
+            right = pixels[row * (size + 1) + col + 1]
+            value = (value << 1) | (left > right)
+    return f"{value:0{size * size // 4}x}"
+
+
+def hamming_distance(hash_a: str, hash_b: str) -> int:
+    return bin(int(hash_a, 16) ^ int(hash_b, 16)).count("1")
+
+
+def process_image(source_path: str, output_dir: str) -> Dict:
+    """
+    Genera en `output_dir` una variante WebP por cada ancho de `VARIANT_WIDTHS` menor
+    que el original (y siempre la más pequeña). Devuelve las dimensiones originales,
+    el hash perceptual y la lista de variantes (`name`, `width`, `height`, `path`).
+    """
+    try:
+        image = Image.open(source_path)
+        # Dimensiones del original tal y como se ve: `draft` puede reducir `image.size`
+        width, height = image.size
+        if image.getexif().get(ExifTags.Base.Orientation) in _TRANSPOSED_ORIENTATIONS:
+            width, height = height, width
+        # Con JPEG, decodifica directamente a una escala reducida si sobra resolución
+        image.draft("RGB", (max(VARIANT_WIDTHS.values()),) * 2)
+        image = ImageOps.exif_transpose(image)
+        image.load()
+    except (OSError, Image.DecompressionBombError, SyntaxError) as e:
+        raise InvalidImage(str(e)) from e
+
+    if image.mode not in ("RGB", "RGBA"):
+        image = image.convert("RGBA" if "A" in image.getbands() else "RGB")
+
+    variants: List[Dict] = []
+    current = image
+    widths = sorted(VARIANT_WIDTHS.items(), key=lambda item: item[1], reverse=True)
+    for index, (name, max_width) in enumerate(widths):
+        is_smallest = index == len(widths) - 1
+        if max_width >= image.width and not is_smallest and variants:
+            continue
+        current = current.copy()
+        # Cada variante parte de la anterior (más barata que reescalar el original)
+        current.thumbnail((max_width, max_width * 4), Image.Resampling.LANCZOS, reducing_gap=3.0)
+        path = os.path.join(output_dir, f"{name}.webp")
+        current.save(path, VARIANT_FORMAT, quality=VARIANT_QUALITY, method=4)
+        variants.append({"name": name, "width": current.width, "height": current.height, "path": path})
+
+    return {
+        "width": width,
+        "height": height,
+        "phash": dhash(image),
+        "variants": variants[::-1],  # De menor a mayor
+    }
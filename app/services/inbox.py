@@ -0,0 +1,149 @@
+# app/services/inbox.py
+"""
+Bandeja de matches de cada usuario.
+
+En lugar de cruzar cada documento de `matches` con los dos usuarios al leer, al
+crearse un match se escriben dos entradas en `inbox_entries` (una por usuario) con
+el resumen de la otra persona, la compatibilidad y la fecha de última actividad.
+La bandeja se pagina entonces con una sola consulta sobre el índice
+`(owner_id, last_activity_at, _id)` (ver `app.db.indexes`).
+
+El resumen es una copia: cuando el otro usuario cambia de foto o de datos, el
+consumidor de change streams (`app.services.change_stream`) la actualiza en todas
+las bandejas donde aparece.
+"""
+import base64
+from datetime import date, datetime, timezone
+from typing import Dict, List, Optional, Tuple
+
+from bson import ObjectId
+from bson.errors import InvalidId
+from pymongo import DESCENDING, UpdateMany, UpdateOne
+
+from app.api.zodiac_logic import calculate_compatibility_scores, get_sun_sign
+from app.db.client import get_mongo_db
+from app.services.change_stream import ChangeEvent, change_handler
+
+INBOX_COLLECTION = "inbox_entries"
+INBOX_DEFAULT_PAGE = 20
+INBOX_MAX_PAGE = 100
+
+# Campos de `users` necesarios para construir el resumen de una entrada
+SUMMARY_PROJECTION = {"birth_date": 1, "birth_place": 1, "gender": 1, "photos": 1, "plan": 1}
+
+def _birth_date(user: Dict) -> date:
+    value = user["birth_date"]
+    return value.date() if isinstance(value, datetime) else value
+
+
+def partner_summary(user: Dict) -> Dict:
+    """Lo que la bandeja muestra de la otra persona: sin tocar `users` al leer."""
+    photo = next(iter(user.get("photos") or []), None)
+    thumbnail = None
+    if photo:
+        variants = photo.get("variants") or []
+        thumbnail = variants[0]["url"] if variants else photo.get("url")
+    return {
+        "id": str(user["_id"]),
+        "sun_sign": get_sun_sign(_birth_date(user)),
+        "birth_place": user.get("birth_place"),
+        "gender": user.get("gender"),
+        "photo_url": thumbnail,
+    }
+
+
+def compatibility_score(owner: Dict, partner: Dict) -> float:
+    """Media de las categorías de `calculate_compatibility_scores`, vista por `owner`."""
+    breakdowns = calculate_compatibility_scores(
+        _birth_date(owner), _birth_date(partner), is_premium=owner.get("plan") == "premium"
+    )
+    return round(sum(b["score"] for b in breakdowns) / len(breakdowns), 1)
+
+
+def _entry_update(owner: Dict, partner: Dict, match_id, at: datetime) -> UpdateOne:
+    return UpdateOne(
+        {"owner_id": str(owner["_id"]), "partner_id": str(partner["_id"])},
+        {
+            "$set": {
+                "partner": partner_summary(partner),
+                "compatibility": compatibility_score(owner, partner),
+                "last_activity_at": at,
+            },
+            "$setOnInsert": {"match_id": match_id, "matched_at": at},
+        },
+        upsert=True,
+    )
+
+
+async def record_match(user_a: Dict, user_b: Dict, match_id=None, at: Optional[datetime] = None) -> None:
+    """
+    Crea (o refresca) las entradas de ambos usuarios. `user_a` y `user_b` son
+    documentos de `users` con al menos `SUMMARY_PROJECTION`. Es idempotente: repetir
+    el match sólo actualiza el resumen y la última actividad.
+    """
+    at = at or datetime.now(timezone.utc)
+    await get_mongo_db().get_collection(INBOX_COLLECTION).bulk_write(
+        [_entry_update(user_a, user_b, match_id, at), _entry_update(user_b, user_a, match_id, at)],
+        ordered=False,
+    )
+
+
+@change_handler("users", operations=("update", "replace"), fields=tuple(SUMMARY_PROJECTION))
+async def _refresh_partner_summaries(changes: List[ChangeEvent]) -> None:
+    requests = [
+        UpdateMany({"partner_id": str(change.document_id)}, {"$set": {"partner": partner_summary(change.document)}})
+        for change in changes
+        if change.document
+    ]
+    if requests:
+        await get_mongo_db().get_collection(INBOX_COLLECTION).bulk_write(requests, ordered=False)
+
+
+# --- Paginación ---
+
+def encode_cursor(entry: Dict) -> str:
+    at = entry["last_activity_at"]
+    if at.tzinfo is None:  # Motor devuelve fechas UTC sin zona
+        at = at.replace(tzinfo=timezone.utc)
+    millis = int(at.timestamp() * 1000)
+    return base64.urlsafe_b64encode(f"{millis}:{entry['_id']}".encode()).decode()
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, str]:
+    try:
+        millis, _, entry_id = base64.urlsafe_b64decode(cursor.encode()).decode().partition(":")
+        at = datetime.fromtimestamp(int(millis) / 1000, tz=timezone.utc)
+    except (ValueError, UnicodeDecodeError) as e:
+        raise ValueError("Invalid cursor") from e
+    if not entry_id:
+        raise ValueError("Invalid cursor")
+    return at, entry_id
+
+
+async def list_inbox(owner_id: str, first: int = INBOX_DEFAULT_PAGE, after: Optional[str] = None) -> Tuple[List[Dict], bool]:
+    """
+    Entradas de `owner_id` de más a menos reciente, a partir del cursor `after`.
+    Devuelve la página y si quedan más (se pide una entrada de más para saberlo).
+    """
+    first = max(1, min(first, INBOX_MAX_PAGE))
+    query: Dict = {"owner_id": owner_id}
+    if after:
+        at, entry_id = decode_cursor(after)
+        try:
+            entry_oid = ObjectId(entry_id)
+        except InvalidId as e:
+            raise ValueError("Invalid cursor") from e
+        query["$or"] = [
+            {"last_activity_at": {"$lt": at}},
+            {"last_activity_at": at, "_id": {"$lt": entry_oid}},
+        ]
+
+    cursor = (
+        get_mongo_db()
+        .get_collection(INBOX_COLLECTION)
+        .find(query)
+        .sort([("last_activity_at", DESCENDING), ("_id", DESCENDING)])
+        .limit(first + 1)
+    )
+    entries = await cursor.to_list(length=first + 1)
+    return entries[:first], len(entries) > first
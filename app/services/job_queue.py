@@ -0,0 +1,234 @@
+# app/services/job_queue.py
+"""
+Cola de trabajos en segundo plano respaldada por Redis.
+
+Estructuras por cola (`<q>` = `jobs:<nombre>`):
+
+- `<q>` (lista): trabajos listos para ejecutarse.
+- `<q>:processing` (zset): trabajos en curso, puntuados por su plazo de visibilidad.
+  Si un worker muere, el trabajo vuelve a la cola cuando vence el plazo.
+- `<q>:delayed` (zset): reintentos programados, puntuados por su hora de ejecución.
+- `<q>:dead` (lista): trabajos que agotaron sus reintentos.
+
+Los manejadores se registran con `@job_handler("tipo")` y los ejecuta `JobWorker`
+(ver `app.worker`).
+"""
+import asyncio
+import json
+import logging
+import os
+import time
+import uuid
+from dataclasses import asdict, dataclass, field
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from app.db.client import get_redis
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_QUEUE = "default"
+JOB_MAX_ATTEMPTS = int(os.getenv("JOB_MAX_ATTEMPTS", "5"))
+JOB_RETRY_BASE_DELAY_S = float(os.getenv("JOB_RETRY_BASE_DELAY_S", "2"))
+JOB_VISIBILITY_TIMEOUT_S = float(os.getenv("JOB_VISIBILITY_TIMEOUT_S", "120"))
+# Espera máxima entre reintentos cuando Redis no responde
+JOB_POLL_MAX_BACKOFF_S = float(os.getenv("JOB_POLL_MAX_BACKOFF_S", "30"))
+
+# Saca un trabajo de la lista y lo marca como en curso en una sola operación atómica
+_DEQUEUE_LUA = """
+local job = redis.call('RPOP', KEYS[1])
+if job then
+  redis.call('ZADD', KEYS[2], ARGV[1], job)
+end
+return job
+"""
+
+# Mueve a la lista los trabajos de un zset cuya puntuación ya venció
+_PROMOTE_DUE_LUA = """
+local due = redis.call('ZRANGEBYSCORE', KEYS[1], '-inf', ARGV[1], 'LIMIT', 0, 100)
+for _, job in ipairs(due) do
+  redis.call('ZREM', KEYS[1], job)
+  redis.call('LPUSH', KEYS[2], job)
+end
+return #due
+"""
+
+JobHandler = Callable[[Dict[str, Any]], Awaitable[None]]
+JobFailureHandler = Callable[[Dict[str, Any], BaseException], Awaitable[None]]
+
+_handlers: Dict[str, JobHandler] = {}
+_failure_handlers: Dict[str, JobFailureHandler] = {}
+
+
+def job_handler(job_type: str):
+    """Registra la corrutina que ejecuta los trabajos de tipo `job_type`."""
+    def decorator(fn: JobHandler) -> JobHandler:
+        _handlers[job_type] = fn
+        return fn
+    return decorator
+
+
+def job_failure_handler(job_type: str):
+    """Registra la corrutina que se ejecuta cuando un trabajo agota sus reintentos."""
+    def decorator(fn: JobFailureHandler) -> JobFailureHandler:
+        _failure_handlers[job_type] = fn
+        return fn
+    return decorator
+
+
+@dataclass
+class Job:
+    type: str
+    payload: Dict[str, Any]
+    id: str = field(default_factory=lambda: uuid.uuid4().hex)
+    attempts: int = 0
+    max_attempts: int = JOB_MAX_ATTEMPTS
+    enqueued_at: float = field(default_factory=time.time)
+    last_error: Optional[str] = None
+
+    def dumps(self) -> str:
+        return json.dumps(asdict(self), default=str)
+
+    @classmethod
+    def loads(cls, raw: bytes) -> "Job":
+        return cls(**json.loads(raw))
+
+
+def _key(queue: str, suffix: str = "") -> str:
+    return f"jobs:{queue}{':' + suffix if suffix else ''}"
+
+
+async def enqueue(job_type: str, payload: Dict[str, Any], queue: str = DEFAULT_QUEUE, **options) -> Job:
+    """Encola un trabajo y lo devuelve (con su id)."""
+    job = Job(type=job_type, payload=payload, **options)
+    await get_redis().lpush(_key(queue), job.dumps())
+    return job
+
+
+class JobWorker:
+    """
+    Consume una cola ejecutando hasta `concurrency` trabajos a la vez. `stop()` deja
+    de tomar trabajos nuevos y espera a que terminen los que están en curso.
+    """
+
+    def __init__(self, queue: str = DEFAULT_QUEUE, concurrency: int = 4, poll_interval: float = 0.5):
+        self.queue = queue
+        self.concurrency = concurrency
+        self.poll_interval = poll_interval
+        self._semaphore = asyncio.Semaphore(concurrency)
+        self._running: set[asyncio.Task] = set()
+        self._stopping = asyncio.Event()
+
+    def stop(self) -> None:
+        self._stopping.set()
+
+    async def run(self) -> None:
+        redis = get_redis()
+        dequeue = redis.register_script(_DEQUEUE_LUA)
+        promote = redis.register_script(_PROMOTE_DUE_LUA)
+        logger.info("Worker listening on queue %r (concurrency=%d)", self.queue, self.concurrency)
+
+        failures = 0
+        while not self._stopping.is_set():
+            try:
+                raw = await self._next_job(dequeue, promote)
+            except Exception as e:
+                # Redis caído o en failover: el worker sigue vivo y reintenta con espera creciente
+                failures += 1
+                delay = min(self.poll_interval * 2 ** failures, JOB_POLL_MAX_BACKOFF_S)
+                logger.warning("Worker on queue %r cannot reach Redis, retrying in %.1fs: %s", self.queue, delay, e)
+                await self._wait(delay)
+                continue
+            failures = 0
+            if raw is None:
+                await self._wait(self.poll_interval)
+                continue
+
+            task = asyncio.create_task(self._execute(raw))
+            self._running.add(task)
+            task.add_done_callback(self._running.discard)
+
+        if self._running:
+            await asyncio.gather(*self._running, return_exceptions=True)
+        logger.info("Worker on queue %r stopped", self.queue)
+
+    async def _next_job(self, dequeue, promote) -> Optional[bytes]:
+        """
+        Reserva un hueco de concurrencia y saca un trabajo. Si no hay ninguno, o si
+        Redis falla, el hueco se libera antes de volver.
+        """
+        now = time.time()
+        # Reintentos vencidos y trabajos de workers caídos vuelven a la cola
+        await promote(keys=[_key(self.queue, "delayed"), _key(self.queue)], args=[now])
+        await promote(keys=[_key(self.queue, "processing"), _key(self.queue)], args=[now])
+
+        await self._semaphore.acquire()
+        try:
+            raw = await dequeue(
+                keys=[_key(self.queue), _key(self.queue, "processing")],
+                args=[now + JOB_VISIBILITY_TIMEOUT_S],
+            )
+        except BaseException:
+            self._semaphore.release()
+            raise
+        if raw is None:
+            self._semaphore.release()
+        return raw
+
+    async def _wait(self, seconds: float) -> None:
+        """Duerme `seconds` o hasta que se llame a `stop()`."""
+        try:
+            await asyncio.wait_for(self._stopping.wait(), seconds)
+        except asyncio.TimeoutError:
+            pass
+
+    async def _execute(self, raw: bytes) -> None:
+        try:
+            await self._handle(raw)
+        except Exception:
+            # Sólo llegan aquí errores de Redis: el trabajo sigue en `processing` y
+            # vuelve a la cola cuando vence su plazo de visibilidad
+            logger.exception("Could not record the outcome of job %r", raw)
+        finally:
+            self._semaphore.release()
+
+    async def _handle(self, raw: bytes) -> None:
+        redis = get_redis()
+        try:
+            job = Job.loads(raw)
+            handler = _handlers.get(job.type)
+            if handler is None:
+                raise LookupError(f"No handler registered for job type {job.type!r}")
+        except Exception:
+            logger.exception("Discarding malformed job %r", raw)
+            await redis.zrem(_key(self.queue, "processing"), raw)
+            await redis.lpush(_key(self.queue, "dead"), raw)
+            return
+
+        try:
+            await handler(job.payload)
+        except Exception as e:
+            await self._retry_or_bury(raw, job, e)
+        else:
+            await redis.zrem(_key(self.queue, "processing"), raw)
+
+    async def _retry_or_bury(self, raw: bytes, job: Job, error: Exception) -> None:
+        redis = get_redis()
+        job.attempts += 1
+        job.last_error = f"{type(error).__name__}: {error}"
+        async with redis.pipeline(transaction=True) as pipe:
+            pipe.zrem(_key(self.queue, "processing"), raw)
+            if job.attempts < job.max_attempts:
+                delay = JOB_RETRY_BASE_DELAY_S * 2 ** (job.attempts - 1)
+                pipe.zadd(_key(self.queue, "delayed"), {job.dumps(): time.time() + delay})
+                logger.warning("Job %s (%s) failed, retry %d in %.0fs: %s",
+                               job.id, job.type, job.attempts, delay, job.last_error)
+            else:
+                pipe.lpush(_key(self.queue, "dead"), job.dumps())
+                logger.error("Job %s (%s) failed permanently: %s", job.id, job.type, job.last_error)
+            await pipe.execute()
+
+        if job.attempts >= job.max_attempts and (on_failure := _failure_handlers.get(job.type)):
+            try:
+                await on_failure(job.payload, error)
+            except Exception:
+                logger.exception("Failure handler for job %s (%s) raised", job.id, job.type)
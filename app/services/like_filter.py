@@ -0,0 +1,166 @@
+# app/services/like_filter.py
+"""
+Filtro de Bloom por usuario con los ids a los que ha dado like, guardado en Redis.
+
+Cada filtro es un string de Redis (`likes:bloom:<user_id>`) de `LIKES_BLOOM_BITS`
+bits en el que un like activa `LIKES_BLOOM_HASHES` bits. Una respuesta negativa es
+segura ("no le ha dado like"); una positiva puede ser un falso positivo, así que:
+
+- `like_user` sólo consulta `likes` en MongoDB cuando el filtro dice "quizá".
+- El feed descarta directamente los candidatos que el filtro marca (perder un
+  candidato de vez en cuando es aceptable).
+
+`like_user` añade sus bits al registrar el like; el consumidor de change streams
+(`app.services.change_stream`) añade además los de cualquier like insertado por otra
+vía. Los filtros sólo se consultan cuando existe `likes:bloom:ready` con la configuración
+actual; lo escribe `python -m app.jobs.like_filters rebuild` tras reconstruirlos desde
+la colección `likes`. Sin él, o si Redis falla, se vuelve a consultar MongoDB.
+"""
+import hashlib
+import logging
+import os
+from typing import Iterable, List, Optional
+
+from app.db.client import get_mongo_db, get_redis
+from app.services.change_stream import ChangeEvent, change_handler, reset_handler
+
+logger = logging.getLogger(__name__)
+
+# Con los valores por defecto (4 KiB por usuario), ~1% de falsos positivos a los
+# 3.400 likes y ~0,1% a los 2.300
+LIKES_BLOOM_BITS = int(os.getenv("LIKES_BLOOM_BITS", str(2**15)))
+LIKES_BLOOM_HASHES = int(os.getenv("LIKES_BLOOM_HASHES", "7"))
+
+READY_KEY = "likes:bloom:ready"
+
+
+def bloom_key(user_id: str) -> str:
+    return f"likes:bloom:{user_id}"
+
+
+def _config_signature() -> str:
+    # Cambiar el tamaño o el número de hashes invalida los filtros existentes
+    return f"{LIKES_BLOOM_BITS}:{LIKES_BLOOM_HASHES}"
+
+
+def bit_offsets(member: str) -> List[int]:
+    """Posiciones de `member` por doble hashing (Kirsch-Mitzenmacher) sobre un blake2b."""
+    digest = hashlib.blake2b(member.encode(), digest_size=16).digest()
+    h1 = int.from_bytes(digest[:8], "little")
+    h2 = int.from_bytes(digest[8:], "little") | 1
+    return [(h1 + i * h2) % LIKES_BLOOM_BITS for i in range(LIKES_BLOOM_HASHES)]
+
+
+class LikeFilter:
+    """Copia local de un filtro (un `GET`) para comprobar muchos candidatos de golpe."""
+
+    def __init__(self, data: Optional[bytes]):
+        self.data = data or b""
+
+    def __contains__(self, member: str) -> bool:
+        data = self.data
+        for offset in bit_offsets(member):
+            byte = offset >> 3
+            # SETBIT numera los bits desde el más significativo de cada byte
+            if byte >= len(data) or not (data[byte] >> (7 - (offset & 7))) & 1:
+                return False
+        return True
+
+
+async def record_like(user_id: str, target_user_id: str) -> Optional[bool]:
+    """
+    Añade el like `user_id -> target_user_id` y, en el mismo viaje a Redis, comprueba
+    si `target_user_id` podría haber dado like a `user_id`.
+
+    Devuelve `False` si seguro que no, `True` si quizá y `None` si el filtro no se
+    puede usar (sin reconstruir o Redis caído): en ambos casos hay que ir a MongoDB.
+    Se escribe antes de leer para que, con dos likes cruzados simultáneos, al menos
+    uno de los dos vea el del otro.
+    """
+    pipe = get_redis().pipeline(transaction=False)
+    for offset in bit_offsets(target_user_id):
+        pipe.setbit(bloom_key(user_id), offset, 1)
+    pipe.get(READY_KEY)
+    for offset in bit_offsets(user_id):
+        pipe.getbit(bloom_key(target_user_id), offset)
+    try:
+        results = await pipe.execute()
+    except Exception as e:
+        logger.warning("Like filter unavailable, falling back to MongoDB: %s", e)
+        return None
+
+    ready, bits = results[LIKES_BLOOM_HASHES], results[LIKES_BLOOM_HASHES + 1:]
+    if not _is_ready(ready):
+        return None
+    return all(bits)
+
+
+async def load_filter(user_id: str) -> Optional[LikeFilter]:
+    """Filtro de `user_id`, o `None` si no se puede usar."""
+    pipe = get_redis().pipeline(transaction=False)
+    pipe.get(READY_KEY)
+    pipe.get(bloom_key(user_id))
+    try:
+        ready, data = await pipe.execute()
+    except Exception as e:
+        logger.warning("Like filter unavailable: %s", e)
+        return None
+    return LikeFilter(data) if _is_ready(ready) else None
+
+
+def _is_ready(value: Optional[bytes]) -> bool:
+    return value is not None and value.decode() == _config_signature()
+
+
+async def add_likes(pairs: Iterable[tuple]) -> int:
+    """Activa los bits de muchos pares `(user_id, target_user_id)` en un pipeline."""
+    pipe = get_redis().pipeline(transaction=False)
+    count = 0
+    for user_id, target_user_id in pairs:
+        for offset in bit_offsets(str(target_user_id)):
+            pipe.setbit(bloom_key(str(user_id)), offset, 1)
+        count += 1
+    await pipe.execute()
+    return count
+
+
+async def rebuild(batch_size: int = 5_000) -> int:
+    """
+    Recorre `likes` y activa los bits de cada like; al terminar marca los filtros como
+    utilizables. Sólo añade bits, así que puede ejecutarse con la aplicación en marcha
+    sin perder los likes que lleguen mientras tanto.
+    """
+    redis = get_redis()
+    # Si cambió la configuración, los filtros viejos no sirven: se borran primero
+    if (ready := await redis.get(READY_KEY)) is not None and not _is_ready(ready):
+        await redis.delete(READY_KEY)
+        async for key in redis.scan_iter(match=bloom_key("*"), count=1_000):
+            await redis.delete(key)
+
+    likes = get_mongo_db().get_collection("likes")
+    cursor = likes.find({}, {"user_id": 1, "target_user_id": 1, "_id": 0}, batch_size=batch_size)
+    total, batch = 0, []
+    async for like in cursor:
+        batch.append((like["user_id"], like["target_user_id"]))
+        if len(batch) >= batch_size:
+            total += await add_likes(batch)
+            batch = []
+    if batch:
+        total += await add_likes(batch)
+
+    await redis.set(READY_KEY, _config_signature())
+    return total
+
+
+@change_handler("likes", operations=("insert",))
+async def _on_likes_inserted(changes: List[ChangeEvent]) -> None:
+    await add_likes(
+        (change.document["user_id"], change.document["target_user_id"])
+        for change in changes
+        if change.document
+    )
+
+
+@reset_handler
+async def _on_change_stream_reset() -> None:
+    await rebuild()
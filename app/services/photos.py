@@ -0,0 +1,245 @@
+# app/services/photos.py
+"""
+Subida de fotos de perfil.
+
+1. `receive_upload` lee el cuerpo `multipart/form-data` de la petición por trozos y
+   escribe el fichero en un temporal a medida que llega: nunca está entero en
+   memoria y se corta en cuanto supera `PHOTO_MAX_UPLOAD_BYTES`.
+2. `process_upload` genera las variantes y el hash perceptual en un pool de
+   procesos (`PHOTO_WORKERS`) y las guarda en el backend de `app.services.storage`.
+3. `add_uploaded_photo` añade la foto (con las URLs de sus variantes) al usuario,
+   rechazando duplicados visuales de una foto que ya tiene.
+"""
+import asyncio
+import multiprocessing
+import os
+import shutil
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+import multipart
+from bson import ObjectId
+from multipart.multipart import parse_options_header
+from starlette.requests import Request
+
+from app.db.client import get_mongo_db
+from app.services.image_processing import VARIANT_CONTENT_TYPE, hamming_distance, process_image
+from app.services.storage import get_storage
+
+PHOTO_MAX_UPLOAD_BYTES = int(os.getenv("PHOTO_MAX_UPLOAD_BYTES", str(15 * 1024 * 1024)))
+PHOTO_WORKERS = int(os.getenv("PHOTO_WORKERS", "2"))
+# Distancia de Hamming (sobre 64 bits) por debajo de la cual dos fotos se consideran la misma
+PHOTO_DUPLICATE_DISTANCE = int(os.getenv("PHOTO_DUPLICATE_DISTANCE", "4"))
+
+FILE_FIELD = "file"
+
+
+class UploadError(ValueError):
+    """Petición de subida inválida; `status_code` indica la respuesta HTTP."""
+
+    def __init__(self, message: str, status_code: int = 400):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+@dataclass
+class Upload:
+    path: Optional[str] = None
+    size: int = 0
+    filename: Optional[str] = None
+    fields: Dict[str, str] = field(default_factory=dict)
+
+    def cleanup(self) -> None:
+        if self.path:
+            try:
+                os.remove(self.path)
+            except FileNotFoundError:
+                pass
+
+
+class _UploadParser:
+    """Callbacks de `multipart.MultipartParser`: el campo `file` va a disco, el resto a `fields`."""
+
+    def __init__(self, upload: Upload, max_bytes: int):
+        self.upload = upload
+        self.max_bytes = max_bytes
+        self._header_field = b""
+        self._header_value = b""
+        self._headers: Dict[bytes, bytes] = {}
+        self._name: Optional[str] = None
+        self._value = bytearray()
+        self._file = None
+        # `finalize()` no comprueba el cierre del mensaje: sin el último boundary
+        # el cuerpo llegó truncado (cliente desconectado a mitad de la subida)
+        self.complete = False
+
+    def callbacks(self) -> Dict:
+        return {
+            "on_part_begin": self.on_part_begin,
+            "on_part_data": self.on_part_data,
+            "on_part_end": self.on_part_end,
+            "on_header_field": lambda data, start, end: setattr(self, "_header_field", self._header_field + data[start:end]),
+            "on_header_value": lambda data, start, end: setattr(self, "_header_value", self._header_value + data[start:end]),
+            "on_header_end": self.on_header_end,
+            "on_headers_finished": self.on_headers_finished,
+            "on_end": lambda: setattr(self, "complete", True),
+        }
+
+    def on_part_begin(self) -> None:
+        self._headers = {}
+        self._name = None
+        self._value = bytearray()
+
+    def on_header_end(self) -> None:
+        self._headers[self._header_field.lower()] = self._header_value
+        self._header_field = self._header_value = b""
+
+    def on_headers_finished(self) -> None:
+        _, options = parse_options_header(self._headers.get(b"content-disposition", b""))
+        self._name = options.get(b"name", b"").decode()
+        if self._name == FILE_FIELD:
+            if self.upload.path is not None:
+                raise UploadError("Only one file per request")
+            self.upload.filename = options.get(b"filename", b"").decode() or None
+            self._file = tempfile.NamedTemporaryFile(prefix="upload-", delete=False)
+            self.upload.path = self._file.name
+
+    def on_part_data(self, data: bytes, start: int, end: int) -> None:
+        if self._name == FILE_FIELD:
+            self.upload.size += end - start
+            if self.upload.size > self.max_bytes:
+                raise UploadError(f"File exceeds {self.max_bytes} bytes", status_code=413)
+            self._file.write(data[start:end])
+        else:
+            self._value += data[start:end]
+            if len(self._value) > 4096:
+                raise UploadError(f"Field {self._name!r} is too long")
+
+    def on_part_end(self) -> None:
+        if self._name == FILE_FIELD:
+            self._file.close()
+            self._file = None
+        elif self._name:
+            self.upload.fields[self._name] = self._value.decode()
+
+    def close(self) -> None:
+        if self._file is not None:
+            self._file.close()
+
+
+async def receive_upload(request: Request, max_bytes: int = PHOTO_MAX_UPLOAD_BYTES) -> Upload:
+    """Consume el cuerpo de la petición; el llamante debe llamar a `Upload.cleanup()`."""
+    content_type, options = parse_options_header(request.headers.get("content-type", ""))
+    if content_type != b"multipart/form-data" or b"boundary" not in options:
+        raise UploadError("Expected multipart/form-data", status_code=415)
+    declared = request.headers.get("content-length")
+    if declared and declared.isdigit() and int(declared) > max_bytes + 64 * 1024:
+        raise UploadError(f"File exceeds {max_bytes} bytes", status_code=413)
+
+    upload = Upload()
+    handler = _UploadParser(upload, max_bytes)
+    parser = multipart.MultipartParser(options[b"boundary"], handler.callbacks())
+    try:
+        async for chunk in request.stream():
+            parser.write(chunk)
+        parser.finalize()
+        if not handler.complete:
+            raise UploadError("Truncated multipart body")
+    except Exception as e:
+        handler.close()
+        upload.cleanup()
+        if isinstance(e, UploadError):
+            raise
+        raise UploadError(f"Malformed multipart body: {e}") from e
+    handler.close()
+
+    if upload.path is None:
+        raise UploadError(f"Missing {FILE_FIELD!r} field")
+    return upload
+
+
+# --- Procesado ---
+
+_pool: Optional[ProcessPoolExecutor] = None
+
+
+def get_photo_pool() -> ProcessPoolExecutor:
+    global _pool
+    if _pool is None:
+        # spawn: los procesos no heredan las conexiones ni el event loop del worker web
+        _pool = ProcessPoolExecutor(max_workers=PHOTO_WORKERS, mp_context=multiprocessing.get_context("spawn"))
+    return _pool
+
+
+def shutdown_photo_pool() -> None:
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(wait=False, cancel_futures=True)
+        _pool = None
+
+
+async def process_upload(upload: Upload, photo_id: str, owner_id: str) -> Dict:
+    """
+    Genera y guarda las variantes. Devuelve el registro de la foto tal y como se
+    guarda en `users.photos` (sin `sign`).
+    """
+    output_dir = tempfile.mkdtemp(prefix="photo-")
+    try:
+        result = await asyncio.get_running_loop().run_in_executor(
+            get_photo_pool(), process_image, upload.path, output_dir
+        )
+        storage = get_storage()
+        variants = []
+        for variant in result["variants"]:
+            key = f"photos/{owner_id}/{photo_id}/{variant['name']}.webp"
+            await storage.save(key, variant["path"], VARIANT_CONTENT_TYPE)
+            variants.append({
+                "name": variant["name"],
+                "width": variant["width"],
+                "height": variant["height"],
+                "key": key,
+                "url": storage.url(key),
+            })
+    finally:
+        shutil.rmtree(output_dir, ignore_errors=True)
+
+    return {
+        "id": photo_id,
+        # `url` sigue apuntando a una sola imagen para los clientes que no usan variantes
+        "url": _default_variant(variants)["url"],
+        "width": result["width"],
+        "height": result["height"],
+        "phash": result["phash"],
+        "variants": variants,
+    }
+
+
+def _default_variant(variants: List[Dict]) -> Dict:
+    medium = [v for v in variants if v["width"] <= 1080]
+    return medium[-1] if medium else variants[0]
+
+
+def find_duplicate(photos: List[Dict], phash: str) -> Optional[Dict]:
+    for photo in photos:
+        if photo.get("phash") and hamming_distance(photo["phash"], phash) <= PHOTO_DUPLICATE_DISTANCE:
+            return photo
+    return None
+
+
+async def add_uploaded_photo(user: Dict, upload: Upload, sign: Optional[str] = None) -> Dict:
+    """Procesa `upload` y lo añade a las fotos de `user` (documento de `users`)."""
+    photo_id = str(ObjectId())
+    photo = await process_upload(upload, photo_id, str(user["_id"]))
+    if duplicate := find_duplicate(user.get("photos", []), photo["phash"]):
+        storage = get_storage()
+        for variant in photo["variants"]:
+            await storage.delete(variant["key"])
+        raise UploadError(f"Photo already uploaded (id {duplicate.get('id')})", status_code=409)
+
+    photo["sign"] = sign
+    await get_mongo_db().get_collection("users").update_one(
+        {"_id": user["_id"]}, {"$push": {"photos": photo}}
+    )
+    return photo
@@ -0,0 +1,168 @@
+# app/services/places.py
+"""
+Lugares de nacimiento ya resueltos (coordenadas y zona horaria), compartidos por todos
+los usuarios.
+
+Cada texto de `birth_place` se reduce a una clave con `normalize_place` (`"Bogotá,
+Colombia"` y `"bogota colombia"` son la misma) y su resultado se guarda en la
+colección `places` con su procedencia (`source`: `nominatim`, `gazetteer`...) y la
+fecha. Delante hay una caché LRU por proceso de `PLACES_CACHE_SIZE` entradas, así que
+una ciudad frecuente cuesta una búsqueda en memoria:
+
+- `resolve_place` (registro, `calculate_chart_variants`): caché, luego `places` y sólo
+  si no está, el geocodificador en un hilo. Las peticiones simultáneas del mismo lugar
+  comparten una sola llamada (Nominatim admite una por segundo).
+- `lookup_places`/`save_places` (importaciones masivas): una consulta `$in` con las
+  claves distintas de cada bloque y un `bulk_write` con las que se resolvieron fuera.
+
+Si MongoDB no está disponible, ambas fallan en abierto (como la caché de Redis): la
+consulta devuelve sólo lo que hay en la caché y `resolve_place` recurre al
+geocodificador sin guardar el resultado.
+"""
+import asyncio
+import logging
+import os
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from pymongo import UpdateOne
+from pymongo.errors import PyMongoError
+
+from app.db.client import get_mongo_db
+from app.services.gazetteer import Place, normalize_place
+
+logger = logging.getLogger(__name__)
+
+PLACES_COLLECTION = "places"
+PLACES_CACHE_SIZE = int(os.getenv("PLACES_CACHE_SIZE", "10000"))
+
+Geocoder = Callable[[str], Tuple[float, float, str]]
+
+
+class PlaceCache:
+    """LRU acotada de clave normalizada -> `Place`."""
+
+    def __init__(self, maxsize: int = PLACES_CACHE_SIZE):
+        self.maxsize = maxsize
+        self._entries: "OrderedDict[str, Place]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: str) -> Optional[Place]:
+        place = self._entries.get(key)
+        if place is None:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return place
+
+    def put(self, key: str, place: Place) -> None:
+        self._entries[key] = place
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def info(self) -> Dict[str, int]:
+        return {"size": len(self._entries), "hits": self.hits, "misses": self.misses}
+
+
+cache = PlaceCache()
+_in_flight: Dict[str, "asyncio.Future[Place]"] = {}
+
+
+def _collection(db=None):
+    return (db if db is not None else get_mongo_db()).get_collection(PLACES_COLLECTION)
+
+
+def _from_document(doc: Dict) -> Place:
+    return Place(doc["name"], doc["latitude"], doc["longitude"], doc["timezone"])
+
+
+def _document_update(key: str, place: Place, source: str) -> UpdateOne:
+    # Un lugar ya guardado no se pisa: la primera resolución queda como procedencia
+    return UpdateOne(
+        {"_id": key},
+        {"$setOnInsert": {
+            "name": place.name,
+            "latitude": place.latitude,
+            "longitude": place.longitude,
+            "timezone": place.timezone,
+            "source": source,
+            "resolved_at": datetime.now(timezone.utc),
+        }},
+        upsert=True,
+    )
+
+
+async def lookup_places(texts: Iterable[str], db=None) -> Dict[str, Place]:
+    """
+    Los lugares ya conocidos (caché o `places`) de `texts`, por clave normalizada. Una
+    sola consulta para todas las claves que no están en la caché.
+    """
+    found: Dict[str, Place] = {}
+    missing: List[str] = []
+    for key in {normalize_place(text) for text in texts}:
+        if not key:
+            continue
+        if (place := cache.get(key)) is not None:
+            found[key] = place
+        else:
+            missing.append(key)
+    if missing:
+        try:
+            async for doc in _collection(db).find({"_id": {"$in": missing}}):
+                place = found[doc["_id"]] = _from_document(doc)
+                cache.put(doc["_id"], place)
+        except (PyMongoError, RuntimeError) as e:  # Sin MongoDB (o sin cliente)
+            logger.warning("Places lookup unavailable, using the cache only: %s", e)
+    return found
+
+
+async def save_places(places: Dict[str, Place], source: str, db=None) -> None:
+    """Guarda (si no existían) lugares resueltos fuera, p. ej. contra un `Gazetteer`."""
+    places = {key: place for key, place in places.items() if key and place.timezone}
+    for key, place in places.items():
+        cache.put(key, place)
+    if places:
+        try:
+            await _collection(db).bulk_write(
+                [_document_update(key, place, source) for key, place in places.items()], ordered=False
+            )
+        except (PyMongoError, RuntimeError) as e:
+            logger.warning("Could not save %d places: %s", len(places), e)
+
+
+async def _geocode_and_save(text: str, key: str, geocoder: Geocoder, source: str) -> Place:
+    latitude, longitude, timezone_name = await asyncio.to_thread(geocoder, text)
+    place = Place(text, latitude, longitude, timezone_name)
+    await save_places({key: place}, source)
+    return place
+
+
+async def resolve_place(text: str, geocoder: Geocoder, source: str) -> Place:
+    """
+    Coordenadas y zona horaria de `text`. `geocoder` (bloqueante, se ejecuta en un
+    hilo) sólo se llama si el lugar no está ni en la caché ni en `places`; sus
+    errores se propagan y no se guardan.
+    """
+    key = normalize_place(text)
+    if (place := (await lookup_places([text])).get(key)) is not None:
+        return place
+    if (pending := _in_flight.get(key)) is not None:
+        return await asyncio.shield(pending)
+
+    task = asyncio.ensure_future(_geocode_and_save(text, key, geocoder, source))
+    _in_flight[key] = task
+    try:
+        return await asyncio.shield(task)
+    finally:
+        if task.done():
+            _in_flight.pop(key, None)
+        else:
+            # Si quien lo inició se cancela, la tarea sigue para los demás
+            task.add_done_callback(lambda _: _in_flight.pop(key, None))
@@ -0,0 +1,98 @@
+# app/services/rate_limit.py
+"""
+Limitador de peticiones tipo *token bucket* compartido entre workers vía Redis.
+
+Cada cubo es un hash de Redis `{tokens, ts}` que un script Lua recarga y consume de
+forma atómica, así que todos los workers ven el mismo saldo. Si Redis no está
+disponible el limitador deja pasar la petición (fail-open) para no tumbar el login.
+"""
+import logging
+import time
+from dataclasses import dataclass
+from typing import Tuple
+
+from app.db.client import get_redis
+
+logger = logging.getLogger(__name__)
+
+# KEYS[1] = clave del cubo
+# ARGV = capacidad, tokens por segundo, ahora (ms), coste
+# Devuelve {permitido (0/1), milisegundos hasta que haya saldo suficiente}
+_TOKEN_BUCKET_LUA = """
+local capacity = tonumber(ARGV[1])
+local rate = tonumber(ARGV[2])
+local now = tonumber(ARGV[3])
+local cost = tonumber(ARGV[4])
+
+local bucket = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(bucket[1])
+local ts = tonumber(bucket[2])
+if tokens == nil then
+  tokens = capacity
+  ts = now
+end
+
+tokens = math.min(capacity, tokens + math.max(0, now - ts) * rate / 1000)
+local allowed = 0
+local retry_after = 0
+if tokens >= cost then
+  tokens = tokens - cost
+  allowed = 1
+else
+  retry_after = math.ceil((cost - tokens) * 1000 / rate)
+end
+
+redis.call('HSET', KEYS[1], 'tokens', tokens, 'ts', now)
+redis.call('PEXPIRE', KEYS[1], math.ceil((capacity - tokens) * 1000 / rate) + 1000)
+return {allowed, retry_after}
+"""
+
+
+@dataclass(frozen=True)
+class RateLimit:
+    """`capacity` peticiones de ráfaga, recargadas a razón de `capacity` cada `period` s."""
+    capacity: int
+    period: float
+
+    @property
+    def refill_per_second(self) -> float:
+        return self.capacity / self.period
+
+    @classmethod
+    def parse(cls, spec: str) -> "RateLimit":
+        """Interpreta una especificación `"<capacidad>/<segundos>"`, p. ej. `"10/60"`."""
+        capacity, period = spec.split("/")
+        return cls(capacity=int(capacity), period=float(period))
+
+
+@dataclass(frozen=True)
+class RateLimitResult:
+    allowed: bool
+    retry_after: float = 0.0
+
+
+async def hit(key: str, limit: RateLimit, cost: int = 1) -> RateLimitResult:
+    """Consume `cost` tokens del cubo `key` y devuelve si la petición está permitida."""
+    try:
+        allowed, retry_after_ms = await get_redis().eval(
+            _TOKEN_BUCKET_LUA,
+            1,
+            f"ratelimit:{key}",
+            limit.capacity,
+            limit.refill_per_second,
+            int(time.time() * 1000),
+            cost,
+        )
+    except Exception as e:  # Redis caído: no bloqueamos el servicio
+        logger.warning("Rate limiter unavailable, allowing request: %s", e)
+        return RateLimitResult(allowed=True)
+    return RateLimitResult(allowed=bool(allowed), retry_after=int(retry_after_ms) / 1000)
+
+
+async def hit_all(checks: Tuple[Tuple[str, RateLimit], ...]) -> RateLimitResult:
+    """Comprueba varios cubos en orden y se detiene en el primero que rechaza."""
+    for key, limit in checks:
+        result = await hit(key, limit)
+        if not result.allowed:
+            return result
+    return RateLimitResult(allowed=True)
@@ -0,0 +1,44 @@
+# app/services/singleflight.py
+"""
+Coalescencia de peticiones concurrentes idénticas ("single flight").
+
+Mientras una corrutina calcula el resultado para una clave, las demás llamadas con
+la misma clave esperan ese mismo resultado en lugar de repetir el trabajo. El ámbito
+es el proceso: cada worker coalesce sus propias peticiones.
+"""
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Hashable, TypeVar
+
+T = TypeVar("T")
+
+
+class SingleFlight:
+    def __init__(self):
+        self._inflight: Dict[Hashable, asyncio.Future] = {}
+
+    def __len__(self) -> int:
+        return len(self._inflight)
+
+    async def do(self, key: Hashable, fn: Callable[..., Awaitable[T]], *args: Any, **kwargs: Any) -> T:
+        """Ejecuta `fn(*args, **kwargs)` una sola vez por clave entre llamadas concurrentes."""
+        if (future := self._inflight.get(key)) is not None:
+            # shield: si cancelan a un seguidor, el cálculo del líder continúa
+            return await asyncio.shield(future)
+
+        future = asyncio.get_running_loop().create_future()
+        # Evita el aviso "exception was never retrieved" cuando no hay seguidores
+        future.add_done_callback(lambda f: f.cancelled() or f.exception())
+        self._inflight[key] = future
+        try:
+            result = await fn(*args, **kwargs)
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            del self._inflight[key]
@@ -0,0 +1,87 @@
+# app/services/storage.py
+"""
+Almacenamiento de ficheros subidos (fotos) con backends intercambiables.
+
+El backend se elige con `STORAGE_BACKEND`: `local` (por defecto) o la ruta de una
+clase propia (`paquete.modulo:Clase`) que implemente `Storage` y se construya sin
+argumentos. Las URLs públicas se forman con `STORAGE_PUBLIC_BASE_URL`, de modo que
+basta con apuntarlo a un CDN delante del almacenamiento para servir desde él.
+"""
+import asyncio
+import importlib
+import os
+import shutil
+from abc import ABC, abstractmethod
+from typing import Optional
+
+
+class Storage(ABC):
+    """Interfaz de un backend: guarda ficheros bajo claves `a/b/c.webp`."""
+
+    @abstractmethod
+    async def save(self, key: str, source_path: str, content_type: str) -> None:
+        """Copia el fichero local `source_path` a `key`."""
+
+    @abstractmethod
+    async def delete(self, key: str) -> None:
+        """Borra `key` (no falla si no existe)."""
+
+    @abstractmethod
+    def url(self, key: str) -> str:
+        """URL pública de `key`."""
+
+
+class LocalStorage(Storage):
+    """
+    Guarda los ficheros en un directorio local. Pensado para desarrollo y pruebas:
+    `app.main` sirve `root` en `/media` cuando este backend está activo.
+    """
+
+    def __init__(self, root: Optional[str] = None, base_url: Optional[str] = None):
+        self.root = os.path.abspath(root or os.getenv("STORAGE_LOCAL_ROOT", "data/media"))
+        self.base_url = (base_url or os.getenv("STORAGE_PUBLIC_BASE_URL", "/media")).rstrip("/")
+
+    def path(self, key: str) -> str:
+        path = os.path.abspath(os.path.join(self.root, key))
+        if not path.startswith(self.root + os.sep):
+            raise ValueError(f"Invalid storage key {key!r}")
+        return path
+
+    def _copy(self, key: str, source_path: str) -> None:
+        destination = self.path(key)
+        os.makedirs(os.path.dirname(destination), exist_ok=True)
+        shutil.copyfile(source_path, destination)
+
+    async def save(self, key: str, source_path: str, content_type: str) -> None:
+        await asyncio.to_thread(self._copy, key, source_path)
+
+    async def delete(self, key: str) -> None:
+        try:
+            await asyncio.to_thread(os.remove, self.path(key))
+        except FileNotFoundError:
+            pass
+
+    def url(self, key: str) -> str:
+        return f"{self.base_url}/{key}"
+
+
+_storage: Optional[Storage] = None
+
+
+def get_storage() -> Storage:
+    """Devuelve el backend configurado (se crea la primera vez)."""
+    global _storage
+    if _storage is None:
+        backend = os.getenv("STORAGE_BACKEND", "local")
+        if backend == "local":
+            _storage = LocalStorage()
+        else:
+            module_name, _, class_name = backend.partition(":")
+            _storage = getattr(importlib.import_module(module_name), class_name)()
+    return _storage
+
+
+def set_storage(storage: Optional[Storage]) -> None:
+    """Sustituye el backend (pruebas) o lo reinicia con `None`."""
+    global _storage
+    _storage = storage
@@ -0,0 +1,155 @@
+# app/services/timezone_table.py
+"""
+Per-zone UTC offset transition tables and vectorized local-time to UTC conversion.
+
+`ZoneInfo` answers one datetime at a time, and `naive.replace(tzinfo=zone)` quietly
+picks an interpretation for wall-clock times that happen twice (a fold, when clocks
+go back) or never (a gap, when they go forward). For bulk work each zone's history
+is flattened once into sorted arrays of transition instants and offsets (taken from
+`ZoneInfo` itself, so both always agree) and whole arrays of local times are
+converted with a few `searchsorted` calls.
+
+Local times are int64 seconds since 1970-01-01 read as wall-clock time (what
+`datetime64[s]` holds for a naive datetime); results are UTC seconds. What to do
+with folds and gaps is explicit:
+
+- `fold="earlier"` (default) / `"later"`: the first or second occurrence;
+  `"raise"` rejects them.
+- `gap="shift"` (default): read with the offset in force before the transition,
+  i.e. moved forward by the gap length (02:30 in a one-hour gap becomes 03:30);
+  `"next_valid"`: the transition instant (03:00); `"raise"` rejects them.
+
+The defaults reproduce `naive.replace(tzinfo=zone)` (`fold=0`, PEP 495), so
+switching a caller to the table changes no result. `classify` reports which rows
+were folds or gaps.
+"""
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from functools import lru_cache
+from typing import Union
+from zoneinfo import ZoneInfo
+
+import numpy as np
+
+# Range scanned for transitions; outside it the first/last offset applies
+TABLE_START = datetime(1800, 1, 1, tzinfo=timezone.utc)
+TABLE_END = datetime(2100, 1, 1, tzinfo=timezone.utc)
+# Offsets are sampled daily and each change is bisected to the second; two
+# transitions less than a day apart (not found in tzdata since 1800) would be missed
+SAMPLE_SECONDS = 86400
+# Wider than any UTC offset: the UTC instant of a local time lies within this window
+_WINDOW = 86400
+
+FOLD_POLICIES = ("earlier", "later", "raise")
+GAP_POLICIES = ("shift", "next_valid", "raise")
+
+# `classify` codes
+VALID = 0
+AMBIGUOUS = 1
+NONEXISTENT = 2
+
+ArrayLike = Union[np.ndarray, list, int]
+
+
+class AmbiguousTimeError(ValueError):
+    pass
+
+
+class NonExistentTimeError(ValueError):
+    pass
+
+
+def _utc_offset(zone: ZoneInfo, utc_seconds: int) -> int:
+    return int(datetime.fromtimestamp(utc_seconds, zone).utcoffset().total_seconds())
+
+
+@dataclass(frozen=True)
+class TransitionTable:
+    zone: str
+    transitions: np.ndarray  # int64 UTC seconds from which `offsets[i]` applies (sorted)
+    offsets: np.ndarray  # int64 seconds east of UTC
+
+    @classmethod
+    def build(cls, zone_name: str) -> "TransitionTable":
+        zone = ZoneInfo(zone_name)
+        samples = np.arange(int(TABLE_START.timestamp()), int(TABLE_END.timestamp()), SAMPLE_SECONDS, dtype=np.int64)
+        sampled = np.fromiter((_utc_offset(zone, int(s)) for s in samples), dtype=np.int64, count=len(samples))
+
+        transitions = [np.iinfo(np.int64).min]
+        offsets = [int(sampled[0])]
+        for i in np.flatnonzero(np.diff(sampled)):
+            low, high = int(samples[i]), int(samples[i + 1])
+            while high - low > 1:
+                middle = (low + high) // 2
+                if _utc_offset(zone, middle) == sampled[i]:
+                    low = middle
+                else:
+                    high = middle
+            transitions.append(high)
+            offsets.append(int(sampled[i + 1]))
+        return cls(zone_name, np.array(transitions, dtype=np.int64), np.array(offsets, dtype=np.int64))
+
+    def offset_at(self, utc_seconds: ArrayLike) -> np.ndarray:
+        """UTC offset in force at each UTC instant."""
+        return self.offsets[np.searchsorted(self.transitions, utc_seconds, side="right") - 1]
+
+    def _candidates(self, local_seconds: np.ndarray):
+        # The offsets in force just before and just after each local time: equal unless
+        # a transition is near, in which case each reading may or may not be valid
+        index_before = np.searchsorted(self.transitions, local_seconds - _WINDOW, side="right") - 1
+        index_after = np.searchsorted(self.transitions, local_seconds + _WINDOW, side="right") - 1
+        utc_before = local_seconds - self.offsets[index_before]
+        utc_after = local_seconds - self.offsets[index_after]
+        valid_before = self.offset_at(utc_before) == self.offsets[index_before]
+        valid_after = self.offset_at(utc_after) == self.offsets[index_after]
+        return utc_before, utc_after, valid_before, valid_after, index_after
+
+    def classify(self, local_seconds: ArrayLike) -> np.ndarray:
+        """`VALID`, `AMBIGUOUS` (fold) or `NONEXISTENT` (gap) for each local time."""
+        local = np.asarray(local_seconds, dtype=np.int64)
+        utc_before, utc_after, valid_before, valid_after, _ = self._candidates(local)
+        status = np.full(local.shape, VALID, dtype=np.int8)
+        status[valid_before & valid_after & (utc_before != utc_after)] = AMBIGUOUS
+        status[~valid_before & ~valid_after] = NONEXISTENT
+        return status
+
+    def to_utc(self, local_seconds: ArrayLike, fold: str = "earlier", gap: str = "shift") -> np.ndarray:
+        """UTC seconds for each local time, resolving folds and gaps by policy."""
+        if fold not in FOLD_POLICIES:
+            raise ValueError(f"Unknown fold policy: {fold}")
+        if gap not in GAP_POLICIES:
+            raise ValueError(f"Unknown gap policy: {gap}")
+        local = np.asarray(local_seconds, dtype=np.int64)
+        utc_before, utc_after, valid_before, valid_after, index_after = self._candidates(local)
+
+        ambiguous = valid_before & valid_after & (utc_before != utc_after)
+        missing = ~valid_before & ~valid_after
+        if fold == "raise" and ambiguous.any():
+            raise AmbiguousTimeError(f"{int(ambiguous.sum())} ambiguous local times in {self.zone}")
+        if gap == "raise" and missing.any():
+            raise NonExistentTimeError(f"{int(missing.sum())} nonexistent local times in {self.zone}")
+
+        # Unambiguous rows have one valid reading (or two equal ones)
+        result = np.where(valid_before, utc_before, utc_after)
+        if ambiguous.any():
+            pick = np.minimum if fold == "earlier" else np.maximum
+            result[ambiguous] = pick(utc_before, utc_after)[ambiguous]
+        if missing.any():
+            result[missing] = utc_before[missing] if gap == "shift" else self.transitions[index_after][missing]
+        return result
+
+
+@lru_cache(maxsize=None)
+def transition_table(zone_name: str) -> TransitionTable:
+    """
+    The (cached, per process) transition table of an IANA zone. The first call for a
+    zone probes it for ~0.2 s, so async code calls this (or `julian_day_utc`) through
+    `run_ephemeris`, never on the event loop.
+    """
+    return TransitionTable.build(zone_name)
+
+
+def local_to_utc(local: np.ndarray, zone_name: str, fold: str = "earlier", gap: str = "shift") -> np.ndarray:
+    """Converts an array of naive local `datetime64` values in `zone_name` to UTC `datetime64[s]`."""
+    local_seconds = np.asarray(local, dtype="datetime64[s]").astype(np.int64)
+    return transition_table(zone_name).to_utc(local_seconds, fold=fold, gap=gap).astype("datetime64[s]")
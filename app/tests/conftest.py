@@ -0,0 +1,69 @@
+"""
+Fixtures compartidas. `mongo_db` y `redis` necesitan servidores reales (`MONGODB_URI`,
+`TEST_REDIS_URL`, por defecto la base 15 de Redis local) y omiten la prueba si no
+responden; mientras dura, sustituyen a los clientes globales de `app.db.client`. Las
+dos vacían su base antes y después de cada prueba: `mongo_db` usa siempre la base
+`synastr_test` y `redis` nunca lee `REDIS_URL`. `redis_down` simula una caída de Redis con un
+cliente que apunta a un puerto cerrado.
+"""
+import os
+
+import pytest
+import pytest_asyncio
+import redis.asyncio as aioredis
+from motor.motor_asyncio import AsyncIOMotorClient
+
+from app.db import client as db_client
+
+TEST_DB = "synastr_test"
+
+
+@pytest_asyncio.fixture
+async def mongo_db():
+    client = AsyncIOMotorClient(
+        os.getenv("MONGODB_URI", "mongodb://localhost:27017"), serverSelectionTimeoutMS=500
+    )
+    try:
+        await client.admin.command("ping")
+    except Exception:
+        client.close()
+        pytest.skip("MongoDB no disponible")
+
+    previous_client, previous_db = db_client.mongo_client, db_client.DEFAULT_DB_NAME
+    db_client.mongo_client, db_client.DEFAULT_DB_NAME = client, TEST_DB
+    await client.drop_database(TEST_DB)
+    try:
+        yield client[TEST_DB]
+    finally:
+        await client.drop_database(TEST_DB)
+        db_client.mongo_client, db_client.DEFAULT_DB_NAME = previous_client, previous_db
+        client.close()
+
+
+@pytest_asyncio.fixture
+async def redis():
+    # Nunca `REDIS_URL`: `app.main` carga el `.env` de desarrollo y el fixture vacía la base
+    client = aioredis.from_url(os.getenv("TEST_REDIS_URL", "redis://localhost:6379/15"), socket_connect_timeout=0.5)
+    try:
+        await client.ping()
+    except Exception:
+        await client.aclose()
+        pytest.skip("Redis no disponible")
+
+    previous = db_client.redis_client
+    db_client.redis_client = client
+    await client.flushdb()
+    try:
+        yield client
+    finally:
+        await client.flushdb()
+        db_client.redis_client = previous
+        await client.aclose()
+
+
+@pytest_asyncio.fixture
+async def redis_down(monkeypatch):
+    client = aioredis.from_url("redis://127.0.0.1:1/0", socket_connect_timeout=0.2)
+    monkeypatch.setattr(db_client, "redis_client", client)
+    yield client
+    await client.aclose()
@@ -0,0 +1,87 @@
+import pytest
+
+from app.services import places
+from app.services.bulk_import import BulkImporter, compute_chunk, parse_row, synthetic_rows
+from app.services.gazetteer import Gazetteer, Place, normalize_place
+
+
+def test_gazetteer_matches_normalized_names_and_prefers_larger_places():
+    gazetteer = Gazetteer.builtin()
+    gazetteer.add(Place("Santiago", 42.88, -8.54, "Europe/Madrid", 95_000), "Santiago de Compostela")
+
+    assert normalize_place("  Bogotá,   COLOMBIA ") == "bogota, colombia"
+    assert gazetteer.lookup("Bogotá, Colombia").timezone == "America/Bogota"
+    assert gazetteer.lookup("SAO PAULO").name == "São Paulo"
+    assert gazetteer.lookup("Santiago").timezone == "America/Santiago"
+    assert gazetteer.lookup("Atlántida") is None
+    assert gazetteer.match("Bogotá, Colombia")[0] == "bogota"
+
+
+@pytest.mark.asyncio
+async def test_partial_gazetteer_matches_are_saved_under_the_matched_key(mongo_db, monkeypatch):
+    monkeypatch.setattr(places, "cache", places.PlaceCache())
+    gazetteer = Gazetteer([Place("Cambridge", 52.2053, 0.1218, "Europe/London", 145_000)])
+    importer = BulkImporter(None, gazetteer, workers=1, collection=mongo_db.users)
+
+    rows, _ = await importer._prepare([{
+        "email": "ana@example.com",
+        "password": "secret",
+        "birth_date": "1990-06-15",
+        "birth_time": "14:30",
+        "birth_place": "Cambridge, Massachusetts",
+        "gender": "Female",
+        "looking_for": "Friendship",
+    }])
+
+    # La fila usa la suposición, pero el registro de "Cambridge, Massachusetts"
+    # seguirá pasando por el geocodificador
+    assert rows[0].timezone == "Europe/London"
+    assert await mongo_db.places.distinct("_id") == ["cambridge"]
+
+
+def test_parse_row_rejects_invalid_rows():
+    row = parse_row({
+        "email": " Ana@Example.com",
+        "password": "secret",
+        "birth_date": "1990-06-15",
+        "birth_time": "14:30",
+        "birth_place": "Bogotá",
+        "gender": "Female",
+        "looking_for": "Friendship",
+        "latitude": "",
+    })
+    assert row.email == "ana@example.com"
+    assert row.latitude is None
+
+    with pytest.raises(ValueError, match="password"):
+        parse_row({**vars(row), "password": None})
+    with pytest.raises(ValueError, match="gender"):
+        parse_row({**vars(row), "gender": "Robot"})
+
+
+def test_synthetic_rows_compute_charts_with_the_shared_hash():
+    rows = list(synthetic_rows(3, seed=7, password_hash="$2b$12$precomputed"))
+    assert rows == list(synthetic_rows(3, seed=7, password_hash="$2b$12$precomputed"))
+
+    place = Gazetteer.builtin().lookup(rows[0]["birth_place"])
+    results, _ = compute_chunk([(
+        f"{rows[0]['birth_date']}T{rows[0]['birth_time']}",
+        None,
+        place.latitude,
+        place.longitude,
+        place.timezone,
+        rows[0]["password_hash"],
+    )])
+    chart, chart_variants, timezone_name, password_hash = results[0]
+    assert len(chart["positions"]) == 13 and len(chart["houses"]) == 12
+    assert set(chart_variants) == {"planets", "ascendant", "cusps", "ayanamsas"}
+    assert timezone_name == place.timezone
+    assert password_hash == "$2b$12$precomputed"
+
+
+def test_polar_births_are_imported_with_a_porphyry_chart():
+    results, _ = compute_chunk([("1990-06-15T14:30:00", None, 78.2232, 15.6267, "Arctic/Longyearbyen", "$2b$12$x")])
+
+    chart, chart_variants, timezone_name, _ = results[0]
+    assert len(chart["houses"]) == 12
+    assert "placidus" not in chart_variants["cusps"] and "porphyry" in chart_variants["cusps"]
@@ -0,0 +1,164 @@
+"""
+Caché distribuida de resultados. Las pruebas contra Redis necesitan un servidor real
+(`TEST_REDIS_URL`) y se omiten si no hay ninguno.
+"""
+import asyncio
+from datetime import datetime
+
+import pytest
+import strawberry
+from bson import ObjectId
+
+from app.db import client as db_client
+from app.services import cache, places
+from app.services.astrology_service import calculate_chart_variants
+from app.services.gazetteer import Place
+
+
+def test_codec_round_trips_and_compresses_large_entries():
+    small = {"value": {"id": ObjectId(), "at": datetime(1990, 6, 15, 14, 30), "score": 0.5}}
+    large = {"value": [{"sign": "Aries", "degrees": n / 7} for n in range(200)]}
+
+    assert cache.decode(cache.encode(small)) == small
+    assert cache.encode(small)[:1] == b"\x00"
+    assert cache.encode(large)[:1] == b"\x01"
+    assert cache.decode(cache.encode(large)) == large
+
+
+def test_keys_depend_on_bound_arguments_only():
+    seen = cache.Cache("test", ttl=60)
+
+    assert seen.key("ana", 2) == seen.key("ana", 2)
+    assert seen.key("ana", 2) != seen.key("ana", 3)
+    assert seen.key({"a", "b"}) == seen.key({"b", "a"})
+    assert cache.Cache("other", ttl=60).key("ana", 2) != seen.key("ana", 2)
+
+
+def test_local_cache_expires_and_evicts():
+    local = cache.LocalCache(maxsize=2)
+    local.put("a", 1, ttl=60)
+    local.put("b", 2, ttl=60)
+    local.put("c", 3, ttl=60)
+    local.put("d", 4, ttl=0)  # No se guarda
+
+    assert local.get("a") == (False, None)
+    assert local.get("b") == (True, 2)
+    assert local.get("d") == (False, None)
+
+
+@pytest.mark.asyncio
+async def test_without_redis_the_function_still_runs(monkeypatch):
+    monkeypatch.setattr(db_client, "redis_client", None)
+
+    @cache.cached("test_fail_open", ttl=60)
+    async def double(x: int) -> int:
+        return 2 * x
+
+    assert await double(21) == 42
+    assert double.cache.stats.errors == 1
+
+
+def _counting(namespace: str, **options):
+    calls = []
+
+    async def compute(x: int, y: int = 2) -> dict:
+        calls.append(x)
+        await asyncio.sleep(0.05)
+        return {"x": x, "y": y}
+
+    # Dos decoradas con el mismo namespace hacen de dos procesos (L1 y single-flight propios)
+    return calls, cache.cached(namespace, l1_ttl=0, **options)(compute), cache.cached(namespace, l1_ttl=0, **options)(compute)
+
+
+@pytest.mark.asyncio
+async def test_concurrent_misses_compute_once(redis):
+    calls, worker_a, worker_b = _counting("test_stampede", ttl=60)
+
+    results = await asyncio.gather(*[worker_a(1) for _ in range(20)], *[worker_b(1, y=2) for _ in range(20)])
+
+    assert calls == [1]
+    assert all(result == {"x": 1, "y": 2} for result in results)
+    assert worker_b.cache.stats.lock_waits > 0
+
+
+@pytest.mark.asyncio
+async def test_stale_entries_are_served_while_refreshing(redis):
+    calls, worker, _ = _counting("test_stale", ttl=0.2, stale_ttl=60)
+    await worker(1)
+    await asyncio.sleep(0.3)
+
+    assert await worker(1) == {"x": 1, "y": 2}  # Sin esperar al recálculo
+    assert worker.cache.stats.stale_hits == 1
+    await asyncio.sleep(0.2)
+    assert calls == [1, 1]
+
+    await worker.invalidate(1)
+    await worker(1)
+    assert calls == [1, 1, 1]
+
+
+@pytest.mark.asyncio
+async def test_slow_computations_refresh_early(redis):
+    calls, worker, _ = _counting("test_xfetch", ttl=0.5, beta=1e5)
+    await worker(1)
+
+    await worker(1)  # Con beta tan alto, casi seguro que decide renovar ya
+    await asyncio.sleep(0.2)
+
+    assert worker.cache.stats.early_refreshes == 1
+    assert calls == [1, 1]
+
+
+@pytest.mark.asyncio
+async def test_cached_resolver_keeps_its_signature(redis):
+    calls = []
+
+    @strawberry.type
+    class Query:
+        @strawberry.field
+        @cache.cached("test_resolver", ttl=60)
+        async def greeting(self, info: strawberry.types.Info, name: str = "Ana") -> str:
+            calls.append(name)
+            return f"Hola, {name}"
+
+    schema = strawberry.Schema(query=Query)
+    for _ in range(3):
+        result = await schema.execute('{ greeting(name: "Leo") }')
+
+    assert result.data == {"greeting": "Hola, Leo"}
+    assert calls == ["Leo"]
+
+
+@pytest.mark.asyncio
+async def test_redis_errors_while_waiting_for_the_lock_fall_back_to_computing(redis, monkeypatch):
+    calls, worker, _ = _counting("test_lock_errors", ttl=60)
+
+    async def broken_set(*args, **kwargs):
+        raise ConnectionError("Redis went away")
+
+    monkeypatch.setattr(redis, "set", broken_set)
+
+    assert await worker(1) == {"x": 1, "y": 2}
+    assert calls == [1]
+    assert worker.cache.stats.errors == 1
+
+
+@pytest.mark.asyncio
+async def test_chart_variants_are_cached_per_birth_moment_and_place(redis, monkeypatch):
+    resolved = []
+
+    async def resolve_place(text, geocoder, source):
+        resolved.append(text)
+        return Place(text, 4.711, -74.0721, "America/Bogota")
+
+    monkeypatch.setattr(places, "resolve_place", resolve_place)
+    birth = datetime(1990, 6, 15, 14, 30)
+
+    first = await calculate_chart_variants(birth, "Bogotá, Colombia")
+    calculate_chart_variants.cache.local.clear()
+    second = await calculate_chart_variants(birth, "bogota,  colombia")
+
+    assert resolved == ["Bogotá, Colombia"]
+    assert first[1:] == second[1:] == (4.711, -74.0721, "America/Bogota")
+    assert first[0].natal_chart() == second[0].natal_chart()
+    assert calculate_chart_variants.cache.stats.hits == 1
@@ -0,0 +1,166 @@
+"""
+Índice de candidatos del feed: facetas, operaciones entre bitmaps y carga masiva. Las
+pruebas de la sincronización necesitan MongoDB y Redis reales (`MONGODB_URI`,
+`TEST_REDIS_URL`) y se omiten si no hay servidores.
+"""
+import asyncio
+import random
+from datetime import datetime
+from types import SimpleNamespace
+
+import pytest
+import pytest_asyncio
+from bson import ObjectId
+from pymongo.errors import ServerSelectionTimeoutError
+
+from app.api.types import Gender, LookingFor, SexualOrientation, ZodiacSign
+from app.services import candidate_index, events
+from app.services.candidate_index import CandidateIndex, facets_of
+
+
+def _users(count: int, seed: int = 7):
+    rng = random.Random(seed)
+    orientations = [o.value for o in SexualOrientation]
+    return [
+        {
+            "_id": ObjectId(),
+            "ordinal": ordinal,
+            "gender": rng.choice([g.value for g in Gender]),
+            "looking_for": rng.choice([l.value for l in LookingFor]),
+            "sexual_orientation": rng.sample(orientations, rng.randint(0, 2)),
+            "birth_date": datetime(1990, rng.randint(1, 12), rng.randint(1, 28)),
+        }
+        # Ordinales con huecos, como los que dejan los duplicados de una importación
+        for ordinal in range(0, count * 2, 2)
+    ]
+
+
+def _values(user, name: str) -> set:
+    return {value for facet, value in facets_of(user) if facet == name}
+
+
+def _bitmap(ordinals) -> int:
+    return sum(1 << ordinal for ordinal in ordinals)
+
+
+def _expected(users, gender=None, orientations=(), signs=(), elements=(), exclude=()):
+    """Lo que devolvería recorrer los usuarios uno a uno."""
+    result = []
+    for user in users:
+        if gender and gender not in _values(user, "gender"):
+            continue
+        if orientations and not _values(user, "orientation") & set(orientations):
+            continue
+        if signs and not _values(user, "sign") & set(signs):
+            continue
+        if elements and not _values(user, "element") & set(elements):
+            continue
+        if user["ordinal"] in exclude:
+            continue
+        result.append(user["ordinal"])
+    return result
+
+
+def test_aquarius_is_a_sign():
+    user = {"gender": "Male", "looking_for": "Friendship", "birth_date": datetime(1990, 2, 1)}
+
+    assert dict(facets_of(user))["sign"] == ZodiacSign.Aquarius.value
+    assert dict(facets_of(user))["element"] == "Aire"
+
+
+def test_candidates_match_a_linear_scan():
+    users = _users(2_000)
+    index = CandidateIndex()
+    index.load(users)
+
+    queries = [
+        {"gender": "Female"},
+        {"gender": "Male", "orientations": ["Gay", "Bisexual"]},
+        {"signs": ["Aquarius", "Leo"], "elements": ["Aire"]},
+        {"elements": ["Agua"], "exclude": {users[0]["ordinal"], users[5]["ordinal"]}},
+    ]
+    for query in queries:
+        excluded = query.pop("exclude", set())
+        bitmap = index.candidates(exclude=_bitmap(excluded), **query)
+        assert index.ordinals(bitmap).tolist() == _expected(users, exclude=excluded, **query)
+
+
+def test_incremental_updates_equal_a_full_load():
+    users = _users(500)
+    incremental = CandidateIndex()
+    for user in users:
+        incremental.upsert(user["ordinal"], user["_id"], facets_of(user))
+
+    # Un cambio de perfil mueve al usuario de bitmap
+    users[10] = dict(users[10], gender="Non-binary", sexual_orientation=["Queer"])
+    incremental.upsert(users[10]["ordinal"], users[10]["_id"], facets_of(users[10]))
+    full = CandidateIndex()
+    full.load(users)
+
+    for query in ({"gender": "Non-binary"}, {"orientations": ["Queer"]}, {"gender": "Female"}):
+        assert incremental.candidates(**query) == full.candidates(**query)
+    assert incremental.ids(full.ordinals(full.candidates(gender="Non-binary"))) == [
+        user["_id"] for user in users if user["gender"] == "Non-binary"
+    ]
+
+
+def test_users_without_ordinal_keep_the_index_disabled():
+    users = _users(10)
+    users[3].pop("ordinal")
+    index = CandidateIndex()
+    index.load(users)
+
+    assert len(index) == 9
+    assert not index.ready
+
+
+@pytest_asyncio.fixture
+async def sync(mongo_db, redis, monkeypatch):
+    """Sincronización en segundo plano sobre un índice nuevo; cuenta las cargas."""
+    monkeypatch.setattr(candidate_index, "index", CandidateIndex())
+    monkeypatch.setattr(candidate_index, "CANDIDATE_INDEX_RETRY_MAX_S", 0.01)
+    monkeypatch.setattr(candidate_index, "_READER_CHECK_S", 0.01)
+    await mongo_db.users.insert_many(_users(5))
+    state = SimpleNamespace(loads=0, fail_next=False)
+    load_index = candidate_index.load_index
+
+    async def counted_load(*args, **kwargs):
+        state.loads += 1
+        if state.fail_next:
+            state.fail_next = False
+            raise ServerSelectionTimeoutError("mongo down")
+        await load_index(*args, **kwargs)
+
+    monkeypatch.setattr(candidate_index, "load_index", counted_load)
+    yield state
+    await candidate_index.stop_candidate_index()
+    await events.stop_event_bus()
+
+
+async def _until(condition, timeout: float = 5.0) -> None:
+    deadline = asyncio.get_running_loop().time() + timeout
+    while not condition():
+        assert asyncio.get_running_loop().time() < deadline, "condition not reached"
+        await asyncio.sleep(0.01)
+
+
+@pytest.mark.asyncio
+async def test_sync_retries_when_the_first_load_fails(sync):
+    sync.fail_next = True
+    await candidate_index.start_candidate_index()
+
+    await _until(lambda: candidate_index.index.ready)
+
+    assert sync.loads == 2
+    assert len(candidate_index.index) == 5
+
+
+@pytest.mark.asyncio
+async def test_sync_resubscribes_and_reloads_after_the_bus_drops(sync):
+    await candidate_index.start_candidate_index()
+    await _until(lambda: candidate_index.index.ready)
+
+    events._reader.cancel()  # Se cae la conexión de escucha
+    await _until(lambda: sync.loads == 2 and candidate_index.index.ready)
+
+    assert events.reader_running()
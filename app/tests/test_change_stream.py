@@ -0,0 +1,105 @@
+"""
+Consumidor de change streams: eventos, filtrado por manejador y lotes.
+"""
+import asyncio
+
+import pytest
+from pymongo.errors import OperationFailure
+
+from app.services import change_stream
+from app.services.change_stream import ChangeEvent, ChangeStreamConsumer, change_handler, dispatch
+
+
+def _change(operation="update", coll="users", updated=None, removed=(), document=None):
+    change = {
+        "operationType": operation,
+        "ns": {"db": "synastr", "coll": coll},
+        "documentKey": {"_id": 1},
+        "fullDocument": document,
+    }
+    if operation == "update":
+        change["updateDescription"] = {"updatedFields": updated or {}, "removedFields": list(removed)}
+    return change
+
+
+class _Stream:
+    """Doble de `ChangeStream`: devuelve los cambios dados y luego `None`."""
+
+    def __init__(self, changes):
+        self.changes = list(changes)
+
+    async def try_next(self):
+        return self.changes.pop(0) if self.changes else None
+
+
+def test_touches_follows_dotted_paths():
+    photo = ChangeEvent.from_change(_change(updated={"photos.0.url": "x"}))
+    user_info = ChangeEvent.from_change(_change(updated={"user_info": {"pets": "cat"}}))
+    unset = ChangeEvent.from_change(_change(removed=["gender"]))
+
+    assert photo.touches(["photos"])
+    assert user_info.touches(["user_info.pets"])
+    assert unset.touches(["gender"])
+    assert not photo.touches(["gender", "photo"])
+    assert ChangeEvent.from_change(_change("insert")).touches(["gender"])
+
+
+@pytest.mark.asyncio
+async def test_dispatch_filters_by_collection_operation_and_fields(monkeypatch):
+    monkeypatch.setattr(change_stream, "_handlers", [])
+    received = {}
+
+    @change_handler("users", operations=("update",), fields=("gender",))
+    async def on_gender(events):
+        received["gender"] = events
+
+    @change_handler("likes", operations=("insert",))
+    async def on_like(events):
+        received["likes"] = events
+
+    events = [ChangeEvent.from_change(c) for c in (
+        _change(updated={"gender": "Female"}),
+        _change(updated={"updated_at": 1}),
+        _change("insert", coll="likes", document={"user_id": "a"}),
+        _change("delete", coll="likes"),
+    )]
+    await dispatch(events)
+
+    assert received["gender"] == [events[0]]
+    assert received["likes"] == [events[2]]
+    assert change_stream.watched_collections() == ["likes", "users"]
+
+
+@pytest.mark.asyncio
+async def test_next_batch_stops_at_batch_size_or_when_idle():
+    consumer = ChangeStreamConsumer(batch_size=3, max_wait_ms=10)
+    stream = _Stream(_change("insert") for _ in range(5))
+
+    assert len(await consumer.next_batch(stream)) == 3
+    assert len(await consumer.next_batch(stream)) == 2
+    assert await consumer.next_batch(stream) == []
+
+
+@pytest.mark.asyncio
+async def test_run_retries_a_failed_reset_before_consuming_again(monkeypatch):
+    monkeypatch.setattr(change_stream, "CHANGE_STREAM_RETRY_DELAY_S", 0)
+    consumer = ChangeStreamConsumer()
+    calls = []
+
+    async def consume():
+        calls.append("consume")
+        if calls.count("consume") == 1:
+            raise OperationFailure("resume token not found", code=286)
+        consumer.stop()
+
+    async def reset():
+        calls.append("reset")
+        if calls.count("reset") == 1:
+            raise RuntimeError("rebuild failed")
+
+    monkeypatch.setattr(consumer, "_consume", consume)
+    monkeypatch.setattr(consumer, "_reset", reset)
+
+    await asyncio.wait_for(consumer.run(), timeout=5)
+
+    assert calls == ["consume", "reset", "reset", "consume"]
@@ -0,0 +1,58 @@
+"""
+Registro con el encolado de la carta caído y barrido de cartas pendientes. Necesitan
+un MongoDB real (`MONGODB_URI`) y, el barrido, también Redis (`TEST_REDIS_URL`); se omiten
+si no hay servidores.
+"""
+import asyncio
+from datetime import date, datetime, time, timedelta, timezone
+
+import pytest
+
+import app.api  # noqa: F401  (resuelve el import circular entre app.auth y app.api)
+from app.api.resolvers.user_resolvers import register_user
+from app.api.types import Gender, LookingFor, SignUpInput
+from app.services import chart_jobs
+from app.services.job_queue import Job
+
+
+@pytest.mark.asyncio
+async def test_sign_up_succeeds_and_leaves_the_chart_pending_when_redis_is_down(mongo_db, redis_down):
+    payload = await register_user(SignUpInput(
+        email="ana@example.com",
+        password="secret-password",
+        birth_date=date(1990, 6, 15),
+        birth_time=time(14, 30),
+        birth_place="Bogotá, Colombia",
+        gender=Gender("Female"),
+        looking_for=LookingFor("Friendship"),
+    ))
+
+    assert payload.token
+    user = await mongo_db.users.find_one({"email": "ana@example.com"})
+    assert user["chart_status"] == chart_jobs.CHART_PENDING
+
+
+@pytest.mark.asyncio
+async def test_stale_pending_charts_are_requeued_once(mongo_db, redis):
+    now = datetime.now(timezone.utc)
+    stale, recent, ready = (
+        {"chart_status": status, "updated_at": now - age}
+        for status, age in (
+            (chart_jobs.CHART_PENDING, timedelta(hours=1)),
+            (chart_jobs.CHART_PENDING, timedelta(seconds=5)),
+            (chart_jobs.CHART_READY, timedelta(hours=1)),
+        )
+    )
+    await mongo_db.users.insert_many([stale, recent, ready])
+
+    # Dos workers barriendo a la vez
+    counts = await asyncio.gather(
+        chart_jobs.requeue_pending_charts(older_than_s=600),
+        chart_jobs.requeue_pending_charts(older_than_s=600),
+    )
+
+    assert sorted(counts) == [0, 1]
+    jobs = [Job.loads(raw) for raw in await redis.lrange("jobs:default", 0, -1)]
+    assert [(job.type, job.payload) for job in jobs] == [(chart_jobs.COMPUTE_NATAL_CHART, {"user_id": str(stale["_id"])})]
+    # Reclamado: el siguiente barrido no lo repite
+    assert await chart_jobs.requeue_pending_charts(older_than_s=600) == 0
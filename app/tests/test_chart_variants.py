@@ -0,0 +1,99 @@
+"""
+Variantes de la carta (sistemas de casas y zodiaco sideral) derivadas de una sola
+pasada de efemérides, frente a Swiss Ephemeris.
+"""
+from datetime import datetime
+
+import pytest
+import swisseph as swe
+
+from app.services.astrology_service import (
+    EPHE_PATH,
+    HOUSE_SYSTEMS,
+    PLANET_MAPPING,
+    ChartVariants,
+    compute_chart_variants,
+    compute_natal_chart,
+    julian_day_utc,
+)
+
+swe.set_ephe_path(EPHE_PATH)
+
+# Bogotá, 1990-06-15 14:30 (hora local)
+LATITUDE, LONGITUDE = 4.6533816, -74.0836333
+JD = julian_day_utc(datetime(1990, 6, 15, 14, 30), "America/Bogota")
+
+
+def _arcsec(a: float, b: float) -> float:
+    return abs((a - b + 180) % 360 - 180) * 3600
+
+
+def _longitude(position) -> float:
+    signs = ["Aries", "Taurus", "Gemini", "Cancer", "Leo", "Virgo", "Libra", "Scorpio",
+             "Sagittarius", "Capricorn", "Aquarius", "Pisces"]
+    return signs.index(position.sign) * 30 + position.degrees
+
+
+def test_default_chart_is_the_natal_chart():
+    variants = compute_chart_variants(JD, LATITUDE, LONGITUDE)
+    assert variants.chart() == compute_natal_chart(JD, LATITUDE, LONGITUDE)
+
+
+def test_quadrant_systems_match_swiss_ephemeris():
+    variants = compute_chart_variants(JD, LATITUDE, LONGITUDE)
+    for name, code in HOUSE_SYSTEMS.items():
+        if code is None:
+            continue
+        expected = swe.houses(JD, LATITUDE, LONGITUDE, code)[0]
+        for house, cusp in zip(variants.chart(name).houses, expected):
+            assert _arcsec(_longitude(house), cusp) < 1e-6
+
+
+def test_whole_sign_and_equal_houses_follow_the_ascendant():
+    variants = compute_chart_variants(JD, LATITUDE, LONGITUDE)
+    whole_sign = variants.chart("whole_sign").houses
+    equal = variants.chart("equal").houses
+
+    assert all(h.degrees == 0 for h in whole_sign)
+    assert whole_sign[0].sign == equal[0].sign
+    assert _arcsec(_longitude(equal[0]), variants.ascendant) < 1e-6
+    assert _arcsec(_longitude(equal[3]), variants.ascendant + 90) < 1e-6
+
+
+def test_sidereal_chart_matches_flg_sidereal():
+    variants = compute_chart_variants(JD, LATITUDE, LONGITUDE)
+    swe.set_sid_mode(swe.SIDM_LAHIRI)
+    chart = variants.chart("placidus", "lahiri")
+
+    for position in chart.positions:
+        expected = swe.calc_ut(JD, PLANET_MAPPING[position.name], swe.FLG_SIDEREAL)[0][0]
+        assert _arcsec(_longitude(position), expected) < 20  # Cuantizado al minuto
+    cusps = swe.houses_ex(JD, LATITUDE, LONGITUDE, b"P", swe.FLG_SIDEREAL)[0]
+    for house, expected in zip(chart.houses, cusps):
+        assert _arcsec(_longitude(house), expected) < 1e-3
+
+
+def test_document_round_trip_is_compact_and_precise():
+    variants = compute_chart_variants(JD, LATITUDE, LONGITUDE)
+    restored = ChartVariants.from_document(variants.to_document())
+
+    for original, copy in zip(variants.chart("koch", "raman").positions, restored.chart("koch", "raman").positions):
+        assert _arcsec(_longitude(original), _longitude(copy)) < 0.1
+    assert len(variants.to_document()["planets"]) == 4 * len(PLANET_MAPPING)
+
+
+def test_quadrant_systems_are_unavailable_at_polar_latitudes():
+    variants = compute_chart_variants(JD, 75.0, 20.0)
+    assert variants.chart("koch") is None
+    assert variants.chart("whole_sign") is not None
+    with pytest.raises(ValueError):
+        variants.chart("topocentric")
+
+
+def test_polar_natal_chart_falls_back_to_porphyry():
+    variants = compute_chart_variants(JD, 75.0, 20.0)  # Svalbard
+
+    assert variants.chart() is None
+    assert variants.natal_chart() == variants.chart("porphyry")
+    assert compute_natal_chart(JD, 75.0, 20.0) == variants.natal_chart()
+    assert set(ChartVariants.from_document(variants.to_document()).cusps) == {"porphyry", "regiomontanus", "campanus"}
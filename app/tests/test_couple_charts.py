@@ -0,0 +1,101 @@
+"""
+Cartas de pareja: compuesta a partir de las cartas guardadas, Davison en el punto
+medio y caché por match. Las pruebas de la caché necesitan un MongoDB real
+(`MONGODB_URI`) y se omiten si no hay servidor.
+"""
+from datetime import datetime
+
+import pytest
+from bson import ObjectId
+
+from app.services import couple_charts
+from app.services.astrology_service import (
+    compute_composite_chart,
+    compute_davison_chart,
+    compute_natal_chart,
+    davison_moment,
+    julian_day_utc,
+    midpoint_longitude,
+    stored_chart_longitudes,
+)
+from app.services.change_stream import ChangeEvent
+
+
+BOGOTA = (4.6533816, -74.0836333, "America/Bogota")
+MADRID = (40.4167, -3.7033, "Europe/Madrid")
+
+
+def _user(birth: datetime, place) -> dict:
+    latitude, longitude, timezone_name = place
+    julian_day = julian_day_utc(birth, timezone_name)
+    return {
+        "_id": ObjectId(),
+        "birth_date": datetime(birth.year, birth.month, birth.day),
+        "birth_time": birth.time().isoformat(),
+        "latitude": latitude,
+        "longitude": longitude,
+        "timezone": timezone_name,
+        "natal_chart": compute_natal_chart(julian_day, latitude, longitude).dict(),
+    }
+
+
+def _arcsec(a: float, b: float) -> float:
+    return abs((a - b + 180) % 360 - 180) * 3600
+
+
+def test_midpoint_takes_the_shorter_arc():
+    assert midpoint_longitude(350.0, 10.0) == pytest.approx(0.0)
+    assert midpoint_longitude(10.0, 350.0) == pytest.approx(0.0)
+    assert midpoint_longitude(100.0, 200.0) == pytest.approx(150.0)
+
+
+def test_composite_is_the_midpoint_of_both_charts():
+    a = _user(datetime(1990, 6, 15, 14, 30), BOGOTA)
+    b = _user(datetime(1992, 11, 3, 8, 5), MADRID)
+
+    planets_a, cusps_a = stored_chart_longitudes(a["natal_chart"])
+    planets_b, cusps_b = stored_chart_longitudes(b["natal_chart"])
+    composite_planets, composite_cusps = stored_chart_longitudes(
+        compute_composite_chart(a["natal_chart"], b["natal_chart"]).dict()
+    )
+
+    for pa, pb, pc in zip(planets_a, planets_b, composite_planets):
+        # Equidistante de los dos, por el arco corto
+        assert _arcsec(pc, pa) == pytest.approx(_arcsec(pc, pb), abs=1e-6)
+        assert _arcsec(pc, pa) <= 90 * 3600
+    assert all(_arcsec(c, midpoint_longitude(x, y)) < 1e-6 for x, y, c in zip(cusps_a, cusps_b, composite_cusps))
+
+
+def test_davison_is_a_chart_for_the_midpoint_moment():
+    jd_a, jd_b = julian_day_utc(datetime(1990, 6, 15, 14, 30), "America/Bogota"), 2449000.25
+    jd, latitude, longitude = davison_moment(jd_a, 4.65, -74.08, jd_b, 40.42, 170.0)
+
+    assert jd == pytest.approx((jd_a + jd_b) / 2)
+    assert latitude == pytest.approx((4.65 + 40.42) / 2)
+    assert longitude == pytest.approx(-132.04)  # Por el antimeridiano, no por Greenwich
+    assert compute_davison_chart(jd_a, 4.65, -74.08, jd_b, 40.42, 170.0) == compute_natal_chart(jd, latitude, longitude)
+
+
+@pytest.fixture
+def db(mongo_db):
+    return mongo_db
+
+
+@pytest.mark.asyncio
+async def test_charts_are_cached_per_match_until_a_natal_chart_changes(db):
+    a = _user(datetime(1990, 6, 15, 14, 30), BOGOTA)
+    b = _user(datetime(1992, 11, 3, 8, 5), MADRID)
+    await db.users.insert_many([a, b])
+    match_id = (await db.matches.insert_one({"users": [str(a["_id"]), str(b["_id"])]})).inserted_id
+
+    charts = await couple_charts.get_couple_charts(match_id)
+    assert len(charts["composite"]["positions"]) == 13
+    assert len(charts["davison"]["houses"]) == 12
+
+    # La segunda lectura sale del documento del match
+    await db.users.delete_many({})
+    assert (await couple_charts.get_couple_charts(match_id))["composite"] == charts["composite"]
+
+    await couple_charts._invalidate_couple_charts([ChangeEvent("users", "update", a["_id"])])
+    assert "couple_charts" not in await db.matches.find_one({"_id": match_id})
+    assert await couple_charts.get_couple_charts(match_id) is None  # Los usuarios ya no existen
@@ -0,0 +1,76 @@
+from datetime import datetime
+
+import pytest
+import swisseph as swe
+
+from app.services.astrology_service import (
+    EPHE_PATH,
+    PLANET_MAPPING,
+    EphemerisCache,
+    compute_natal_chart,
+    julian_day_utc,
+    run_ephemeris,
+)
+
+swe.set_ephe_path(EPHE_PATH)
+
+# 2024-03-10 00:00 UT
+BASE_JD = swe.julday(2024, 3, 10, 0.0)
+
+
+def _arcsec(a: float, b: float) -> float:
+    return abs((a - b + 180) % 360 - 180) * 3600
+
+
+def test_cache_reuses_positions_for_the_same_minute():
+    """Cartas del mismo minuto (en cualquier lugar) comparten todas las posiciones."""
+    cache = EphemerisCache(maxsize=1024)
+    for second in (0, 10, 20, 25):
+        jd = BASE_JD + (12 * 3600 + second) / 86400
+        for planet_id in PLANET_MAPPING.values():
+            cache.position(jd, planet_id)
+
+    assert cache.misses == len(PLANET_MAPPING)
+    assert cache.hit_ratio == pytest.approx(0.75)
+
+
+def test_cache_is_bounded():
+    cache = EphemerisCache(maxsize=10)
+    for minute in range(50):
+        cache.position(BASE_JD + minute / 1440, swe.SUN)
+    assert cache.info()["size"] == 10
+
+
+def test_interpolated_slow_bodies_stay_within_tolerance():
+    """
+    La interpolación de los cuerpos lentos debe mantenerse dentro de la tolerancia
+    frente a una llamada directa a Swiss Ephemeris.
+    """
+    cache = EphemerisCache(interpolate=True, tolerance_arcsec=5.0)
+    assert swe.TRUE_NODE not in cache.interpolated_bodies  # Su error supera la tolerancia
+
+    for hours in range(0, 24 * 30, 7):
+        jd = BASE_JD + hours / 24 + 0.013
+        for planet_id in cache.interpolated_bodies:
+            longitude, speed = cache.position(jd, planet_id)
+            expected = swe.calc_ut(jd, planet_id, swe.FLG_SPEED)[0]
+            assert _arcsec(longitude, expected[0]) <= 5.0
+            assert speed == pytest.approx(expected[3], abs=1e-3)
+
+    assert cache.interpolations > 0
+    assert cache.hit_ratio > 0.8
+
+
+@pytest.mark.asyncio
+async def test_compute_natal_chart_matches_reference():
+    """Bogotá, 1990-06-15 14:30 (hora local): Sol a 24° de Géminis."""
+    jd = julian_day_utc(datetime(1990, 6, 15, 14, 30), "America/Bogota")
+    chart = await run_ephemeris(compute_natal_chart, jd, 4.6533816, -74.0836333)
+
+    positions = {p.name: (p.sign, int(p.degrees)) for p in chart.positions}
+    assert positions["Sun"] == ("Gemini", 24)
+    assert len(chart.houses) == 12
+
+    for position in chart.positions:
+        expected = swe.calc_ut(jd, PLANET_MAPPING[position.name])[0][0]
+        assert _arcsec(position.degrees, expected % 30) < 20  # Cuantizado al minuto
@@ -0,0 +1,119 @@
+"""
+Tabla diaria de efemérides y búsqueda vectorizada de aspectos frente a un cálculo
+directo con Swiss Ephemeris, incluidos los bordes del rango de la tabla.
+"""
+from datetime import date, timedelta
+
+import numpy as np
+import pytest
+import swisseph as swe
+
+from app.services.astrology_service import EPHE_PATH, PLANET_MAPPING
+from app.services.ephemeris_table import (
+    ASPECTS,
+    BODY_NAMES,
+    EphemerisTable,
+    build_table,
+    find_transit_aspects,
+    natal_longitudes,
+)
+
+START = date(2024, 2, 25)
+END = date(2024, 3, 5)  # Cruza el 29 de febrero
+
+
+@pytest.fixture(scope="module")
+def table(tmp_path_factory):
+    path = str(tmp_path_factory.mktemp("ephemeris") / "daily.npy")
+    build_table(START, END, path)
+    return EphemerisTable(path)
+
+
+def _swisseph_positions(day: date) -> np.ndarray:
+    swe.set_ephe_path(EPHE_PATH)
+    jd = swe.julday(day.year, day.month, day.day, 0.0)
+    return np.array([swe.calc_ut(jd, planet_id)[0][0] for planet_id in PLANET_MAPPING.values()])
+
+
+def _brute_force_aspects(natal: np.ndarray, transit: np.ndarray, orb: float) -> set:
+    found = set()
+    for user, row in enumerate(natal):
+        for transit_body, transit_longitude in enumerate(transit):
+            for natal_body, natal_longitude in enumerate(row):
+                if np.isnan(natal_longitude):
+                    continue
+                separation = abs((transit_longitude - natal_longitude + 180) % 360 - 180)
+                for aspect, angle in enumerate(ASPECTS.values()):
+                    if abs(separation - angle) <= orb:
+                        found.add((user, transit_body, natal_body, aspect))
+    return found
+
+
+def _natal_sample(rng: np.random.Generator, users: int) -> np.ndarray:
+    natal = rng.uniform(0, 360, size=(users, len(BODY_NAMES)))
+    natal[rng.random(natal.shape) < 0.1] = np.nan  # Cuerpos ausentes de la carta
+    # Longitudes a ambos lados de 0°/360° para cubrir la vuelta del círculo
+    natal[0, :] = 359.98
+    natal[1, :] = 0.01
+    return natal
+
+
+def test_table_matches_swisseph_on_every_day(table):
+    assert (table.start, table.end) == (START, END)
+    day = START
+    while day <= END:
+        np.testing.assert_allclose(table.positions(day), _swisseph_positions(day), rtol=0, atol=1e-9)
+        day += timedelta(days=1)
+
+
+def test_days_outside_the_table_are_rejected(table):
+    table.positions(START)
+    table.positions(END)
+    for day in (START - timedelta(days=1), END + timedelta(days=1)):
+        with pytest.raises(KeyError):
+            table.positions(day)
+
+
+@pytest.mark.parametrize("day", [START, date(2024, 2, 29), END])
+def test_transit_aspects_match_brute_force(table, day):
+    orb = 1.0
+    natal = _natal_sample(np.random.default_rng(day.toordinal()), 200)
+    transit = _swisseph_positions(day)
+
+    # Trozos pequeños para que los índices de usuario crucen varios bloques
+    result = find_transit_aspects(natal, table.positions(day), orb=orb, chunk_size=37)
+    found = set(zip(result.user.tolist(), result.transit_body.tolist(),
+                    result.natal_body.tolist(), result.aspect.tolist()))
+
+    # La búsqueda trabaja en float32: sólo se toleran diferencias en el mismo borde del orbe
+    tolerance = 1e-4
+    assert _brute_force_aspects(natal, transit, orb - tolerance) <= found
+    assert found <= _brute_force_aspects(natal, transit, orb + tolerance)
+    assert np.all(result.deviation <= orb)
+    assert len(found) == len(result)
+
+
+def test_wrap_around_conjunction_is_found(table):
+    transit = table.positions(START)
+    natal = np.full((1, len(BODY_NAMES)), np.nan)
+    sun = BODY_NAMES.index("Sun")
+    natal[0, sun] = (transit[sun] + 359.5) % 360  # Medio grado por detrás, pasando por 0°
+
+    result = find_transit_aspects(natal, transit)
+
+    conjunction = list(ASPECTS).index("conjunction")
+    assert (0, sun, sun, conjunction) in set(zip(
+        result.user.tolist(), result.transit_body.tolist(), result.natal_body.tolist(), result.aspect.tolist()
+    ))
+
+
+def test_natal_longitudes_leave_missing_bodies_as_nan():
+    row = natal_longitudes({"positions": [{"name": "Sun", "sign": "Taurus", "degrees": 12.5}]})
+
+    assert row[BODY_NAMES.index("Sun")] == 42.5
+    assert np.isnan(np.delete(row, BODY_NAMES.index("Sun"))).all()
+
+
+def test_overlapping_orbs_are_rejected():
+    with pytest.raises(ValueError):
+        find_transit_aspects(np.zeros((1, len(BODY_NAMES))), np.zeros(len(BODY_NAMES)), orb=31.0)
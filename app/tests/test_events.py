@@ -0,0 +1,31 @@
+"""
+Bus de eventos sobre Redis Pub/Sub. Necesita un Redis real (`TEST_REDIS_URL`) y se omite
+si no hay servidor.
+"""
+import asyncio
+
+import pytest
+
+from app.services import events
+
+
+@pytest.mark.asyncio
+async def test_published_events_reach_every_local_listener_of_the_channel(redis):
+    try:
+        async with events.subscribe("test:a") as first, events.subscribe("test:a") as second, \
+                events.subscribe("test:b") as other:
+            # El lector se suscribe en segundo plano; se reintenta hasta que escucha
+            for _ in range(50):
+                await events.publish("test:a", {"n": 1})
+                try:
+                    payload = await asyncio.wait_for(first.get(), 0.1)
+                    break
+                except asyncio.TimeoutError:
+                    continue
+            assert payload == {"n": 1}
+            assert await asyncio.wait_for(second.get(), 1) == {"n": 1}
+            assert other.empty()
+
+        assert "test:a" not in events._listeners and "test:b" not in events._listeners
+    finally:
+        await events.stop_event_bus()
@@ -0,0 +1,57 @@
+import json
+from datetime import datetime
+
+import pytest
+from bson import ObjectId
+
+from app.services.export import ArrowStreamEncoder, BODY_COLUMNS, HOUSE_COLUMNS, encode_ndjson, flatten_user
+
+
+def _user_doc():
+    return {
+        "_id": ObjectId(),
+        "email": "ana@example.com",
+        "gender": "female",
+        "birth_date": datetime(1990, 6, 15),
+        "birth_time": "14:30",
+        "created_at": datetime(2024, 1, 1, 12, 0),
+        "natal_chart": {
+            "positions": [
+                {"name": "Sun", "sign": "Gemini", "degrees": 24.1},
+                {"name": "North Node", "sign": "Aquarius", "degrees": 10.0},
+            ],
+            "houses": [{"sign": "Libra", "degrees": 5.0}],
+        },
+    }
+
+
+def test_flatten_user_produces_fixed_columns_with_absolute_longitudes():
+    row = flatten_user(_user_doc())
+
+    assert set(BODY_COLUMNS + HOUSE_COLUMNS) <= set(row)
+    assert row["sun_lon"] == pytest.approx(84.1)  # Géminis empieza en 60°
+    assert row["north_node_lon"] == pytest.approx(310.0)
+    assert row["moon_lon"] is None
+    assert row["house_1"] == pytest.approx(185.0)
+    assert row["birth_date"] == "1990-06-15"
+    assert "password_hash" not in row
+
+
+def test_ndjson_encoding_is_one_object_per_line():
+    rows = [flatten_user(_user_doc()) for _ in range(3)]
+    lines = encode_ndjson(rows).splitlines()
+
+    assert len(lines) == 3
+    assert json.loads(lines[0])["created_at"] == "2024-01-01T12:00:00"
+
+
+def test_arrow_stream_round_trip():
+    pa = pytest.importorskip("pyarrow")
+    encoder = ArrowStreamEncoder()
+    data = b"".join(
+        [encoder.encode([flatten_user(_user_doc())]), encoder.encode([flatten_user(_user_doc())]), encoder.close()]
+    )
+
+    table = pa.ipc.open_stream(data).read_all()
+    assert table.num_rows == 2
+    assert table.column("sun_lon").to_pylist() == pytest.approx([84.1, 84.1])
@@ -0,0 +1,71 @@
+"""
+Búfer de candidatos del feed en streaming: prefetch, relleno en segundo plano y cierre
+del cursor. También el límite de la página de `find_feed_candidates`.
+"""
+import asyncio
+
+import pytest
+
+from app.services import feed
+from app.services.feed_stream import FeedSession
+
+
+class _Source:
+    """Generador de documentos que cuenta cuántos se han leído y si se cerró."""
+
+    def __init__(self, count: int):
+        self.count = count
+        self.read = 0
+        self.closed = False
+
+    async def docs(self):
+        try:
+            for n in range(self.count):
+                await asyncio.sleep(0)
+                self.read += 1
+                yield {"_id": n}
+        finally:
+            self.closed = True
+
+
+@pytest.mark.asyncio
+async def test_take_reads_ahead_and_refills_in_the_background():
+    source = _Source(100)
+    session = FeedSession(source.docs(), prefetch=10)
+
+    first = await session.take(4)
+    assert [doc["_id"] for doc in first] == [0, 1, 2, 3]
+    assert source.read == 4  # Sólo se espera a los que hacen falta...
+    await asyncio.sleep(0.01)
+    assert session.buffered == 10  # ...y el resto se lee en segundo plano
+
+    await session.take(6)  # Baja a la mitad: se rellena sin esperar
+    assert session.buffered == 4
+    await asyncio.sleep(0.01)
+    assert session.buffered == 10 and source.read == 20
+
+    await session.close()
+    assert source.closed
+
+
+@pytest.mark.asyncio
+async def test_take_returns_what_is_left_when_exhausted():
+    source = _Source(5)
+    session = FeedSession(source.docs(), prefetch=3)
+
+    assert len(await session.take(4)) == 4
+    assert [doc["_id"] for doc in await session.take(4)] == [4]
+    assert session.exhausted
+    assert await session.take(1) == []
+    await session.close()
+
+
+@pytest.mark.asyncio
+async def test_feed_candidates_are_capped_without_near_or_exclude(mongo_db, monkeypatch):
+    monkeypatch.setattr(feed, "FEED_DEFAULT_LIMIT", 3)
+    monkeypatch.setattr(feed, "FEED_MAX_LIMIT", 5)
+    await mongo_db.users.insert_many([{"n": n} for n in range(10)])
+
+    for limit, expected in ((None, 3), (0, 3), (4, 4), (100, 5)):
+        docs = [doc async for doc in feed.find_feed_candidates({}, limit=limit)]
+        assert len(docs) == expected
@@ -0,0 +1,48 @@
+"""
+Vista de GraphQL: serialización con orjson y negociación de la compresión.
+"""
+import json
+from datetime import date, datetime, time
+
+from bson import ObjectId
+from starlette.testclient import TestClient
+
+from app.api import graphql_view
+from app.main import create_app
+
+
+def test_dumps_handles_dates_and_object_ids():
+    oid = ObjectId()
+    data = {"birthDate": date(1990, 2, 1), "birthTime": time(8, 30), "at": datetime(2024, 1, 1, 12), "id": oid}
+
+    assert json.loads(graphql_view.dumps(data)) == {
+        "birthDate": "1990-02-01",
+        "birthTime": "08:30:00",
+        "at": "2024-01-01T12:00:00",
+        "id": str(oid),
+    }
+
+
+def test_negotiate_encoding_honours_q_values():
+    supported = graphql_view.supported_encodings()
+
+    assert graphql_view.negotiate_encoding("gzip, deflate, br") == supported[0]
+    assert graphql_view.negotiate_encoding("br;q=0.5, gzip") == "gzip"
+    assert graphql_view.negotiate_encoding("gzip;q=0, identity") is None
+    assert graphql_view.negotiate_encoding("*") == supported[0]
+    assert graphql_view.negotiate_encoding("") is None
+
+
+def test_large_graphql_responses_are_compressed():
+    client = TestClient(create_app())
+    query = {"query": "{ __schema { types { name fields { name } } } }"}
+
+    plain = client.post("/graphql", json=query, headers={"Accept-Encoding": "identity"})
+    compressed = client.post("/graphql", json=query, headers={"Accept-Encoding": "gzip"})
+    small = client.post("/graphql", json={"query": "{ __typename }"}, headers={"Accept-Encoding": "gzip"})
+
+    assert "content-encoding" not in plain.headers
+    assert compressed.headers["content-encoding"] == "gzip"
+    assert int(compressed.headers["content-length"]) < len(plain.content)
+    assert compressed.json() == plain.json()
+    assert "content-encoding" not in small.headers
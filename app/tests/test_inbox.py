@@ -0,0 +1,97 @@
+"""
+Bandeja de matches: resúmenes, cursores y paginación. Las pruebas de paginación
+necesitan un MongoDB real (`MONGODB_URI`) y se omiten si no hay servidor.
+"""
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from bson import ObjectId
+
+from app.services import inbox
+
+
+def _user(month: int, plan: str = "free", photos=None) -> dict:
+    return {
+        "_id": ObjectId(),
+        "birth_date": datetime(1990, month, 15),
+        "birth_place": "Lima",
+        "gender": "Female",
+        "plan": plan,
+        "photos": photos or [],
+    }
+
+
+def test_partner_summary_uses_the_smallest_variant():
+    user = _user(6, photos=[{
+        "url": "/media/medium.webp",
+        "variants": [{"name": "thumb", "width": 160, "height": 160, "url": "/media/thumb.webp"}],
+    }])
+
+    summary = inbox.partner_summary(user)
+
+    assert summary == {
+        "id": str(user["_id"]),
+        "sun_sign": "Gemini",
+        "birth_place": "Lima",
+        "gender": "Female",
+        "photo_url": "/media/thumb.webp",
+    }
+
+
+def test_premium_bonus_only_applies_to_the_premium_side():
+    # Enero (Capricornio) y mayo (Tauro) comparten elemento Tierra
+    free, premium = _user(1), _user(5, plan="premium")
+
+    assert inbox.compatibility_score(premium, free) > inbox.compatibility_score(free, premium)
+
+
+def test_cursor_round_trip():
+    entry = {"_id": ObjectId(), "last_activity_at": datetime(2024, 3, 1, 12, 30, 0, 123000)}
+
+    at, entry_id = inbox.decode_cursor(inbox.encode_cursor(entry))
+
+    assert at == entry["last_activity_at"].replace(tzinfo=timezone.utc)
+    assert entry_id == str(entry["_id"])
+    with pytest.raises(ValueError):
+        inbox.decode_cursor("not-a-cursor")
+
+
+@pytest.fixture
+def entries(mongo_db):
+    return mongo_db[inbox.INBOX_COLLECTION]
+
+
+@pytest.mark.asyncio
+async def test_pages_follow_last_activity_without_gaps_or_repeats(entries):
+    owner = _user(3)
+    partners = [_user(month) for month in range(1, 8)]
+    start = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    for n, partner in enumerate(partners):
+        # Dos matches en el mismo milisegundo: el desempate es el `_id`
+        await inbox.record_match(owner, partner, at=start + timedelta(minutes=n // 2))
+
+    seen, after = [], None
+    while True:
+        page, has_next_page = await inbox.list_inbox(str(owner["_id"]), first=3, after=after)
+        seen += [entry["partner_id"] for entry in page]
+        if not has_next_page:
+            break
+        after = inbox.encode_cursor(page[-1])
+
+    assert sorted(seen) == sorted(str(p["_id"]) for p in partners)
+    assert len(seen) == len(set(seen))
+    assert seen[0] == str(partners[-1]["_id"])
+
+
+@pytest.mark.asyncio
+async def test_record_match_is_idempotent_and_writes_both_sides(entries):
+    a, b = _user(2), _user(9)
+    first_at = datetime(2024, 1, 1, tzinfo=timezone.utc)
+
+    await inbox.record_match(a, b, at=first_at)
+    await inbox.record_match(a, b, at=first_at + timedelta(days=1))
+
+    assert await entries.count_documents({}) == 2
+    entry = await entries.find_one({"owner_id": str(b["_id"])})
+    assert entry["partner"]["sun_sign"] == "Aquarius"
+    assert entry["matched_at"].replace(tzinfo=timezone.utc) == first_at
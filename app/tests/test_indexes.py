@@ -0,0 +1,30 @@
+"""
+Índices de arranque: un índice que no se puede crear no impide crear los demás.
+Necesitan un MongoDB real (`MONGODB_URI`) y se omiten si no hay servidor.
+"""
+import pytest
+
+from app.db.indexes import INDEXES, ensure_indexes
+
+
+@pytest.mark.asyncio
+async def test_duplicate_emails_do_not_block_the_other_indexes(mongo_db):
+    # Usuarios anteriores con el mismo email: `email_unique` no se puede crear
+    await mongo_db.users.insert_many([{"email": "ana@synastr.app", "ordinal": n} for n in range(2)])
+
+    failed = await ensure_indexes()
+
+    assert failed == ["email_unique"]
+    user_indexes = await mongo_db.users.index_information()
+    assert "email_unique" not in user_indexes
+    assert "location_2dsphere_gender_looking_for" in user_indexes
+    created = set(user_indexes)
+    for collection in ("matches", "inbox_entries"):
+        created |= set(await mongo_db.get_collection(collection).index_information())
+    assert {options["name"] for _, _, options in INDEXES} - created == {"email_unique"}
+
+
+@pytest.mark.asyncio
+async def test_ensure_indexes_is_idempotent(mongo_db):
+    assert await ensure_indexes() == []
+    assert await ensure_indexes() == []
@@ -0,0 +1,160 @@
+"""
+Cola de trabajos y `JobWorker`: confirmación, reintentos con espera, cola de muertos y
+manejadores de fallo. Necesitan un Redis real (`TEST_REDIS_URL`) y se omiten si no hay
+servidor.
+"""
+import asyncio
+import time
+
+import pytest
+
+from app.services import job_queue
+from app.services.job_queue import Job, JobWorker, enqueue, job_failure_handler, job_handler
+
+QUEUE = "test"
+
+
+async def _run_until(worker: JobWorker, condition, timeout: float = 5.0) -> None:
+    """Ejecuta el worker hasta que `condition()` (corrutina) sea cierta y lo detiene."""
+    task = asyncio.create_task(worker.run())
+    try:
+        deadline = asyncio.get_running_loop().time() + timeout
+        while not await condition():
+            assert asyncio.get_running_loop().time() < deadline, "worker did not reach the expected state"
+            await asyncio.sleep(0.02)
+    finally:
+        worker.stop()
+        await asyncio.wait_for(task, timeout)
+
+
+@pytest.mark.asyncio
+async def test_successful_jobs_are_acknowledged(redis):
+    seen = []
+
+    @job_handler("test_ok")
+    async def handle(payload):
+        seen.append(payload)
+
+    job = await enqueue("test_ok", {"n": 1}, queue=QUEUE)
+    assert job.id and await redis.llen("jobs:test") == 1
+
+    await _run_until(JobWorker(QUEUE, poll_interval=0.01), lambda: _done(seen))
+
+    assert seen == [{"n": 1}]
+    assert await redis.llen("jobs:test") == 0
+    assert await redis.zcard("jobs:test:processing") == 0
+
+
+async def _done(seen) -> bool:
+    return bool(seen)
+
+
+@pytest.mark.asyncio
+async def test_worker_survives_redis_errors_and_keeps_its_concurrency(redis, monkeypatch):
+    seen = []
+
+    @job_handler("test_after_outage")
+    async def handle(payload):
+        seen.append(payload)
+
+    evalsha, failures = redis.evalsha, []
+    dequeue_sha = redis.register_script(job_queue._DEQUEUE_LUA).sha
+
+    def flaky_evalsha(sha, *args, **kwargs):
+        # Los primeros `dequeue` fallan después de reservar su hueco de concurrencia
+        if sha == dequeue_sha and len(failures) < 5:
+            failures.append(sha)
+            raise ConnectionError("Redis failover")
+        return evalsha(sha, *args, **kwargs)
+
+    monkeypatch.setattr(redis, "evalsha", flaky_evalsha)
+    await enqueue("test_after_outage", {"n": 1}, queue=QUEUE)
+    worker = JobWorker(QUEUE, concurrency=2, poll_interval=0.001)
+
+    await _run_until(worker, lambda: _done(seen))
+
+    assert seen == [{"n": 1}]
+    assert len(failures) == 5
+    assert worker._semaphore._value == 2  # Ningún hueco perdido en los fallos
+
+
+@pytest.mark.asyncio
+async def test_failing_jobs_are_retried_then_buried(redis, monkeypatch):
+    monkeypatch.setattr(job_queue, "JOB_RETRY_BASE_DELAY_S", 0.0)
+    attempts, failures = [], []
+
+    @job_handler("test_fail")
+    async def handle(payload):
+        attempts.append(payload)
+        raise RuntimeError("boom")
+
+    @job_failure_handler("test_fail")
+    async def on_failure(payload, error):
+        failures.append((payload, str(error)))
+
+    await enqueue("test_fail", {"n": 2}, queue=QUEUE, max_attempts=3)
+
+    async def buried() -> bool:
+        return await redis.llen("jobs:test:dead") == 1
+
+    await _run_until(JobWorker(QUEUE, poll_interval=0.01), buried)
+
+    assert len(attempts) == 3
+    assert failures == [({"n": 2}, "boom")]
+    dead = Job.loads(await redis.lindex("jobs:test:dead", 0))
+    assert dead.attempts == 3 and dead.last_error == "RuntimeError: boom"
+    assert await redis.zcard("jobs:test:delayed") == 0
+    assert await redis.zcard("jobs:test:processing") == 0
+
+
+@pytest.mark.asyncio
+async def test_retries_wait_in_the_delayed_set(redis, monkeypatch):
+    monkeypatch.setattr(job_queue, "JOB_RETRY_BASE_DELAY_S", 60.0)
+
+    @job_handler("test_later")
+    async def handle(payload):
+        raise RuntimeError("not yet")
+
+    await enqueue("test_later", {}, queue=QUEUE)
+
+    async def delayed() -> bool:
+        return await redis.zcard("jobs:test:delayed") == 1
+
+    await _run_until(JobWorker(QUEUE, poll_interval=0.01), delayed)
+
+    (raw, due), = await redis.zrange("jobs:test:delayed", 0, -1, withscores=True)
+    assert Job.loads(raw).attempts == 1
+    assert due > time.time() + 30  # Se reintentará dentro de un minuto
+    assert await redis.llen("jobs:test:dead") == 0
+
+
+@pytest.mark.asyncio
+async def test_unknown_job_types_go_to_the_dead_letter_queue(redis):
+    await enqueue("test_nobody_handles_this", {}, queue=QUEUE)
+
+    async def buried() -> bool:
+        return await redis.llen("jobs:test:dead") == 1
+
+    await _run_until(JobWorker(QUEUE, poll_interval=0.01), buried)
+
+    assert await redis.zcard("jobs:test:processing") == 0
+
+
+@pytest.mark.asyncio
+async def test_stop_waits_for_running_jobs(redis):
+    finished = []
+
+    @job_handler("test_slow")
+    async def handle(payload):
+        await asyncio.sleep(0.2)
+        finished.append(payload)
+
+    await enqueue("test_slow", {"n": 3}, queue=QUEUE)
+
+    async def started() -> bool:
+        return await redis.zcard("jobs:test:processing") == 1
+
+    await _run_until(JobWorker(QUEUE, poll_interval=0.01), started)
+
+    assert finished == [{"n": 3}]
+    assert await redis.zcard("jobs:test:processing") == 0
@@ -0,0 +1,70 @@
+"""
+Vistas perezosas de los tipos de salida: mismos valores que los documentos y sin
+convertir los campos que la consulta no pide.
+"""
+from datetime import datetime
+from typing import List
+
+import strawberry
+from bson import ObjectId
+
+from app.api.types import User
+from app.api.views import UserView
+
+
+def _schema(docs) -> strawberry.Schema:
+    @strawberry.type
+    class Query:
+        @strawberry.field
+        def users(self) -> List[User]:
+            return [UserView(doc) for doc in docs]
+
+    return strawberry.Schema(query=Query)
+
+
+def _doc(**extra) -> dict:
+    return {
+        "_id": ObjectId(),
+        "email": "ana@synastr.test",
+        "birth_date": datetime(1990, 2, 1),
+        "birth_time": "08:30:00",
+        "birth_place": "Madrid",
+        "gender": "Female",
+        "looking_for": "Friendship",
+        "photos": [],
+        **extra,
+    }
+
+
+def test_views_resolve_nested_fields():
+    chart = {
+        "positions": [{"name": "Sun", "sign": "Aquarius", "sign_icon": "♒", "degrees": 11.5, "house": 3}],
+        "houses": [],
+    }
+    doc = _doc(natal_chart=chart, user_info={"height": 170, "pets": "Cat"}, distance_m=2500)
+    result = _schema([doc]).execute_sync(
+        "{ users { id birthDate birthTime chartStatus distanceKm "
+        "natalChart { positions { name signIcon degrees } } userInfo { height pets smoking } } }"
+    )
+
+    assert result.errors is None
+    assert result.data["users"] == [{
+        "id": str(doc["_id"]),
+        "birthDate": "1990-02-01",
+        "birthTime": "08:30:00",
+        "chartStatus": "Ready",
+        "distanceKm": 2.5,
+        "natalChart": {"positions": [{"name": "Sun", "signIcon": "♒", "degrees": 11.5}]},
+        "userInfo": {"height": 170, "pets": "Cat", "smoking": None},
+    }]
+
+
+def test_unselected_fields_are_never_converted():
+    # Datos que fallarían al convertirse: sólo dan error si se piden
+    doc = _doc(natal_chart={"positions": [{}]}, user_info={"pets": "Dragon"})
+    schema = _schema([doc])
+
+    assert schema.execute_sync("{ users { email } }").errors is None
+    assert schema.execute_sync("{ users { natalChart { positions { name } } } }").errors
+    assert schema.execute_sync("{ users { userInfo { pets } } }").errors
+    assert schema.execute_sync("{ users { userInfo { height } } }").data == {"users": [{"userInfo": {"height": None}}]}
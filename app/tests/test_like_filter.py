@@ -0,0 +1,48 @@
+"""
+Filtros de Bloom de likes. La prueba de `record_like` necesita un Redis real
+(`TEST_REDIS_URL`) y se omite si no hay servidor.
+"""
+import pytest
+
+from app.services import like_filter
+
+
+def _setbits(members) -> bytes:
+    """Reproduce lo que deja SETBIT en Redis (bit 0 = el más significativo del byte 0)."""
+    data = bytearray(like_filter.LIKES_BLOOM_BITS // 8)
+    for member in members:
+        for offset in like_filter.bit_offsets(member):
+            data[offset >> 3] |= 0x80 >> (offset & 7)
+    return bytes(data)
+
+
+def test_filter_has_no_false_negatives():
+    liked = [f"user-{n}" for n in range(2_000)]
+
+    bloom = like_filter.LikeFilter(_setbits(liked))
+
+    assert all(member in bloom for member in liked)
+
+
+def test_false_positive_rate_matches_the_sizing():
+    bloom = like_filter.LikeFilter(_setbits(f"user-{n}" for n in range(2_000)))
+
+    false_positives = sum(f"other-{n}" in bloom for n in range(20_000))
+
+    assert false_positives / 20_000 < 0.005
+
+
+def test_empty_or_short_filter_contains_nothing():
+    assert "user-1" not in like_filter.LikeFilter(None)
+    assert "user-1" not in like_filter.LikeFilter(b"\xff")
+
+
+@pytest.mark.asyncio
+async def test_record_like_needs_a_rebuilt_filter(redis):
+    assert await like_filter.record_like("ana", "leo") is None
+
+    await redis.set(like_filter.READY_KEY, like_filter._config_signature())
+
+    assert await like_filter.record_like("leo", "eva") is False
+    assert await like_filter.record_like("leo", "ana") is True  # Ana ya le dio like
+    assert "eva" in await like_filter.load_filter("leo")
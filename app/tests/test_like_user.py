@@ -0,0 +1,69 @@
+"""
+Mutación `likeUser`: validación de la entrada y registro del like y del match. Las
+pruebas del match necesitan un MongoDB real (`MONGODB_URI`) y se omiten si no hay
+servidor; Redis se sustituye por uno inalcanzable para simular una caída.
+"""
+from datetime import datetime
+from types import SimpleNamespace
+
+import pytest
+
+from app.api import schema
+from app.auth.jwt import create_access_token
+from app.services import feed_stream
+
+LIKE = 'mutation($target: ID!) { likeUser(inputData: {userId: "me", targetUserId: $target}) { matched } }'
+
+
+def _context(email: str) -> dict:
+    headers = {"Authorization": f"Bearer {create_access_token(email)}"}
+    return {"request": SimpleNamespace(headers=headers)}
+
+
+@pytest.mark.asyncio
+async def test_malformed_target_id_is_a_graphql_error():
+    result = await schema.execute(LIKE, variable_values={"target": "not-an-object-id"})
+
+    assert result.data is None
+    assert result.errors[0].message == "Invalid target user id"
+
+
+async def _couple(db):
+    ana, leo = (
+        {"email": f"{name}@example.com", "password_hash": "x", "birth_date": datetime(1990, month, 15),
+         "birth_place": "Lima", "gender": "Female", "photos": []}
+        for name, month in (("ana", 3), ("leo", 8))
+    )
+    await db.users.insert_many([ana, leo])
+    # Leo ya le dio like a Ana
+    await db.likes.insert_one({"user_id": str(leo["_id"]), "target_user_id": str(ana["_id"])})
+    return ana, leo
+
+
+@pytest.mark.asyncio
+async def test_match_is_recorded_when_the_couple_charts_job_cannot_be_enqueued(mongo_db, redis_down, monkeypatch):
+    async def no_swipe(*args, **kwargs):
+        return None
+
+    monkeypatch.setattr(feed_stream, "publish_swipe", no_swipe)
+    ana, leo = await _couple(mongo_db)
+
+    result = await schema.execute(LIKE, variable_values={"target": str(leo["_id"])}, context_value=_context(ana["email"]))
+
+    assert result.errors is None
+    assert result.data == {"likeUser": {"matched": True}}
+    assert await mongo_db.matches.count_documents({}) == 1
+    assert await mongo_db.inbox_entries.count_documents({}) == 2
+
+
+@pytest.mark.asyncio
+async def test_like_and_match_are_written_when_the_event_bus_fails(mongo_db, redis_down):
+    ana, leo = await _couple(mongo_db)
+
+    result = await schema.execute(LIKE, variable_values={"target": str(leo["_id"])}, context_value=_context(ana["email"]))
+
+    assert result.errors is None
+    assert result.data == {"likeUser": {"matched": True}}
+    assert await mongo_db.likes.count_documents({"user_id": str(ana["_id"])}) == 1
+    assert await mongo_db.matches.count_documents({}) == 1
+    assert await mongo_db.inbox_entries.count_documents({}) == 2
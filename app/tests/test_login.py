@@ -0,0 +1,77 @@
+"""
+Login: sólo se validan las credenciales y bcrypt no bloquea el bucle de eventos. Las
+pruebas de normalización del email necesitan un MongoDB real (`MONGODB_URI`) y se
+omiten si no hay servidor.
+"""
+from datetime import date, time
+
+import pytest
+from pydantic import ValidationError
+
+import app.api  # noqa: F401  (resuelve el import circular entre app.auth y app.api)
+from app.api.exceptions import UserAlreadyExistsError
+from app.api.resolvers.user_resolvers import authenticate_user, register_user
+from app.api.types import Gender, LoginInput, LookingFor, SignUpInput
+from app.models.user import Credentials, email_adapter, normalize_email, pwd_context
+
+
+def test_credentials_ignore_the_rest_of_the_document():
+    # Un documento que `UserModel` rechazaría (carta natal incompleta, sin fecha)
+    doc = {"email": "ana@synastr.app", "password_hash": "x", "natal_chart": {"positions": [{}]}}
+
+    assert Credentials.from_document(doc).email == "ana@synastr.app"
+
+
+def test_email_adapter_rejects_malformed_emails():
+    email_adapter.validate_python("ana@synastr.app")
+    with pytest.raises(ValidationError):
+        email_adapter.validate_python("ana@")
+
+
+@pytest.mark.asyncio
+async def test_verify_password_async():
+    credentials = Credentials(email="ana@synastr.app", password_hash=pwd_context.hash("secret", rounds=4))
+
+    assert await credentials.verify_password_async("secret")
+    assert not await credentials.verify_password_async("wrong")
+
+
+def test_normalize_email():
+    assert normalize_email("  Ana@Synastr.App ") == "ana@synastr.app"
+
+
+def _sign_up(email: str) -> SignUpInput:
+    return SignUpInput(
+        email=email,
+        password="secret-password",
+        birth_date=date(1990, 6, 15),
+        birth_time=time(14, 30),
+        birth_place="Bogotá, Colombia",
+        gender=Gender("Female"),
+        looking_for=LookingFor("Friendship"),
+    )
+
+
+@pytest.mark.asyncio
+async def test_emails_are_normalized_on_sign_up_and_login(mongo_db, redis_down):
+    await register_user(_sign_up("Ana@Synastr.App"))
+
+    assert await mongo_db.users.find_one({"email": "ana@synastr.app"})
+    with pytest.raises(UserAlreadyExistsError):
+        await register_user(_sign_up("ANA@synastr.app"))
+    payload = await authenticate_user(LoginInput(email="aNa@SYNASTR.app", password="secret-password"))
+    assert payload.user.email == "ana@synastr.app"
+
+
+@pytest.mark.asyncio
+async def test_legacy_mixed_case_accounts_can_still_log_in(mongo_db):
+    await mongo_db.users.insert_one({
+        "email": "Leo@Synastr.App",
+        "password_hash": pwd_context.hash("secret", rounds=4),
+        "birth_date": None,
+        "photos": [],
+    })
+
+    payload = await authenticate_user(LoginInput(email="Leo@Synastr.App", password="secret"))
+
+    assert payload.user.email == "Leo@Synastr.App"
@@ -0,0 +1,37 @@
+import asyncio
+import time
+
+import pytest
+
+from app.monitoring.loop_lag import LoopLagMonitor
+
+
+async def _slow_resolver():
+    # Simula un resolver que hace trabajo síncrono (bcrypt, swisseph, HTTP...)
+    time.sleep(0.3)
+
+
+@pytest.mark.asyncio
+async def test_loop_monitor_reports_lag_and_blocking_callback():
+    """
+    El monitor debe registrar la latencia provocada por una llamada bloqueante y,
+    en modo debug, identificar la función que retuvo el event loop.
+    """
+    monitor = LoopLagMonitor(interval=0.01, debug=True, block_threshold=0.05)
+    await monitor.start()
+    try:
+        await asyncio.sleep(0.05)
+        await _slow_resolver()
+        await asyncio.sleep(0.1)
+    finally:
+        await monitor.stop()
+
+    stats = monitor.stats()
+    assert stats["samples"] > 0
+    assert stats["max_ms"] >= 200, f"Latencia máxima inesperada: {stats['max_ms']} ms"
+
+    assert monitor.blocking_calls, "No se detectó ningún bloqueo del event loop"
+    call = monitor.blocking_calls[0]
+    assert call.duration >= 0.2
+    assert "_slow_resolver" in call.location
+    assert any("time.sleep" in line for line in call.stack)
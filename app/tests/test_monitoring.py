@@ -0,0 +1,131 @@
+"""
+Endpoints de salud y de pools, y drenado del worker al apagarse. Los pings a MongoDB
+y Redis se sustituyen: no necesitan servidores.
+"""
+import asyncio
+from types import SimpleNamespace
+
+import httpx
+import pytest
+import redis.asyncio as aioredis
+from motor.motor_asyncio import AsyncIOMotorClient
+
+from app.api import monitoring
+from app.db import client as db_client
+from app.main import create_app
+from app.monitoring.pools import MongoPoolMetrics
+
+
+async def _ok(timeout: float) -> None:
+    return None
+
+
+async def _refused(timeout: float) -> None:
+    raise ConnectionError("connection refused")
+
+
+@pytest.fixture
+def stores_up(monkeypatch):
+    monkeypatch.setattr(monitoring, "ping_mongo", _ok)
+    monkeypatch.setattr(monitoring, "ping_redis", _ok)
+
+
+def _client(app) -> httpx.AsyncClient:
+    return httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test")
+
+
+@pytest.mark.asyncio
+async def test_readiness_reports_each_store(stores_up, monkeypatch):
+    async with _client(create_app()) as client:
+        ready = await client.get("/health/ready")
+        monkeypatch.setattr(monitoring, "ping_redis", _refused)
+        unavailable = await client.get("/health/ready")
+
+    assert (ready.status_code, ready.json()["checks"]) == (200, {"mongo": "ok", "redis": "ok"})
+    assert unavailable.status_code == 503
+    assert unavailable.json()["checks"] == {
+        "mongo": "ok",
+        "redis": "error: ConnectionError: connection refused",
+    }
+
+
+@pytest.mark.asyncio
+async def test_drain_refuses_new_requests_while_in_flight_ones_finish(stores_up):
+    app = create_app()
+    started, release = asyncio.Event(), asyncio.Event()
+
+    async def slow() -> dict:
+        started.set()
+        await release.wait()
+        return {"done": True}
+
+    app.add_api_route("/slow", slow)
+    drain = app.state.drain
+
+    async with _client(app) as client:
+        in_flight = asyncio.create_task(client.get("/slow"))
+        await started.wait()
+
+        drain.begin()
+        ready = await client.get("/health/ready")
+        live = await client.get("/health/live")
+        refused = await client.get("/")
+        drained = asyncio.create_task(drain.wait(timeout=5))
+        await asyncio.sleep(0.1)
+        assert not drained.done()  # La petición lenta sigue en curso
+
+        release.set()
+        response = await in_flight
+
+    assert (ready.status_code, ready.json()) == (503, {"status": "draining", "draining": True, "in_flight": 1})
+    assert live.status_code == 200
+    assert refused.status_code == 503
+    assert refused.headers["connection"] == "close"
+    assert (response.status_code, response.json()) == (200, {"done": True})
+    assert await drained
+    assert drain.in_flight == 0
+
+
+@pytest.mark.asyncio
+async def test_drain_wait_gives_up_after_the_timeout():
+    app = create_app()
+    drain = app.state.drain
+    drain.in_flight = 1  # Una petición que no termina
+
+    assert not await drain.wait(timeout=0.1)
+
+
+@pytest.mark.asyncio
+async def test_pool_metrics_endpoint(monkeypatch):
+    mongo = AsyncIOMotorClient("mongodb://127.0.0.1:1", maxPoolSize=7, connect=False)
+    redis = aioredis.Redis(connection_pool=aioredis.BlockingConnectionPool(max_connections=5))
+    monkeypatch.setattr(db_client, "mongo_client", mongo)
+    monkeypatch.setattr(db_client, "redis_client", redis)
+    try:
+        async with _client(create_app()) as client:
+            response = await client.get("/metrics/pools")
+    finally:
+        mongo.close()
+
+    assert response.status_code == 200
+    assert response.json()["mongo"]["max_pool_size"] == 7
+    assert response.json()["redis"] == {"max_connections": 5, "in_use": 0, "available": 0, "utilization": 0.0}
+
+
+def test_mongo_pool_metrics_count_checkouts_per_server():
+    metrics = MongoPoolMetrics()
+    event = SimpleNamespace(address=("db", 27017))
+    for _ in range(2):
+        metrics.connection_created(event)
+    for _ in range(3):
+        metrics.connection_check_out_started(event)
+    metrics.connection_checked_out(event)
+    metrics.connection_checked_out(event)
+    metrics.connection_check_out_failed(event)
+    metrics.connection_checked_in(event)
+
+    assert metrics.in_use == 1
+    assert metrics.snapshot(max_pool_size=4) == {
+        "max_pool_size": 4,
+        "servers": {"db:27017": {"open": 2, "in_use": 1, "waiting": 0, "checkout_failures": 1, "utilization": 0.25}},
+    }
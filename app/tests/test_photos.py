@@ -0,0 +1,194 @@
+import asyncio
+import os
+import tempfile
+
+import pytest
+from PIL import ExifTags, Image, ImageDraw
+from starlette.requests import Request
+
+from app.services.image_processing import InvalidImage, dhash, hamming_distance, process_image
+from app.services.photos import UploadError, receive_upload
+from app.services.storage import LocalStorage
+
+BOUNDARY = "synastr-boundary"
+
+
+def _sample_image(path, size=(2400, 1600)):
+    image = Image.new("RGB", size, "white")
+    draw = ImageDraw.Draw(image)
+    draw.ellipse((200, 200, 1400, 1400), fill="navy")
+    draw.rectangle((1500, 300, 2200, 1300), fill="orange")
+    image.save(path, "JPEG", quality=90)
+    return image
+
+
+def test_process_image_builds_variants_smallest_first(tmp_path):
+    source = tmp_path / "photo.jpg"
+    _sample_image(source)
+
+    result = process_image(str(source), str(tmp_path))
+
+    assert (result["width"], result["height"]) == (2400, 1600)
+    assert [v["name"] for v in result["variants"]] == ["thumb", "small", "medium", "large"]
+    assert [v["width"] for v in result["variants"]] == [160, 480, 1080, 2048]
+    for variant in result["variants"]:
+        with Image.open(variant["path"]) as image:
+            assert image.format == "WEBP"
+            assert image.size == (variant["width"], variant["height"])
+
+
+def test_process_image_reports_the_original_size_of_large_jpegs(tmp_path):
+    # `draft` decodifica este JPEG a la mitad; el tamaño devuelto debe ser el original
+    source = tmp_path / "large.jpg"
+    _sample_image(source, size=(8000, 5400))
+
+    result = process_image(str(source), str(tmp_path))
+
+    assert (result["width"], result["height"]) == (8000, 5400)
+    assert [v["width"] for v in result["variants"]] == [160, 480, 1080, 2048]
+
+
+def test_process_image_reports_the_size_after_exif_rotation(tmp_path):
+    source = tmp_path / "rotated.jpg"
+    exif = Image.Exif()
+    exif[ExifTags.Base.Orientation] = 6  # Girada 90°: se ve en vertical
+    Image.new("RGB", (8000, 5400), "white").save(source, "JPEG", exif=exif)
+
+    result = process_image(str(source), str(tmp_path))
+
+    assert (result["width"], result["height"]) == (5400, 8000)
+    assert result["variants"][-1]["height"] > result["variants"][-1]["width"]
+
+
+def test_small_images_are_not_upscaled(tmp_path):
+    source = tmp_path / "small.jpg"
+    _sample_image(source, size=(600, 400))
+
+    variants = process_image(str(source), str(tmp_path))["variants"]
+
+    assert [v["width"] for v in variants] == [160, 480, 600]
+
+
+def test_dhash_matches_resized_copies_and_differs_for_other_images(tmp_path):
+    original = _sample_image(tmp_path / "a.jpg")
+    resized = original.resize((800, 533))
+    flipped = original.transpose(Image.Transpose.FLIP_LEFT_RIGHT)
+
+    assert hamming_distance(dhash(original), dhash(resized)) <= 4
+    assert hamming_distance(dhash(original), dhash(flipped)) > 10
+
+
+def test_process_image_rejects_non_images(tmp_path):
+    source = tmp_path / "notes.txt"
+    source.write_text("not an image")
+    with pytest.raises(InvalidImage):
+        process_image(str(source), str(tmp_path))
+
+
+def test_local_storage_saves_and_rejects_escaping_keys(tmp_path):
+    storage = LocalStorage(root=str(tmp_path / "media"), base_url="https://cdn.example.com/")
+    source = tmp_path / "file.webp"
+    source.write_bytes(b"data")
+
+    asyncio.run(storage.save("photos/u1/p1/thumb.webp", str(source), "image/webp"))
+
+    assert open(storage.path("photos/u1/p1/thumb.webp"), "rb").read() == b"data"
+    assert storage.url("photos/u1/p1/thumb.webp") == "https://cdn.example.com/photos/u1/p1/thumb.webp"
+    with pytest.raises(ValueError):
+        storage.path("../outside.webp")
+    asyncio.run(storage.delete("photos/u1/p1/thumb.webp"))
+    assert not os.path.exists(storage.path("photos/u1/p1/thumb.webp"))
+
+
+def _multipart(file_bytes: bytes, fields=None) -> bytes:
+    parts = [
+        f'--{BOUNDARY}\r\nContent-Disposition: form-data; name="{name}"\r\n\r\n{value}\r\n'.encode()
+        for name, value in (fields or {}).items()
+    ]
+    parts.append(
+        f'--{BOUNDARY}\r\nContent-Disposition: form-data; name="file"; filename="me.jpg"\r\n'
+        f"Content-Type: image/jpeg\r\n\r\n".encode() + file_bytes + b"\r\n"
+    )
+    return b"".join(parts) + f"--{BOUNDARY}--\r\n".encode()
+
+
+def _request(body: bytes, chunk_size: int = 1024, content_length: bool = False):
+    """Petición cuyo cuerpo llega en trozos; `pending` cuenta los que no se llegaron a leer."""
+    chunks = [body[i:i + chunk_size] for i in range(0, len(body), chunk_size)]
+    headers = [(b"content-type", f"multipart/form-data; boundary={BOUNDARY}".encode())]
+    if content_length:
+        headers.append((b"content-length", str(len(body)).encode()))
+
+    async def receive():
+        chunk = chunks.pop(0) if chunks else b""
+        return {"type": "http.request", "body": chunk, "more_body": bool(chunks)}
+
+    request = Request({"type": "http", "method": "POST", "path": "/photos", "headers": headers}, receive)
+    return request, chunks
+
+
+@pytest.fixture
+def upload_dir(tmp_path, monkeypatch):
+    """Directorio de los temporales de subida, para comprobar que no quedan restos."""
+    monkeypatch.setattr(tempfile, "tempdir", str(tmp_path))
+    return tmp_path
+
+
+@pytest.mark.asyncio
+async def test_receive_upload_streams_the_file_to_disk(upload_dir):
+    request, _ = _request(_multipart(b"x" * 5000, {"sign": "Leo"}))
+
+    upload = await receive_upload(request, max_bytes=10_000)
+
+    assert (upload.size, upload.filename, upload.fields) == (5000, "me.jpg", {"sign": "Leo"})
+    assert open(upload.path, "rb").read() == b"x" * 5000
+    upload.cleanup()
+    assert os.listdir(upload_dir) == []
+
+
+@pytest.mark.asyncio
+async def test_oversize_upload_is_rejected_mid_stream(upload_dir):
+    # Sin Content-Length (chunked): el límite se aplica mientras llega el cuerpo
+    request, pending = _request(_multipart(b"x" * 50_000))
+
+    with pytest.raises(UploadError) as error:
+        await receive_upload(request, max_bytes=10_000)
+
+    assert error.value.status_code == 413
+    assert pending  # No se leyó el resto del cuerpo
+    assert os.listdir(upload_dir) == []
+
+
+@pytest.mark.asyncio
+async def test_declared_oversize_upload_is_rejected_before_reading(upload_dir):
+    request, pending = _request(_multipart(b"x" * 200_000), content_length=True)
+    chunks = len(pending)
+
+    with pytest.raises(UploadError) as error:
+        await receive_upload(request, max_bytes=10_000)
+
+    assert error.value.status_code == 413
+    assert len(pending) == chunks
+
+
+@pytest.mark.asyncio
+async def test_truncated_body_is_rejected(upload_dir):
+    body = _multipart(b"x" * 5000)
+    request, _ = _request(body[:3000])  # El cliente se desconecta a mitad del fichero
+
+    with pytest.raises(UploadError) as error:
+        await receive_upload(request, max_bytes=10_000)
+
+    assert error.value.status_code == 400
+    assert os.listdir(upload_dir) == []
+
+
+@pytest.mark.asyncio
+async def test_non_multipart_body_is_rejected():
+    request = Request({"type": "http", "method": "POST", "path": "/photos",
+                       "headers": [(b"content-type", b"image/jpeg")]})
+
+    with pytest.raises(UploadError) as error:
+        await receive_upload(request)
+
+    assert error.value.status_code == 415
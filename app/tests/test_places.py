@@ -0,0 +1,81 @@
+"""
+Lugares resueltos: caché por proceso y colección `places`. Las pruebas de la colección
+necesitan un MongoDB real (`MONGODB_URI`) y se omiten si no hay servidor.
+"""
+import asyncio
+
+import pytest
+
+from app.db import client as db_client
+from app.services import places
+from app.services.gazetteer import Place
+
+
+def test_place_cache_is_a_bounded_lru():
+    cache = places.PlaceCache(maxsize=2)
+    cache.put("bogota", Place("Bogotá", 4.711, -74.0721, "America/Bogota"))
+    cache.put("lima", Place("Lima", -12.0464, -77.0428, "America/Lima"))
+    assert cache.get("bogota").timezone == "America/Bogota"
+
+    cache.put("quito", Place("Quito", -0.1807, -78.4678, "America/Guayaquil"))
+
+    assert cache.get("lima") is None  # La menos usada
+    assert cache.get("bogota") is not None
+    assert cache.info() == {"size": 2, "hits": 2, "misses": 1}
+
+
+@pytest.fixture
+def db(mongo_db, monkeypatch):
+    monkeypatch.setattr(places, "cache", places.PlaceCache())
+    return mongo_db
+
+
+@pytest.mark.asyncio
+async def test_resolve_place_geocodes_each_normalized_place_once(db):
+    calls = []
+
+    def geocoder(text):
+        calls.append(text)
+        return 4.711, -74.0721, "America/Bogota"
+
+    results = await asyncio.gather(*(
+        places.resolve_place(text, geocoder, source="test")
+        for text in ("Bogotá, Colombia", "bogota,  colombia", "BOGOTÁ, COLOMBIA.")
+    ))
+
+    assert len(calls) == 1
+    assert {place.timezone for place in results} == {"America/Bogota"}
+    stored = await db.places.find_one({"_id": "bogota, colombia"})
+    assert stored["source"] == "test" and stored["name"] == "Bogotá, Colombia"
+
+    # Otro proceso (sin caché) lo encuentra en `places`
+    places.cache.clear()
+    assert (await places.resolve_place("Bogotá,  Colombia", geocoder, source="test")).latitude == 4.711
+    assert len(calls) == 1
+
+
+@pytest.mark.asyncio
+async def test_lookup_places_returns_only_known_places(db):
+    await places.save_places({"lima": Place("Lima", -12.0464, -77.0428, "America/Lima")}, source="gazetteer")
+    places.cache.clear()
+
+    found = await places.lookup_places(["Lima", "LIMA", "Atlántida"])
+
+    assert list(found) == ["lima"]
+    assert places.cache.info()["size"] == 1
+
+
+@pytest.mark.asyncio
+async def test_resolve_place_falls_back_to_the_geocoder_without_mongo(monkeypatch):
+    monkeypatch.setattr(places, "cache", places.PlaceCache())
+    monkeypatch.setattr(db_client, "mongo_client", None)
+    calls = []
+
+    def geocoder(text):
+        calls.append(text)
+        return -12.0464, -77.0428, "America/Lima"
+
+    for _ in range(2):
+        assert (await places.resolve_place("Lima, Perú", geocoder, source="test")).timezone == "America/Lima"
+
+    assert calls == ["Lima, Perú"]  # La segunda vez sale de la caché del proceso
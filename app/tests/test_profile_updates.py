@@ -0,0 +1,68 @@
+"""
+Ediciones de perfil contra un MongoDB real (`MONGODB_URI`); se omiten si no hay
+servidor disponible.
+"""
+import asyncio
+from datetime import datetime
+from types import SimpleNamespace
+
+import pytest
+
+import app.api  # noqa: F401  (resuelve el import circular entre app.auth y app.api)
+from app.auth.jwt import create_access_token
+from app.api.resolvers.user_resolvers import update_profile_resolver
+
+
+@pytest.fixture
+def users(mongo_db):
+    return mongo_db["users"]
+
+
+def _info(email: str):
+    headers = {"Authorization": f"Bearer {create_access_token(email)}"}
+    return SimpleNamespace(context={"request": SimpleNamespace(headers=headers)})
+
+
+async def _insert_user(users, email: str, user_info):
+    await users.insert_one({
+        "email": email,
+        "password_hash": "x",
+        "birth_date": datetime(1990, 6, 15),
+        "birth_time": "14:30:00",
+        "birth_place": "Bogotá",
+        "gender": "Female",
+        "looking_for": "Friendship",
+        "photos": [],
+        "user_info": user_info,
+    })
+
+
+@pytest.mark.asyncio
+async def test_concurrent_edits_of_different_fields_are_all_kept(users):
+    await _insert_user(users, "ana@example.com", {"school": "UNAL"})
+
+    await asyncio.gather(*(
+        update_profile_resolver(_info("ana@example.com"), **{field: value})
+        for field, value in [("height", 170), ("weight", 60), ("languages", ["es", "en"]), ("interests", ["yoga"])]
+    ))
+
+    stored = await users.find_one({"email": "ana@example.com"})
+    assert stored["user_info"] == {
+        "school": "UNAL",
+        "height": 170,
+        "weight": 60,
+        "languages": ["es", "en"],
+        "interests": ["yoga"],
+    }
+
+
+@pytest.mark.asyncio
+async def test_update_returns_the_new_document_without_password_hash(users):
+    await _insert_user(users, "leo@example.com", None)  # Usuario anterior con user_info nulo
+
+    user = await update_profile_resolver(_info("leo@example.com"), height=180, gender="Male")
+
+    assert user.user_info.height == 180
+    assert user.gender.value == "Male"
+    stored = await users.find_one({"email": "leo@example.com"})
+    assert stored["user_info"] == {"height": 180}
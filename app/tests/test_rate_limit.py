@@ -0,0 +1,82 @@
+"""
+Token bucket de Redis: ráfaga, rechazo, recarga con el tiempo y fail-open si Redis
+falla, y el mensaje de los permisos que lo usan. Necesitan un Redis real
+(`TEST_REDIS_URL`) salvo la prueba de la caída y la de los permisos.
+"""
+from types import SimpleNamespace
+
+import pytest
+
+from app.api import permissions
+from app.api.permissions import LoginRateLimit
+from app.services import rate_limit
+from app.services.rate_limit import RateLimit, RateLimitResult, hit, hit_all
+
+LIMIT = RateLimit(capacity=3, period=30)  # Un token cada 10 s
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Reloj manual para el `time.time()` que el limitador pasa al script Lua."""
+    now = SimpleNamespace(value=1_700_000_000.0)
+    monkeypatch.setattr(rate_limit, "time", SimpleNamespace(time=lambda: now.value))
+    return now
+
+
+@pytest.mark.asyncio
+async def test_burst_is_allowed_then_rejected(redis, clock):
+    for _ in range(LIMIT.capacity):
+        assert (await hit("login:ip:1.2.3.4", LIMIT)).allowed
+
+    rejected = await hit("login:ip:1.2.3.4", LIMIT)
+
+    assert not rejected.allowed
+    assert rejected.retry_after == pytest.approx(10, abs=0.01)
+    # Otra clave tiene su propio cubo
+    assert (await hit("login:ip:5.6.7.8", LIMIT)).allowed
+
+
+@pytest.mark.asyncio
+async def test_tokens_refill_over_time_up_to_capacity(redis, clock):
+    for _ in range(LIMIT.capacity):
+        await hit("signup:email:ana@synastr.app", LIMIT)
+
+    clock.value += 10  # Un token
+    assert (await hit("signup:email:ana@synastr.app", LIMIT)).allowed
+    assert not (await hit("signup:email:ana@synastr.app", LIMIT)).allowed
+
+    clock.value += 3600  # Mucho más que un periodo: el saldo no pasa de la capacidad
+    results = [await hit("signup:email:ana@synastr.app", LIMIT) for _ in range(LIMIT.capacity + 1)]
+    assert [result.allowed for result in results] == [True] * LIMIT.capacity + [False]
+
+
+@pytest.mark.asyncio
+async def test_hit_all_stops_at_the_first_rejecting_bucket(redis, clock):
+    strict = RateLimit(capacity=1, period=60)
+    await hit("ip", strict)
+
+    assert not (await hit_all((("ip", strict), ("email", strict)))).allowed
+    # El cubo del email no se ha tocado
+    assert (await hit("email", strict)).allowed
+
+
+@pytest.mark.asyncio
+async def test_requests_are_allowed_when_redis_is_down(redis_down):
+    for _ in range(LIMIT.capacity + 2):
+        result = await hit("login:ip:1.2.3.4", LIMIT)
+        assert result.allowed
+        assert result.retry_after == 0
+
+
+@pytest.mark.asyncio
+async def test_rejection_message_does_not_leak_into_the_permission_class(monkeypatch):
+    async def rejected(checks):
+        return RateLimitResult(allowed=False, retry_after=7.2)
+
+    monkeypatch.setattr(permissions, "hit_all", rejected)
+    info = SimpleNamespace(context={"request": SimpleNamespace(headers={}, client=None)})
+    login_input = SimpleNamespace(email="ana@synastr.app")
+
+    with pytest.raises(PermissionError, match="^Too many requests, retry in 8 seconds$"):
+        await LoginRateLimit().has_permission(None, info, login_input=login_input)
+    assert LoginRateLimit.message == LoginRateLimit().message == "Too many requests"
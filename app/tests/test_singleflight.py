@@ -0,0 +1,75 @@
+"""
+Coalescencia de llamadas concurrentes: una sola ejecución por clave, el error llega
+a todos los que esperan y la clave se libera al terminar.
+"""
+import asyncio
+
+import pytest
+
+from app.services.singleflight import SingleFlight
+
+
+class _Slow:
+    def __init__(self, result=None, error=None):
+        self.calls = 0
+        self.release = asyncio.Event()
+        self.result = result
+        self.error = error
+
+    async def __call__(self, *args):
+        self.calls += 1
+        await self.release.wait()
+        if self.error is not None:
+            raise self.error
+        return (self.result, args)
+
+
+async def _start(flight: SingleFlight, fn, callers: int):
+    tasks = [asyncio.create_task(flight.do("key", fn, "arg")) for _ in range(callers)]
+    await asyncio.sleep(0)  # Todas las llamadas llegan antes de que termine el líder
+    return tasks
+
+
+@pytest.mark.asyncio
+async def test_concurrent_callers_share_one_call():
+    flight, fn = SingleFlight(), _Slow(result=42)
+    tasks = await _start(flight, fn, 10)
+
+    assert len(flight) == 1
+    fn.release.set()
+    results = await asyncio.gather(*tasks)
+
+    assert fn.calls == 1
+    assert results == [(42, ("arg",))] * 10
+    assert len(flight) == 0
+
+
+@pytest.mark.asyncio
+async def test_the_error_reaches_every_waiter_and_the_key_is_released():
+    flight, fn = SingleFlight(), _Slow(error=RuntimeError("boom"))
+    tasks = await _start(flight, fn, 5)
+    fn.release.set()
+
+    results = await asyncio.gather(*tasks, return_exceptions=True)
+
+    assert fn.calls == 1
+    assert all(isinstance(result, RuntimeError) and str(result) == "boom" for result in results)
+    assert len(flight) == 0
+    # La siguiente llamada vuelve a ejecutar la función
+    fn.error = None
+    assert await flight.do("key", fn) == (None, ())
+    assert fn.calls == 2
+
+
+@pytest.mark.asyncio
+async def test_cancelling_a_waiter_does_not_cancel_the_call():
+    flight, fn = SingleFlight(), _Slow(result="ok")
+    leader, follower = await _start(flight, fn, 2)
+
+    follower.cancel()
+    await asyncio.sleep(0)
+    fn.release.set()
+
+    assert await leader == ("ok", ("arg",))
+    assert follower.cancelled()
+    assert len(flight) == 0
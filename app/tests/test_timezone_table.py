@@ -0,0 +1,125 @@
+"""
+Tablas de transiciones de zona horaria frente a `zoneinfo`, políticas para horas
+ambiguas e inexistentes y conversión vectorizada de días julianos.
+"""
+import threading
+import time as clock
+from datetime import datetime, timezone
+from zoneinfo import ZoneInfo
+
+import numpy as np
+import pytest
+
+from app.services import places, timezone_table
+from app.services.astrology_service import calculate_chart_variants, julian_day_utc, julian_days_by_zone, julian_days_utc
+from app.services.gazetteer import Place
+from app.services.timezone_table import (
+    AMBIGUOUS,
+    NONEXISTENT,
+    VALID,
+    AmbiguousTimeError,
+    NonExistentTimeError,
+    local_to_utc,
+    transition_table,
+)
+
+ZONES = ["America/Bogota", "America/New_York", "Europe/Madrid", "Asia/Kolkata", "Australia/Lord_Howe"]
+
+
+def _zoneinfo_utc(local: datetime, zone: str, fold: int) -> int:
+    return int(local.replace(tzinfo=ZoneInfo(zone), fold=fold).timestamp())
+
+
+@pytest.mark.parametrize("zone", ZONES)
+def test_table_matches_zoneinfo(zone):
+    rng = np.random.default_rng(7)
+    local = np.datetime64("1900-01-01") + rng.integers(0, 200 * 365 * 86400, 20000).astype("timedelta64[s]")
+    table = transition_table(zone)
+    seconds = local.astype(np.int64)
+    status = table.classify(seconds)
+    for fold, policy in ((0, "earlier"), (1, "later")):
+        utc = table.to_utc(seconds, fold=policy)
+        expected = [_zoneinfo_utc(value.astype(datetime), zone, fold) for value in local]
+        # En los huecos zoneinfo aplica el desfase anterior (fold=0) o el posterior (fold=1)
+        comparable = status != NONEXISTENT if fold else np.ones(len(local), dtype=bool)
+        assert np.array_equal(utc[comparable], np.array(expected)[comparable])
+
+
+def test_fold_and_gap_policies():
+    table = transition_table("America/New_York")
+    # 2021-11-07 01:30 ocurre dos veces; 2021-03-14 02:30 no existe
+    fold = int(np.datetime64("2021-11-07T01:30:00").astype(np.int64))
+    gap = int(np.datetime64("2021-03-14T02:30:00").astype(np.int64))
+    plain = int(np.datetime64("2021-07-01T12:00:00").astype(np.int64))
+
+    assert list(table.classify([plain, fold, gap])) == [VALID, AMBIGUOUS, NONEXISTENT]
+    earlier, later = table.to_utc([fold], fold="earlier")[0], table.to_utc([fold], fold="later")[0]
+    assert later - earlier == 3600
+    assert datetime.fromtimestamp(earlier, timezone.utc) == datetime(2021, 11, 7, 5, 30, tzinfo=timezone.utc)
+
+    shifted = datetime.fromtimestamp(table.to_utc([gap], gap="shift")[0], timezone.utc)
+    next_valid = datetime.fromtimestamp(table.to_utc([gap], gap="next_valid")[0], timezone.utc)
+    assert shifted == datetime(2021, 3, 14, 7, 30, tzinfo=timezone.utc)  # 03:30 EDT
+    assert next_valid == datetime(2021, 3, 14, 7, 0, tzinfo=timezone.utc)  # 03:00 EDT
+
+    with pytest.raises(AmbiguousTimeError):
+        table.to_utc([plain, fold], fold="raise")
+    with pytest.raises(NonExistentTimeError):
+        table.to_utc([plain, gap], gap="raise")
+    with pytest.raises(ValueError):
+        table.to_utc([plain], fold="latest")
+
+
+def test_julian_days_utc_matches_scalar_conversion():
+    rng = np.random.default_rng(11)
+    local = np.datetime64("1940-01-01") + rng.integers(0, 80 * 365 * 86400, 500).astype("timedelta64[s]")
+    vectorized = julian_days_utc(local, "Europe/Madrid")
+    scalar = [julian_day_utc(value.astype(datetime), "Europe/Madrid") for value in local]
+    # Sólo difiere la corrección UT1-UTC, que se toma una vez por día
+    assert np.max(np.abs(vectorized - np.array(scalar))) * 86400 < 0.01
+
+
+def test_julian_days_by_zone_reports_errors_per_row():
+    births = [
+        (datetime(1990, 6, 15, 14, 30), "America/Bogota"),
+        (datetime(1985, 1, 2, 8, 0), "Nowhere/Atlantis"),
+        (datetime(1975, 3, 9, 23, 15), "America/Bogota"),
+    ]
+    results = julian_days_by_zone(births)
+    assert results[0] == pytest.approx(julian_day_utc(*births[0]), abs=1e-7)
+    assert isinstance(results[1], Exception)
+    assert results[2] == pytest.approx(julian_day_utc(*births[2]), abs=1e-7)
+
+
+def test_million_rows_convert_quickly():
+    transition_table("America/Sao_Paulo")  # La construcción de la tabla no cuenta
+    local = np.datetime64("1900-01-01") + np.arange(0, 10**6, dtype=np.int64).astype("timedelta64[s]") * 6000
+    started = clock.perf_counter()
+    utc = local_to_utc(local, "America/Sao_Paulo")
+    elapsed = clock.perf_counter() - started
+    assert len(utc) == 10**6
+    assert elapsed < 5  # ~0.3 s en un portátil; zoneinfo fila a fila tarda ~3 s
+    sample = local[123456].astype(datetime)
+    expected = sample.replace(tzinfo=ZoneInfo("America/Sao_Paulo")).astimezone(timezone.utc).replace(tzinfo=None)
+    assert utc[123456].astype(datetime) == expected
+
+
+@pytest.mark.asyncio
+async def test_new_zones_are_built_off_the_event_loop(monkeypatch):
+    async def resolve_place(text, geocoder, source):
+        return Place(text, -43.95, -176.56, "Pacific/Chatham")
+
+    threads = []
+    build = timezone_table.TransitionTable.build.__func__
+
+    def recording_build(cls, zone_name):
+        threads.append(threading.current_thread())
+        return build(cls, zone_name)
+
+    monkeypatch.setattr(places, "resolve_place", resolve_place)
+    monkeypatch.setattr(timezone_table.TransitionTable, "build", classmethod(recording_build))
+    transition_table.cache_clear()
+
+    await calculate_chart_variants(datetime(1990, 6, 15, 14, 30), "Waitangi")
+
+    assert threads and all(thread is not threading.main_thread() for thread in threads)
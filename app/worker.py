@@ -0,0 +1,61 @@
+"""
+Punto de entrada del worker de trabajos en segundo plano.
+
+    python -m app.worker [--queue default] [--concurrency 4]
+
+Conecta con MongoDB y Redis, importa los manejadores registrados y consume la cola
+hasta recibir SIGINT/SIGTERM, momento en el que termina los trabajos en curso. Cada
+`CHART_PENDING_SWEEP_S` segundos vuelve a encolar las cartas que se quedaron
+pendientes sin trabajo (ver `chart_jobs.requeue_pending_charts`).
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+import signal
+
+from dotenv import load_dotenv
+
+from app.db.client import close_db_clients, init_db_clients
+from app.services import chart_jobs, couple_charts  # noqa: F401  (registran los manejadores)
+from app.services.job_queue import DEFAULT_QUEUE, JobWorker
+
+logger = logging.getLogger(__name__)
+
+CHART_PENDING_SWEEP_S = float(os.getenv("CHART_PENDING_SWEEP_S", "300"))
+
+
+async def sweep_pending_charts(interval: float) -> None:
+    while True:
+        try:
+            await chart_jobs.requeue_pending_charts()
+        except Exception as e:
+            logger.warning("Pending chart sweep failed: %s", e)
+        await asyncio.sleep(interval)
+
+
+async def main(queue: str, concurrency: int) -> None:
+    await init_db_clients()
+    worker = JobWorker(queue=queue, concurrency=concurrency)
+
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, worker.stop)
+
+    sweeper = asyncio.create_task(sweep_pending_charts(CHART_PENDING_SWEEP_S), name="pending-chart-sweep")
+    try:
+        await worker.run()
+    finally:
+        sweeper.cancel()
+        await close_db_clients()
+
+
+if __name__ == "__main__":
+    load_dotenv()
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+    parser = argparse.ArgumentParser(description="Synastr background job worker")
+    parser.add_argument("--queue", default=DEFAULT_QUEUE)
+    parser.add_argument("--concurrency", type=int, default=int(os.getenv("JOB_WORKER_CONCURRENCY", "4")))
+    args = parser.parse_args()
+    asyncio.run(main(args.queue, args.concurrency))
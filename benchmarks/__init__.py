@@ -0,0 +1,8 @@
+"""
+Benchmarks de rendimiento. Se ejecutan como módulos, p. ej.:
+
+    python -m benchmarks.geo_feed --help
+
+Los que necesitan MongoDB/Redis usan `MONGODB_URI`/`REDIS_URL` y trabajan sobre una
+base de datos propia (`synastr_bench`) para no tocar los datos reales.
+"""
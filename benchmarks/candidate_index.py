@@ -0,0 +1,108 @@
+"""
+Filtrado de candidatos con los bitmaps del índice en memoria frente a recorrer los
+usuarios comprobando cada documento. No necesita base de datos: genera usuarios
+sintéticos con ordinales densos.
+
+    python -m benchmarks.candidate_index --users 1000000 --queries 200
+"""
+
+import argparse
+import random
+import statistics
+import time
+from datetime import datetime
+
+from bson import ObjectId
+
+from app.api.types import Element, Gender, LookingFor, SexualOrientation, ZodiacSign
+from app.services.candidate_index import CandidateIndex, facets_of
+
+ORIENTATIONS = [o.value for o in SexualOrientation]
+
+
+def _synthetic_users(count: int, rng: random.Random):
+    for ordinal in range(count):
+        yield {
+            "_id": ObjectId(),
+            "ordinal": ordinal,
+            "gender": rng.choice([g.value for g in Gender]),
+            "looking_for": rng.choice([l.value for l in LookingFor]),
+            "sexual_orientation": rng.sample(ORIENTATIONS, rng.randint(0, 2)),
+            "birth_date": datetime(rng.randint(1960, 2005), rng.randint(1, 12), rng.randint(1, 28)),
+        }
+
+
+def _random_query(rng: random.Random) -> dict:
+    return {
+        "gender": rng.choice([g.value for g in Gender]),
+        "looking_for": rng.choice([l.value for l in LookingFor]),
+        "orientations": rng.sample(ORIENTATIONS, 2),
+        "signs": [s.value for s in rng.sample(list(ZodiacSign), 4)],
+        "elements": [rng.choice(list(Element)).value],
+    }
+
+
+def _scan(facet_rows, query: dict) -> int:
+    """Lo que haría el feed sin índice: comprobar cada usuario en Python."""
+    wanted = {
+        "gender": {query["gender"]},
+        "looking_for": {query["looking_for"]},
+        "orientation": set(query["orientations"]),
+        "sign": set(query["signs"]),
+        "element": set(query["elements"]),
+    }
+    matches = 0
+    for facets in facet_rows:
+        present = {name for name, value in facets if value in wanted[name]}
+        matches += len(present) == len(wanted)
+    return matches
+
+
+def _ms(samples) -> str:
+    ordered = sorted(samples)
+    return (
+        f"p50 {statistics.median(ordered) * 1000:8.3f} ms  "
+        f"p99 {ordered[min(len(ordered) - 1, int(len(ordered) * 0.99))] * 1000:8.3f} ms"
+    )
+
+
+def main(args) -> None:
+    rng = random.Random(args.seed)
+    users = list(_synthetic_users(args.users, rng))
+
+    started = time.perf_counter()
+    index = CandidateIndex()
+    index.load(users)
+    print(f"índice de {args.users} usuarios cargado en {time.perf_counter() - started:.2f}s: {index.stats()}")
+
+    queries = [_random_query(rng) for _ in range(args.queries)]
+    bitmap_times, hydrate_times = [], []
+    for query in queries:
+        started = time.perf_counter()
+        bitmap = index.candidates(**query)
+        bitmap_times.append(time.perf_counter() - started)
+        started = time.perf_counter()
+        index.ids(index.ordinals(bitmap)[:args.page])
+        hydrate_times.append(time.perf_counter() - started)
+
+    facet_rows = [facets_of(user) for user in users]
+    scan_times = []
+    for query in queries[: args.scan_queries]:
+        started = time.perf_counter()
+        expected = _scan(facet_rows, query)
+        scan_times.append(time.perf_counter() - started)
+        assert expected == index.candidates(**query).bit_count()
+
+    print(f"{'AND/OR de bitmaps':<24}{_ms(bitmap_times)}")
+    print(f"{f'ordinales -> _id ({args.page})':<24}{_ms(hydrate_times)}")
+    print(f"{'recorrido en Python':<24}{_ms(scan_times)}  ({len(scan_times)} consultas)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=1_000_000)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--scan-queries", type=int, default=5)
+    parser.add_argument("--page", type=int, default=50)
+    parser.add_argument("--seed", type=int, default=42)
+    main(parser.parse_args())
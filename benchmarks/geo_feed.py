@@ -0,0 +1,99 @@
+"""
+Latencia del feed por cercanía a medida que crece la colección de usuarios.
+
+Inserta usuarios sintéticos (repartidos alrededor de varias ciudades) en la base de
+datos `synastr_bench` hasta cada tamaño indicado y, en cada punto, mide la consulta
+`$geoNear` del feed con filtros de género y tipo de relación.
+
+    python -m benchmarks.geo_feed --sizes 10000 100000 1000000 --queries 200
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import statistics
+import time
+
+from motor.motor_asyncio import AsyncIOMotorClient
+
+from app.db import client as db_client
+from app.db.indexes import ensure_indexes
+from app.services.feed import build_feed_filters, find_feed_candidates, geo_point
+
+CITIES = [
+    (4.711, -74.072),     # Bogotá
+    (40.416, -3.703),     # Madrid
+    (19.432, -99.133),    # Ciudad de México
+    (-34.603, -58.381),   # Buenos Aires
+    (40.712, -74.006),    # Nueva York
+    (51.507, -0.127),     # Londres
+]
+GENDERS = ["Male", "Female", "Non-binary", "Other"]
+LOOKING_FOR = ["Serious relationship", "Casual relationship", "Friendship"]
+
+
+def _random_point(rng: random.Random):
+    lat, lng = rng.choice(CITIES)
+    # ~0.5° de dispersión: áreas metropolitanas de unos 50 km
+    return lat + rng.gauss(0, 0.25), lng + rng.gauss(0, 0.25)
+
+
+def _synthetic_user(rng: random.Random, i: int) -> dict:
+    lat, lng = _random_point(rng)
+    return {
+        "email": f"bench-{i}@synastr.test",
+        "birth_place": "Synthetic",
+        "gender": rng.choice(GENDERS),
+        "looking_for": rng.choice(LOOKING_FOR),
+        "location": geo_point(lat, lng),
+    }
+
+
+async def _grow(users, start: int, stop: int, rng: random.Random, batch: int = 10_000) -> None:
+    for offset in range(start, stop, batch):
+        docs = [_synthetic_user(rng, i) for i in range(offset, min(offset + batch, stop))]
+        await users.insert_many(docs, ordered=False)
+
+
+async def _measure(queries: int, max_distance_km: float, rng: random.Random) -> list[float]:
+    latencies = []
+    for _ in range(queries):
+        lat, lng = _random_point(rng)
+        filters = build_feed_filters(gender=rng.choice(GENDERS), looking_for=rng.choice(LOOKING_FOR))
+        started = time.perf_counter()
+        async for _ in find_feed_candidates(filters, near=geo_point(lat, lng), max_distance_km=max_distance_km, limit=50):
+            pass
+        latencies.append((time.perf_counter() - started) * 1000)
+    return latencies
+
+
+async def main(sizes: list[int], queries: int, max_distance_km: float, keep: bool) -> None:
+    db_client.DEFAULT_DB_NAME = "synastr_bench"
+    db_client.mongo_client = AsyncIOMotorClient(os.getenv("MONGODB_URI", "mongodb://localhost:27017"))
+    users = db_client.get_mongo_db().get_collection("users")
+    await users.drop()
+    await ensure_indexes()
+
+    rng = random.Random(42)
+    current = 0
+    print(f"{'users':>10} {'p50 ms':>8} {'p95 ms':>8} {'max ms':>8}")
+    for size in sorted(sizes):
+        await _grow(users, current, size, rng)
+        current = size
+        latencies = sorted(await _measure(queries, max_distance_km, rng))
+        p95 = latencies[int(len(latencies) * 0.95) - 1]
+        print(f"{size:>10} {statistics.median(latencies):>8.2f} {p95:>8.2f} {latencies[-1]:>8.2f}")
+
+    if not keep:
+        await users.drop()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--max-distance-km", type=float, default=25.0)
+    parser.add_argument("--keep", action="store_true", help="no borrar los datos al terminar")
+    args = parser.parse_args()
+    asyncio.run(main(args.sizes, args.queries, args.max_distance_km, args.keep))
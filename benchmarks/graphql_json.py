@@ -0,0 +1,85 @@
+"""
+Serialización de una respuesta GraphQL del feed: `json.dumps` (lo que hace Strawberry
+por defecto) frente a `orjson` (`app.api.graphql_view`), y coste y tamaño de
+comprimirla con gzip y Brotli. No necesita base de datos: la página se genera con la
+forma que devuelve `feed` pidiendo la carta natal completa.
+
+    python -m benchmarks.graphql_json --users 100 --iterations 500
+"""
+
+import argparse
+import json
+import random
+import statistics
+import time
+from datetime import date, time as dt_time
+
+from app.api import graphql_view
+from app.api.zodiac_logic import SIGN_NAMES
+from app.services.astrology_service import PLANET_MAPPING
+
+def _position(rng: random.Random, name: str, icon_field: str = "signIcon") -> dict:
+    """Posición aleatoria; `icon_field="sign_icon"` da la forma del documento de Mongo."""
+    sign = rng.choice(SIGN_NAMES)
+    return {"name": name, "sign": sign, icon_field: f"/icons/{sign.lower()}.svg",
+            "degrees": rng.uniform(0, 30), "house": rng.randint(1, 12)}
+
+
+def _feed_page(users: int, seed: int = 42) -> dict:
+    rng = random.Random(seed)
+    feed = []
+    for i in range(users):
+        feed.append({
+            "id": f"{rng.getrandbits(96):024x}",
+            "email": f"user{i}@synastr.test",
+            "birthDate": date(rng.randint(1960, 2005), rng.randint(1, 12), rng.randint(1, 28)).isoformat(),
+            "birthTime": dt_time(rng.randint(0, 23), rng.randint(0, 59)).isoformat(),
+            "birthPlace": "Madrid, España",
+            "gender": "Female",
+            "lookingFor": "Friendship",
+            "photos": [{"url": f"https://cdn.synastr.test/p/{i}-{n}.webp", "sign": None} for n in range(3)],
+            "natalChart": {
+                # 13 posiciones y 12 casas: 25 por usuario
+                "positions": [_position(rng, name) for name in PLANET_MAPPING],
+                "houses": [_position(rng, f"House {n}") for n in range(1, 13)],
+            },
+        })
+    return {"data": {"feed": feed}}
+
+
+def _time(fn, iterations: int) -> list:
+    samples = []
+    for _ in range(iterations):
+        started = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - started)
+    return samples
+
+
+def _report(label: str, samples: list, size: int) -> None:
+    ordered = sorted(samples)
+    print(
+        f"{label:<18}p50 {statistics.median(ordered) * 1000:7.3f} ms  "
+        f"p99 {ordered[min(len(ordered) - 1, int(len(ordered) * 0.99))] * 1000:7.3f} ms  {size:>8} bytes"
+    )
+
+
+def main(args) -> None:
+    page = _feed_page(args.users)
+    stdlib = json.dumps(page).encode()
+    fast = graphql_view.dumps(page)
+    assert json.loads(fast) == json.loads(stdlib)
+
+    print(f"página de {args.users} usuarios")
+    _report("json.dumps", _time(lambda: json.dumps(page).encode(), args.iterations), len(stdlib))
+    _report("orjson", _time(lambda: graphql_view.dumps(page), args.iterations), len(fast))
+    for encoding in graphql_view.supported_encodings():
+        compressed = graphql_view.compress(fast, encoding)
+        _report(f"+ {encoding}", _time(lambda: graphql_view.compress(fast, encoding), args.iterations), len(compressed))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=100)
+    parser.add_argument("--iterations", type=int, default=500)
+    main(parser.parse_args())
@@ -0,0 +1,127 @@
+"""
+Memoria y tiempo de resolver una página del feed con las vistas perezosas de
+`app.api.views` frente a construir de antemano los tipos de Strawberry (como se hacía
+antes: 25 `AstrologicalPositionType` y un `UserInfo` por usuario aunque la consulta no
+los pida). No necesita base de datos: los documentos son sintéticos.
+
+    python -m benchmarks.graphql_views --users 100 --iterations 50
+"""
+
+import argparse
+import gc
+import random
+import statistics
+import time
+import tracemalloc
+from datetime import datetime
+from typing import List
+
+import strawberry
+
+from app.api.types import (
+    AstrologicalPositionType, Gender, LookingFor, NatalChartType, Photo, SexualOrientation, User, UserInfo,
+)
+from app.api.views import UserView, build_chart_status
+from app.services.astrology_service import PLANET_MAPPING
+from benchmarks.graphql_json import _position
+
+QUERIES = {
+    "tarjeta": "{ feed { id birthDate gender photos { url } } }",
+    "con carta": "{ feed { id birthDate gender photos { url } natalChart { positions { name sign degrees } houses { sign } } } }",
+}
+
+
+def _documents(count: int, seed: int = 42) -> List[dict]:
+    rng = random.Random(seed)
+    return [
+        {
+            "_id": f"{rng.getrandbits(96):024x}",
+            "email": f"user{i}@synastr.test",
+            "birth_date": datetime(rng.randint(1960, 2005), rng.randint(1, 12), rng.randint(1, 28)),
+            "birth_time": "10:30:00",
+            "birth_place": "Madrid, España",
+            "gender": "Female",
+            "looking_for": "Friendship",
+            "sexual_orientation": ["Bisexual"],
+            "photos": [{"url": f"https://cdn.synastr.test/p/{i}-{n}.webp"} for n in range(3)],
+            "natal_chart": {
+                "positions": [_position(rng, name, "sign_icon") for name in PLANET_MAPPING],
+                "houses": [_position(rng, f"House {n}", "sign_icon") for n in range(1, 13)],
+            },
+            "user_info": {"height": 170, "languages": ["es", "en"], "interests": ["astrología"]},
+            "chart_status": "ready",
+        }
+        for i in range(count)
+    ]
+
+
+def _eager(doc: dict) -> User:
+    """Lo que hacían antes `build_user`/`build_user_object`."""
+    chart, info = doc["natal_chart"], doc["user_info"]
+    natal_chart = NatalChartType(
+        positions=[AstrologicalPositionType(**p) for p in chart["positions"]],
+        houses=[AstrologicalPositionType(**h) for h in chart["houses"]],
+    )
+    user = User(
+        id=str(doc["_id"]),
+        email=doc["email"],
+        birth_date=doc["birth_date"].date(),
+        birth_time=datetime.strptime(doc["birth_time"], "%H:%M:%S").time(),
+        birth_place=doc["birth_place"],
+        photos=[Photo.from_document(p) for p in doc["photos"]],
+        chart_status=build_chart_status(doc),
+        gender=Gender(doc["gender"]),
+        looking_for=LookingFor(doc["looking_for"]),
+        sexual_orientation=[SexualOrientation(so) for so in doc["sexual_orientation"]],
+        user_info=UserInfo(
+            height=info.get("height"), weight=None, school=None, languages=info.get("languages"),
+            interests=info.get("interests"), education=None, children=None, communication_style=None,
+            pets=None, drinking=None, smoking=None, fitness=None, dietary=None, sleeping=None,
+            politics=None, spirituality=None,
+        ),
+    )
+    # `natalChart` es un resolver sobre `chart()` (ver `UserView.chart`)
+    user.chart = lambda *args: natal_chart
+    return user
+
+
+def _schema(build, docs) -> strawberry.Schema:
+    @strawberry.type
+    class Query:
+        @strawberry.field
+        def feed(self) -> List[User]:
+            return [build(doc) for doc in docs]
+
+    return strawberry.Schema(query=Query)
+
+
+def _run(schema: strawberry.Schema, query: str, iterations: int):
+    gc.collect()
+    times = []
+    for _ in range(iterations):
+        started = time.perf_counter()
+        result = schema.execute_sync(query)
+        times.append(time.perf_counter() - started)
+        assert result.errors is None, result.errors
+    tracemalloc.start()
+    schema.execute_sync(query)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return statistics.median(times), peak
+
+
+def main(args) -> None:
+    docs = _documents(args.users)
+    schemas = {"eager": _schema(_eager, docs), "vistas": _schema(UserView, docs)}
+    print(f"página de {args.users} usuarios")
+    for label, query in QUERIES.items():
+        for name, schema in schemas.items():
+            median, peak = _run(schema, query, args.iterations)
+            print(f"{label:<10} {name:<7} p50 {median * 1000:7.2f} ms  pico {peak / 1024:8.1f} KiB")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=100)
+    parser.add_argument("--iterations", type=int, default=50)
+    main(parser.parse_args())
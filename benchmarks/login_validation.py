@@ -0,0 +1,85 @@
+"""
+Coste de validación por login: `UserModel(**documento)` (validaba el documento entero,
+carta natal incluida, sólo para comprobar la contraseña) frente a `Credentials`
+(validado o con `model_construct`) y el email comprobado con el `TypeAdapter`
+precompilado o creando uno en cada llamada. Se muestra también el coste de bcrypt como
+referencia; no necesita base de datos.
+
+    python -m benchmarks.login_validation --iterations 20000
+"""
+
+import argparse
+import random
+import time
+from datetime import datetime
+
+from bson import ObjectId
+from pydantic import EmailStr, TypeAdapter
+
+from app.models.user import Credentials, UserModel, email_adapter, pwd_context
+from app.services.astrology_service import PLANET_MAPPING
+from benchmarks.graphql_json import _position
+
+
+def _document(password_hash: str) -> dict:
+    rng = random.Random(42)
+    return {
+        "_id": ObjectId(),
+        "email": "ana@synastr.app",
+        "password_hash": password_hash,
+        "birth_date": datetime(1990, 2, 1),
+        "birth_time": "08:30:00",
+        "birth_place": "Madrid, España",
+        "latitude": 40.4, "longitude": -3.7, "timezone": "Europe/Madrid",
+        "natal_chart": {
+            "positions": [_position(rng, name, "sign_icon") for name in PLANET_MAPPING],
+            "houses": [_position(rng, f"House {n}", "sign_icon") for n in range(1, 13)],
+        },
+        "chart_status": "ready",
+        "plan": "free",
+        "photos": [{"url": f"https://cdn.synastr.test/p/{n}.webp", "sign": None} for n in range(6)],
+        "gender": "Female",
+        "looking_for": "Friendship",
+        "sexual_orientation": ["Bisexual"],
+        "user_info": {"height": 170, "languages": ["es", "en"], "pets": "Cat"},
+        "created_at": datetime(2024, 1, 1), "updated_at": datetime(2024, 1, 1),
+    }
+
+
+def _per_call_us(fn, iterations: int) -> float:
+    started = time.perf_counter()
+    for _ in range(iterations):
+        fn()
+    return (time.perf_counter() - started) / iterations * 1e6
+
+
+def main(args) -> None:
+    doc = _document(pwd_context.hash("secret"))
+    email = doc["email"]
+
+    def full_model():
+        return UserModel(**doc).password_hash
+
+    def constructed():
+        return Credentials.model_construct(email=email, password_hash=doc["password_hash"]).password_hash
+
+    def validated():
+        return Credentials.from_document(doc).password_hash
+
+    rows = [
+        ("UserModel(**doc)", full_model),
+        ("Credentials.from_document", validated),
+        ("Credentials.model_construct", constructed),
+        ("email_adapter", lambda: email_adapter.validate_python(email)),
+        ("TypeAdapter(EmailStr) nuevo", lambda: TypeAdapter(EmailStr).validate_python(email)),
+    ]
+    for label, fn in rows:
+        print(f"{label:<30}{_per_call_us(fn, args.iterations):9.2f} µs")
+    bcrypt_ms = _per_call_us(lambda: Credentials.from_document(doc).verify_password("secret"), 3) / 1000
+    print(f"{'bcrypt (referencia)':<30}{bcrypt_ms:9.2f} ms  (en un hilo, fuera del bucle de eventos)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--iterations", type=int, default=20_000)
+    main(parser.parse_args())
@@ -0,0 +1,75 @@
+"""
+Latencia de una edición de perfil: `update_one` + `find_one` (dos viajes) frente a
+`find_one_and_update` con `ReturnDocument.AFTER` y proyección (uno).
+
+    python -m benchmarks.profile_updates --iterations 2000 --concurrency 20
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import time
+from datetime import datetime, timezone
+
+from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import ReturnDocument
+
+from app.api.resolvers.user_resolvers import USER_PROJECTION
+
+
+async def _two_round_trips(users, user_id, value):
+    await users.update_one({"_id": user_id}, {"$set": {"user_info.height": value, "updated_at": datetime.now(timezone.utc)}})
+    return await users.find_one({"_id": user_id})
+
+
+async def _one_round_trip(users, user_id, value):
+    return await users.find_one_and_update(
+        {"_id": user_id},
+        {"$set": {"user_info.height": value, "updated_at": datetime.now(timezone.utc)}},
+        projection=USER_PROJECTION,
+        return_document=ReturnDocument.AFTER,
+    )
+
+
+async def _measure(update, users, user_ids, iterations: int, concurrency: int) -> list[float]:
+    latencies: list[float] = []
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one(i: int):
+        async with semaphore:
+            started = time.perf_counter()
+            await update(users, user_ids[i % len(user_ids)], 150 + i % 50)
+            latencies.append((time.perf_counter() - started) * 1000)
+
+    await asyncio.gather(*(one(i) for i in range(iterations)))
+    return sorted(latencies)
+
+
+async def main(iterations: int, concurrency: int) -> None:
+    client = AsyncIOMotorClient(os.getenv("MONGODB_URI", "mongodb://localhost:27017"))
+    users = client["synastr_bench"]["profile_updates"]
+    await users.drop()
+    result = await users.insert_many([
+        {"email": f"bench-{i}@synastr.test", "password_hash": "x" * 60, "user_info": {}, "natal_chart": {"positions": [], "houses": []}}
+        for i in range(1000)
+    ])
+
+    print(f"{'variante':<22} {'p50 ms':>8} {'p95 ms':>8} {'ops/s':>8}")
+    for name, update in [("update_one+find_one", _two_round_trips), ("find_one_and_update", _one_round_trip)]:
+        started = time.perf_counter()
+        latencies = await _measure(update, users, result.inserted_ids, iterations, concurrency)
+        elapsed = time.perf_counter() - started
+        p95 = latencies[int(len(latencies) * 0.95) - 1]
+        print(f"{name:<22} {statistics.median(latencies):>8.2f} {p95:>8.2f} {iterations / elapsed:>8.0f}")
+
+    await users.drop()
+    client.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--iterations", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=20)
+    args = parser.parse_args()
+    asyncio.run(main(args.iterations, args.concurrency))
@@ -0,0 +1,54 @@
+"""
+Hora local -> UTC de muchos nacimientos: `zoneinfo` fila a fila (como hacía
+`julian_day_utc` antes) frente a la tabla de transiciones vectorizada de
+`app.services.timezone_table`. No necesita base de datos.
+
+    python -m benchmarks.timezone_table --rows 1000000 --zone America/Sao_Paulo
+"""
+
+import argparse
+import time
+from datetime import datetime, timezone
+from zoneinfo import ZoneInfo
+
+import numpy as np
+
+from app.services.timezone_table import local_to_utc, transition_table
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--zone", default="America/Sao_Paulo")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    local = np.datetime64("1900-01-01") + rng.integers(0, 120 * 365 * 86400, args.rows).astype("timedelta64[s]")
+
+    started = time.perf_counter()
+    transition_table(args.zone)
+    build = time.perf_counter() - started
+
+    started = time.perf_counter()
+    vectorized = local_to_utc(local, args.zone)
+    table_time = time.perf_counter() - started
+
+    zone = ZoneInfo(args.zone)
+    started = time.perf_counter()
+    per_row = [
+        value.replace(tzinfo=zone).astimezone(timezone.utc).replace(tzinfo=None)
+        for value in local.astype(datetime)
+    ]
+    zoneinfo_time = time.perf_counter() - started
+
+    mismatches = int(np.count_nonzero(vectorized != np.array(per_row, dtype="datetime64[s]")))
+    print(f"{args.rows} filas en {args.zone}")
+    print(f"  construir la tabla   {build:8.3f} s (una vez por zona y proceso)")
+    print(f"  tabla vectorizada    {table_time:8.3f} s")
+    print(f"  zoneinfo fila a fila {zoneinfo_time:8.3f} s")
+    print(f"  diferencias          {mismatches}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+"""
+Configuración de producción: gunicorn gestiona N workers de Uvicorn.
+
+    gunicorn -c gunicorn.conf.py app.main:app
+
+Los datos inmutables (efemérides, tablas de zonas horarias) se precargan en el
+maestro antes del fork y se comparten copy-on-write; cada worker crea sus propios
+clientes MongoDB/Redis en el `lifespan`. `kill -HUP <pid del maestro>` reinicia los
+workers de forma ordenada sin cortar peticiones en curso.
+
+Variables de entorno:
+
+- `WEB_CONCURRENCY`: número de workers (por defecto, uno por núcleo disponible)
+- `PORT` (por defecto `8000`)
+- `GUNICORN_TIMEOUT`, `GUNICORN_GRACEFUL_TIMEOUT`, `GUNICORN_KEEPALIVE`
+- `GUNICORN_MAX_REQUESTS`, `GUNICORN_MAX_REQUESTS_JITTER`: reciclado de workers
+"""
+
+import os
+
+
+def _available_cores() -> int:
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:  # pragma: no cover - plataformas sin sched_getaffinity
+        return os.cpu_count() or 1
+
+
+bind = f"0.0.0.0:{os.getenv('PORT', '8000')}"
+# swisseph y bcrypt son CPU-bound: un worker por núcleo
+workers = int(os.getenv("WEB_CONCURRENCY", _available_cores()))
+worker_class = "uvicorn.workers.UvicornWorker"
+preload_app = True
+
+timeout = int(os.getenv("GUNICORN_TIMEOUT", "60"))
+graceful_timeout = int(os.getenv("GUNICORN_GRACEFUL_TIMEOUT", "30"))
+keepalive = int(os.getenv("GUNICORN_KEEPALIVE", "5"))
+max_requests = int(os.getenv("GUNICORN_MAX_REQUESTS", "10000"))
+max_requests_jitter = int(os.getenv("GUNICORN_MAX_REQUESTS_JITTER", "1000"))
+
+accesslog = "-"
+errorlog = "-"
+
+
+def on_starting(server):
+    from app.preload import warm
+
+    warm()
+
+
+def post_fork(server, worker):
+    from app.preload import after_fork
+
+    after_fork()